@@ -271,6 +271,34 @@ class c3d(object):
             #data = list(reader)
         return data
     
+    def MontaTopologia(self, vPipe):
+        """Monta o indice de topologia da rede em uma unica passada pelos tubos.
+
+        :returns: dicionarios {PV: [QuantTubos, DiamMax, Prof]} dos tubos que saem
+            (Prof = PRFM) e dos tubos que chegam (Prof = PRFJ) em cada PV.
+            Com varios tubos, Prof e a do ultimo tubo lido, como na busca por expressao.
+        :rtype: (dict, dict)
+        """
+        campos = ['PVM', 'PVJ', 'DIAMETER', 'PRFM', 'PRFJ']
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(campos, vPipe.fields())
+        saindo = {}
+        chegando = {}
+        for pipe in vPipe.getFeatures(request):
+            diam = pipe['DIAMETER']
+            for pvCampo, profCampo, topologia in (('PVM', 'PRFM', saindo), ('PVJ', 'PRFJ', chegando)):
+                pv = pipe[pvCampo]
+                if pv is None or pv == NULL:
+                    continue
+                dados = topologia.get(str(pv))
+                if dados is None:
+                    topologia[str(pv)] = [1, max(diam, 0), pipe[profCampo]]
+                else:
+                    dados[0] += 1
+                    dados[1] = max(diam, dados[1])
+                    dados[2] = pipe[profCampo]
+        return saindo, chegando
+
     def Calc_PVs(self, vPipe, vNode): # A profundidade do PV é igual ao PRFM do tubo que sai
         vNode.startEditing()
         
@@ -283,56 +311,50 @@ class c3d(object):
                     #QgsField('DIAMSAI',QVariant.Double,'Real',10,1)]
                     
         self.CheckFields(vNode, c3D_fields) #verifica os campos
+        idxSump = vNode.fields().indexFromName('Sump')
+        idxProf = vNode.fields().indexFromName('PROF')
+        idxTipo = vNode.fields().indexFromName('TIPO')
         
-        #Pega a lista dos PV's de onde partem tubulações para não classificar o PV exutorio
-        idx = vPipe.fields().indexOf('PVM')
-        pvmLst = vPipe.uniqueValues(idx)       
+        #Tubos que saem/chegam em cada PV, em uma unica leitura da camada de tubos
+        #(os PV's de onde partem tubulações são as chaves de 'saindo', o PV exutorio não)
+        saindo, chegando = self.MontaTopologia(vPipe)
         
         #Preenche o campo 'Sump' com zero, 
         #'PROF' com valor 'PRFM' do pipe cujo PVM é igual ao PV
         # e 'TIPO' com a funcao criada para selecionar
-        for pv in vNode.getFeatures():
-            dcid = pv['DC_ID']
-            
-            expression = 'PVM=\'{}\''.format(dcid)            
-            request = QgsFeatureRequest().setFilterExpression(expression)
-            matchesSaindo = diamSaindo =  prof = 0
-            for pipe in vPipe.getFeatures(request):
-                diamSaindo = max(pipe['DIAMETER'],diamSaindo)
-                prof = pipe['PRFM']
-                matchesSaindo += 1
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(['DC_ID'], vNode.fields())
+        alteracoes = {}
+        for pv in vNode.getFeatures(request):
+            dcid = str(pv['DC_ID'])
             
-            expression = 'PVJ=\'{}\''.format(dcid)            
-            request = QgsFeatureRequest().setFilterExpression(expression)
-            matchesCheg = diamCheg = 0
-            for pipe in vPipe.getFeatures(request):
-                diamCheg = max(pipe['DIAMETER'],diamCheg)
-                matchesCheg += 1
+            matchesSaindo, diamSaindo, prof = saindo.get(dcid, (0, 0, 0))
+            matchesCheg, diamCheg, profJus = chegando.get(dcid, (0, 0, None))
             
             QuantTubos = matchesCheg+matchesSaindo
-            pv['Sump']= 0
-            pv['PROF']= prof
+            valores = {idxSump: 0, idxProf: prof}
             
             #verifica se não é um PV exutorio
-            if dcid in pvmLst:
+            if matchesSaindo:
                 calcTipo = self.selectPV(self.PVsTipos, prof, QuantTubos, diamCheg, diamSaindo)
-                pv['TIPO']= 'PV TIPO {}'.format(calcTipo)
-            else:
-                expression = 'PVJ=\'{}\''.format(dcid)            
-                request = QgsFeatureRequest().setFilterExpression(expression)                
-                for pipe in vPipe.getFeatures(request):                    
-                    prof = pipe['PRFJ']
-                    pv['PROF']= prof
-                    calcTipo = self.selectPV(self.PVsTipos, prof, QuantTubos, diamCheg, diamSaindo)
-                    pv['TIPO']= 'PV TIPO {}'.format(calcTipo)
-            #fields for checking
-            #pv['TUBOS']= QuantTubos
-            #pv['DIAMCHEG']= diamCheg
-            #pv['DIAMSAI']= diamSaindo
-            vNode.updateFeature(pv)
-            valor=int(self.progress.value()+1)
-            self.progress.setValue(valor)
-            QApplication.processEvents()
+                valores[idxTipo] = 'PV TIPO {}'.format(calcTipo)
+            elif matchesCheg:
+                prof = profJus
+                valores[idxProf] = prof
+                calcTipo = self.selectPV(self.PVsTipos, prof, QuantTubos, diamCheg, diamSaindo)
+                valores[idxTipo] = 'PV TIPO {}'.format(calcTipo)
+            alteracoes[pv.id()] = valores
+        
+        #Grava todas as alterações em um unico comando de edição
+        vNode.beginEditCommand('C3D: Calcula PVs')
+        passo = max(1, len(alteracoes) // 100)
+        for i, (fid, valores) in enumerate(alteracoes.items(), 1):
+            vNode.changeAttributeValues(fid, valores)
+            if i % passo == 0:
+                self.progress.setValue(int(self.progress.value() + passo))
+                QApplication.processEvents()
+        vNode.endEditCommand()
+        self.progress.setValue(int(self.progress.value() + len(alteracoes) % passo))
         return
     
     def CheckFields(self, vLayer, chkFields):
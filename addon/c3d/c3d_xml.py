@@ -120,33 +120,51 @@ def reloadTreeWidget(xmlPath):
         if os.path.isfile(xmlPath):     
             tw.clear()                
             QApplication.setOverrideCursor(Qt.WaitCursor)
-            tree = ET.parse(xmlPath)
-            root = tree.getroot()                
-            for tipo in root:#[4:]:
-                tag = tipo.tag[nsLen:]
-                print(tag)
-                if tag in c3d_elemTypes:
-                    twItem = QTreeWidgetItem([tag])            
-                    tw.addTopLevelItem(twItem)
-                    pai = tw.topLevelItem(tw.topLevelItemCount()-1)                    
-                    for elem in tipo:
-                        try:
-                            nome = elem.attrib['name']
-                        except:
-                            nome ='no name'
+            #Leitura em fluxo: os elementos são descartados assim que contados,
+            #os itens guardam apenas uma referencia (XMLElemRef) ao elemento
+            pai = None
+            ref = None
+            depth = 0
+            ordem = {}
+            abertos = [] #elementos abertos, para soltar cada elemento do pai ao terminar
+            for event, elem in ET.iterparse(xmlPath, events=('start','end')):
+                if event == 'start':
+                    abertos.append(elem)
+                    depth += 1
+                    if depth == 2:
+                        tag = elem.tag[nsLen:]
+                        pai = None
+                        if tag in c3d_elemTypes:
+                            print(tag)
+                            twItem = QTreeWidgetItem([tag])            
+                            tw.addTopLevelItem(twItem)
+                            pai = tw.topLevelItem(tw.topLevelItemCount()-1)
+                            nodeTag = ns+c3d_elemTypes[tag][0]
+                    elif depth == 3 and pai is not None:
+                        ordem[tag] = ordem.get(tag, -1) + 1
+                        ref = XMLElemRef(xmlPath, tag, ordem[tag], dict(elem.attrib))
+                    elif depth > 3 and ref is not None and elem.tag == nodeTag:
+                        ref.count += 1
+                else:
+                    if depth == 3 and ref is not None:
+                        nome = ref.get('name', 'no name')
                         nroFilhos = pai.childCount()                
                         QTreeWidgetItem(pai)
                         twItem = pai.child(nroFilhos)
-                        nodeName = c3d_elemTypes[tag][0]
-                        nroSubItens = '{}'.format(countNodes(elem,nodeName)) #str(len(list(elem)))
-                        twItem.setData(0,Qt.UserRole,elem)
+                        twItem.setData(0,Qt.UserRole,ref)
                         twItem.setText(0,nome)
-                        twItem.setText(1,nroSubItens)
+                        twItem.setText(1,'{}'.format(ref.count))
                         print(' |-->'+nome)
+                        ref = None
+                    elem.clear()
+                    abertos.pop()
+                    if abertos:
+                        abertos[-1].remove(elem)
+                    depth -= 1
 
-                tw.expandAll()
-                tw.resizeColumnToContents(0) #resize first Column
-                tw.header().resizeSection(0, int(tw.columnWidth(0)*1.2)) #increase first column size in 20%
+            tw.expandAll()
+            tw.resizeColumnToContents(0) #resize first Column
+            tw.header().resizeSection(0, int(tw.columnWidth(0)*1.2)) #increase first column size in 20%
     finally:
         QApplication.restoreOverrideCursor()
         
@@ -160,11 +178,59 @@ tw.itemDoubleClicked.connect(twItemChoosed)
 
 
 
-def countNodes(rootNode, subNode):
-    i=0
-    for child in rootNode.findall(".//{0}{1}".format(ns,subNode)):
-        i+=1
-    return i
+class XMLElemRef(object):
+    """Referencia a um elemento de segundo nivel do LandXML (uma Surface, PipeNetwork...)
+    
+    Guarda apenas o arquivo, o tipo, a ordem e os atributos do elemento; os
+    subelementos são lidos em fluxo com iterSubElements quando necessario.
+    """
+    def __init__(self, xmlPath, tipo, ordem, attrib):
+        self.xmlPath = xmlPath
+        self.tipo = tipo
+        self.ordem = ordem
+        self.attrib = attrib
+        self.count = 0
+    
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+def iterSubElements(ref, subNode):
+    """Percorre em fluxo (iterparse) os subelementos 'subNode' do elemento referenciado.
+    
+    Cada elemento é liberado e solto do pai depois de usado, então arquivos
+    grandes não ficam inteiros na memoria.
+    """
+    alvo = ns+subNode
+    depth = 0
+    tipo = None
+    ordem = -1
+    dentro = False
+    noAlvo = 0
+    abertos = [] #elementos abertos (o ultimo é o pai do elemento atual)
+    for event, elem in ET.iterparse(ref.xmlPath, events=('start','end')):
+        if event == 'start':
+            abertos.append(elem)
+            depth += 1
+            if depth == 2:
+                tipo = elem.tag[nsLen:]
+            elif depth == 3 and tipo == ref.tipo:
+                ordem += 1
+                dentro = ordem == ref.ordem
+            if dentro and elem.tag == alvo:
+                noAlvo += 1
+        else:
+            if dentro and elem.tag == alvo:
+                noAlvo -= 1
+                yield elem
+            if depth == 3 and dentro:
+                return
+            abertos.pop()
+            if noAlvo == 0:
+                #dentro de um alvo os filhos ficam, o alvo ainda vai ser lido
+                elem.clear()
+                if abertos:
+                    abertos[-1].remove(elem)
+            depth -= 1
 
 def removeDesc(texto):
     #remove string (description) from just before last open parenthesis '(' to end if exists
@@ -174,6 +240,74 @@ def removeDesc(texto):
     else:
         return texto
 
+class GravaFeicoes(object):
+    """Grava as feições importadas em uma camada, em lotes.
+    
+    No modo de atualização as feições existentes são localizadas por um indice
+    {DC_ID: [ids]} montado em uma unica leitura da camada e alteradas no buffer
+    de edição (um unico comando de edição); as novas são adicionadas em lotes
+    com dataProvider().addFeatures. Com DC_ID duplicado a primeira feição é
+    atualizada e as demais apagadas.
+    """
+    LOTE = 1000
+    
+    def __init__(self, vLayer, atualiza, notFound, dupFound):
+        self.vLayer = vLayer
+        self.atualiza = atualiza
+        self.notFound = notFound
+        self.dupFound = dupFound
+        self.fields = vLayer.fields()
+        self.novas = []
+        self.apagar = []
+        self.indice = {}
+        if atualiza:
+            request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+            request.setSubsetOfAttributes(['DC_ID'], self.fields)
+            for feat in vLayer.getFeatures(request):
+                self.indice.setdefault(str(feat['DC_ID']), []).append(feat.id())
+            vLayer.beginEditCommand('C3D: Atualiza a partir do XML')
+        self.aberto = atualiza
+    
+    def grava(self, name, geom, valores):
+        fids = self.indice.get(name) if self.atualiza else None
+        if fids:
+            if len(fids) > 1:
+                self.apagar.extend(fids[1:])
+                self.dupFound.append(name)
+            fid = fids[0]
+            self.vLayer.changeGeometry(fid, geom)
+            self.vLayer.changeAttributeValues(fid, {self.fields.indexFromName(campo): valor
+                                                    for campo, valor in valores.items()
+                                                    if self.fields.indexFromName(campo) > -1})
+        else:
+            if self.atualiza:
+                self.notFound.append(name)
+            feat = QgsFeature(self.fields)
+            feat.setGeometry(geom)
+            for campo, valor in valores.items():
+                if self.fields.indexFromName(campo) > -1:
+                    feat[campo] = valor
+            self.novas.append(feat)
+            if len(self.novas) >= self.LOTE:
+                self.vLayer.dataProvider().addFeatures(self.novas)
+                self.novas = []
+    
+    def finaliza(self):
+        if self.novas:
+            self.vLayer.dataProvider().addFeatures(self.novas)
+            self.novas = []
+        if self.atualiza:
+            if self.apagar:
+                self.vLayer.deleteFeatures(self.apagar)
+            self.vLayer.endEditCommand()
+            self.aberto = False
+    
+    def cancela(self):
+        # Descarta o comando de edição aberto no modo de atualização (erro na importação)
+        if self.aberto:
+            self.vLayer.destroyEditCommand()
+            self.aberto = False
+
 def XML_import_PipeNetwork(rootNode):
     proj = QgsProject.instance()
     nome = os.path.basename(dlg.mQgsFileWidget.filePath())        
@@ -229,9 +363,9 @@ def XML_import_PipeNetwork(rootNode):
         lineLayer.updateFields()
 
     if ptoLayer:
+        gravando = None
         try:
             QApplication.setOverrideCursor(Qt.WaitCursor)
-            i=0
             if UpdJunct:
                 ptoLayer.startEditing()
             #loop for structs
@@ -239,44 +373,14 @@ def XML_import_PipeNetwork(rootNode):
             notFoundPipes=[]
             dupFoundNodes=[]
             dupFoundPipes=[]
-            for child in rootNode.findall(".//{0}{1}".format(ns,c3d_elemTypes['PipeNetworks'][0])): #network structs
-                i+=1
+            gravaPtos = gravando = GravaFeicoes(ptoLayer, UpdJunct, notFoundNodes, dupFoundNodes)
+            for child in iterSubElements(rootNode, c3d_elemTypes['PipeNetworks'][0]): #network structs
                 name = removeDesc(child.get('name'))
                 desc = child.get('desc')
                 elevRim = float(child.get('elevRim')) or 0
                 y,x = list(map(float,child.find(ns+'Center').text.split()))
-                if UpdJunct:
-                    request = QgsFeatureRequest().setFilterExpression( '"DC_ID" = \'{}\''.format(name) )
-                    it = ptoLayer.getFeatures( request )
-                    LstIT = list(it)
-                    itCount=len(LstIT)
-                    if itCount==0:
-                        notFoundNodes.append(name)
-                        feat = QgsFeature(ptoLayer.fields())
-                        ptoLayer.dataProvider().addFeature(feat) #hoje
-                    elif itCount>1:
-                        listOfIds=[]
-                        for i in range(itCount-2):
-                            feat = LstIT[i]
-                            listOfIds.append(feat.id())
-                        ptoLayer.deleteFeatures( listOfIds )
-                        dupFoundNodes.append(name)
-                        feat = LstIT[0]                      
-                    else:
-                        feat = LstIT[0] #get the first and unique feature
-                else:
-                    feat = QgsFeature(ptoLayer.fields())
-                feat.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x,y)))
-                #feat.setAttributes([name, desc, elevRim])
-                feat['DC_ID'] = name
-                feat['TIPO'] = desc
-                feat['COTA_TN'] = elevRim
-                
-                if UpdJunct:
-                    ptoLayer.updateFeature(feat)
-                else:
-                    ptoLayer.dataProvider().addFeature(feat)
-                
+                gravaPtos.grava(name, QgsGeometry.fromPointXY(QgsPointXY(x,y)),
+                                {'DC_ID': name, 'TIPO': desc, 'COTA_TN': elevRim})
                 
                 #loop for get pipes invert elevation from structs
                 pipesInver = {}
@@ -286,16 +390,15 @@ def XML_import_PipeNetwork(rootNode):
                     pipesInver[refPipe]=elev
                 
                 ptos[name]=[[x,y],pipesInver]
+            gravaPtos.finaliza()
             
             ptoLayer.updateExtents() #hoje
             
             #loop for pipes
-            for child in rootNode.findall(".//{0}{1}".format(ns,c3d_elemTypes['PipeNetworks'][1])): #network pipes
-                i+=1
-                if UpdPipe:
-                    lineLayer.startEditing()
-                #for subchild in child.findall(".//*"):
-                #    print('subchild=',subchild)#.find('Center'))
+            if UpdPipe:
+                lineLayer.startEditing()
+            gravaLinhas = gravando = GravaFeicoes(lineLayer, UpdPipe, notFoundPipes, dupFoundPipes)
+            for child in iterSubElements(rootNode, c3d_elemTypes['PipeNetworks'][1]): #network pipes
                 name = removeDesc(child.get('name'))
                 desc = child.get('desc')
                 refStart = removeDesc(child.get('refStart'))
@@ -307,47 +410,14 @@ def XML_import_PipeNetwork(rootNode):
                 pto1 = QgsPointXY(ptos[refStart][0][0],ptos[refStart][0][1])
                 pto2 = QgsPointXY(ptos[refEnd][0][0],ptos[refEnd][0][1])
                 
-                if UpdPipe:                
-                    request = QgsFeatureRequest().setFilterExpression( '"DC_ID" = \'{}\''.format(name) )
-                    it = lineLayer.getFeatures( request )
-                    LstIT = list(it)
-                    itCount=len(LstIT)
-                    if itCount==0:
-                        notFoundPipes.append(name)
-                        feat = QgsFeature(lineLayer.fields())
-                        lineLayer.dataProvider().addFeature(feat) #hoje
-                    elif itCount>1:
-                        listOfIds=[]
-                        for i in range(itCount-2):
-                            feat = LstIT[i]
-                            listOfIds.append(feat.id())
-                        lineLayer.deleteFeatures( listOfIds )
-                        dupFoundPipes.append(name)
-                        feat = LstIT[0]                      
-                    else:
-                        feat = LstIT[0] #get the first and unique feature                
-                else:
-                    feat = QgsFeature(lineLayer.fields())
-                    
-                feat.setGeometry(QgsGeometry.fromPolylineXY([pto1,pto2]))
-                #feat.setAttributes([name, desc, slope, diameter, upElev, downElev])
-                feat['DC_ID']=name
-                feat['Descript']=desc
-                feat['DECL']=slope
-                feat['DIAMETER']=diameter
-                feat['CCM']=upElev
-                feat['CCJ']=downElev
-                feat['PVM']=refStart
-                feat['PVJ']=refEnd
-                
                 colTre = re.findall(r"\d+", name)
-                feat['Coletor']=int(colTre[0]) if len(colTre)>=1 else 0                
-                feat['Trecho']=int(colTre[1]) if len(colTre)>=2 else 0
-                
-                if UpdPipe:
-                    lineLayer.updateFeature(feat)
-                else:
-                    lineLayer.dataProvider().addFeature(feat) 
+                gravaLinhas.grava(name, QgsGeometry.fromPolylineXY([pto1,pto2]),
+                                  {'DC_ID': name, 'Descript': desc, 'DECL': slope,
+                                   'DIAMETER': diameter, 'CCM': upElev, 'CCJ': downElev,
+                                   'PVM': refStart, 'PVJ': refEnd,
+                                   'Coletor': int(colTre[0]) if len(colTre)>=1 else 0,
+                                   'Trecho': int(colTre[1]) if len(colTre)>=2 else 0})
+            gravaLinhas.finaliza()
                         
             lineLayer.updateExtents()
             if not UpdPipe:
@@ -374,6 +444,10 @@ def XML_import_PipeNetwork(rootNode):
                 iface.messageBar().pushMessage("C3D: ", 'Network imported: {}'.format(NomeRede), level=Qgis.Info, duration=5)
 
             dlg.close()
+        except Exception:
+            if gravando:
+                gravando.cancela()
+            raise
         finally:
             QApplication.restoreOverrideCursor()
     else:
@@ -396,7 +470,7 @@ def XML_import_Mesh(rootNode):
                 outFile.write('MESH2D\n') #Header
                 i=0
                 #loop for triangule faces
-                for child in rootNode.findall(".//{}F".format(ns)): #surface faces
+                for child in iterSubElements(rootNode, 'F'): #surface faces
                     i+=1
                     #id = child.get('n')
                     vertIds = child.text.split()
@@ -406,7 +480,7 @@ def XML_import_Mesh(rootNode):
                     #print(linha)
                 
                 #loop for triangule vertices
-                for child in rootNode.findall(".//{}P".format(ns)): #surface vertices
+                for child in iterSubElements(rootNode, 'P'): #surface vertices
                     id = child.get('id')
                     vertIds = child.text.split()
                     linha = 'ND    {}    {}    {}    {}'.format(id, vertIds[1],vertIds[0],vertIds[2])
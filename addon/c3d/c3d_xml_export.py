@@ -30,18 +30,34 @@ from qgis.utils import *
 import os.path
 from qgis.gui import QgsMessageBar, QgsMapLayerComboBox, QgsVertexMarker, QgsMapToolIdentify
 import math
+import shutil
+import tempfile
 import xml.etree.ElementTree as ET
-import xml.dom.minidom
+from xml.sax.saxutils import escape
 
 from ...QEsg_00Model import *
 from ...QEsg_00Common import *
 
+def xmlAttr(valor):
+    """Escapa um valor para uso como atributo XML (entre aspas duplas)"""
+    return escape(str(valor), {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#09;'})
+
+
 class c3d_xml_export(object):
     common=QEsg_00Common()
     SETTINGS = common.SETTINGS
     ns = '{http://www.landxml.org/schema/LandXML-1.2}'
     ET.register_namespace('',ns[1:-1])
-    nsLen = len(ns)    
+    nsLen = len(ns)
+    PRETTY_PRINT = True #Grava o XML indentado (False = arquivo mais compacto)
+    
+    #Subelementos constantes, serializados uma unica vez
+    FLOW_XML = ET.tostring(ET.fromstring('<PipeFlow areaCatchment="0." flowIn="0." hglDown="0." hglUp="0." runoffCoeff="0." timeInlet="0."/>'), encoding='unicode')
+    CIRCSTRUCT_XML = ET.tostring(ET.fromstring('<CircStruct diameter="1050." material="Reinforced Concrete" thickness="0.065"></CircStruct>'), encoding='unicode')
+    SUMP_XML = ET.tostring(ET.fromstring('<Feature code="StructureFeature" source="Autodesk Civil 3D">'+
+                                         '<Property label="controlSumpBy" value="depth"></Property>'+
+                                         #'<Property label="SumpDepth" value="0"></Property>'+
+                                         '</Feature>'), encoding='unicode')
     
     def XML_export(self):
         layer = self.common.PegaQEsgLayer('PIPES')
@@ -50,94 +66,104 @@ class c3d_xml_export(object):
         outXML, __ = QFileDialog.getSaveFileName(caption=self.tr(u'Salvar o arquivo como:'), filter="Autodesk Civil 3d XML (*.xml *.XML)")
         #outXML = os.path.join(basePath, 'template/c3d_pipenetwork_out.xml')
         if layer and structLayer and outXML:
-            nsLen = self.nsLen
-            ns = self.ns            
-            template = os.path.join(basePath, 'template/c3d_pipenetwork.xml')                        
-            tree = ET.parse(template)
-            root = tree.getroot()
-            pipeNt = root.find('.//{}PipeNetwork'.format(ns))
-            pipeNt.set('name',layer.name())
-            pipesRoot = root.find('.//{}Pipes'.format(ns))
-            structsRoot = root.find('.//{}Structs'.format(ns))
-            #structET = root.find('.//{}Struct'.format(ns))
-            #structsRoot.append(structET)
-
+            template = os.path.join(basePath, 'template/c3d_pipenetwork.xml')
+            self.writeLandXML(outXML, template, layer, structLayer, self.PRETTY_PRINT)
+            
+            rawPath = r'{}'.format(outXML)
+            folderLink='<a href=\"file:///{}\">{}</a>'.format(rawPath, rawPath) #.encode('unicode_escape')) #'LandXML created!'            
+            iface.messageBar().pushMessage('QEsg', folderLink, level=Qgis.Info, duration=20)
+    
+    def templateParts(self, template, networkName):
+        """Divide o template em [inicio, meio, fim] nos pontos de inserção de Structs e Pipes"""
+        ns = self.ns
+        root = ET.parse(template).getroot()
+        root.find('.//{}PipeNetwork'.format(ns)).set('name', networkName)
+        marca = '\x01{}\x01'
+        root.find('.//{}Structs'.format(ns)).text = marca.format('STRUCTS')
+        root.find('.//{}Pipes'.format(ns)).text = marca.format('PIPES')
+        texto = ET.tostring(root, encoding='unicode')
+        inicio, resto = texto.split(marca.format('STRUCTS'))
+        meio, fim = resto.split(marca.format('PIPES'))
+        return inicio, meio, fim
+    
+    def writeLandXML(self, outXML, template, layer, structLayer, pretty=True):
+        """Grava o LandXML em fluxo, sem montar a arvore completa em memoria.
+        
+        Os tubos são lidos uma unica vez: o XML de cada <Pipe> vai para um arquivo
+        temporario e as cotas de entrada/saida são indexadas por PV. Depois os
+        <Struct> são gravados direto no arquivo final e os tubos copiados em seguida
+        (no template, Structs vem antes de Pipes).
+        """
+        nl = '\n' if pretty else ''
+        ind = '\t' if pretty else ''
+        pipeInd = nl + ind*4
+        childInd = nl + ind*5
+        
+        inicio, meio, fim = self.templateParts(template, layer.name())
+        temDescript = layer.fields().indexFromName('Descript')>-1
+        temProf = structLayer.fields().indexFromName('PROF')>-1
+        temTipo = structLayer.fields().indexFromName('TIPO')>-1
+        
+        #Indice de topologia {PV: [(DC_ID do tubo, cota)]}
+        pipesIN = {}
+        pipesOUT = {}
+        
+        pipeFields = ['DC_ID','PVM','PVJ','CCM','CCJ','DECL','LENGTH','DIAMETER'] + (['Descript'] if temDescript else [])
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(pipeFields, layer.fields())
+        
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as pipesTmp:
             #Create pipes
-            pipesList = [] #[[DC_ID,PVM,PVJ,CCM,CCJ]] list with network topology
-            for feat in layer.getFeatures():                
-                pipeET = ET.Element('Pipe')
+            for feat in layer.getFeatures(request):
+                descr = feat['Descript'] if temDescript else ''
+                pipesTmp.write('{}<Pipe slope="{:f}" refStart="{}" refEnd="{}" length="{:f}" desc="{}" name="{}">'.format(
+                    pipeInd, feat['DECL'], xmlAttr(feat['PVM']), xmlAttr(feat['PVJ']),
+                    feat['LENGTH'], xmlAttr(descr), xmlAttr(feat['DC_ID'])))
+                pipesTmp.write('{}<CircPipe diameter="{:f}" material="PVC" thickness="0.005" />'.format(childInd, feat['DIAMETER']))
+                pipesTmp.write(childInd + self.FLOW_XML)
+                pipesTmp.write(pipeInd + '</Pipe>')
                 
-                pipeET.set('slope','{:f}'.format(feat['DECL']))
-                pipeET.set('refStart',feat['PVM'])
-                pipeET.set('refEnd',feat['PVJ'])
-                pipeET.set('length','{:f}'.format(feat['LENGTH']))
-                descr = feat['Descript'] if layer.fields().indexFromName('Descript')>-1 else ''
-                pipeET.set('desc',descr)
-                pipeET.set('name',feat['DC_ID'])
-                circAtt = ET.fromstring('<CircPipe diameter="{:f}" material="PVC" thickness="0.005"/>'.format(feat['DIAMETER']))
-                FlowAtt = ET.fromstring('<PipeFlow areaCatchment="0." flowIn="0." hglDown="0." hglUp="0." runoffCoeff="0." timeInlet="0."/>')
-                
-                pipeET.append(circAtt)
-                pipeET.append(FlowAtt)                
-                
-                pipesRoot.append(pipeET)
-                pipesList.append([feat['DC_ID'],feat['PVM'],feat['PVJ'],feat['CCM'],feat['CCJ']])
+                pvj = feat['PVJ']
+                if pvj is not None and pvj != NULL:
+                    pipesIN.setdefault(pvj, []).append((feat['DC_ID'], feat['CCJ']))
+                pvm = feat['PVM']
+                if pvm is not None and pvm != NULL:
+                    pipesOUT.setdefault(pvm, []).append((feat['DC_ID'], feat['CCM']))
             
-            #Create Structs
-            for feat in structLayer.getFeatures():
-                structET = ET.Element('Struct')
-                structET.set('elevRim','{:f}'.format(feat['COTA_TN']))
-                if structLayer.fields().indexFromName('PROF')>-1:
-                    structET.set('elevSump','{:f}'.format(feat['COTA_TN']-feat['PROF']))
-                
-                descr = feat['TIPO'] if structLayer.fields().indexFromName('TIPO')>-1 else ''
-                structET.set('desc',descr)
-                structET.set('name',feat['DC_ID'])
+            structFields = ['DC_ID','COTA_TN'] + (['PROF'] if temProf else []) + (['TIPO'] if temTipo else [])
+            request = QgsFeatureRequest().setSubsetOfAttributes(structFields, structLayer.fields())
+            
+            with open(outXML, 'w', encoding='utf-8') as out:
+                out.write('<?xml version="1.0" encoding="utf-8"?>' + nl)
+                out.write(inicio)
                 
-                geom = feat.geometry()
-                if geom.isMultipart():
-                    pto = geom.asMultiPoint()[0]
-                else:
-                    pto = geom.asPoint()
+                #Create Structs
+                for feat in structLayer.getFeatures(request):
+                    dcid = feat['DC_ID']
+                    elevSump = ' elevSump="{:f}"'.format(feat['COTA_TN']-feat['PROF']) if temProf else ''
+                    descr = feat['TIPO'] if temTipo else ''
+                    out.write('{}<Struct elevRim="{:f}"{} desc="{}" name="{}">'.format(
+                        pipeInd, feat['COTA_TN'], elevSump, xmlAttr(descr), xmlAttr(dcid)))
                     
-                centerAtt = ET.fromstring('<Center>{:f} {:f}</Center>'.format(pto.y(), pto.x()))
-                geomAtt = ET.fromstring('<CircStruct diameter="1050." material="Reinforced Concrete" thickness="0.065"></CircStruct>')
-                sumpAtt = ET.fromstring('<Feature code="StructureFeature" source="Autodesk Civil 3D">'+
-                                        '<Property label="controlSumpBy" value="depth"></Property>'+
-                                        #'<Property label="SumpDepth" value="0"></Property>'+
-                                        '</Feature>')
-                
-                pipesIN = [[DC_ID,CCJ] for [DC_ID,PVM,PVJ,CCM,CCJ] in pipesList if PVJ==feat['DC_ID']]                
-                for pipe in pipesIN:
-                    invAtt = ET.fromstring('<Invert elev="{1:f}" flowDir="in" refPipe="{0}"></Invert>'.format(pipe[0],float(pipe[1])))
-                    structET.append(invAtt)
-                
-                pipesOUT = [[DC_ID,CCM] for [DC_ID,PVM,PVJ,CCM,CCJ] in pipesList if PVM==feat['DC_ID']]
-                for pipe in pipesOUT:
-                    invAtt = ET.fromstring('<Invert elev="{1:f}" flowDir="out" refPipe="{0}"></Invert>'.format(pipe[0],float(pipe[1])))
-                    structET.append(invAtt)
-                
-                structET.append(centerAtt)
-                structET.append(geomAtt)
-                structET.append(sumpAtt)                
-                structsRoot.append(structET)
-            
-
+                    for pipeId, cota in pipesIN.get(dcid, ()):
+                        out.write('{}<Invert elev="{:f}" flowDir="in" refPipe="{}" />'.format(childInd, float(cota), xmlAttr(pipeId)))
+                    for pipeId, cota in pipesOUT.get(dcid, ()):
+                        out.write('{}<Invert elev="{:f}" flowDir="out" refPipe="{}" />'.format(childInd, float(cota), xmlAttr(pipeId)))
+                    
+                    geom = feat.geometry()
+                    if geom.isMultipart():
+                        pto = geom.asMultiPoint()[0]
+                    else:
+                        pto = geom.asPoint()
+                    out.write('{}<Center>{:f} {:f}</Center>'.format(childInd, pto.y(), pto.x()))
+                    out.write(childInd + self.CIRCSTRUCT_XML)
+                    out.write(childInd + self.SUMP_XML)
+                    out.write(pipeInd + '</Struct>')
                 
-            tree.write(outXML, encoding='utf-8', xml_declaration=True)
-            self.prettyPrintXml(outXML) #Only for debug purpose while development phase     
-            
-            rawPath = r'{}'.format(outXML)
-            folderLink='<a href=\"file:///{}\">{}</a>'.format(rawPath, rawPath) #.encode('unicode_escape')) #'LandXML created!'            
-            iface.messageBar().pushMessage('QEsg', folderLink, level=Qgis.Info, duration=20)
-            
-    def prettyPrintXml(self, xml_fname):
-        dom = xml.dom.minidom.parse(xml_fname) # or xml.dom.minidom.parseString(xml_string)
-        xml_string = dom.toprettyxml()
-        #xml_string = os.linesep.join([s for s in xml_string.splitlines() if s.strip()])
-        xml_string = '\n'.join([s for s in xml_string.splitlines() if s.strip()])
-        with open(xml_fname, "w") as file_out:
-            file_out.write(xml_string)
+                out.write(nl + ind*3 + meio)
+                pipesTmp.seek(0)
+                shutil.copyfileobj(pipesTmp, out)
+                out.write(nl + ind*3 + fim)
     
     def tr(self, string):
         return QCoreApplication.translate('C3D', string)
@@ -13,7 +13,13 @@ from qgis.core import QgsVectorLayer, QgsFeature, QgsExpression, QgsExpressionCo
 
 from .data_structures import LayerMapping, GeometryType, FieldType
 from .field_definitions import SewageNetworkFields
-from .data_converter import DataConverter, CalculatedFields
+from .data_converter import DataConverter
+from .calculated_fields import (
+    CalculatedFieldBatch, JUNCTION_INPUT_FIELDS, calculate_junction_fields, calculate_pipe_rows
+)
+from .extraction_plan import ExtractionPlan, ExtractionPlanCache, MAPPER_CONVERTERS
+from .feature_records import FeatureRecordStore
+from .feature_requests import extraction_feature_request
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +36,7 @@ class AttributeMapper:
     def __init__(self):
         """Initialize the AttributeMapper."""
         self.data_converter = DataConverter()
-        self.calculated_fields = CalculatedFields()
+        self._extraction_plans = ExtractionPlanCache(MAPPER_CONVERTERS, skip_calculated=True)
     
     def create_auto_mapping(self, layer: QgsVectorLayer, geometry_type: GeometryType) -> LayerMapping:
         """
@@ -142,35 +148,11 @@ class AttributeMapper:
         Returns:
             Dictionary with converted feature data
         """
-        extracted_data = {}
+        plan = self._extraction_plan(mapping, feature.fields().names())
         
-        # Get all relevant field definitions
-        if mapping.geometry_type == GeometryType.LINE:
-            all_fields = SewageNetworkFields.get_all_pipe_fields()
-        else:
-            all_fields = SewageNetworkFields.get_all_junction_fields()
-        
-        # Extract mapped fields with type conversion
-        for field_def in all_fields:
-            field_name = field_def.name
-            
-            # Skip calculated fields for now (will be calculated later)
-            if mapping.is_field_calculated(field_name):
-                continue
-            
-            # Get value from mapping or default
-            if field_name in mapping.field_mappings:
-                layer_field = mapping.field_mappings[field_name]
-                raw_value = feature[layer_field]
-            elif field_name in mapping.default_values:
-                raw_value = mapping.default_values[field_name]
-            else:
-                # Use field definition default
-                raw_value = field_def.default_value
-            
-            # Convert value to appropriate type
-            converted_value = self._convert_value(raw_value, field_def.field_type)
-            extracted_data[field_name] = converted_value
+        # Extract mapped fields with type conversion (calculated fields are
+        # left out of the plan and calculated below)
+        extracted_data = plan.extract(feature.attributes())
         
         # Calculate derived fields
         calculated_data = self._calculate_derived_fields(extracted_data, mapping)
@@ -178,31 +160,51 @@ class AttributeMapper:
         
         return extracted_data
     
-    def extract_all_features_data(self, layer: QgsVectorLayer, mapping: LayerMapping) -> List[Dict[str, Any]]:
+    def extract_all_features_data(self, layer: QgsVectorLayer, mapping: LayerMapping) -> FeatureRecordStore:
         """
         Extract data from all features in a layer.
         
+        The data is held in columns rather than one dictionary per feature;
+        the result is a sequence of read-only, dictionary-like rows (use
+        ``to_dicts()`` for plain dictionaries).
+        
         Args:
             layer: QgsVectorLayer to process
             mapping: LayerMapping configuration
             
         Returns:
-            List of dictionaries with feature data
+            FeatureRecordStore with one row per extracted feature (empty if
+            the layer is invalid or a mapped field is missing)
         """
         if not layer or not layer.isValid():
-            return []
+            return FeatureRecordStore([])
         
-        features_data = []
+        try:
+            plan = self._extraction_plan(mapping, layer.fields().names())
+        except KeyError as e:
+            logger.warning(f"Failed to extract data from layer {layer.name()}: {e}")
+            return FeatureRecordStore([])
         
-        for feature in layer.getFeatures():
+        records = FeatureRecordStore.for_plan(plan)
+        for feature in layer.getFeatures(extraction_feature_request(layer, mapping)):
             try:
-                feature_data = self.extract_feature_data(feature, mapping, layer)
-                features_data.append(feature_data)
+                values = plan.extract_values(feature.attributes())
             except Exception as e:
                 logger.warning(f"Failed to extract data from feature {feature.id()}: {e}")
                 continue
+            records.append_values(values)
         
-        return features_data
+        # Calculated fields in one pass over the whole layer (drop heights
+        # need every pipe leaving a node)
+        batch = self._calculate_batch(records, mapping)
+        if batch is not None:
+            for field_name in self._calculated_field_names(mapping, batch):
+                field_def = SewageNetworkFields.get_field_by_name(field_name)
+                records.add_column(field_name, field_def.field_type if field_def else FieldType.DOUBLE)
+                for index, value in enumerate(batch.filled(field_name)):
+                    records.set_value(index, field_name, float(value))
+        
+        return records
     
     def validate_mapping_completeness(self, mapping: LayerMapping) -> Tuple[bool, List[str]]:
         """
@@ -314,6 +316,25 @@ class AttributeMapper:
         
         return suggestions
     
+    def _extraction_plan(self, mapping: LayerMapping, field_names: List[str]) -> ExtractionPlan:
+        """
+        Get the compiled extraction plan for a mapping and layer schema.
+        
+        Args:
+            mapping: LayerMapping configuration
+            field_names: Attribute names of the source layer
+            
+        Returns:
+            Compiled ExtractionPlan
+            
+        Raises:
+            KeyError: If a mapped layer field does not exist in the layer
+        """
+        plan = self._extraction_plans.get(mapping, field_names)
+        if plan.missing_sources:
+            raise KeyError(f"Mapped fields not found in layer: {', '.join(plan.missing_sources)}")
+        return plan
+    
     def _convert_value(self, value: Any, field_type: FieldType) -> Any:
         """
         Convert a value to the specified field type.
@@ -348,46 +369,59 @@ class AttributeMapper:
         Returns:
             Dictionary with calculated field values
         """
-        calculated_data = {}
+        batch = self._calculate_batch([data], mapping)
+        if batch is None:
+            return {}
+        return {field_name: float(batch.filled(field_name)[0])
+                for field_name in self._calculated_field_names(mapping, batch)}
+    
+    def _calculate_batch(self, rows, mapping: LayerMapping) -> Optional[CalculatedFieldBatch]:
+        """
+        Calculate the derived fields of extracted rows in one batch.
         
-        # Only calculate fields that are marked as calculated in the mapping
-        for field_name, is_calculated in mapping.calculated_fields.items():
-            if not is_calculated:
-                continue
+        Args:
+            rows: Extracted rows (dictionaries or a FeatureRecordStore)
+            mapping: LayerMapping configuration
             
-            try:
-                if field_name == "calculated_slope":
-                    if all(key in data for key in ["upstream_invert", "downstream_invert", "length"]):
-                        calculated_data[field_name] = self.calculated_fields.calculate_slope(
-                            data["upstream_invert"], data["downstream_invert"], data["length"]
-                        )
-                
-                elif field_name == "upstream_depth":
-                    if all(key in data for key in ["upstream_ground", "upstream_invert"]):
-                        calculated_data[field_name] = self.calculated_fields.calculate_depth(
-                            data["upstream_ground"], data["upstream_invert"]
-                        )
-                
-                elif field_name == "downstream_depth":
-                    if all(key in data for key in ["downstream_ground", "downstream_invert"]):
-                        calculated_data[field_name] = self.calculated_fields.calculate_depth(
-                            data["downstream_ground"], data["downstream_invert"]
-                        )
-                
-                elif field_name == "junction_depth":
-                    if all(key in data for key in ["ground_elevation", "invert_elevation"]):
-                        calculated_data[field_name] = self.calculated_fields.calculate_depth(
-                            data["ground_elevation"], data["invert_elevation"]
-                        )
-                
-            except Exception as e:
-                logger.warning(f"Failed to calculate field {field_name}: {e}")
-                # Use default value from field definition
-                field_def = SewageNetworkFields.get_field_by_name(field_name)
-                if field_def:
-                    calculated_data[field_name] = field_def.default_value
+        Returns:
+            CalculatedFieldBatch, or None if the mapping calculates no fields
+        """
+        if not len(rows) or not any(mapping.calculated_fields.values()):
+            return None
+        # Single rows are cheaper without NumPy
+        use_numpy = None if len(rows) > 1 else False
+        try:
+            if mapping.geometry_type == GeometryType.POINT:
+                return calculate_junction_fields(*([row.get(name) for row in rows] for name in JUNCTION_INPUT_FIELDS),
+                                                 use_numpy=use_numpy)
+            return calculate_pipe_rows(rows, use_numpy=use_numpy)
+        except Exception as e:
+            logger.warning(f"Failed to calculate fields of layer {mapping.layer_name}: {e}")
+            return None
+    
+    def _calculated_field_names(self, mapping: LayerMapping, batch: CalculatedFieldBatch) -> List[str]:
+        """
+        Get the fields of a batch that the mapping marks as calculated.
         
-        return calculated_data
+        They are stored with CalculatedFieldBatch.filled (missing results
+        become the field default, values below the field minimum are raised
+        to it); out-of-range results are logged.
+        
+        Args:
+            mapping: LayerMapping configuration
+            batch: Calculated fields of the extracted rows
+            
+        Returns:
+            Names of the calculated fields to store
+        """
+        names = [field_name for field_name, is_calculated in mapping.calculated_fields.items()
+                 if is_calculated and field_name in batch.values]
+        out_of_range = batch.out_of_range_counts()
+        for field_name in names:
+            if field_name in out_of_range:
+                logger.warning(f"{out_of_range[field_name]} calculated {field_name} value(s) "
+                               f"outside the valid range in layer {mapping.layer_name}")
+        return names
     
     def _validate_mapping(self, mapping: LayerMapping, layer: QgsVectorLayer) -> LayerMapping:
         """
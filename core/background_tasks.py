@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Background tasks for long running operations.
+
+DXF export and node assignment run as cancellable QgsTask subclasses so QGIS
+stays responsive. Layers are snapshotted as feature sources (the export also
+keeps the layer id, name and fields) on the main thread when the task is
+created; features are read on the worker thread.
+Progress is reported through ``setProgress`` plus a message signal, which Qt
+delivers to main thread receivers through a queued connection.
+"""
+
+from typing import Any, Dict, Optional
+
+from qgis.core import QgsTask, QgsProject, QgsVectorLayer, QgsVectorLayerFeatureSource
+from qgis.PyQt.QtCore import pyqtSignal
+
+from .data_structures import ExportConfiguration
+from .node_assignment import NodeAssignmentResult, compute_node_assignments, ensure_node_fields
+
+
+class DXFExportTask(QgsTask):
+    """
+    Cancellable background DXF export.
+
+    Cancelling the task stops the export loops through
+    ``ErrorRecoveryManager.cancel()``; the partial document is not saved.
+    """
+
+    progressMessage = pyqtSignal(int, str)
+    exportFinished = pyqtSignal(bool, str, dict)
+
+    def __init__(self, config: ExportConfiguration, template_manager=None,
+                 description: str = "RedBasica DXF export"):
+        """
+        Create the task. Must be called on the main thread.
+
+        Args:
+            config: Export configuration
+            template_manager: Optional TemplateManager for the exporter
+            description: Task description shown in the QGIS task manager
+        """
+        # Imported here so loading this module does not pull in ezdxf (see lazy_loader)
+        from .dxf_exporter import DXFExporter
+
+        super().__init__(description, QgsTask.CanCancel)
+        self.config = config
+        self.exporter = DXFExporter(template_manager, progress_callback=self._report_progress)
+        self.success = False
+        self.message = ""
+        self.statistics: Dict[str, Any] = {}
+        self.exception: Optional[Exception] = None
+
+        # The worker thread only uses the snapshots; QGIS cancels the task
+        # when one of the layers is removed from the project
+        project = QgsProject.instance()
+        layers = []
+        for mapping in (config.pipes_mapping, config.junctions_mapping):
+            if not mapping or not mapping.layer_id:
+                continue
+            layer = project.mapLayer(mapping.layer_id)
+            if isinstance(layer, QgsVectorLayer) and layer.isValid():
+                self.exporter.set_feature_source(layer)
+                layers.append(layer)
+        self.setDependentLayers(layers)
+
+    def _report_progress(self, progress: int, message: str):
+        self.setProgress(progress)
+        self.progressMessage.emit(progress, message)
+
+    def run(self) -> bool:
+        """Run the export on the worker thread."""
+        try:
+            self.success, self.message, self.statistics = \
+                self.exporter.export_with_error_handling(self.config)
+        except Exception as e:
+            self.exception = e
+            self.success = False
+            self.message = str(e)
+        return self.success
+
+    def cancel(self):
+        """Cancel the export; the loops stop at the next feature."""
+        self.exporter.error_manager.cancel()
+        super().cancel()
+
+    def finished(self, result: bool):
+        """Emit the export result on the main thread."""
+        if self.isCanceled():
+            self.success = False
+            self.message = "Export cancelled by user"
+        self.exportFinished.emit(self.success, self.message, self.statistics or {})
+
+
+class NodeAssignmentTask(QgsTask):
+    """
+    Cancellable background node assignment.
+
+    The nearest junction lookup runs on the worker thread against feature
+    source snapshots. The resulting attribute changes are applied to the
+    pipes layer by the receiver of ``assignmentFinished`` on the main thread
+    (see :func:`node_assignment.apply_node_assignments`).
+    """
+
+    progressMessage = pyqtSignal(int, str)
+    assignmentFinished = pyqtSignal(object)
+
+    def __init__(self, pipes_layer: QgsVectorLayer, junctions_layer: QgsVectorLayer,
+                 node_id_field: str, depth_field: Optional[str] = None,
+                 ground_elev_field: Optional[str] = None,
+                 invert_elev_field: Optional[str] = None,
+                 snap_tolerance: Optional[float] = None,
+                 description: str = "RedBasica node assignment"):
+        """
+        Create the task. Must be called on the main thread.
+
+        Adds the node fields to the pipes layer if they are missing.
+
+        Args:
+            pipes_layer: Pipes layer receiving the node attributes
+            junctions_layer: Junctions layer
+            node_id_field: Name of the ID field in the junctions layer
+            depth_field: Name of the depth field (optional)
+            ground_elev_field: Name of the ground elevation (CT) field (optional)
+            invert_elev_field: Name of the invert elevation (CF) field (optional)
+            snap_tolerance: Maximum pipe end to junction distance (None = nearest at any distance)
+            description: Task description shown in the QGIS task manager
+        """
+        super().__init__(description, QgsTask.CanCancel)
+        self.pipes_layer = pipes_layer
+        self.snap_tolerance = snap_tolerance
+        self.field_names = (node_id_field, depth_field, ground_elev_field, invert_elev_field)
+        self.idx_map = ensure_node_fields(pipes_layer)
+        self.total_pipes = pipes_layer.featureCount()
+        self.pipes_source = QgsVectorLayerFeatureSource(pipes_layer)
+        self.junctions_source = QgsVectorLayerFeatureSource(junctions_layer)
+        self.result: Optional[NodeAssignmentResult] = None
+        self.exception: Optional[Exception] = None
+
+    def _report_progress(self, progress: int, message: str):
+        self.setProgress(progress)
+        self.progressMessage.emit(progress, message)
+
+    def run(self) -> bool:
+        """Compute the assignments on the worker thread."""
+        try:
+            self.result = compute_node_assignments(
+                self.pipes_source, self.junctions_source, self.idx_map, *self.field_names,
+                total_pipes=self.total_pipes,
+                progress_callback=self._report_progress,
+                is_cancelled=self.isCanceled,
+                snap_tolerance=self.snap_tolerance
+            )
+        except Exception as e:
+            self.exception = e
+            return False
+        return not self.result.cancelled
+
+    def finished(self, result: bool):
+        """Emit the computed result (None on failure or cancellation) on the main thread."""
+        self.assignmentFinished.emit(self.result if result else None)
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Batch calculation of derived pipe and junction fields.
+
+Slopes, depths and drop heights used to be calculated one feature at a time
+(CalculatedFields, DXFExporter._calculate_pipe_fields and
+AttributeMapper._calculate_derived_fields), each call converting its inputs
+and catching exceptions per value. The functions here take whole columns
+(the double columns of a FeatureRecordStore, NumPy arrays or plain lists)
+and calculate every derived field in one vectorized pass, with a pure Python
+fallback when NumPy is not available.
+
+Missing values follow NaN semantics: a NULL or unconvertible input makes the
+derived value NaN instead of raising or substituting a default, so callers
+decide what a missing result means (the exporter leaves the field alone,
+the attribute mapper uses the field default, see
+CalculatedFieldBatch.filled). Results are not clamped; every derived column
+comes with an out-of-range mask built from the ``validation_rules`` of its
+field definition (e.g. ``calculated_slope`` outside 0.0001..1.0 or a negative
+depth).
+
+Derived fields:
+- calculated_slope: (upstream invert - downstream invert) / length, NaN for
+  lengths <= 0
+- upstream_depth / downstream_depth / junction_depth: ground - invert
+- drop_height: downstream invert of a pipe minus the lowest upstream invert
+  of the pipes leaving its downstream node (needs the node ids); NaN at
+  outlets
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Pipe input fields, in the argument order of calculate_pipe_fields
+PIPE_INPUT_FIELDS = (
+    'upstream_invert_elev',
+    'downstream_invert_elev',
+    'length',
+    'upstream_ground_elev',
+    'downstream_ground_elev',
+)
+
+# Junction input fields, in the argument order of calculate_junction_fields
+JUNCTION_INPUT_FIELDS = ('ground_elevation', 'invert_elevation')
+
+_NAN = float('nan')
+
+# (min_value, max_value, default_value) per derived field, read once from
+# the field catalog (validation rules and defaults do not depend on the locale)
+_field_rules: Dict[str, Tuple[Optional[float], Optional[float], Any]] = {}
+
+
+def field_rules(name: str) -> Tuple[Optional[float], Optional[float], Any]:
+    """
+    Get the value range and default of a field from its definition.
+
+    Args:
+        name: Field name in the SewageNetworkFields catalog
+
+    Returns:
+        (min_value, max_value, default_value); None for missing entries
+    """
+    if name not in _field_rules:
+        from .field_definitions import SewageNetworkFields
+
+        # Calculated definitions first: downstream_depth is also an optional
+        # (mapped) pipe field without rules
+        field_def = next((field_def for field_def in SewageNetworkFields.get_calculated_fields()
+                          if field_def.name == name), None) or SewageNetworkFields.get_field_by_name(name)
+        rules = (field_def.validation_rules or {}) if field_def else {}
+        _field_rules[name] = (rules.get('min_value'), rules.get('max_value'),
+                              field_def.default_value if field_def else None)
+    return _field_rules[name]
+
+
+def _to_float(value: Any) -> float:
+    if value is None:
+        return _NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def float_values(values: Sequence[Any], use_numpy: Optional[bool] = None):
+    """
+    Convert a column of raw values to floats, NaN for NULL or unconvertible values.
+
+    Args:
+        values: Column values (float64 arrays are used as they are)
+        use_numpy: Return a NumPy array (True) or a list (False); defaults to
+            NumPy when available
+
+    Returns:
+        float64 NumPy array or list of floats
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    if use_numpy:
+        if isinstance(values, np.ndarray) and values.dtype == np.float64:
+            return values
+        return np.fromiter(map(_to_float, values), dtype=np.float64, count=len(values))
+    return [_to_float(value) for value in values]
+
+
+class CalculatedFieldBatch:
+    """
+    Derived field columns of a batch of features with their range checks.
+
+    ``values`` maps each derived field to a float column (NumPy array or
+    list, NaN where it could not be calculated); ``out_of_range`` maps it to
+    a bool column flagging values outside the field's validation rules (NaN
+    is never flagged), built on first access.
+    """
+
+    __slots__ = ('values', 'count', 'use_numpy', '_out_of_range')
+
+    def __init__(self, values: Dict[str, Sequence[float]], count: int, use_numpy: bool):
+        self.values = values
+        self.count = count
+        self.use_numpy = use_numpy
+        self._out_of_range: Optional[Dict[str, Sequence[bool]]] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def out_of_range(self) -> Dict[str, Sequence[bool]]:
+        """Out-of-range mask (NumPy bool array or list) per derived field."""
+        if self._out_of_range is None:
+            self._out_of_range = {name: self._range_mask(name, column) for name, column in self.values.items()}
+        return self._out_of_range
+
+    def _range_mask(self, name, column):
+        minimum, maximum, _ = field_rules(name)
+        if self.use_numpy:
+            mask = np.zeros(self.count, dtype=bool)
+            if minimum is not None:
+                mask |= column < minimum
+            if maximum is not None:
+                mask |= column > maximum
+            return mask
+        return [(minimum is not None and value < minimum) or (maximum is not None and value > maximum)
+                for value in column]
+
+    def valid(self, name: str):
+        """Get the rows where a derived field could be calculated (not NaN)."""
+        column = self.values[name]
+        if self.use_numpy:
+            return ~np.isnan(column)
+        return [value == value for value in column]
+
+    def filled(self, name: str):
+        """
+        Get a derived column ready to be stored as a field value.
+
+        NaN becomes the field default and values below the rule minimum are
+        raised to it (e.g. negative depths become 0.0).
+
+        Args:
+            name: Derived field name
+
+        Returns:
+            Column of the same kind as ``values[name]``
+        """
+        minimum, _, default = field_rules(name)
+        default = _NAN if default is None else float(default)
+        column = self.values[name]
+        if self.use_numpy:
+            filled = np.where(np.isnan(column), default, column)
+            if minimum is not None:
+                filled = np.where(filled < minimum, minimum, filled)
+            return filled
+        filled = [default if value != value else value for value in column]
+        if minimum is not None:
+            filled = [minimum if value < minimum else value for value in filled]
+        return filled
+
+    def row(self, index: int) -> Dict[str, Optional[float]]:
+        """Get the derived values of one feature (None where not calculated)."""
+        row = {}
+        for name, column in self.values.items():
+            value = float(column[index])
+            row[name] = None if math.isnan(value) else value
+        return row
+
+    def out_of_range_counts(self) -> Dict[str, int]:
+        """Number of out-of-range values per derived field (fields without any are left out)."""
+        counts = {}
+        for name, mask in self.out_of_range.items():
+            count = int(mask.sum()) if self.use_numpy else sum(mask)
+            if count:
+                counts[name] = count
+        return counts
+
+
+def calculate_pipe_fields(upstream_invert: Sequence[Any], downstream_invert: Sequence[Any],
+                          length: Sequence[Any], upstream_ground: Sequence[Any],
+                          downstream_ground: Sequence[Any],
+                          upstream_node: Optional[Sequence[Any]] = None,
+                          downstream_node: Optional[Sequence[Any]] = None,
+                          use_numpy: Optional[bool] = None) -> CalculatedFieldBatch:
+    """
+    Calculate slope, depths and (with node ids) drop heights for a batch of pipes.
+
+    Args:
+        upstream_invert: Upstream invert elevations
+        downstream_invert: Downstream invert elevations
+        length: Pipe lengths
+        upstream_ground: Ground elevations at the upstream end
+        downstream_ground: Ground elevations at the downstream end
+        upstream_node: Upstream node ids (drop heights are only calculated
+            with both node id columns)
+        downstream_node: Downstream node ids
+        use_numpy: Force (True) or disable (False) the NumPy kernel;
+            defaults to NumPy when available
+
+    Returns:
+        CalculatedFieldBatch with calculated_slope, upstream_depth,
+        downstream_depth and, with node ids, drop_height
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    count = len(length)
+    up_invert, down_invert, pipe_length, up_ground, down_ground = (
+        float_values(column, use_numpy)
+        for column in (upstream_invert, downstream_invert, length, upstream_ground, downstream_ground))
+    with_drops = upstream_node is not None and downstream_node is not None
+
+    if use_numpy:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = {
+                'calculated_slope': np.where(pipe_length > 0, (up_invert - down_invert) / pipe_length, np.nan),
+                'upstream_depth': up_ground - up_invert,
+                'downstream_depth': down_ground - down_invert,
+            }
+        if with_drops:
+            values['drop_height'] = _drop_heights_numpy(up_invert, down_invert, upstream_node, downstream_node)
+    else:
+        values = {
+            'calculated_slope': [(up - down) / size if size > 0 else _NAN
+                                 for up, down, size in zip(up_invert, down_invert, pipe_length)],
+            'upstream_depth': [ground - invert for ground, invert in zip(up_ground, up_invert)],
+            'downstream_depth': [ground - invert for ground, invert in zip(down_ground, down_invert)],
+        }
+        if with_drops:
+            values['drop_height'] = _drop_heights_python(up_invert, down_invert, upstream_node, downstream_node)
+    return CalculatedFieldBatch(values, count, use_numpy)
+
+
+def calculate_junction_fields(ground_elevation: Sequence[Any], invert_elevation: Sequence[Any],
+                              use_numpy: Optional[bool] = None) -> CalculatedFieldBatch:
+    """
+    Calculate the depth of a batch of junctions.
+
+    Args:
+        ground_elevation: Ground elevations
+        invert_elevation: Invert elevations
+        use_numpy: Force (True) or disable (False) the NumPy kernel;
+            defaults to NumPy when available
+
+    Returns:
+        CalculatedFieldBatch with junction_depth
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    ground = float_values(ground_elevation, use_numpy)
+    invert = float_values(invert_elevation, use_numpy)
+    if use_numpy:
+        depth = ground - invert
+    else:
+        depth = [top - bottom for top, bottom in zip(ground, invert)]
+    return CalculatedFieldBatch({'junction_depth': depth}, len(ground), use_numpy)
+
+
+def calculate_pipe_rows(rows: Sequence[Any], use_numpy: Optional[bool] = None) -> CalculatedFieldBatch:
+    """
+    Calculate the derived pipe fields of extracted rows (dictionaries or FeatureRecords).
+
+    Drop heights are included when the rows hold upstream_node and downstream_node.
+
+    Args:
+        rows: Extracted pipe data keyed by target field name
+        use_numpy: Force (True) or disable (False) the NumPy kernel
+
+    Returns:
+        CalculatedFieldBatch, see calculate_pipe_fields
+    """
+    columns = [[row.get(name) for row in rows] for name in PIPE_INPUT_FIELDS]
+    nodes = [None, None]
+    if rows and all('upstream_node' in row and 'downstream_node' in row for row in rows):
+        nodes = [[row['upstream_node'] for row in rows], [row['downstream_node'] for row in rows]]
+    return calculate_pipe_fields(*columns, *nodes, use_numpy=use_numpy)
+
+
+def _node_codes(upstream_node, downstream_node) -> Tuple[List[int], List[int], int]:
+    # Integer code per node id; -1 for NULL/empty ids and for downstream
+    # nodes no pipe starts at
+    codes = {}
+    upstream = [codes.setdefault(node, len(codes)) if node not in (None, '') else -1
+                for node in upstream_node]
+    downstream = [codes.get(node, -1) if node not in (None, '') else -1 for node in downstream_node]
+    return upstream, downstream, len(codes)
+
+
+def _drop_heights_numpy(up_invert, down_invert, upstream_node, downstream_node):
+    upstream, downstream, node_count = _node_codes(upstream_node, downstream_node)
+    upstream = np.asarray(upstream, dtype=np.int64)
+    downstream = np.asarray(downstream, dtype=np.int64)
+
+    # Lowest invert leaving each node (minimum.at ignores the NaN inverts masked out here)
+    lowest = np.full(node_count, np.inf)
+    starts = (upstream >= 0) & ~np.isnan(up_invert)
+    np.minimum.at(lowest, upstream[starts], up_invert[starts])
+    lowest[np.isinf(lowest)] = np.nan
+
+    drops = np.full(len(downstream), np.nan)
+    ends = downstream >= 0
+    drops[ends] = down_invert[ends] - lowest[downstream[ends]]
+    return drops
+
+
+def _drop_heights_python(up_invert, down_invert, upstream_node, downstream_node):
+    upstream, downstream, _ = _node_codes(upstream_node, downstream_node)
+    lowest = {}
+    for code, invert in zip(upstream, up_invert):
+        if code >= 0 and invert == invert and invert < lowest.get(code, math.inf):
+            lowest[code] = invert
+    return [invert - lowest[code] if code in lowest else _NAN
+            for code, invert in zip(downstream, down_invert)]
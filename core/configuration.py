@@ -240,6 +240,7 @@ class Configuration:
             'auto_save_config': True,
             'show_validation_warnings': True,
             'remember_window_size': True,
+            'warm_up_export_modules': True,
         }
     
     def save_template_paths(self, template_paths: Dict[str, str]) -> bool:
@@ -618,6 +619,13 @@ class Configuration:
             'include_collector_depth': config.include_collector_depth,
             'export_node_id': config.export_node_id,
             'include_slope_unit': config.include_slope_unit,
+            'streaming_export': config.streaming_export,
+            'parallel_workers': config.parallel_workers,
+            'binary_dxf': config.binary_dxf,
+            'geos_validation': config.geos_validation,
+            'incremental_export': config.incremental_export,
+            'profile_export': config.profile_export,
+            'profile_memory': config.profile_memory,
         }
         
         # Always include pipes_mapping and junctions_mapping, even if None
@@ -669,6 +677,13 @@ class Configuration:
             include_collector_depth=config_dict.get('include_collector_depth', True),
             export_node_id=config_dict.get('export_node_id', False),
             include_slope_unit=config_dict.get('include_slope_unit', False),
+            streaming_export=config_dict.get('streaming_export', False),
+            parallel_workers=config_dict.get('parallel_workers', 0),
+            binary_dxf=config_dict.get('binary_dxf', False),
+            geos_validation=config_dict.get('geos_validation', False),
+            incremental_export=config_dict.get('incremental_export', False),
+            profile_export=config_dict.get('profile_export', False),
+            profile_memory=config_dict.get('profile_memory', False),
         )
         
         if 'pipes_mapping' in config_dict and config_dict['pipes_mapping'] is not None:
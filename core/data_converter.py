@@ -8,6 +8,8 @@ NULL values, and different decimal notations.
 """
 
 import logging
+import re
+from functools import lru_cache
 from typing import Any, Union, Optional
 
 # Handle QGIS import gracefully for testing
@@ -22,6 +24,96 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Number formats found in attribute tables: currency/unit prefixes and suffixes
+# ("R$ 1.234,56", "12.5m"), Portuguese thousands separator with decimal comma
+# ("1.234,56") and plain decimal comma ("12,34")
+_NUMBER_PREFIX = re.compile(r'^[^\d\-]*')
+_NUMBER_SUFFIX = re.compile(r'[^\d\-\.,]*$')
+_PORTUGUESE_NUMBER = re.compile(r'^(\d{1,3}(?:\.\d{3})*),(\d+)$')
+_NUMERIC_VALUE = re.compile(r'-?\d*\.?\d+')
+# Plain decimal ("-12.5") or Portuguese decimal ("1.234,56") without any
+# prefix or suffix: the common formats, converted without the cleanup steps
+_DECIMAL_NUMBER = re.compile(r'(-?\d+(?:\.\d+)?)|(\d{1,3}(?:\.\d{3})*),(\d+)')
+
+# Distinct string values memoized by _parse_number_string. Attribute columns
+# repeat a small set of values (diameters, materials, depths), so the hit rate
+# is high while the bound keeps memory flat on columns of unique values.
+STRING_CACHE_SIZE = 4096
+
+# Types that never compare equal to NULL; their values skip the NULL checks
+_PLAIN_TYPES = frozenset((str, int, float, bool))
+
+# NULL class-name test result per type (QGIS NULL or MockNull in tests)
+_null_type_cache = {}
+
+
+def _is_null(value: Any) -> bool:
+    """
+    Check for None, QGIS NULL and NULL mocks.
+
+    Args:
+        value: Input value of any type
+
+    Returns:
+        True if the value represents a missing attribute
+    """
+    if value is None:
+        return True
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        return False
+    null_type = _null_type_cache.get(value_type)
+    if null_type is None:
+        name = value_type.__name__
+        null_type = 'Null' in name or 'NULL' in name
+        _null_type_cache[value_type] = null_type
+    if null_type:
+        return True
+    try:
+        return bool(value == NULL)
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=STRING_CACHE_SIZE)
+def _parse_number_string(text: str) -> Optional[float]:
+    """
+    Parse a numeric string in any of the supported formats.
+
+    Args:
+        text: Raw string value (not stripped)
+
+    Returns:
+        Parsed float, 0.0 for blank strings, or None if the string holds no
+        numeric value
+    """
+    cleaned = text.strip()
+    if not cleaned:
+        return 0.0
+
+    match = _DECIMAL_NUMBER.fullmatch(cleaned)
+    if match:
+        if match.group(1):
+            return float(cleaned)
+        return float(f"{match.group(2).replace('.', '')}.{match.group(3)}")
+
+    # Remove currency symbols and other non-numeric prefixes/suffixes
+    cleaned = _NUMBER_PREFIX.sub('', cleaned)
+    cleaned = _NUMBER_SUFFIX.sub('', cleaned)
+
+    match = _PORTUGUESE_NUMBER.match(cleaned)
+    if match:
+        # Convert "1.234,56" to "1234.56"
+        cleaned = f"{match.group(1).replace('.', '')}.{match.group(2)}"
+    else:
+        # Simple comma to dot replacement for cases like "12,34"
+        cleaned = cleaned.replace(',', '.')
+
+    numeric_match = _NUMERIC_VALUE.search(cleaned)
+    if numeric_match:
+        return float(numeric_match.group())
+    return None
+
 
 class DataConverter:
     """Utility class for robust data type conversion."""
@@ -37,18 +129,7 @@ class DataConverter:
         Returns:
             String representation of the value, empty string for NULL/None
         """
-        if value is None:
-            return ""
-        
-        # Handle QGIS NULL values and MockNull for testing
-        try:
-            if value == NULL:
-                return ""
-        except:
-            pass
-        
-        # Check type name for mock NULL or QGIS NULL
-        if hasattr(value, '__class__') and ('Null' in value.__class__.__name__ or 'NULL' in value.__class__.__name__):
+        if _is_null(value):
             return ""
         
         if isinstance(value, str):
@@ -56,6 +137,40 @@ class DataConverter:
         
         return str(value).strip()
     
+    @staticmethod
+    def parse_double(value: Any) -> Optional[float]:
+        """
+        Strict variant of to_double for validation.
+        
+        Accepts the same formats as to_double, but reports missing and
+        non-numeric values instead of replacing them with 0.0.
+        
+        Args:
+            value: Input value to convert
+        
+        Returns:
+            Float value, None for NULL/None and blank values
+        
+        Raises:
+            ValueError: If the value holds no numeric value
+        """
+        value_type = type(value)
+        if value_type is float or value_type is int:
+            return float(value)
+        if value_type is str:
+            if not value.strip():
+                return None
+            result = _parse_number_string(value)
+            if result is None:
+                raise ValueError(f"No numeric value in '{value}'")
+            return result
+        if _is_null(value):
+            return None
+        try:
+            return float(value)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Cannot convert {type(value).__name__} '{value}' to float: {e}")
+    
     @staticmethod
     def to_double(value: Any) -> float:
         """
@@ -67,6 +182,8 @@ class DataConverter:
         - Numeric types (int, float)
         - Invalid values (returns 0.0 with warning)
         
+        Parsed strings are memoized (see STRING_CACHE_SIZE).
+        
         Args:
             value: Input value to convert
             
@@ -76,59 +193,28 @@ class DataConverter:
         if value is None:
             return 0.0
         
-        # Handle QGIS NULL values and MockNull for testing
-        try:
-            if value == NULL:
+        # Fast path for native numbers (bool is handled below as an int)
+        value_type = type(value)
+        if value_type is float:
+            return value
+        if value_type is int:
+            return float(value)
+        
+        if value_type is str:
+            result = _parse_number_string(value)
+            if result is None:
+                logger.warning(f"Could not extract numeric value from '{value}', using 0.0")
                 return 0.0
-        except:
-            pass
+            return result
         
-        # Check type name for mock NULL or QGIS NULL
-        if hasattr(value, '__class__') and ('Null' in value.__class__.__name__ or 'NULL' in value.__class__.__name__):
+        if _is_null(value):
             return 0.0
         
         if isinstance(value, (int, float)):
             return float(value)
         
         if isinstance(value, str):
-            try:
-                # Handle empty strings
-                cleaned = value.strip()
-                if not cleaned:
-                    return 0.0
-                
-                # Handle Portuguese decimal notation (comma to dot)
-                # First check if it's a number with thousands separator
-                import re
-                
-                # Remove currency symbols and other non-numeric prefixes
-                # This handles cases like "R$ 1.234,56", "$25.50", "12.5m"
-                cleaned = re.sub(r'^[^\d\-]*', '', cleaned)  # Remove non-numeric prefix
-                cleaned = re.sub(r'[^\d\-\.,]*$', '', cleaned)  # Remove non-numeric suffix
-                
-                # Pattern for numbers like "1.234,56" (Portuguese format with thousands separator)
-                portuguese_pattern = r'^(\d{1,3}(?:\.\d{3})*),(\d+)$'
-                match = re.match(portuguese_pattern, cleaned)
-                if match:
-                    # Convert "1.234,56" to "1234.56"
-                    integer_part = match.group(1).replace('.', '')
-                    decimal_part = match.group(2)
-                    cleaned = f"{integer_part}.{decimal_part}"
-                else:
-                    # Simple comma to dot replacement for cases like "12,34"
-                    cleaned = cleaned.replace(',', '.')
-                
-                # Extract the numeric value
-                numeric_match = re.search(r'-?\d*\.?\d+', cleaned)
-                if numeric_match:
-                    return float(numeric_match.group())
-                else:
-                    logger.warning(f"Could not extract numeric value from '{value}', using 0.0")
-                    return 0.0
-                    
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Failed to convert '{value}' to float: {e}, using 0.0")
-                return 0.0
+            return DataConverter.to_double(str(value))
         
         # For any other type, try direct conversion
         try:
@@ -151,15 +237,16 @@ class DataConverter:
         if value is None:
             return 0
         
-        # Handle QGIS NULL values and MockNull for testing
-        try:
-            if value == NULL:
-                return 0
-        except:
-            pass
+        value_type = type(value)
+        if value_type is int:
+            return value
+        if value_type is float:
+            return int(value)
+        if value_type is str:
+            # First convert to float to handle decimal strings, then to int
+            return int(DataConverter.to_double(value))
         
-        # Check type name for mock NULL or QGIS NULL
-        if hasattr(value, '__class__') and ('Null' in value.__class__.__name__ or 'NULL' in value.__class__.__name__):
+        if _is_null(value):
             return 0
         
         if isinstance(value, int):
@@ -194,18 +281,7 @@ class DataConverter:
         Returns:
             Boolean representation of the value
         """
-        if value is None:
-            return False
-        
-        # Handle QGIS NULL values and MockNull for testing
-        try:
-            if value == NULL:
-                return False
-        except:
-            pass
-        
-        # Check type name for mock NULL or QGIS NULL
-        if hasattr(value, '__class__') and ('Null' in value.__class__.__name__ or 'NULL' in value.__class__.__name__):
+        if _is_null(value):
             return False
         
         if isinstance(value, bool):
@@ -174,6 +174,13 @@ class ExportConfiguration:
     label_format: str = "{length:.0f}-{diameter:.0f}-{slope:.5f}"
     export_mode: ExportMode = ExportMode.STANDARD
     label_style: LabelStyle = LabelStyle.STACKED
+    streaming_export: bool = False  # Stream entities to an R12 file instead of building the document in memory
+    parallel_workers: int = 0  # Worker processes rendering pipes in streaming mode (0/1 = serial)
+    binary_dxf: bool = False  # Write binary instead of ASCII DXF (about 30% smaller files)
+    geos_validation: bool = False  # Also run full GEOS validity checks, once per layer before the export
+    incremental_export: bool = False  # Streaming only: reuse cached entities of unchanged features (<name>.rbcache)
+    profile_export: bool = False  # Attach a stage profile to the result and write it as JSON next to the DXF
+    profile_memory: bool = False  # Also trace Python allocations (tracemalloc) while profiling
     
     def __post_init__(self):
         """Debug ExportConfiguration creation."""
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Binary DXF output.
+
+Binary DXF stores numbers as little-endian binary values instead of
+formatted text, which makes files about a third smaller. The vendored ezdxf
+BinaryTagWriter encodes every tag with a chain of group code set lookups and
+several small writes, which makes binary saving slower than ASCII. The
+BinaryTagEncoder below resolves the layout of each group code once (prefix
+bytes and value packer) and is shared by:
+
+- save_document(), saving ezdxf documents with FastBinaryTagWriter
+- the streaming R12 writer, which re-encodes its generated tag text
+  (see dxf_stream_writer._BinaryDXFStream)
+
+The produced bytes are identical to those of ezdxf's BinaryTagWriter.
+"""
+
+import os
+import struct
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Add addon directory to path for bundled libraries
+addon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'addon')
+if addon_path not in sys.path:
+    sys.path.insert(0, addon_path)
+
+try:
+    import ezdxf  # registers the 'dxfreplace' codec error handler
+    from ezdxf.lldxf.const import DXF12
+    from ezdxf.lldxf.tagwriter import BinaryTagWriter
+    from ezdxf.lldxf.types import BINARY_DATA, BYTES, DOUBLE, INT16, INT32, INT64
+except ImportError as e:
+    raise ImportError(f"Failed to import bundled ezdxf library: {e}")
+
+
+# (group code prefix, value packer or None for zero terminated strings)
+_Layout = Tuple[bytes, Optional[Callable[[Any], bytes]]]
+
+_PACK_DOUBLE = struct.Struct('<d').pack
+_PACK_BYTE = struct.Struct('<B').pack
+_PACK_INT16 = struct.Struct('<h').pack
+_PACK_INT32 = struct.Struct('<i').pack
+_PACK_INT64 = struct.Struct('<q').pack
+
+
+def _pack_double(value) -> bytes:
+    return _PACK_DOUBLE(float(value))
+
+
+def _pack_byte(value) -> bytes:
+    return _PACK_BYTE(int(value))
+
+
+def _pack_int16(value) -> bytes:
+    return _PACK_INT16(int(value))
+
+
+def _pack_int32(value) -> bytes:
+    return _PACK_INT32(int(value))
+
+
+def _pack_int64(value) -> bytes:
+    return _PACK_INT64(int(value))
+
+
+class BinaryTagEncoder:
+    """Encodes DXF tags as binary DXF with a per group code layout cache."""
+
+    def __init__(self, r12: bool, encoding: str):
+        """
+        Initialize encoder.
+
+        Args:
+            r12: Use the DXF R12 group code layout (1 byte codes, 0xFF + 2
+                bytes for extended data) instead of 2 byte codes
+            encoding: Text encoding of string values
+        """
+        self.r12 = r12
+        self.encoding = encoding
+        self._layouts: Dict[int, _Layout] = {}
+
+    def layout(self, code: int) -> _Layout:
+        """
+        Get the prefix bytes and value packer of a group code.
+
+        Args:
+            code: DXF group code (not a binary data code)
+
+        Returns:
+            (prefix, packer) tuple; packer is None for string values
+        """
+        layout = self._layouts.get(code)
+        if layout is not None:
+            return layout
+
+        if not self.r12:
+            prefix = code.to_bytes(2, 'little')
+        elif code >= 1000:
+            prefix = b"\xff" + code.to_bytes(2, 'little')
+        else:
+            prefix = code.to_bytes(1, 'little')
+
+        if code in BYTES:
+            packer = _pack_byte
+        elif code in INT16:
+            packer = _pack_int16
+        elif code in INT32:
+            packer = _pack_int32
+        elif code in INT64:
+            packer = _pack_int64
+        elif code in DOUBLE:
+            packer = _pack_double
+        else:
+            packer = None
+        layout = self._layouts[code] = (prefix, packer)
+        return layout
+
+    def encode_tag(self, code: int, value: Any) -> bytes:
+        """
+        Encode one tag (not for binary data codes, see BINARY_DATA).
+
+        Args:
+            code: DXF group code
+            value: Tag value (numbers may be given as strings)
+
+        Returns:
+            Binary encoded tag
+        """
+        prefix, packer = self.layout(code)
+        if packer is None:
+            return prefix + str(value).encode(self.encoding, errors='dxfreplace') + b"\x00"
+        return prefix + packer(value)
+
+    def encode_binary_data(self, code: int, data: bytes) -> bytes:
+        """
+        Encode binary data in chunks of 127 bytes, as BinaryTagWriter does.
+
+        Args:
+            code: Binary data group code (see BINARY_DATA)
+            data: Data bytes
+
+        Returns:
+            Binary encoded tags
+        """
+        prefix = (b"\xff" if self.r12 and code >= 1000 else b"") + code.to_bytes(2, 'little')
+        chunks = []
+        for index in range(0, len(data), 127):
+            chunk = data[index:index + 127]
+            chunks.append(prefix + len(chunk).to_bytes(1, 'little') + chunk)
+        return b"".join(chunks)
+
+    def encode_text(self, text: str) -> bytes:
+        """
+        Encode ASCII DXF tag text.
+
+        Args:
+            text: Complete ``code\\nvalue\\n`` pairs (group codes may be padded)
+
+        Returns:
+            Binary encoded tags
+        """
+        items = text.split("\n")
+        encoding = self.encoding
+        layouts = self._layouts
+        chunks = []
+        append = chunks.append
+        for index in range(0, len(items) - 1, 2):
+            code = int(items[index])
+            value = items[index + 1]
+            if code in BINARY_DATA:
+                append(self.encode_binary_data(code, bytes.fromhex(value)))
+                continue
+            prefix, packer = layouts.get(code) or self.layout(code)
+            append(prefix)
+            if packer is None:
+                append(value.encode(encoding, errors='dxfreplace'))
+                append(b"\x00")
+            else:
+                append(packer(value))
+        return b"".join(chunks)
+
+
+class FastBinaryTagWriter(BinaryTagWriter):
+    """BinaryTagWriter using a BinaryTagEncoder (same output, faster)."""
+
+    def __init__(self, stream, dxfversion: str, write_handles: bool = True, encoding: str = 'utf8'):
+        super().__init__(stream, dxfversion=dxfversion, write_handles=write_handles, encoding=encoding)
+        self._encoder = BinaryTagEncoder(self._r12, encoding)
+        self._write = stream.write
+
+    def write_tag2(self, code: int, value: Any) -> None:
+        if code in BINARY_DATA:
+            self._write_binary_chunks(code, value)
+            return
+        prefix, packer = self._encoder.layout(code)
+        if packer is None:
+            self._write(prefix + str(value).encode(self._encoding, errors='dxfreplace') + b"\x00")
+        else:
+            self._write(prefix + packer(value))
+
+
+def save_document(doc, path: str, fmt: str = 'asc') -> None:
+    """
+    Save an ezdxf document as ASCII or binary DXF.
+
+    Binary files are written like ``Drawing.saveas(path, fmt='bin')``, but
+    through FastBinaryTagWriter.
+
+    Args:
+        doc: ezdxf Drawing
+        path: Output file path
+        fmt: 'asc' or 'bin'
+    """
+    if not fmt.startswith('bin'):
+        doc.saveas(path, fmt=fmt)
+        return
+
+    doc.filename = str(path)
+    # Same preparation as Drawing.write()
+    doc.commit_pending_changes()
+    dxfversion = doc.dxfversion
+    if dxfversion == DXF12:
+        handles = bool(doc.header.get("$HANDLING", 0))
+    else:
+        handles = True
+        doc.classes.add_required_classes(dxfversion)
+    doc.update_all()
+
+    with open(path, 'wb') as stream:
+        tagwriter = FastBinaryTagWriter(stream, dxfversion=dxfversion, write_handles=handles,
+                                        encoding=doc.output_encoding)
+        tagwriter.write_signature()
+        doc.export_sections(tagwriter)
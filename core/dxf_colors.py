@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Colour resolution for DXF entities.
+
+DXF R12 entities and MTEXT inline codes use ACI (AutoCAD Color Index) values,
+while the exporter styling is defined as RGB tuples. Finding the closest ACI
+colour searches the whole 256-entry palette, so each RGB colour is resolved
+once and its ACI index and MTEXT colour code are kept in a ColorTable. The
+emitters read the precomputed values instead of resolving per entity.
+"""
+
+from typing import Dict, Iterable, Tuple
+
+try:
+    from ezdxf.colors import rgb2aci
+except ImportError:
+    rgb2aci = None
+
+RGB = Tuple[int, int, int]
+
+
+def resolve_aci(rgb: RGB) -> int:
+    """
+    Get the closest ACI color index for an RGB tuple (Euclidean distance).
+
+    Args:
+        rgb: (r, g, b) tuple
+
+    Returns:
+        ACI color index
+    """
+    if rgb2aci is not None:
+        return rgb2aci(rgb)
+
+    # Fallback for older ezdxf versions
+    r, g, b = rgb
+
+    # Standard Colors
+    if r == 255 and g == 0 and b == 0: return 1 # Red
+    if r == 255 and g == 255 and b == 0: return 2 # Yellow
+    if r == 0 and g == 255 and b == 0: return 3 # Green
+    if r == 0 and g == 255 and b == 255: return 4 # Cyan
+    if r == 0 and g == 0 and b == 255: return 5 # Blue
+    if r == 255 and g == 0 and b == 255: return 6 # Magenta
+    if r == 255 and g == 255 and b == 255: return 7 # White
+
+    # Manual mapping for our specific colors
+    if rgb == (152, 152, 152): return 8   # Dark Gray (Arrow)
+    if rgb == (140, 140, 140): return 252 # Darker Gray (Depth) - ACI 252
+    if rgb == (255, 97, 0): return 30     # Orange (Pipe Name)
+
+    # Simple approximation for grays
+    if r == g == b:
+        if r < 30: return 250
+        if r > 240: return 255
+        return 250 + int((r - 30) / 42) # Maps to 250-255 range partially
+
+    return 7 # Default to white/adaptive if unknown
+
+
+def mtext_color_code(aci: int) -> str:
+    """Return MTEXT formatting code for ACI Color: \\C<index>;"""
+    return f"\\C{aci};"
+
+
+# MTEXT codes for every ACI index (0 BYBLOCK ... 256 BYLAYER)
+_MTEXT_ACI_CODES = tuple(mtext_color_code(index) for index in range(257))
+
+
+class ColorTable:
+    """
+    Resolved ACI indices and MTEXT colour codes per RGB colour.
+
+    Colours passed to the constructor (the exporter styling constants) are
+    resolved up front; any other colour, e.g. one configured by the user, is
+    resolved on first use or explicitly through register().
+    """
+
+    def __init__(self, colors: Iterable[RGB] = ()):
+        """
+        Initialize the table.
+
+        Args:
+            colors: RGB tuples to resolve immediately
+        """
+        self._aci: Dict[RGB, int] = {}
+        self._mtext: Dict[RGB, str] = {}
+        for rgb in colors:
+            self.register(rgb)
+
+    def register(self, rgb: RGB) -> int:
+        """
+        Resolve an RGB colour and store its ACI index and MTEXT code.
+
+        Args:
+            rgb: (r, g, b) tuple
+
+        Returns:
+            ACI color index
+        """
+        rgb = tuple(int(c) for c in rgb)
+        aci = self._aci.get(rgb)
+        if aci is None:
+            aci = resolve_aci(rgb)
+            self._aci[rgb] = aci
+            self._mtext[rgb] = self.mtext_aci(aci)
+        return aci
+
+    def aci(self, rgb: RGB) -> int:
+        """
+        Get the ACI color index for an RGB colour.
+
+        Args:
+            rgb: (r, g, b) tuple
+
+        Returns:
+            ACI color index
+        """
+        try:
+            return self._aci[rgb]
+        except KeyError:
+            return self.register(rgb)
+
+    def mtext(self, rgb: RGB) -> str:
+        """
+        Get the MTEXT colour code (closest ACI, R12 compatible) for an RGB colour.
+
+        Args:
+            rgb: (r, g, b) tuple
+
+        Returns:
+            MTEXT formatting code, e.g. \\C30;
+        """
+        try:
+            return self._mtext[rgb]
+        except KeyError:
+            self.register(rgb)
+            return self._mtext[tuple(int(c) for c in rgb)]
+
+    @staticmethod
+    def mtext_aci(aci: int) -> str:
+        """
+        Get the MTEXT colour code for an ACI index.
+
+        Args:
+            aci: ACI color index
+
+        Returns:
+            MTEXT formatting code, e.g. \\C7;
+        """
+        if 0 <= aci <= 256:
+            return _MTEXT_ACI_CODES[aci]
+        return mtext_color_code(aci)
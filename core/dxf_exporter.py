@@ -24,16 +24,97 @@ try:
 except ImportError as e:
     raise ImportError(f"Failed to import bundled ezdxf library: {e}")
 
-from qgis.core import QgsVectorLayer, QgsFeature, QgsProject, QgsMessageLog, Qgis
-from .data_structures import ExportConfiguration, LayerMapping, GeometryType, FieldType
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from qgis.core import (
+    QgsVectorLayer, QgsVectorLayerFeatureSource, QgsFeature, QgsProject, QgsMessageLog, Qgis
+)
+from .data_structures import ExportConfiguration, LayerMapping, GeometryType
 from .field_definitions import SewageNetworkFields
 from .template_manager import TemplateManager
 from .geometry_processor import GeometryProcessor
 from .data_converter import DataConverter
 from .exceptions import ExportError, GeometryError, TemplateError, FilePermissionError
 from .error_recovery import ErrorRecoveryManager, ProgressTracker, ErrorSeverity, create_error_recovery_context, handle_feature_processing_error
-from .file_utils import validate_and_prepare_output_path
+from .file_utils import FileOperationHelper, validate_and_prepare_output_path
 from .error_messages import create_error_formatter
+from .dxf_stream_writer import DXFStreamDocument, DXFStreamFragment
+from .extraction_plan import ExtractionPlan, ExtractionPlanCache, EXPORT_CONVERTERS
+from .feature_records import FeatureRecordStore
+from .calculated_fields import CalculatedFieldBatch, PIPE_INPUT_FIELDS, calculate_pipe_fields
+from .feature_requests import export_feature_request
+from .geometry_checks import CHECK_MESSAGES, GeosValidityReport, check_line, check_point
+from .pipe_geometry import PipeGeometry, PipeGeometryBatch
+from .dxf_colors import ColorTable
+from .dxf_binary import save_document
+from .export_profiler import ExportProfiler, NULL_PROFILER, profile_report_path
+from .export_cache import ExportCache, cache_path, export_signature, feature_fingerprint
+from .tracing import get_tracer
+
+_trace = get_tracer('export')
+_trace_fields = get_tracer('export.fields')
+_trace_labels = get_tracer('export.labels')
+
+# Number of features between progress updates while streaming a layer
+FEATURE_CHUNK_SIZE = 500
+
+# Pipe record columns read or written by _calculate_pipe_columns
+PIPE_CALCULATION_COLUMNS = (
+    'slope', 'upstream_invert_elev', 'downstream_invert_elev', 'length',
+    'upstream_ground_elev', 'downstream_ground_elev',
+    'calculated_slope', 'upstream_depth', 'downstream_depth',
+)
+
+
+def dxf_output_format(config: ExportConfiguration) -> str:
+    """Get the ezdxf save format ('asc' or 'bin') of an export."""
+    return 'bin' if config.binary_dxf else 'asc'
+
+
+class LayerSnapshot:
+    """
+    Layer state taken on the main thread for a background export.
+    
+    Holds a feature source snapshot plus the layer properties the export
+    reads (id, name, fields, feature count) and provides that part of the
+    QgsVectorLayer API, so the worker thread never touches the layer itself.
+    """
+    
+    def __init__(self, layer: QgsVectorLayer):
+        """
+        Snapshot a layer. Must be called on the main thread.
+        
+        Args:
+            layer: Source layer
+        """
+        self._id = layer.id()
+        self._name = layer.name()
+        self._fields = layer.fields()
+        self._feature_count = layer.featureCount()
+        self._source = QgsVectorLayerFeatureSource(layer)
+    
+    def id(self) -> str:
+        return self._id
+    
+    def name(self) -> str:
+        return self._name
+    
+    def fields(self):
+        return self._fields
+    
+    def featureCount(self) -> int:
+        return self._feature_count
+    
+    def isValid(self) -> bool:
+        return True
+    
+    def getFeatures(self, request):
+        return self._source.getFeatures(request)
 
 
 class DXFExporter:
@@ -53,11 +134,23 @@ class DXFExporter:
     COLOR_PIPE = (166, 166, 255)       # Light blue #a6a6ff
     COLOR_PIPE_NAME = (255, 97, 0)     # Orange #ff6100
     COLOR_DEPTH_LENGTH = (140, 140, 140)  # Darker Gray #8c8c8c
-    COLOR_DEPTH_LENGTH = (140, 140, 140)  # Darker Gray #8c8c8c
     COLOR_WHITE = (255, 255, 255)      # White for other labels
     COLOR_RED = (255, 0, 0)            # Red for Tubo de Queda (TC)
     COLOR_BLUE = (0, 0, 255)           # Blue for Degrau (D)
     
+    # Resolved ACI indices / MTEXT codes of the colors above; other colors
+    # are added to the table on first use
+    COLORS = ColorTable((COLOR_ARROW, COLOR_PIPE, COLOR_PIPE_NAME, COLOR_DEPTH_LENGTH,
+                         COLOR_WHITE, COLOR_RED, COLOR_BLUE))
+    ACI_ARROW = COLORS.aci(COLOR_ARROW)
+    ACI_PIPE_NAME = COLORS.aci(COLOR_PIPE_NAME)
+    ACI_DEPTH_LENGTH = COLORS.aci(COLOR_DEPTH_LENGTH)
+    ACI_RED = COLORS.aci(COLOR_RED)
+    ACI_BLUE = COLORS.aci(COLOR_BLUE)
+    MTEXT_PIPE_NAME = COLORS.mtext(COLOR_PIPE_NAME)
+    MTEXT_DEPTH_LENGTH = COLORS.mtext(COLOR_DEPTH_LENGTH)
+    MTEXT_ADAPTIVE = ColorTable.mtext_aci(7)
+    
     # Dimensions
     DROP_CIRCLE_RADIUS = 1.0           # Base radius for drop markers (scaled by config)
     
@@ -70,45 +163,17 @@ class DXFExporter:
     @staticmethod
     def format_mtext_color_rgb(rgb_tuple):
         """Return MTEXT formatting code for closest ACI Color (R12 compatible): \C<index>;"""
-        # Convert RGB to closest ACI index for R12 compatibility
-        aci = DXFExporter.get_aci_color(rgb_tuple)
-        return f"\\C{aci};"
+        return DXFExporter.COLORS.mtext(rgb_tuple)
 
     @staticmethod
     def format_mtext_color_aci(aci_index):
         """Return MTEXT formatting code for ACI Color: \C7;"""
-        return f"\\C{aci_index};"
+        return ColorTable.mtext_aci(aci_index)
         
     @staticmethod
     def get_aci_color(rgb_tuple):
-        """Get closest ACI color index from RGB tuple using Euclidean distance."""
-        try:
-            return ezdxf.colors.rgb2aci(rgb_tuple)
-        except AttributeError:
-            # Fallback for older ezdxf versions
-            r, g, b = rgb_tuple
-            
-            # Standard Colors
-            if r == 255 and g == 0 and b == 0: return 1 # Red
-            if r == 255 and g == 255 and b == 0: return 2 # Yellow
-            if r == 0 and g == 255 and b == 0: return 3 # Green
-            if r == 0 and g == 255 and b == 255: return 4 # Cyan
-            if r == 0 and g == 0 and b == 255: return 5 # Blue
-            if r == 255 and g == 0 and b == 255: return 6 # Magenta
-            if r == 255 and g == 255 and b == 255: return 7 # White
-            
-            # Manual mapping for our specific colors
-            if rgb_tuple == (152, 152, 152): return 8   # Dark Gray (Arrow)
-            if rgb_tuple == (140, 140, 140): return 252 # Darker Gray (Depth) - ACI 252
-            if rgb_tuple == (255, 97, 0): return 30     # Orange (Pipe Name)
-            
-            # Simple approximation for grays
-            if r == g == b:
-                if r < 30: return 250
-                if r > 240: return 255
-                return 250 + int((r - 30) / 42) # Maps to 250-255 range partially
-                
-            return 7 # Default to white/adaptive if unknown
+        """Get closest ACI color index from RGB tuple (resolved once per colour)."""
+        return DXFExporter.COLORS.aci(rgb_tuple)
     
     def __init__(self, template_manager: TemplateManager = None, 
                  progress_callback: Optional[callable] = None):
@@ -127,6 +192,16 @@ class DXFExporter:
         self.data_converter = DataConverter()
         self.geometry_processor = GeometryProcessor()
         self.data_converter = DataConverter()
+        self._extraction_plans = ExtractionPlanCache(EXPORT_CONVERTERS)
+        self._feature_sources: Dict[str, LayerSnapshot] = {}
+        # Replaced by an ExportProfiler for exports with profile_export set
+        self.profiler = NULL_PROFILER
+        # Entity cache of the running incremental export
+        self._export_cache: Optional[ExportCache] = None
+        # Calculated pipe values outside their field ranges, per field (current export)
+        self.out_of_range_counts: Dict[str, int] = {}
+        # GEOS validity per layer id, with geos_validation set (current export)
+        self._geos_reports: Dict[str, GeosValidityReport] = {}
         
         # Export statistics
         self.stats = {
@@ -163,14 +238,9 @@ class DXFExporter:
             except:
                 pass
             
-            # Load or create DXF document
-            doc = self.template_manager.load_template(config.template_path)
-            
-            # Set up document properties
-            self.template_manager.setup_document_properties(doc)
-            
-            # Create layers with prefix
-            self.template_manager.create_layers_with_prefix(doc, config.layer_prefix)
+            # Load or create DXF document, with document properties and
+            # prefixed layers already set up
+            doc = self.template_manager.load_template(config.template_path, config.layer_prefix)
             
             # Get model space
             msp = doc.modelspace()
@@ -188,7 +258,7 @@ class DXFExporter:
                     return False, "Failed to export junctions", self.stats
             
             # Save DXF file
-            doc.saveas(config.output_path)
+            save_document(doc, config.output_path, dxf_output_format(config))
             
             # Generate success message
             message = self._generate_success_message(config.output_path)
@@ -234,7 +304,7 @@ class DXFExporter:
             arrows_layer_name = self.template_manager.get_layer_name('SETA_FLUXO', config.layer_prefix)
             
             # Process each pipe feature
-            for feature in pipes_layer.getFeatures():
+            for feature in pipes_layer.getFeatures(export_feature_request(pipes_layer, config.pipes_mapping)):
                 try:
                     # Extract feature data using mappings
                     pipe_data = self._extract_pipe_data(feature, config.pipes_mapping)
@@ -331,7 +401,7 @@ class DXFExporter:
             elevation_layer_name = self.template_manager.get_layer_name('LEG_PV', config.layer_prefix)
             
             # Process each junction feature
-            for feature in junctions_layer.getFeatures():
+            for feature in junctions_layer.getFeatures(export_feature_request(junctions_layer, config.junctions_mapping)):
                 try:
                     # Extract feature data using mappings
                     junction_data = self._extract_junction_data(feature, config.junctions_mapping)
@@ -400,32 +470,25 @@ class DXFExporter:
             pipe_data = {}
             
             # Extract mapped fields
-            print(f"DEBUG: About to iterate over field_mappings in _extract_pipe_data")
-            print(f"DEBUG: mapping.field_mappings type: {type(mapping.field_mappings)}")
-            print(f"DEBUG: mapping.field_mappings: {mapping.field_mappings}")
-            print(f"DEBUG: mapping.field_mappings.items() type: {type(mapping.field_mappings.items())}")
+            _trace_fields.debug("_extract_pipe_data field_mappings: %s", mapping.field_mappings)
             
             try:
                 # Ensure field_mappings is actually a dictionary
                 if not isinstance(mapping.field_mappings, dict):
-                    print(f"ERROR: field_mappings is not a dict: {type(mapping.field_mappings)}")
+                    _trace_fields.warning("field_mappings is not a dict: %s", type(mapping.field_mappings))
                     # Try to convert if it's a proper dictionary-like sequence
                     if hasattr(mapping.field_mappings, 'items'):
                         mapping.field_mappings = dict(mapping.field_mappings)
-                        print(f"DEBUG: Converted field_mappings to dict: {mapping.field_mappings}")
+                        _trace_fields.debug("Converted field_mappings to dict: %s", mapping.field_mappings)
                     else:
                         # Fallback: create empty dict if completely invalid
                         mapping.field_mappings = {}
-                        print(f"DEBUG: Fallback: created empty field_mappings dict")
+                        _trace_fields.debug("Fallback: created empty field_mappings dict")
                 
                 items_list = list(mapping.field_mappings.items())
-                print(f"DEBUG: items_list: {items_list}")
-                print(f"DEBUG: items_list length: {len(items_list)}")
-                if items_list:
-                    print(f"DEBUG: first item: {items_list[0]}")
-                    print(f"DEBUG: first item type: {type(items_list[0])}")
+                _trace_fields.debug("items_list: %s", items_list)
             except Exception as e:
-                print(f"DEBUG: Error converting items to list: {e}")
+                _trace_fields.debug("Error converting items to list: %s", e)
             
             for required_field, layer_field in mapping.field_mappings.items():
                 if layer_field in feature.fields().names():
@@ -479,7 +542,7 @@ class DXFExporter:
             # Extract mapped fields
             # Ensure field_mappings is actually a dictionary
             if not isinstance(mapping.field_mappings, dict):
-                print(f"ERROR: junction field_mappings is not a dict: {type(mapping.field_mappings)}")
+                _trace_fields.warning("junction field_mappings is not a dict: %s", type(mapping.field_mappings))
                 if hasattr(mapping.field_mappings, 'items'):
                     mapping.field_mappings = dict(mapping.field_mappings)
                 else:
@@ -530,39 +593,82 @@ class DXFExporter:
         Returns:
             Updated pipe data with calculated fields
         """
-        # Calculate slope if not provided
-        if ('slope' not in pipe_data or pipe_data['slope'] == 0) and all(
-            field in pipe_data for field in ['upstream_invert_elev', 'downstream_invert_elev', 'length']
-        ):
-            try:
-                upstream_invert = float(pipe_data['upstream_invert_elev'])
-                downstream_invert = float(pipe_data['downstream_invert_elev'])
-                length = float(pipe_data['length'])
-                
-                if length > 0:
-                    calculated_slope = (upstream_invert - downstream_invert) / length
-                    pipe_data['calculated_slope'] = calculated_slope
-                    if 'slope' not in pipe_data:
-                        pipe_data['slope'] = calculated_slope
-            except (ValueError, TypeError, ZeroDivisionError):
-                pass
+        batch = calculate_pipe_fields(*([pipe_data.get(name)] for name in PIPE_INPUT_FIELDS), use_numpy=False)
+        pipe_data.update(self._calculated_pipe_values(pipe_data, batch, 0))
+        return pipe_data
+    
+    def _calculated_pipe_values(self, pipe_data, batch: CalculatedFieldBatch, index: int) -> Dict[str, float]:
+        """
+        Get the calculated values stored for one pipe of a batch.
         
-        # Calculate depths if ground elevations available
-        if all(field in pipe_data for field in ['upstream_ground_elev', 'upstream_invert_elev']):
-            try:
-                upstream_depth = float(pipe_data['upstream_ground_elev']) - float(pipe_data['upstream_invert_elev'])
-                pipe_data['upstream_depth'] = max(0, upstream_depth)
-            except (ValueError, TypeError):
-                pass
+        The calculated slope is only stored for pipes without a slope (or a
+        slope of 0); depths are stored clamped at 0.0. Values that could not
+        be calculated (missing inputs, length <= 0) are left out.
         
-        if all(field in pipe_data for field in ['downstream_ground_elev', 'downstream_invert_elev']):
-            try:
-                downstream_depth = float(pipe_data['downstream_ground_elev']) - float(pipe_data['downstream_invert_elev'])
-                pipe_data['downstream_depth'] = max(0, downstream_depth)
-            except (ValueError, TypeError):
-                pass
+        Args:
+            pipe_data: Pipe data (dictionary or FeatureRecord)
+            batch: Calculated fields of the batch holding the pipe
+            index: Row of the pipe in the batch
+            
+        Returns:
+            Field values to store
+        """
+        calculated = batch.row(index)
+        values = {}
+        slope = calculated['calculated_slope']
+        if slope is not None and ('slope' not in pipe_data or pipe_data['slope'] == 0):
+            values['calculated_slope'] = slope
+            if 'slope' not in pipe_data:
+                values['slope'] = slope
+        for name in ('upstream_depth', 'downstream_depth'):
+            if calculated[name] is not None:
+                values[name] = max(0.0, calculated[name])
+        return values
+    
+    def _calculate_pipe_columns(self, records: FeatureRecordStore) -> Optional[CalculatedFieldBatch]:
+        """
+        Calculate derived fields for all pipes of a record store.
         
-        return pipe_data
+        One calculate_pipe_fields() pass over the columns, with the same
+        results as _calculate_pipe_fields per row. Double columns are handed
+        to the NumPy kernel as they are; otherwise the values are converted
+        and written back row by row. Out-of-range values are counted in
+        out_of_range_counts.
+        
+        Args:
+            records: Pipe records (see FeatureRecordStore.for_plan)
+            
+        Returns:
+            Calculated fields of the records, None for an empty store
+        """
+        if not len(records):
+            return None
+        
+        if NUMPY_AVAILABLE and all(records.is_double(name) for name in PIPE_CALCULATION_COLUMNS):
+            batch = calculate_pipe_fields(*(records.float_array(name) for name in PIPE_INPUT_FIELDS),
+                                          use_numpy=True)
+            # NULL slopes are NaN and compare unequal to 0, as in _calculate_pipe_fields
+            stored = {'calculated_slope': (records.float_array('slope') == 0) & batch.valid('calculated_slope')}
+            records.assign('calculated_slope', stored['calculated_slope'], batch.values['calculated_slope'])
+            for name in ('upstream_depth', 'downstream_depth'):
+                stored[name] = batch.valid(name)
+                records.assign(name, stored[name], batch.filled(name))
+            counts = {name: int((batch.out_of_range[name] & mask).sum()) for name, mask in stored.items()}
+        else:
+            batch = calculate_pipe_fields(*([record.get(name) for record in records] for name in PIPE_INPUT_FIELDS),
+                                          use_numpy=False)
+            counts = {}
+            for record in records:
+                for name, value in self._calculated_pipe_values(record, batch, record.index).items():
+                    records.set_value(record.index, name, value)
+                    if name in batch.out_of_range and batch.out_of_range[name][record.index]:
+                        counts[name] = counts.get(name, 0) + 1
+        
+        # Only values actually stored count (the calculated slope is not stored for pipes with a slope)
+        for name, count in counts.items():
+            if count:
+                self.out_of_range_counts[name] = self.out_of_range_counts.get(name, 0) + count
+        return batch
     
     def _calculate_junction_fields(self, junction_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -730,7 +836,7 @@ class DXFExporter:
                 insert=(arrow_x, arrow_y),
                 dxfattribs={
                     'layer': layer_name,
-                    'color': self.get_aci_color(self.COLOR_ARROW),
+                    'color': self.ACI_ARROW,
                     'xscale': arrow_scale,
                     'yscale': arrow_scale,
                     'rotation': rotation
@@ -940,8 +1046,9 @@ class DXFExporter:
 
     def _add_enhanced_pipe_label(self, msp, p1: Any, p2: Any, 
                                pipe_data: Dict[str, Any], layer_name: str, 
-                               scale_factor: float, config: ExportConfiguration):
-        """Add MTEXT label for pipe."""
+                               scale_factor: float, config: ExportConfiguration,
+                               geom: Optional[PipeGeometry] = None):
+        """Add MTEXT label for pipe (placement read from geom when given)."""
         try:
             from .data_structures import LabelStyle
             from .utils.geometry_utils import (
@@ -981,25 +1088,30 @@ class DXFExporter:
                 drop_str = f"{drop_type} {height_str}".strip()
             
             # Geometry
-            angle = get_cad_angle(p1, p2)
-            rotation = get_readable_rotation(angle)
-            
-            # Calculate Visual Up Vector based on TEXT rotation (not just line geometry)
-            # Rotation is in degrees. +90 is "Up" relative to text reading direction
-            rad_up = math.radians(rotation + 90)
-            up_x = math.cos(rad_up)
-            up_y = math.sin(rad_up)
-            
-            # Midpoint
-            mid_x = (p1.x() + p2.x()) / 2.0
-            mid_y = (p1.y() + p2.y()) / 2.0
+            if geom is not None:
+                rotation = geom.label_rotation
+                up_x, up_y = geom.up_x, geom.up_y
+                mid_x, mid_y = geom.mid_x, geom.mid_y
+            else:
+                angle = get_cad_angle(p1, p2)
+                rotation = get_readable_rotation(angle)
+                
+                # Calculate Visual Up Vector based on TEXT rotation (not just line geometry)
+                # Rotation is in degrees. +90 is "Up" relative to text reading direction
+                rad_up = math.radians(rotation + 90)
+                up_x = math.cos(rad_up)
+                up_y = math.sin(rad_up)
+                
+                # Midpoint
+                mid_x = (p1.x() + p2.x()) / 2.0
+                mid_y = (p1.y() + p2.y()) / 2.0
             
             text_height = 2.0 * scale_factor / 1000.0
             
             # Prepare color codes
-            c_name = self.format_mtext_color_rgb(self.COLOR_PIPE_NAME)
-            c_len = self.format_mtext_color_rgb(self.COLOR_DEPTH_LENGTH)
-            c_adaptive = self.format_mtext_color_aci(7)
+            c_name = self.MTEXT_PIPE_NAME
+            c_len = self.MTEXT_DEPTH_LENGTH
+            c_adaptive = self.MTEXT_ADAPTIVE
             
             if config.label_style == LabelStyle.COMPACT:
                 # Split Style: 
@@ -1086,8 +1198,11 @@ class DXFExporter:
                 )
                 
         except Exception as e:
-            from qgis.core import QgsMessageLog, Qgis
-            QgsMessageLog.logMessage(f"Error adding MTEXT label: {e}", "RedBasica Export", Qgis.Warning)
+            self.error_manager.record_error(
+                ErrorSeverity.WARNING,
+                f"Error adding MTEXT label: {e}",
+                error_type="label_creation_failed"
+            )
 
 
     def _add_multileader_node_label(self, msp, point: Any, 
@@ -1305,13 +1420,16 @@ class DXFExporter:
         Returns:
             Tuple of (success, message, statistics)
         """
-        print(f"DEBUG: export_with_error_handling called")
-        print(f"DEBUG: config: {config}")
-        print(f"DEBUG: config.pipes_mapping: {config.pipes_mapping}")
-        print(f"DEBUG: config.junctions_mapping: {config.junctions_mapping}")
+        _trace.debug("export_with_error_handling called with config: %s", config)
         
-        progress = ProgressTracker(7, self.progress_callback)
+        self.profiler = ExportProfiler(config.profile_memory) if config.profile_export else NULL_PROFILER
+        self.profiler.start()
+        progress = ProgressTracker(7, self.progress_callback, self.profiler)
         progress.start()
+        doc = None
+        self._export_cache = None
+        self.out_of_range_counts = {}
+        self._geos_reports = {}
         
         try:
             # Step 1: Validate and prepare output path
@@ -1324,48 +1442,75 @@ class DXFExporter:
                                                                  file_path=config.output_path, 
                                                                  operation="write")
                 progress.finish(False, "Path validation failed")
-                return False, error_msg, self.error_manager.get_error_summary()
+                return False, error_msg, self._export_summary(config)
             
             # Step 2: Initialize DXF document
             progress.update(2, "Initializing DXF document...")
             try:
-                doc = self._initialize_dxf_document(config)
+                with self.profiler.stage('template_load'):
+                    doc = self._initialize_dxf_document(config)
             except (TemplateError, ExportError) as e:
                 error_msg = self.error_formatter.format_export_error("template_not_found",
                                                                    template_path=config.template_path or "default")
                 progress.finish(False, "DXF initialization failed")
-                return False, error_msg, self.error_manager.get_error_summary()
+                return False, error_msg, self._export_summary(config)
             
             # Step 3: Set up layers and styles
             progress.update(3, "Setting up DXF layers...")
             try:
-                self._setup_dxf_layers(doc, config.layer_prefix)
+                # In-memory documents come from the cached template image,
+                # which already has the layers, styles and blocks
+                if config.streaming_export:
+                    with self.profiler.stage('layer_setup'):
+                        self._setup_dxf_layers(doc, config.layer_prefix)
+                        # Streamed files need every block before the first entity
+                        self._ensure_arrow_block(doc, f"{config.layer_prefix}SETA", config.scale_factor / 2000.0)
+                        self._ensure_drop_marker_block(doc)
             except ExportError as e:
                 self.error_manager.record_error(
                     ErrorSeverity.ERROR,
                     f"Failed to setup DXF layers: {e}",
                     error_type="layer_setup_failed"
                 )
+                self._abort_stream(doc)
                 progress.finish(False, "Layer setup failed")
-                return False, str(e), self.error_manager.get_error_summary()
+                return False, str(e), self._export_summary(config)
+            
+            self._export_cache = self._open_export_cache(doc, config)
             
             # Step 4: Export pipes
             progress.update(4, "Exporting pipe network...")
-            pipes_stats = self._export_pipes_with_recovery(doc, config)
+            pipes_stats = self._export_pipes_with_recovery(doc, config, progress, 4)
+            self.profiler.record_features('pipes', pipes_stats, 4)
             
             # Step 5: Export junctions
             progress.update(5, "Exporting junctions...")
-            junctions_stats = self._export_junctions_with_recovery(doc, config)
+            junctions_stats = self._export_junctions_with_recovery(doc, config, progress, 5)
+            self.profiler.record_features('junctions', junctions_stats, 5)
+            
+            if self.error_manager.cancelled:
+                self._abort_stream(doc)
+                progress.finish(False, "Export cancelled")
+                return False, "Export cancelled by user", self._export_summary(config)
             
             # Step 6: Save DXF file
             progress.update(6, "Saving DXF file...")
             try:
-                doc.saveas(config.output_path)
+                with self.profiler.stage('save'):
+                    if isinstance(doc, DXFStreamDocument):
+                        doc.saveas(config.output_path, fmt=dxf_output_format(config))
+                    else:
+                        save_document(doc, config.output_path, dxf_output_format(config))
+                valid, integrity_error = FileOperationHelper.verify_file_integrity(config.output_path)
+                if not valid:
+                    raise ExportError(f"Saved file failed the integrity check: {integrity_error}")
+                self._close_export_cache(commit=True)
             except Exception as e:
                 error_msg = self.error_formatter.format_export_error("export_failed",
                                                                    error_details=str(e))
+                self._abort_stream(doc)
                 progress.finish(False, "File save failed")
-                return False, error_msg, self.error_manager.get_error_summary()
+                return False, error_msg, self._export_summary(config)
             
             # Step 7: Generate final report
             progress.update(7, "Generating export report...")
@@ -1384,10 +1529,20 @@ class DXFExporter:
                     total_processed, total_features, total_errors, total_warnings
                 )
                 success_msg += f"\n\nDXF file saved to: {config.output_path}"
-            
+            if self._export_cache is not None:
+                cache_stats = self._export_cache.statistics()
+                success_msg += (f"\nIncremental export: {cache_stats['reused']} features reused, "
+                                f"{cache_stats['rendered']} rendered, {cache_stats['removed']} removed")
+            if self.out_of_range_counts:
+                success_msg += "\nCalculated values outside the field ranges: " + ", ".join(
+                    f"{name} {count}" for name, count in sorted(self.out_of_range_counts.items()))
+            if self.profiler.enabled:
+                success_msg += f"\nProfile report: {profile_report_path(config.output_path)}"
+            
+            self.error_manager.flush_log()
             progress.finish(True, "Export completed")
             
-            return True, success_msg, self.error_manager.get_error_summary()
+            return True, success_msg, self._export_summary(config)
             
         except Exception as e:
             # Catch-all for unexpected errors
@@ -1400,29 +1555,156 @@ class DXFExporter:
             
             error_msg = self.error_formatter.format_export_error("export_failed",
                                                                error_details=str(e))
+            self._abort_stream(doc)
             progress.finish(False, "Export failed with unexpected error")
             
-            return False, error_msg, self.error_manager.get_error_summary()
+            return False, error_msg, self._export_summary(config)
+    
+    def _export_summary(self, config: ExportConfiguration) -> Dict[str, Any]:
+        """
+        Get the error summary of an export, with the profile report when profiling.
+        
+        The profile report is also written as JSON next to the DXF file.
+        
+        Args:
+            config: Export configuration
+            
+        Returns:
+            Error summary dictionary (see ErrorRecoveryManager.get_error_summary)
+        """
+        if not self.profiler.enabled:
+            return self._error_summary()
+        
+        self.profiler.stop()
+        report_path = profile_report_path(config.output_path)
+        try:
+            self.profiler.write_json(report_path, {
+                'output_path': config.output_path,
+                'streaming_export': config.streaming_export,
+                'parallel_workers': config.parallel_workers,
+                'export_mode': config.export_mode.name,
+                'binary_dxf': config.binary_dxf,
+            })
+        except OSError as e:
+            report_path = None
+            self.error_manager.record_error(
+                ErrorSeverity.WARNING,
+                f"Failed to write profile report: {e}",
+                error_type="profile_report_failed"
+            )
+        
+        summary = self._error_summary()
+        summary['profile'] = self.profiler.report()
+        summary['profile_path'] = report_path
+        return summary
+    
+    def _error_summary(self) -> Dict[str, Any]:
+        """Get the error summary, with the cache statistics of an incremental export."""
+        summary = self.error_manager.get_error_summary()
+        if self._export_cache is not None:
+            summary['incremental'] = self._export_cache.statistics()
+        return summary
+    
+    def _open_export_cache(self, doc, config: ExportConfiguration) -> Optional[ExportCache]:
+        """
+        Open the entity cache of an incremental export.
+        
+        Args:
+            doc: DXF document with its layers and blocks set up
+            config: Export configuration
+            
+        Returns:
+            ExportCache, or None if the export is not incremental or the cache
+            cannot be opened (every feature is then rendered)
+        """
+        if not config.incremental_export:
+            return None
+        if not isinstance(doc, DXFStreamDocument):
+            self.error_manager.record_error(
+                ErrorSeverity.WARNING,
+                "Incremental export requires streaming export; exporting all features",
+                error_type="incremental_export_unavailable"
+            )
+            return None
+        
+        path = cache_path(config.output_path)
+        try:
+            signature = export_signature(config, [block.name for block in doc.blocks],
+                                         self.template_manager.default_text_style)
+            cache = ExportCache(path, signature)
+        except Exception as e:
+            self.error_manager.record_error(
+                ErrorSeverity.WARNING,
+                f"Incremental export cache unavailable, exporting all features: {e}",
+                error_type="incremental_export_unavailable"
+            )
+            return None
+        
+        self.error_manager.record_error(
+            ErrorSeverity.INFO,
+            f"Using incremental export cache: {path}"
+            + (" (export settings changed, cache rebuilt)" if cache.invalidated else ""),
+            error_type="export_cache_opened"
+        )
+        return cache
+    
+    def _close_export_cache(self, commit: bool) -> None:
+        """
+        Commit (after a successful save) or roll back the cache changes of this export.
+        
+        Args:
+            commit: Keep the entities rendered by this export
+        """
+        if self._export_cache is None:
+            return
+        try:
+            if commit:
+                self._export_cache.commit()
+            else:
+                self._export_cache.rollback()
+        except Exception as e:
+            self.error_manager.record_error(
+                ErrorSeverity.WARNING,
+                f"Failed to update the incremental export cache: {e}",
+                error_type="export_cache_failed"
+            )
     
     def _initialize_dxf_document(self, config: ExportConfiguration):
         """Initialize DXF document with error handling."""
         try:
-            if config.template_path and os.path.exists(config.template_path):
-                # Load from template
-                doc = ezdxf.readfile(config.template_path)
+            if config.streaming_export:
+                # Entities are written straight to disk (DXF R12), the
+                # template is not used since nothing is kept in memory
+                doc = DXFStreamDocument(config.output_path, binary=config.binary_dxf)
                 self.error_manager.record_error(
                     ErrorSeverity.INFO,
-                    f"Loaded template: {config.template_path}",
-                    error_type="template_loaded"
+                    "Created streaming DXF R12 document",
+                    error_type="document_created"
                 )
             else:
-                # Create new document
-                doc = ezdxf.new('R2018')
-                self.error_manager.record_error(
-                    ErrorSeverity.INFO,
-                    "Created new DXF document (no template)",
-                    error_type="document_created"
+                # Documents are cloned from a cached image that already has
+                # the export layers, styles and blocks
+                use_template = bool(config.template_path and os.path.exists(config.template_path))
+                doc = self.template_manager.load_prepared_document(
+                    config.template_path if use_template else None,
+                    lambda: self._prepare_document(
+                        ezdxf.readfile(config.template_path) if use_template else ezdxf.new('R2018'),
+                        config
+                    ),
+                    ('export', config.layer_prefix, config.scale_factor, config.include_arrows)
                 )
+                if use_template:
+                    self.error_manager.record_error(
+                        ErrorSeverity.INFO,
+                        f"Loaded template: {config.template_path}",
+                        error_type="template_loaded"
+                    )
+                else:
+                    self.error_manager.record_error(
+                        ErrorSeverity.INFO,
+                        "Created new DXF document (no template)",
+                        error_type="document_created"
+                    )
             
             # Set up application ID for extended data
             if 'REDBASICA_EXPORT' not in doc.appids:
@@ -1433,6 +1715,34 @@ class DXFExporter:
         except Exception as e:
             raise TemplateError(config.template_path or "default", str(e))
     
+    def _prepare_document(self, doc, config: ExportConfiguration):
+        """
+        Add the export layers, styles and blocks to a new document.
+        
+        The result is cached as a template image (see TemplateManager), so
+        this runs once per template and setting combination in a session.
+        
+        Args:
+            doc: Document loaded from the template or created from scratch
+            config: Export configuration
+            
+        Returns:
+            The prepared document
+        """
+        if 'REDBASICA_EXPORT' not in doc.appids:
+            doc.appids.new('REDBASICA_EXPORT')
+        self._setup_dxf_layers(doc, config.layer_prefix)
+        if config.include_arrows:
+            self._ensure_arrow_block(doc, f"{config.layer_prefix}SETA", config.scale_factor / 2000.0)
+        self._ensure_drop_marker_block(doc)
+        return doc
+    
+    def _abort_stream(self, doc) -> None:
+        """Discard the partially written file and cache changes of a failed streaming export."""
+        self._close_export_cache(commit=False)
+        if isinstance(doc, DXFStreamDocument):
+            doc.abort()
+    
     def _setup_dxf_layers(self, doc, layer_prefix: str = "ESG_"):
         """Set up DXF layers with error handling."""
         try:
@@ -1465,19 +1775,17 @@ class DXFExporter:
         except Exception as e:
             raise ExportError(f"Failed to setup DXF layers: {e}")
     
-    def _export_pipes_with_recovery(self, doc, config: ExportConfiguration):
+    def _export_pipes_with_recovery(self, doc, config: ExportConfiguration,
+                                    progress: Optional[ProgressTracker] = None, step: int = 0):
         """Export pipes with error recovery."""
         from .error_recovery import ProcessingStats
         
-        print(f"DEBUG: _export_pipes_with_recovery called")
-        print(f"DEBUG: config type: {type(config)}")
-        print(f"DEBUG: config.pipes_mapping: {config.pipes_mapping}")
-        print(f"DEBUG: config.pipes_mapping type: {type(config.pipes_mapping)}")
+        _trace.debug("_export_pipes_with_recovery called, pipes_mapping: %s", config.pipes_mapping)
         
         stats = ProcessingStats()
         
         if not config.pipes_mapping or not config.pipes_mapping.layer_id:
-            print(f"DEBUG: No pipes layer configured")
+            _trace.debug("No pipes layer configured")
             self.error_manager.record_error(
                 ErrorSeverity.WARNING,
                 "No pipes layer configured - skipping pipe export",
@@ -1486,11 +1794,9 @@ class DXFExporter:
             return stats
         
         # Get pipes layer
-        project = QgsProject.instance()
-        print(f"DEBUG: Getting pipes layer with ID: {config.pipes_mapping.layer_id}")
-        pipes_layer = project.mapLayer(config.pipes_mapping.layer_id)
-        print(f"DEBUG: pipes_layer: {pipes_layer}")
-        print(f"DEBUG: pipes_layer.isValid(): {pipes_layer.isValid() if pipes_layer else 'N/A'}")
+        _trace.debug("Getting pipes layer with ID: %s", config.pipes_mapping.layer_id)
+        pipes_layer = self._export_layer(config.pipes_mapping.layer_id)
+        _trace.debug("pipes_layer: %s (valid: %s)", pipes_layer, pipes_layer.isValid() if pipes_layer else 'N/A')
         
         if not pipes_layer or not pipes_layer.isValid():
             self.error_manager.record_error(
@@ -1500,64 +1806,374 @@ class DXFExporter:
             )
             return stats
         
-        # Process features with error recovery
-        print(f"DEBUG: Getting features from pipes layer")
-        features = list(pipes_layer.getFeatures())
-        print(f"DEBUG: Got {len(features)} features")
-        stats.total_features = len(features)
+        # Process features with error recovery, streamed from the provider
+        features = self._stream_features(
+            pipes_layer, export_feature_request(pipes_layer, config.pipes_mapping),
+            stats, progress, step, "Exporting pipes"
+        )
+        _trace.debug("Pipes layer reports %d features", stats.total_features)
         
-        print(f"DEBUG: Getting modelspace")
-        msp = doc.modelspace()
-        print(f"DEBUG: Starting feature loop")
+        msp = self.profiler.wrap_layout(doc.modelspace())
+        plan = self._get_extraction_plan(config.pipes_mapping, pipes_layer.fields().names())
+
+        if self._export_cache is not None:
+            # Only changed pipes are rendered, so workers are not started
+            return self._export_pipes_incremental(doc, self._export_cache, config, pipes_layer,
+                                                  features, plan, stats)
+
+        if config.parallel_workers > 1 and isinstance(doc, DXFStreamDocument):
+            renderer = self._start_parallel_renderer(doc, config)
+            if renderer is not None:
+                return self._export_pipes_parallel(doc, renderer, config, pipes_layer,
+                                                   features, plan, stats)
+
+        # Pipes wait here until a chunk is complete so their derived fields
+        # and placement geometry can be computed in batched column passes
+        records = FeatureRecordStore.for_plan(plan)
+        pending = []
+        geometry_stage = self.profiler.stage('geometry')
+        geos_report = self._geos_report(pipes_layer, config)
         
         for i, feature in enumerate(features):
-            print(f"DEBUG: Processing feature {i+1}/{len(features)}")
+            _trace.debug("Processing feature %d/%d", i + 1, stats.total_features)
             if not self.error_manager.should_continue:
                 break
                 
             try:
-                context = create_error_recovery_context(feature, pipes_layer.name(), "pipe_export")
-                
-                print(f"DEBUG: About to call _extract_feature_data_safe")
-                print(f"DEBUG: feature id: {feature.id()}")
-                print(f"DEBUG: config.pipes_mapping type: {type(config.pipes_mapping)}")
-                print(f"DEBUG: config.pipes_mapping.field_mappings: {config.pipes_mapping.field_mappings}")
-                
                 # Extract feature data with error handling
                 feature_data = self._extract_feature_data_safe(
-                    feature, config.pipes_mapping, "pipes"
+                    feature, config.pipes_mapping, "pipes", plan, records
                 )
-                print(f"DEBUG: _extract_feature_data_safe returned: {feature_data}")
+                _trace_fields.debug("_extract_feature_data_safe returned: %s", feature_data)
                 
                 if feature_data is None:
                     stats.skipped_features += 1
                     continue
                 
-                # Calculate derived fields (slope, depths, etc.)
-                feature_data = self._calculate_pipe_fields(feature_data)
-                print(f"DEBUG: After _calculate_pipe_fields: {feature_data}")
+                with geometry_stage:
+                    line_coords = self._pipe_line_coords(feature, geos_report)
+                pending.append((feature, feature_data, line_coords))
                 
+            except Exception as e:
+                # A record stored before the failure stays unused in the chunk
+                if not self._handle_export_error(e, feature, pipes_layer.name(), "pipe_export", stats):
+                    break
+                continue
+            
+            if len(pending) >= FEATURE_CHUNK_SIZE:
+                chunk, pending = pending, []
+                exported = self._export_pipe_chunk(msp, chunk, records, config, pipes_layer.name(), stats)
+                records.clear()
+                if not exported:
+                    break
+        
+        if pending:
+            self._export_pipe_chunk(msp, pending, records, config, pipes_layer.name(), stats)
+        
+        return stats
+    
+    def _export_pipe_chunk(self, msp, chunk, records: FeatureRecordStore, config: ExportConfiguration,
+                           layer_name: str, stats) -> bool:
+        """
+        Export a chunk of pipes using batched derived fields and placement geometry.
+        
+        Args:
+            msp: DXF modelspace
+            chunk: List of (feature, feature_data, line_coords) tuples; feature_data
+                are FeatureRecord views of records
+            records: Record store of the chunk
+            config: Export configuration
+            layer_name: Source layer name for error reporting
+            stats: ProcessingStats to update
+            
+        Returns:
+            True if processing should continue
+        """
+        # Calculate derived fields (slope, depths, etc.)
+        with self.profiler.stage('conversion'):
+            self._calculate_pipe_columns(records)
+        
+        with self.profiler.stage('geometry'):
+            geometry = PipeGeometryBatch.from_lines([line_coords for _, _, line_coords in chunk])
+        
+        for index, (feature, feature_data, line_coords) in enumerate(chunk):
+            if self.error_manager.cancelled:
+                return False
+            try:
                 # Export pipe geometry and labels
-                print(f"DEBUG: About to call _export_pipe_feature")
-                print(f"DEBUG: config.include_labels: {config.include_labels}")
-                print(f"DEBUG: config.include_arrows: {config.include_arrows}")
-                self._export_pipe_feature(msp, feature, feature_data, config)
+                self._export_pipe_feature(msp, str(feature.id()), feature_data, config,
+                                          line_coords, geometry.row(index))
                 stats.processed_features += 1
-                
             except Exception as e:
-                context = create_error_recovery_context(feature, pipes_layer.name(), "pipe_export")
-                continue_processing = handle_feature_processing_error(
-                    self.error_manager, e, context
+                if not self._handle_export_error(e, feature, layer_name, "pipe_export", stats):
+                    return False
+        return True
+    
+    def _start_parallel_renderer(self, doc: DXFStreamDocument, config: ExportConfiguration):
+        """
+        Start the worker pool of a parallel pipe export.
+
+        Returns:
+            ParallelPipeRenderer, or None if the workers cannot be started
+            (the export then continues serially)
+        """
+        from .parallel_export import ParallelPipeRenderer
+
+        try:
+            return ParallelPipeRenderer(
+                config, self.template_manager.default_text_style,
+                [block.name for block in doc.blocks], config.parallel_workers
+            )
+        except Exception as e:
+            self.error_manager.record_error(
+                ErrorSeverity.WARNING,
+                f"Parallel export unavailable, exporting pipes serially: {e}",
+                error_type="parallel_export_unavailable"
+            )
+            return None
+
+    def _export_pipes_parallel(self, doc: DXFStreamDocument, renderer, config: ExportConfiguration,
+                               pipes_layer: QgsVectorLayer, features, plan: ExtractionPlan, stats):
+        """
+        Export pipes with their entities rendered in worker processes.
+
+        Features are read and their data extracted on this thread; the plain
+        records are rendered in chunks by the workers and the resulting entity
+        text is appended to the stream in feature order. If the worker pool
+        dies, the unrendered chunks and the rest of the pipes are rendered on
+        this thread (SerialPipeRenderer).
+
+        Args:
+            doc: Streaming DXF document
+            renderer: Started ParallelPipeRenderer
+            config: Export configuration
+            pipes_layer: Source pipes layer
+            features: Feature iterator (see _stream_features)
+            plan: Extraction plan of the pipes mapping
+            stats: ProcessingStats to update
+
+        Returns:
+            ProcessingStats of the pipe export
+        """
+        from .parallel_export import PARALLEL_CHUNK_SIZE, WorkerPoolBroken
+
+        layer_name = pipes_layer.name()
+        completed = False
+        conversion = self.profiler.stage('conversion')
+        geometry_stage = self.profiler.stage('geometry')
+        # Time spent waiting for and merging worker output; the workers'
+        # own stages are not profiled
+        workers = self.profiler.stage('parallel_render')
+        geos_report = self._geos_report(pipes_layer, config)
+
+        def merge(results) -> bool:
+            nonlocal renderer
+            try:
+                with workers:
+                    return merge_results(results)
+            except WorkerPoolBroken as e:
+                # Render the lost chunks and the rest of the export here
+                self.error_manager.record_error(
+                    ErrorSeverity.WARNING,
+                    f"Parallel export workers stopped, exporting remaining pipes serially: {e}",
+                    error_type="parallel_export_unavailable"
                 )
-                
-                if continue_processing:
-                    stats.failed_features += 1
-                else:
+                renderer.shutdown(cancel=True)
+                renderer = renderer.serial_renderer()
+                return merge_results(renderer.render(e.chunks))
+
+        def merge_results(results) -> bool:
+            for text, entity_count, processed, failures, aggregate in results:
+                doc.write_fragment(text, entity_count)
+                stats.processed_features += processed
+                self.error_manager.merge_aggregate(aggregate)
+                for feature_id, message in failures:
+                    context = {'feature_id': feature_id, 'layer_name': layer_name,
+                               'operation': 'pipe_export'}
+                    if handle_feature_processing_error(self.error_manager, ExportError(message), context):
+                        stats.failed_features += 1
+                    else:
+                        return False
+            return not self.error_manager.cancelled
+
+        def submit(records, pending):
+            # The store is pickled for the workers as a whole (columns, not dicts)
+            with conversion:
+                self._calculate_pipe_columns(records)
+            return merge(renderer.submit((records, pending)))
+
+        try:
+            # A new store per chunk: submitted chunks are pickled asynchronously
+            records = FeatureRecordStore.for_plan(plan)
+            pending = []
+            stopped = False
+            for feature in features:
+                if not self.error_manager.should_continue:
                     break
-        
+                try:
+                    feature_data = self._extract_feature_data_safe(
+                        feature, config.pipes_mapping, "pipes", plan, records
+                    )
+                    if feature_data is None:
+                        stats.skipped_features += 1
+                        continue
+                    with geometry_stage:
+                        line_coords = [(point.x(), point.y())
+                                       for point in self._pipe_line_coords(feature, geos_report)]
+                    pending.append((str(feature.id()), feature_data.index, line_coords))
+                except Exception as e:
+                    if not self._handle_export_error(e, feature, layer_name, "pipe_export", stats):
+                        break
+                    continue
+
+                if len(pending) >= PARALLEL_CHUNK_SIZE:
+                    chunk_records, chunk = records, pending
+                    records, pending = FeatureRecordStore.for_plan(plan), []
+                    if not submit(chunk_records, chunk):
+                        stopped = True
+                        break
+
+            if not stopped and pending:
+                stopped = not submit(records, pending)
+            if not stopped:
+                stopped = not merge(renderer.drain())
+            completed = not stopped
+            return stats
+        finally:
+            renderer.shutdown(cancel=not completed)
+
+    def _export_pipes_incremental(self, doc: DXFStreamDocument, cache: ExportCache,
+                                  config: ExportConfiguration, pipes_layer: QgsVectorLayer,
+                                  features, plan: ExtractionPlan, stats):
+        """
+        Export pipes, reusing the cached entities of unchanged pipes.
+
+        Every pipe is still read and its data extracted to fingerprint it;
+        only new and changed pipes are rendered (see _write_cached_feature).
+
+        Args:
+            doc: Streaming DXF document
+            cache: Open ExportCache
+            config: Export configuration
+            pipes_layer: Source pipes layer
+            features: Feature iterator (see _stream_features)
+            plan: Extraction plan of the pipes mapping
+            stats: ProcessingStats to update
+
+        Returns:
+            ProcessingStats of the pipe export
+        """
+        layer_name = pipes_layer.name()
+        fragment = DXFStreamFragment(block.name for block in doc.blocks)
+        msp = self.profiler.wrap_layout(fragment.modelspace())
+        conversion = self.profiler.stage('conversion')
+        geometry_stage = self.profiler.stage('geometry')
+        geos_report = self._geos_report(pipes_layer, config)
+
+        def write_chunk(chunk) -> bool:
+            with conversion:
+                self._calculate_pipe_columns(records)
+            with geometry_stage:
+                geometry = PipeGeometryBatch.from_lines([line_coords for _, _, line_coords in chunk])
+            for index, (feature, feature_data, line_coords) in enumerate(chunk):
+                if self.error_manager.cancelled:
+                    return False
+                try:
+                    feature_id = str(feature.id())
+                    self._write_cached_feature(
+                        doc, fragment, cache, feature_id, feature_fingerprint(feature_data, line_coords),
+                        lambda: self._export_pipe_feature(msp, feature_id, feature_data, config,
+                                                          line_coords, geometry.row(index))
+                    )
+                    stats.processed_features += 1
+                except Exception as e:
+                    if not self._handle_export_error(e, feature, layer_name, "pipe_export", stats):
+                        return False
+            return True
+
+        # Derived fields are calculated per chunk, as in the serial export
+        records = FeatureRecordStore.for_plan(plan)
+        pending = []
+        cache.begin_layer('pipes')
+        for feature in features:
+            if not self.error_manager.should_continue:
+                break
+            try:
+                feature_data = self._extract_feature_data_safe(
+                    feature, config.pipes_mapping, "pipes", plan, records
+                )
+                if feature_data is None:
+                    stats.skipped_features += 1
+                    continue
+                with geometry_stage:
+                    line_coords = [(point.x(), point.y()) for point in self._pipe_line_coords(feature, geos_report)]
+                pending.append((feature, feature_data, line_coords))
+            except Exception as e:
+                if not self._handle_export_error(e, feature, layer_name, "pipe_export", stats):
+                    break
+                continue
+
+            if len(pending) >= FEATURE_CHUNK_SIZE:
+                chunk, pending = pending, []
+                written = write_chunk(chunk)
+                records.clear()
+                if not written:
+                    break
+        if pending:
+            write_chunk(pending)
+        cache.end_layer()
         return stats
+
+    def _write_cached_feature(self, doc: DXFStreamDocument, fragment: DXFStreamFragment,
+                              cache: ExportCache, feature_id: str, fingerprint: bytes, render) -> None:
+        """
+        Write the entities of a feature from the cache, rendering them on a miss.
+
+        Rendered entities go through the fragment so they can be stored in
+        the cache before being appended to the stream; features keep their
+        order in the output either way.
+
+        Args:
+            doc: Streaming DXF document
+            fragment: Fragment whose modelspace render() draws into
+            cache: Open ExportCache (layer started)
+            feature_id: Source feature id
+            fingerprint: Feature fingerprint, see feature_fingerprint()
+            render: Callable rendering the feature's entities
+        """
+        cache_stage = self.profiler.stage('cache')
+        with cache_stage:
+            cached = cache.lookup(feature_id, fingerprint)
+        if cached is None:
+            try:
+                render()
+            except Exception:
+                fragment.take()  # drop the entities of the partly rendered feature
+                raise
+            cached = fragment.take()
+            with cache_stage:
+                cache.store(feature_id, fingerprint, *cached)
+        doc.write_fragment(*cached)
+
+    def _handle_export_error(self, error: Exception, feature: QgsFeature, layer_name: str,
+                             operation: str, stats) -> bool:
+        """
+        Record a feature export error and decide whether to continue.
+        
+        Returns:
+            True if processing should continue
+        """
+        context = create_error_recovery_context(feature, layer_name, operation)
+        continue_processing = handle_feature_processing_error(
+            self.error_manager, error, context
+        )
+        
+        if continue_processing:
+            stats.failed_features += 1
+        return continue_processing
     
-    def _export_junctions_with_recovery(self, doc, config: ExportConfiguration):
+    def _export_junctions_with_recovery(self, doc, config: ExportConfiguration,
+                                        progress: Optional[ProgressTracker] = None, step: int = 0):
         """Export junctions with error recovery."""
         from .error_recovery import ProcessingStats
         
@@ -1572,8 +2188,7 @@ class DXFExporter:
             return stats
         
         # Get junctions layer
-        project = QgsProject.instance()
-        junctions_layer = project.mapLayer(config.junctions_mapping.layer_id)
+        junctions_layer = self._export_layer(config.junctions_mapping.layer_id)
         
         if not junctions_layer or not junctions_layer.isValid():
             self.error_manager.record_error(
@@ -1583,11 +2198,22 @@ class DXFExporter:
             )
             return stats
         
-        # Process features with error recovery
-        features = list(junctions_layer.getFeatures())
-        stats.total_features = len(features)
+        # Process features with error recovery, streamed from the provider
+        features = self._stream_features(
+            junctions_layer, export_feature_request(junctions_layer, config.junctions_mapping),
+            stats, progress, step, "Exporting junctions"
+        )
         
-        msp = doc.modelspace()
+        msp = self.profiler.wrap_layout(doc.modelspace())
+        plan = self._get_extraction_plan(config.junctions_mapping, junctions_layer.fields().names())
+        geos_report = self._geos_report(junctions_layer, config)
+        
+        cache = self._export_cache
+        if cache is not None:
+            # Junctions are rendered into a fragment first (see _write_cached_feature)
+            fragment = DXFStreamFragment(block.name for block in doc.blocks)
+            msp = self.profiler.wrap_layout(fragment.modelspace())
+            cache.begin_layer('junctions')
         
         for feature in features:
             if not self.error_manager.should_continue:
@@ -1598,7 +2224,7 @@ class DXFExporter:
                 
                 # Extract feature data with error handling
                 feature_data = self._extract_feature_data_safe(
-                    feature, config.junctions_mapping, "junctions"
+                    feature, config.junctions_mapping, "junctions", plan
                 )
                 
                 if feature_data is None:
@@ -1606,7 +2232,18 @@ class DXFExporter:
                     continue
                 
                 # Export junction geometry and labels
-                self._export_junction_feature(msp, feature, feature_data, config)
+                if cache is not None:
+                    with self.profiler.stage('geometry'):
+                        point = self._junction_point(feature, geos_report)
+                    self._write_cached_feature(
+                        doc, fragment, cache, str(feature.id()),
+                        feature_fingerprint(feature_data, (point.x(), point.y())),
+                        lambda: self._export_junction_feature(msp, feature, feature_data, config, point)
+                    )
+                else:
+                    with self.profiler.stage('geometry'):
+                        point = self._junction_point(feature, geos_report)
+                    self._export_junction_feature(msp, feature, feature_data, config, point)
                 stats.processed_features += 1
                 
             except Exception as e:
@@ -1620,95 +2257,137 @@ class DXFExporter:
                 else:
                     break
         
+        if cache is not None:
+            cache.end_layer()
         return stats
     
-    def _extract_feature_data_safe(self, feature: QgsFeature, mapping: LayerMapping, 
-                                 feature_type: str) -> Optional[Dict[str, Any]]:
-        """Extract feature data with error handling and type conversion."""
-        try:
-            print(f"DEBUG: _extract_feature_data_safe ENTRY - feature_type: {feature_type}")
-            print(f"DEBUG: mapping type: {type(mapping)}")
-            print(f"DEBUG: mapping.field_mappings type: {type(mapping.field_mappings)}")
-            print(f"DEBUG: mapping.field_mappings: {mapping.field_mappings}")
+    def set_feature_source(self, layer: QgsVectorLayer):
+        """
+        Snapshot a layer for reading from a background thread.
+        
+        Must be called on the main thread. The export loops then use the
+        LayerSnapshot (features, id, name, fields) instead of the layer itself.
+        
+        Args:
+            layer: Source layer used by the export configuration
+        """
+        self._feature_sources[layer.id()] = LayerSnapshot(layer)
+    
+    def _export_layer(self, layer_id: str):
+        """
+        Get the layer an export loop reads.
+        
+        Args:
+            layer_id: Layer ID of a mapping
             
-            feature_data = {}
+        Returns:
+            LayerSnapshot set by set_feature_source, otherwise the project layer (or None)
+        """
+        snapshot = self._feature_sources.get(layer_id)
+        if snapshot is not None:
+            return snapshot
+        return QgsProject.instance().mapLayer(layer_id)
+    
+    def _stream_features(self, layer: QgsVectorLayer, request, stats,
+                         progress: Optional[ProgressTracker] = None, step: int = 0,
+                         message: str = ""):
+        """
+        Iterate layer features as the provider returns them.
+        
+        The total is taken from featureCount() up front instead of materializing
+        the feature list, so memory does not grow with layer size. Progress is
+        reported once per FEATURE_CHUNK_SIZE features.
+        
+        Args:
+            layer: Source layer or LayerSnapshot (see _export_layer)
+            request: QgsFeatureRequest for the scan
+            stats: ProcessingStats whose total_features is set
+            progress: Optional ProgressTracker for per-chunk progress
+            step: Progress step the scan belongs to
+            message: Progress message prefix
             
-            # Get all fields based on feature type
-            if feature_type == "pipes":
-                all_fields = SewageNetworkFields.get_all_pipe_fields()
-            else:
-                all_fields = SewageNetworkFields.get_all_junction_fields()
+        Returns:
+            Iterator over the QgsFeature instances
+        """
+        source, total = layer, layer.featureCount()
+        stats.total_features = total if total >= 0 else 0
+        
+        read = self.profiler.stage('feature_read')
+        
+        def iterate():
+            seen = 0
+            features = iter(source.getFeatures(request))
+            while True:
+                with read:
+                    feature = next(features, None)
+                if feature is None:
+                    break
+                yield feature
+                seen += 1
+                if progress is not None and seen % FEATURE_CHUNK_SIZE == 0:
+                    progress.update_partial(step, seen, stats.total_features,
+                                            f"{message}: {seen}/{stats.total_features or '?'}")
+            
+            # featureCount() can be an estimate (or unknown) for some providers
+            if seen > stats.total_features:
+                stats.total_features = seen
+            if progress is not None and seen % FEATURE_CHUNK_SIZE:
+                progress.update_partial(step, seen, stats.total_features,
+                                        f"{message}: {seen}/{stats.total_features}")
+        
+        return iterate()
+    
+    def _extract_feature_data_safe(self, feature: QgsFeature, mapping: LayerMapping, 
+                                 feature_type: str,
+                                 plan: Optional[ExtractionPlan] = None,
+                                 records: Optional[FeatureRecordStore] = None):
+        """
+        Extract feature data with error handling and type conversion.
+        
+        Args:
+            feature: QGIS feature
+            mapping: Layer mapping configuration
+            feature_type: "pipes" or "junctions" (used for tracing only)
+            plan: Extraction plan compiled for the mapping and the feature's layer;
+                looked up from the plan cache when not given
+            records: Store created with FeatureRecordStore.for_plan(plan); the
+                values are appended to it instead of returned as a dictionary
             
-            # Extract and convert field values
-            for field_def in all_fields:
-                field_name = field_def.name
-                
-                print(f"DEBUG: Processing field: {field_name}")
-                print(f"DEBUG: mapping.field_mappings type: {type(mapping.field_mappings)}")
-                print(f"DEBUG: mapping.field_mappings: {mapping.field_mappings}")
+        Returns:
+            Dictionary of converted field values (FeatureRecord of the appended
+            row when records is given) or None if extraction fails
+        """
+        try:
+            if plan is None:
+                plan = self._get_extraction_plan(mapping, feature.fields().names())
+            
+            def recover(entry, raw_value, error):
+                # Use recovery strategy for conversion errors
+                recovery_context = {
+                    'field_name': entry.name,
+                    'raw_value': raw_value,
+                    'target_type': entry.field_def.field_type.value,
+                    'default_value': entry.default_value,
+                    'feature_id': str(feature.id())
+                }
                 
-                # Get mapped field name or use default
-                try:
-                    # Ensure field_mappings is actually a dictionary
-                    if not isinstance(mapping.field_mappings, dict):
-                        print(f"ERROR: field_mappings is not a dict: {type(mapping.field_mappings)}")
-                        # Try to convert if it's a proper dictionary-like sequence
-                        if hasattr(mapping.field_mappings, 'items'):
-                            mapping.field_mappings = dict(mapping.field_mappings)
-                            print(f"DEBUG: Converted field_mappings to dict: {mapping.field_mappings}")
-                        else:
-                            # Fallback: create empty dict if completely invalid
-                            mapping.field_mappings = {}
-                            print(f"DEBUG: Fallback: created empty field_mappings dict")
-                    
-                    field_in_mappings = field_name in mapping.field_mappings
-                    print(f"DEBUG: '{field_name}' in mapping.field_mappings: {field_in_mappings}")
-                except Exception as e:
-                    print(f"DEBUG: Error checking if '{field_name}' in mapping.field_mappings: {e}")
-                    print(f"DEBUG: Exception type: {type(e)}")
-                    raise
+                success, default_value = self.error_manager.apply_recovery_strategy(
+                    'data_conversion_error', recovery_context
+                )
                 
-                if field_name in mapping.field_mappings:
-                    source_field = mapping.field_mappings[field_name]
-                    raw_value = feature[source_field] if source_field in feature.fields().names() else None
-                elif hasattr(mapping, 'default_values') and isinstance(mapping.default_values, dict) and field_name in mapping.default_values:
-                    raw_value = mapping.default_values[field_name]
+                if success:
+                    return default_value or entry.default_value
+                # Critical conversion failure
+                raise ExportError(f"Failed to convert field {entry.name}: {error}")
+            
+            with self.profiler.stage('attribute_extraction'):
+                attributes = feature.attributes()
+            with self.profiler.stage('conversion'):
+                if records is None:
+                    feature_data = plan.extract(attributes, recover)
                 else:
-                    raw_value = field_def.default_value
-                
-                # Convert value to appropriate type
-                try:
-                    if field_def.field_type == FieldType.STRING:
-                        converted_value = self.data_converter.to_string(raw_value)
-                    elif field_def.field_type == FieldType.DOUBLE:
-                        converted_value = self.data_converter.to_double(raw_value)
-                    elif field_def.field_type == FieldType.INTEGER:
-                        converted_value = self.data_converter.to_integer(raw_value)
-                    else:
-                        converted_value = raw_value
-                    
-                    feature_data[field_name] = converted_value
-                    
-                except Exception as e:
-                    # Use recovery strategy for conversion errors
-                    recovery_context = {
-                        'field_name': field_name,
-                        'raw_value': raw_value,
-                        'target_type': field_def.field_type.value,
-                        'default_value': field_def.default_value,
-                        'feature_id': str(feature.id())
-                    }
-                    
-                    success, default_value = self.error_manager.apply_recovery_strategy(
-                        'data_conversion_error', recovery_context
-                    )
-                    
-                    if success:
-                        feature_data[field_name] = default_value or field_def.default_value
-                    else:
-                        # Critical conversion failure
-                        raise ExportError(f"Failed to convert field {field_name}: {e}")
-            
+                    feature_data = records.append_values(plan.extract_values(attributes, recover))
+            _trace_fields.debug("_extract_feature_data_safe %s: %s", feature_type, feature_data)
             return feature_data
             
         except Exception as e:
@@ -1721,30 +2400,122 @@ class DXFExporter:
             )
             return None
     
-    def _export_pipe_feature(self, msp, feature: QgsFeature, feature_data: Dict[str, Any], 
-                           config: ExportConfiguration):
-        """Export a single pipe feature with error handling."""
-        try:
-            geometry = feature.geometry()
-            if geometry.isNull() or not geometry.isGeosValid():
-                raise GeometryError(str(feature.id()), "Invalid or null geometry")
-            
-            # Get line coordinates
-            if geometry.isMultipart():
-                # Handle multipart geometry - use first part
-                parts = geometry.asMultiPolyline()
-                if not parts:
-                    raise GeometryError(str(feature.id()), "Empty multipart geometry")
-                line_coords = parts[0]
+    def _get_extraction_plan(self, mapping: LayerMapping, field_names: List[str]) -> ExtractionPlan:
+        """
+        Get the compiled extraction plan for a mapping and layer schema.
+        
+        Args:
+            mapping: Layer mapping configuration
+            field_names: Attribute names of the source layer
+            
+        Returns:
+            Cached or newly compiled ExtractionPlan
+        """
+        # Ensure field_mappings is actually a dictionary
+        if not isinstance(mapping.field_mappings, dict):
+            _trace_fields.warning("field_mappings is not a dict: %s", type(mapping.field_mappings))
+            # Try to convert if it's a proper dictionary-like sequence
+            if hasattr(mapping.field_mappings, 'items'):
+                mapping.field_mappings = dict(mapping.field_mappings)
+                _trace_fields.debug("Converted field_mappings to dict: %s", mapping.field_mappings)
             else:
-                line_coords = geometry.asPolyline()
+                # Fallback: create empty dict if completely invalid
+                mapping.field_mappings = {}
+                _trace_fields.debug("Fallback: created empty field_mappings dict")
+        
+        plan = self._extraction_plans.get(mapping, field_names)
+        if plan.missing_sources:
+            _trace_fields.debug("Mapped fields missing from layer %s: %s",
+                                mapping.layer_name, plan.missing_sources)
+        return plan
+    
+    def _geos_report(self, layer: QgsVectorLayer,
+                     config: ExportConfiguration) -> Optional[GeosValidityReport]:
+        """
+        Get the GEOS validity report of a layer (opt-in tier, see geometry_checks).
+        
+        The report is built in one geometry-only pass the first time a layer
+        is exported and reused by every export path of the current export.
+        
+        Args:
+            layer: Source layer
+            config: Export configuration
             
-            if len(line_coords) < 2:
-                raise GeometryError(str(feature.id()), "Line has less than 2 points")
+        Returns:
+            GeosValidityReport, None unless config.geos_validation is set
+        """
+        if not config.geos_validation:
+            return None
+        report = self._geos_reports.get(layer.id())
+        if report is None:
+            with self.profiler.stage('geos_validation'):
+                report = GeosValidityReport.scan(layer)
+            self._geos_reports[layer.id()] = report
+        return report
+    
+    def _pipe_line_coords(self, feature: QgsFeature, geos_report: Optional[GeosValidityReport] = None):
+        """
+        Get the polyline vertices of a pipe feature (first part of multipart lines).
+        
+        Only the basic tier geometry checks run per feature (see geometry_checks).
+        
+        Args:
+            feature: Pipe feature
+            geos_report: GEOS validity report of the layer (opt-in tier)
+        
+        Raises:
+            GeometryError: If the geometry is null, has less than 2 points,
+                non-finite coordinates or zero length, or GEOS reported it invalid
+        """
+        geometry = feature.geometry()
+        if geometry.isNull():
+            raise GeometryError(str(feature.id()), "Invalid or null geometry")
+        if geos_report is not None and feature.id() in geos_report:
+            raise GeometryError(str(feature.id()), "Invalid geometry (GEOS)")
+        
+        # Get line coordinates
+        if geometry.isMultipart():
+            # Handle multipart geometry - use first part
+            parts = geometry.asMultiPolyline()
+            if not parts:
+                raise GeometryError(str(feature.id()), "Empty multipart geometry")
+            line_coords = parts[0]
+            # length() would cover every part
+            length = None
+        else:
+            line_coords = geometry.asPolyline()
+            length = geometry.length()
+        
+        issue = check_line(line_coords, length)
+        if issue is not None:
+            raise GeometryError(str(feature.id()), CHECK_MESSAGES[issue])
+        
+        return line_coords
+    
+    def _export_pipe_feature(self, msp, feature_id: str, feature_data: Dict[str, Any], 
+                           config: ExportConfiguration, line_coords,
+                           geom: Optional[PipeGeometry] = None):
+        """
+        Export a single pipe feature with error handling.
+        
+        Only plain data is used (no QGIS objects), so this also runs in the
+        worker processes of the parallel export.
+        
+        Args:
+            msp: DXF modelspace
+            feature_id: Source feature ID (fallback pipe ID)
+            feature_data: Extracted pipe data
+            config: Export configuration
+            line_coords: Pipe vertices (QgsPointXY or (x, y) tuples), see _pipe_line_coords
+            geom: Precomputed placement geometry, computed here when not given
+        """
+        try:
+            if geom is None:
+                geom = PipeGeometryBatch.from_lines([line_coords], use_numpy=False).row(0)
             
             # Convert to DXF coordinates
-            start_point = (line_coords[0].x(), line_coords[0].y(), 0)
-            end_point = (line_coords[-1].x(), line_coords[-1].y(), 0)
+            start_point = (geom.start_x, geom.start_y, 0)
+            end_point = (geom.end_x, geom.end_y, 0)
             
             # Add pipe line to DXF
             line = msp.add_line(
@@ -1753,64 +2524,88 @@ class DXFExporter:
             )
             
             # Add extended data
-            pipe_id = feature_data.get('pipe_id', str(feature.id()))
+            pipe_id = feature_data.get('pipe_id', feature_id)
             diameter = feature_data.get('diameter', 0)
             length = feature_data.get('length', 0)
             
-            line.set_xdata('REDBASICA_EXPORT', [
-                (1000, 'PIPE_DATA'),
-                (1000, pipe_id),
-                (1040, diameter),
-                (1040, length)
-            ])
+            with self.profiler.stage('xdata'):
+                line.set_xdata('REDBASICA_EXPORT', [
+                    (1000, 'PIPE_DATA'),
+                    (1000, pipe_id),
+                    (1040, diameter),
+                    (1040, length)
+                ])
             
             # Add labels if enabled
-            print(f"DEBUG: _export_pipe_feature - config.include_labels: {config.include_labels}")
             if config.include_labels:
-                print(f"DEBUG: Calling _add_pipe_labels")
-                self._add_pipe_labels(msp, line_coords, feature_data, config)
-            else:
-                print(f"DEBUG: Skipping labels - include_labels is False")
+                self._add_pipe_labels(msp, line_coords, feature_data, config, geom)
             
             # Add flow arrows if enabled
-            print(f"DEBUG: _export_pipe_feature - config.include_arrows: {config.include_arrows}")
             if config.include_arrows:
-                print(f"DEBUG: Calling _add_flow_arrows")
-                self._add_flow_arrows(msp, line_coords, config)
-            else:
-                print(f"DEBUG: Skipping arrows - include_arrows is False")
+                self._add_flow_arrows(msp, line_coords, config, geom)
                 
             # Add Drop / Drop Pipe markers (even if arrows are disabled, though usually they go together)
             # Uses the same layer prefix logic as arrows or specific layer
-            self._add_drop_marker(msp, line_coords[0], line_coords[-1], feature_data, f"{config.layer_prefix}SETA", config.scale_factor)
-            print(f"DEBUG: Called _add_drop_marker in recovery mode")
+            self._add_drop_marker(msp, line_coords[0], line_coords[-1], feature_data, f"{config.layer_prefix}SETA", config.scale_factor, geom)
 
             # Add Collector Depth Label (h_col_p2) if enabled
             if config.include_collector_depth:
-                self._add_collector_depth_label(msp, line_coords[0], line_coords[-1], feature_data, f"{config.layer_prefix}TEXTO", config.scale_factor)
+                self._add_collector_depth_label(msp, line_coords[0], line_coords[-1], feature_data, f"{config.layer_prefix}TEXTO", config.scale_factor, geom)
                 
         except GeometryError:
             raise  # Re-raise geometry errors
         except Exception as e:
             raise ExportError(f"Failed to export pipe feature: {e}")
     
+    def _junction_point(self, feature: QgsFeature, geos_report: Optional[GeosValidityReport] = None):
+        """
+        Get the point of a junction feature (first part of multipart points).
+        
+        Args:
+            feature: Junction feature
+            geos_report: GEOS validity report of the layer (opt-in tier)
+        
+        Raises:
+            GeometryError: If the geometry is null, empty or has non-finite
+                coordinates, or GEOS reported it invalid
+        """
+        geometry = feature.geometry()
+        if geometry.isNull():
+            raise GeometryError(str(feature.id()), "Invalid or null geometry")
+        if geos_report is not None and feature.id() in geos_report:
+            raise GeometryError(str(feature.id()), "Invalid geometry (GEOS)")
+        
+        # Get point coordinates
+        if geometry.isMultipart():
+            # Handle multipart geometry - use first part
+            parts = geometry.asMultiPoint()
+            if not parts:
+                raise GeometryError(str(feature.id()), "Empty multipart geometry")
+            point = parts[0]
+        else:
+            point = geometry.asPoint()
+        
+        issue = check_point(point)
+        if issue is not None:
+            raise GeometryError(str(feature.id()), CHECK_MESSAGES[issue])
+        return point
+    
     def _export_junction_feature(self, msp, feature: QgsFeature, feature_data: Dict[str, Any],
-                               config: ExportConfiguration):
-        """Export a single junction feature with error handling."""
+                               config: ExportConfiguration, point=None):
+        """
+        Export a single junction feature with error handling.
+        
+        Args:
+            msp: DXF modelspace
+            feature: Junction feature
+            feature_data: Extracted junction data
+            config: Export configuration
+            point: Junction point, read from the feature when not given (see _junction_point)
+        """
         try:
-            geometry = feature.geometry()
-            if geometry.isNull() or not geometry.isGeosValid():
-                raise GeometryError(str(feature.id()), "Invalid or null geometry")
-            
-            # Get point coordinates
-            if geometry.isMultipart():
-                # Handle multipart geometry - use first part
-                parts = geometry.asMultiPoint()
-                if not parts:
-                    raise GeometryError(str(feature.id()), "Empty multipart geometry")
-                point = parts[0]
-            else:
-                point = geometry.asPoint()
+            if point is None:
+                with self.profiler.stage('geometry'):
+                    point = self._junction_point(feature)
             
             # Convert to DXF coordinates
             dxf_point = (point.x(), point.y(), 0)
@@ -1825,37 +2620,34 @@ class DXFExporter:
             node_id = feature_data.get('node_id', str(feature.id()))
             ground_elevation = feature_data.get('ground_elevation', 0)
             
-            circle.set_xdata('REDBASICA_EXPORT', [
-                (1000, 'JUNCTION_DATA'),
-                (1000, node_id),
-                (1040, ground_elevation)
-            ])
+            with self.profiler.stage('xdata'):
+                circle.set_xdata('REDBASICA_EXPORT', [
+                    (1000, 'JUNCTION_DATA'),
+                    (1000, node_id),
+                    (1040, ground_elevation)
+                ])
             
             # Add labels if enabled
-            print(f"DEBUG: _export_junction_feature - config.include_labels: {config.include_labels}")
             if config.include_labels:
-                print(f"DEBUG: Calling _add_junction_labels")
                 self._add_junction_labels(msp, dxf_point, feature_data, config)
-            else:
-                print(f"DEBUG: Skipping junction labels - include_labels is False")
                 
         except GeometryError:
             raise  # Re-raise geometry errors
         except Exception as e:
             raise ExportError(f"Failed to export junction feature: {e}")
     
-    def _add_pipe_labels(self, msp, line_coords, feature_data: Dict[str, Any], config: ExportConfiguration):
+    def _add_pipe_labels(self, msp, line_coords, feature_data: Dict[str, Any], config: ExportConfiguration,
+                         geom: Optional[PipeGeometry] = None):
         """Add pipe labels with error handling."""
         try:
             # Use enhanced pipe labels for proper label style (2/4 lines) support
             # This applies to both STANDARD and ENHANCED modes
-            from qgis.core import QgsPointXY
-            start = QgsPointXY(line_coords[0].x(), line_coords[0].y())
-            end = QgsPointXY(line_coords[-1].x(), line_coords[-1].y())
+            if geom is None:
+                geom = PipeGeometryBatch.from_lines([line_coords], use_numpy=False).row(0)
             text_layer = f"{config.layer_prefix}TEXTO"
-            self._add_enhanced_pipe_label(msp, start, end, feature_data, text_layer, config.scale_factor, config)
+            self._add_enhanced_pipe_label(msp, line_coords[0], line_coords[-1], feature_data,
+                                          text_layer, config.scale_factor, config, geom)
             
-            print(f"DEBUG: _add_pipe_labels called _add_enhanced_pipe_label")
             return  # Done - enhanced method handles everything
             
             # QEsg-style scale calculation and text sizing
@@ -1866,12 +2658,11 @@ class DXFExporter:
             start = line_coords[0]
             end = line_coords[-1]
             
-            print(f"DEBUG: QEsg-style scale (sc): {sc}, text_height: {text_height}, offset: {text_offset}")
+            _trace_labels.debug("QEsg-style scale (sc): %s, text_height: %s, offset: %s", sc, text_height, text_offset)
             
             # Add pipe ID label above line (QEsg style)
             pipe_id = feature_data.get('pipe_id', 'Unknown')
-            print(f"DEBUG: pipe_id: {pipe_id}")
-            print(f"DEBUG: Adding pipe ID text: '{pipe_id}' to layer: {config.layer_prefix}NUMERO")
+            _trace_labels.debug("Adding pipe ID text: '%s' to layer: %sNUMERO", pipe_id, config.layer_prefix)
             
             # Calculate text position and rotation using QEsg method
             azim = self._calculate_azimuth(start, end)
@@ -1886,7 +2677,7 @@ class DXFExporter:
                 rot += 180
             
             text_pos = self._calculate_text_position(start, end, -text_offset, azim)
-            print(f"DEBUG: Text position: {text_pos}, rotation: {rot}")
+            _trace_labels.debug("Text position: %s, rotation: %s", text_pos, rot)
             
             from ezdxf.enums import TextEntityAlignment
             text_entity = msp.add_text(
@@ -1895,19 +2686,17 @@ class DXFExporter:
                 dxfattribs={
                     'rotation': rot,
                     'style': self.CAD_FONT,
-                    'color': self.get_aci_color(self.COLOR_PIPE_NAME),
+                    'color': self.ACI_PIPE_NAME,
                     'layer': f"{config.layer_prefix}NUMERO"
                 }
             ).set_placement(text_pos, align=TextEntityAlignment.BOTTOM_CENTER)
-            print(f"DEBUG: Pipe ID text added successfully")
             
             # Add pipe data label below line
             length = feature_data.get('length', 0)
             diameter = feature_data.get('diameter', 0)
             slope = feature_data.get('slope', feature_data.get('calculated_slope', 0))
             
-            print(f"DEBUG: Pipe data - length: {length}, diameter: {diameter}, slope: {slope}")
-            print(f"DEBUG: Available feature_data keys: {list(feature_data.keys())}")
+            _trace_labels.debug("Pipe data - length: %s, diameter: %s, slope: %s", length, diameter, slope)
             
             data_label = config.label_format.format(
                 length=length, diameter=diameter, slope=slope
@@ -1921,9 +2710,8 @@ class DXFExporter:
                 height_str = f"{float(drop_height):.2f}" if drop_height is not None else ""
                 data_label += f" {drop_type} {height_str}".strip()
             
-            print(f"DEBUG: Formatted data label: '{data_label}'")
             
-            print(f"DEBUG: Adding pipe data text: '{data_label}' to layer: {config.layer_prefix}TEXTO")
+            _trace_labels.debug("Adding pipe data text: '%s' to layer: %sTEXTO", data_label, config.layer_prefix)
             
             # Add data label below line (QEsg style)
             data_pos = self._calculate_text_position(start, end, text_offset, azim)
@@ -1934,11 +2722,10 @@ class DXFExporter:
                 dxfattribs={
                     'rotation': rot,
                     'style': self.CAD_FONT, 
-                    'color': self.get_aci_color(self.COLOR_DEPTH_LENGTH),
+                    'color': self.ACI_DEPTH_LENGTH,
                     'layer': f"{config.layer_prefix}TEXTO"
                 }
             ).set_placement(data_pos, align=TextEntityAlignment.TOP_CENTER)
-            print(f"DEBUG: Pipe data text added successfully")
             
         except Exception as e:
             self.error_manager.record_error(
@@ -1950,8 +2737,8 @@ class DXFExporter:
     def _add_junction_labels(self, msp, point, feature_data: Dict[str, Any], config: ExportConfiguration):
         """Add junction labels with error handling."""
         try:
-            # Enhanced Mode Check
-            if config.export_mode.name == 'ENHANCED':
+            # Enhanced Mode Check (MULTILEADER is not available in streamed R12 files)
+            if config.export_mode.name == 'ENHANCED' and not config.streaming_export:
                 from qgis.core import QgsPointXY
                 # point is tuple (x, y, 0)
                 point_xy = QgsPointXY(point[0], point[1])
@@ -1959,12 +2746,9 @@ class DXFExporter:
                 self._add_multileader_node_label(msp, point_xy, feature_data, text_layer, config.scale_factor, export_node_id=config.export_node_id)
                 return
 
-            print(f"DEBUG: _add_junction_labels ENTRY")
-            print(f"DEBUG: point: {point}")
-            print(f"DEBUG: feature_data: {feature_data}")
+            _trace_labels.debug("_add_junction_labels point: %s, feature_data: %s", point, feature_data)
             
             # Skip individual manhole ID label since it's now included in the h-ID block
-            print(f"DEBUG: Skipping individual manhole ID label - now included in detailed labels")
             
             # Add detailed manhole data labels (QEsg style)
             self._add_manhole_data_labels(msp, point, feature_data, config)
@@ -1976,57 +2760,38 @@ class DXFExporter:
                 error_type="label_creation_failed"
             )
     
-    def _add_flow_arrows(self, msp, line_coords, config: ExportConfiguration):
+    def _add_flow_arrows(self, msp, line_coords, config: ExportConfiguration,
+                         geom: Optional[PipeGeometry] = None):
         """Add flow direction arrows with error handling."""
         try:
-            print(f"DEBUG: _add_flow_arrows ENTRY")
-            print(f"DEBUG: line_coords length: {len(line_coords)}")
-            print(f"DEBUG: config.scale_factor: {config.scale_factor}")
+            if geom is None:
+                geom = PipeGeometryBatch.from_lines([line_coords], use_numpy=False).row(0)
             
             # Calculate line length
-            total_length = 0
-            for i in range(len(line_coords) - 1):
-                p1 = line_coords[i]
-                p2 = line_coords[i + 1]
-                segment_length = math.sqrt((p2.x() - p1.x())**2 + (p2.y() - p1.y())**2)
-                total_length += segment_length
+            total_length = geom.path_length
             
-            print(f"DEBUG: Total line length: {total_length}")
             
             # QEsg-style arrow condition: only for lines longer than 20*sc
             sc = config.scale_factor / 2000.0
             min_length = 20 * sc
-            print(f"DEBUG: Minimum length for arrows: {min_length}")
+            _trace_labels.debug("Line length: %s, minimum length for arrows: %s", total_length, min_length)
             
             if total_length > min_length:
-                print(f"DEBUG: Line is long enough for arrows, proceeding...")
                 
                 # QEsg-style arrow positioning: middle of line
-                start = line_coords[0]
-                end = line_coords[-1]
-                arrow_x = (start.x() + end.x()) / 2
-                arrow_y = (start.y() + end.y()) / 2
+                arrow_x = geom.mid_x
+                arrow_y = geom.mid_y
                 arrow_z = 0  # QEsg calculates from elevations but we'll use 0
                 
-                # QEsg-style arrow rotation
-                azim = self._calculate_azimuth(start, end)
-                if azim < 0:
-                    azim += 360
-                rot = 90.0 - azim
+                # QEsg-style arrow rotation (90 - azimuth)
+                rot = geom.arrow_rotation
                 
                 arrow_point = (arrow_x, arrow_y, arrow_z)
-                print(f"DEBUG: Adding arrow block at {arrow_point} with rotation {rot}")
-                print(f"DEBUG: Arrow layer: {config.layer_prefix}SETA")
+                _trace_labels.debug("Adding arrow block at %s with rotation %s on layer %sSETA", arrow_point, rot, config.layer_prefix)
                 
                 # Create arrow block if it doesn't exist (QEsg solid triangle)
                 arrow_block_name = f"{config.layer_prefix}SETA"
-                if arrow_block_name not in msp.doc.blocks:
-                    arrow_block = msp.doc.blocks.new(name=arrow_block_name)
-                    arrow_block.add_solid(
-                        [(4*sc, 0), (-4*sc, -1.33*sc), (-4*sc, 1.33*sc)],
-                        dxfattribs={'color': 0, 'layer': '0'}
-                    )
-                    print(f"DEBUG: Created arrow block: {arrow_block_name}")
+                self._ensure_arrow_block(msp.doc, arrow_block_name, sc)
                 
                 # Add arrow block reference
                 msp.add_blockref(
@@ -2037,12 +2802,11 @@ class DXFExporter:
                         'yscale': 1,
                         'rotation': rot,
                         'layer': f"{config.layer_prefix}SETA",
-                        'color': self.get_aci_color(self.COLOR_ARROW)
+                        'color': self.ACI_ARROW
                     }
                 )
-                print(f"DEBUG: Arrow block added successfully")
             else:
-                print(f"DEBUG: Line too short for arrows ({total_length} <= {min_length})")
+                _trace_labels.debug("Line too short for arrows (%s <= %s)", total_length, min_length)
                     
         except Exception as e:
             self.error_manager.record_error(
@@ -2051,6 +2815,18 @@ class DXFExporter:
                 error_type="arrow_creation_failed"
             )
             
+    def _ensure_arrow_block(self, doc, block_name: str, sc: float):
+        """Create the QEsg solid triangle arrow block if it doesn't exist."""
+        if block_name in doc.blocks:
+            return
+        
+        arrow_block = doc.blocks.new(name=block_name)
+        arrow_block.add_solid(
+            [(4*sc, 0), (-4*sc, -1.33*sc), (-4*sc, 1.33*sc)],
+            dxfattribs={'color': 0, 'layer': '0'}
+        )
+        _trace.debug("Created arrow block: %s", block_name)
+    
     def _ensure_drop_marker_block(self, doc, block_name="RB_DROP_MARKER", n=16):
         """
         Create a filled circle marker block using only R12-safe primitives:
@@ -2085,10 +2861,11 @@ class DXFExporter:
                 dxfattribs={"layer": "0", "color": 0}
             )
         
-        print(f"DEBUG: Created robust drop marker block: {block_name}")
+        _trace.debug("Created robust drop marker block: %s", block_name)
 
-    def _add_drop_marker(self, msp, start_point, end_point, feature_data: Dict[str, Any], layer_name: str, scale_factor: float):
-        """Add drop marker using robust block."""
+    def _add_drop_marker(self, msp, start_point, end_point, feature_data: Dict[str, Any], layer_name: str, scale_factor: float,
+                         geom: Optional[PipeGeometry] = None):
+        """Add drop marker using robust block (position read from geom when given)."""
         try:
             drop_type = feature_data.get('drop_type')
             if not drop_type:
@@ -2096,36 +2873,17 @@ class DXFExporter:
 
             # Determine color
             if drop_type.upper() in ['TC', 'TUBO DE QUEDA']:
-                color_rgb = self.COLOR_RED
+                aci_color = self.ACI_RED
             else:
-                color_rgb = self.COLOR_BLUE
+                aci_color = self.ACI_BLUE
             
-            aci_color = self.get_aci_color(color_rgb)
-            
-            # Access coordinates
-            from qgis.core import QgsPointXY
-            if hasattr(start_point, 'x'):
-                p1 = QgsPointXY(start_point.x(), start_point.y())
-            else:
-                p1 = QgsPointXY(start_point[0], start_point[1])
-                
-            if hasattr(end_point, 'x'):
-                p2 = QgsPointXY(end_point.x(), end_point.y())
-            else:
-                p2 = QgsPointXY(end_point[0], end_point[1])
-            
-            # Calculate position
-            import math
-            length = math.sqrt((p2.x() - p1.x())**2 + (p2.y() - p1.y())**2)
-            
-            # 1/3 rule for short pipes, otherwise 6m from end
-            if length <= 4.0:
-                dist_from_end = length / 3.0
-            else:
-                dist_from_end = 4.0
-                
-            # Calculate marker position (using vector from end to start)
-            marker_pos = self._point_along(p2, p1, dist_from_end)
+            # Calculate position: 1/3 rule for short pipes, otherwise
+            # DROP_LIMIT from the downstream end (see pipe_geometry)
+            if geom is None:
+                geom = PipeGeometryBatch.from_lines([[start_point, end_point]], use_numpy=False).row(0)
+            if geom.chord_length == 0:
+                raise ValueError("zero length pipe")
+            marker_pos = (geom.drop_x, geom.drop_y)
             
             # --- BLOCK BASED IMPLEMENTATION ---
             block_name = "RB_DROP_MARKER"
@@ -2140,7 +2898,7 @@ class DXFExporter:
             
             msp.add_blockref(
                 block_name,
-                (marker_pos.x(), marker_pos.y(), 0),
+                (marker_pos[0], marker_pos[1], 0),
                 dxfattribs={
                     'xscale': scale,
                     'yscale': scale,
@@ -2150,7 +2908,7 @@ class DXFExporter:
                 }
             )
             
-            print(f"DEBUG: Added drop marker block ref ({drop_type}) at {marker_pos}")
+            _trace_labels.debug("Added drop marker block ref (%s) at %s", drop_type, marker_pos)
             
         except Exception as e:
             self.error_manager.record_error(
@@ -2159,7 +2917,8 @@ class DXFExporter:
                 error_type="drop_marker_failed"
             )
             
-    def _add_collector_depth_label(self, msp, start_point, end_point, feature_data: Dict[str, Any], layer_name: str, scale_factor: float):
+    def _add_collector_depth_label(self, msp, start_point, end_point, feature_data: Dict[str, Any], layer_name: str, scale_factor: float,
+                                   geom: Optional[PipeGeometry] = None):
         """
         Add collector depth label (h_col_p2) near downstream node.
         
@@ -2181,66 +2940,23 @@ class DXFExporter:
             except:
                 return
 
-            from qgis.core import QgsPointXY
-            import math
-            
-            # Access coordinates
-            if hasattr(start_point, 'x'):
-                p1 = QgsPointXY(start_point.x(), start_point.y())
-            else:
-                p1 = QgsPointXY(start_point[0], start_point[1])
-                
-            if hasattr(end_point, 'x'):
-                p2 = QgsPointXY(end_point.x(), end_point.y())
-            else:
-                p2 = QgsPointXY(end_point[0], end_point[1])
-            
-            # Calculate position: 5.0m from p2 towards p1
-            dist_from_end = 5.0
-            length = math.sqrt((p2.x() - p1.x())**2 + (p2.y() - p1.y())**2)
-            
-            if length < dist_from_end:
-                 # If pipe is too short, place at midpoint
-                 marker_pos = self._point_along(p2, p1, length / 2.0)
-            else:
-                 marker_pos = self._point_along(p2, p1, dist_from_end)
-            
-            # Calculate rotation
-            angle_rad = math.atan2(p2.y() - p1.y(), p2.x() - p1.x())
-            angle_deg = math.degrees(angle_rad)
-            
-            # Normalize for readability (same logic as pipe labels)
-            rotation = angle_deg
-            if 90 < rotation <= 270:
-                rotation -= 180
-            elif -270 < rotation <= -90:
-                rotation += 180
-                
-            # Offset "Below" the line
-            # "Below" depends on the reading direction.
-            # We want to move perpendicular to the text direction.
-            # Normal vector to text direction:
-            # If text is rotated R, Up is R+90. Below is R-90.
-            
-            rad_text = math.radians(rotation)
-            rad_below = rad_text - math.pi/2
-            
+            # Position: 5.0m from p2 towards p1 (midpoint for shorter pipes),
+            # offset "below" the readable text direction, parallel to the pipe.
             # Text Height: User requested 1.2 drawing units (approx 0.6mm at 1:2000)
             # This is very small, but explicitly valid per user conversation.
+            # Offset distance: roughly 1.5 * text_height (see pipe_geometry)
             text_height = 1.2
+            if geom is None:
+                geom = PipeGeometryBatch.from_lines([[start_point, end_point]], use_numpy=False).row(0)
+            if geom.chord_length == 0:
+                raise ValueError("zero length pipe")
             
-            # Offset distance: roughly 1.5 * text_height
-            offset_dist = 1.5 * text_height
-            
-            off_x = math.cos(rad_below) * offset_dist
-            off_y = math.sin(rad_below) * offset_dist
-            
-            final_x = marker_pos.x() + off_x
-            final_y = marker_pos.y() + off_y
+            rotation = geom.collector_rotation
+            final_x = geom.collector_x
+            final_y = geom.collector_y
             
             # Color: Gray
-            color_rgb = self.COLOR_DEPTH_LENGTH
-            aci_color = self.get_aci_color(color_rgb)
+            aci_color = self.ACI_DEPTH_LENGTH
             
             # Add TEXT entity using explicit attributes for alignment
             # For MIDDLE_CENTER: halign=1 (CENTER), valign=2 (MIDDLE)
@@ -2259,7 +2975,7 @@ class DXFExporter:
                 }
             )
             
-            print(f"DEBUG: Added collector depth label '{text}' at {final_x}, {final_y} with height {text_height}")
+            _trace_labels.debug("Added collector depth label '%s' at %s, %s with height %s", text, final_x, final_y, text_height)
             
         except Exception as e:
             self.error_manager.record_error(
@@ -2359,7 +3075,6 @@ class DXFExporter:
     def _add_manhole_data_labels(self, msp, point, feature_data: Dict[str, Any], config: ExportConfiguration):
         """Add manhole data labels with two-segment leader and left/right layout."""
         try:
-            print(f"DEBUG: _add_manhole_data_labels ENTRY")
             
             sc = config.scale_factor / 2000.0
             text_height = 2.75 * sc           # Increased by another 5% (total 10% from base)
@@ -2384,7 +3099,7 @@ class DXFExporter:
             else:
                 right_str = f"{calculated_depth:.3f}" if calculated_depth else ""
             
-            print(f"DEBUG: Labels - CT: '{ct_str}', CF: '{cf_str}', Right: '{right_str}'")
+            _trace_labels.debug("Labels - CT: '%s', CF: '%s', Right: '%s'", ct_str, cf_str, right_str)
             
             # Calculate text widths using 0.93 factor for accurate measurement
             char_width = text_height * 0.93  # Use 0.93 factor for precise width
@@ -2392,7 +3107,7 @@ class DXFExporter:
             w_cf = len(cf_str) * char_width if cf_str else 0
             left_block_w = max(w_ct, w_cf)  # Width of widest line in left block
             
-            print(f"DEBUG: Text widths - CT: {w_ct}, CF: {w_cf}, left_block_w: {left_block_w}")
+            _trace_labels.debug("Text widths - CT: %s, CF: %s, left_block_w: %s", w_ct, w_cf, left_block_w)
             
             # Position labels (adjusted for proper alignment)
             # Increased offsets again to match new text size
@@ -2418,7 +3133,6 @@ class DXFExporter:
                         'layer': f"{config.layer_prefix}TEXTOPVS"
                     }
                 ).set_placement((x_label, y_CT), align=TextEntityAlignment.MIDDLE_LEFT)
-                print(f"DEBUG: Added CT label: {ct_str} at ({x_label}, {y_CT})")
             
             if cf_str:
                 msp.add_text(
@@ -2431,7 +3145,6 @@ class DXFExporter:
                         'layer': f"{config.layer_prefix}TEXTOPVS"
                     }
                 ).set_placement((x_label, y_CF), align=TextEntityAlignment.MIDDLE_LEFT)
-                print(f"DEBUG: Added CF label: {cf_str} at ({x_label}, {y_CF})")
             
             # Draw right block (h - id inline) center-aligned between CT and CF
             if right_str:
@@ -2445,11 +3158,10 @@ class DXFExporter:
                     dxfattribs={
                         'rotation': 0,
                         'style': self.CAD_FONT,
-                        'color': self.get_aci_color(self.COLOR_DEPTH_LENGTH),
+                        'color': self.ACI_DEPTH_LENGTH,
                         'layer': f"{config.layer_prefix}TEXTOPVS"
                     }
                 ).set_placement((x_right, y_right), align=TextEntityAlignment.MIDDLE_LEFT)
-                print(f"DEBUG: Added right block: {right_str} at ({x_right}, {y_right})")
             
             # Create two-segment leader with correct elbow positioning
             # Target point T (manhole center)
@@ -2478,10 +3190,9 @@ class DXFExporter:
                 }
             )
             
-            print(f"DEBUG: Added polyline leader from {T} to {E} to {L}")
+            _trace_labels.debug("Added polyline leader from %s to %s to %s", T, E, L)
                 
         except Exception as e:
-            print(f"DEBUG: Error in _add_manhole_data_labels: {e}")
             self.error_manager.record_error(
                 ErrorSeverity.WARNING,
                 f"Failed to add manhole data labels: {e}",
@@ -0,0 +1,580 @@
+"""
+Streaming DXF R12 writer for large sewerage network exports.
+
+This module provides a drop-in replacement for the parts of the ezdxf
+``Drawing``/modelspace API used by the DXF exporter. Instead of building the
+complete entity graph in memory, table and block definitions are collected
+first and written as soon as the modelspace is requested; every entity added
+afterwards is streamed straight to disk through the vendored
+``ezdxf.addons.r12writer`` writer. Peak memory stays flat regardless of the
+network size.
+
+Limitations of the R12 format:
+- MTEXT is written as one TEXT entity per paragraph (inline color codes
+  select the ACI color of each line)
+- MULTILEADER is not available
+- Tables and blocks must be defined before the first entity is written
+
+Binary DXF output is produced by re-encoding the generated tag text with the
+vendored ``BinaryTagWriter``; it makes the file smaller, not faster to write.
+"""
+
+import io
+import math
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Add addon directory to path for bundled libraries
+addon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'addon')
+if addon_path not in sys.path:
+    sys.path.insert(0, addon_path)
+
+try:
+    import ezdxf  # registers the 'dxfreplace' codec error handler
+    from ezdxf.addons.r12writer import (
+        R12FastStreamWriter, TEXT_ALIGN_FLAGS, dxf_attribs, dxf_tag, dxf_vertex
+    )
+except ImportError as e:
+    raise ImportError(f"Failed to import bundled ezdxf library: {e}")
+
+from .dxf_binary import BinaryTagEncoder
+from .exceptions import ExportError
+from .file_utils import BINARY_DXF_SENTINEL
+
+
+# MTEXT default line spacing factor (distance between baselines / char height)
+MTEXT_LINE_SPACING = 5.0 / 3.0
+
+_MTEXT_COLOR_CODE = re.compile(r'\\C(\d+);')
+_MTEXT_FORMAT_CODE = re.compile(r'\\[A-Za-z][^;\\]*;')
+
+# TEXT (halign, valign) flags back to r12writer alignment names
+_ALIGN_NAMES = {flags: name for name, flags in TEXT_ALIGN_FLAGS.items()}
+
+
+class _R12EntityWriter(R12FastStreamWriter):
+    """R12FastStreamWriter that leaves the section framing to the caller."""
+
+    def __init__(self, stream):
+        # Do not write the ENTITIES section header, the owning document
+        # decides where entities are written (BLOCKS or ENTITIES section)
+        self.stream = stream
+
+    def add_insert(self, name: str, insert: Sequence[float], xscale: float = 1.0,
+                   yscale: float = 1.0, rotation: float = 0.0, layer: str = "0",
+                   color: Optional[int] = None) -> None:
+        """Add an INSERT (block reference) entity."""
+        dxf = ["0\nINSERT\n"]
+        dxf.append(dxf_attribs(layer, color))
+        dxf.append(dxf_tag(2, name))
+        dxf.append(dxf_vertex(_xyz(insert), code=10))
+        if xscale != 1.0:
+            dxf.append(dxf_tag(41, round(xscale, 6)))
+        if yscale != 1.0:
+            dxf.append(dxf_tag(42, round(yscale, 6)))
+        if rotation:
+            dxf.append(dxf_tag(50, round(rotation, 6)))
+        self.stream.write("".join(dxf))
+
+    def add_xdata(self, appid: str, tags: Iterable[Tuple[int, Any]]) -> None:
+        """Append extended data to the entity written last."""
+        dxf = [dxf_tag(1001, appid)]
+        for code, value in tags:
+            dxf.append(dxf_tag(code, value))
+        self.stream.write("".join(dxf))
+
+
+class _BinaryDXFStream:
+    """
+    Write-only text stream storing DXF tag text as binary DXF R12.
+
+    Every write() must contain complete ``code\\nvalue\\n`` tag pairs, which
+    holds for the preamble, the entity writer and rendered fragments.
+    """
+
+    def __init__(self, path: str, encoding: str = 'cp1252'):
+        self._file = open(path, 'wb')
+        self._encoder = BinaryTagEncoder(r12=True, encoding=encoding)
+        self._file.write(BINARY_DXF_SENTINEL)
+
+    def write(self, text: str) -> None:
+        self._file.write(self._encoder.encode_text(text))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _xyz(point: Sequence[float]) -> Tuple[float, float, float]:
+    """Return a 3D tuple for 2D or 3D input points."""
+    if len(point) > 2:
+        return (point[0], point[1], point[2])
+    return (point[0], point[1], 0.0)
+
+
+def _valid_color(color: Optional[int]) -> Optional[int]:
+    """Return color if it is a valid ACI index (0-256), otherwise None."""
+    try:
+        color = int(color)
+    except (TypeError, ValueError):
+        return None
+    return color if 0 <= color <= 256 else None
+
+
+class StreamEntity:
+    """
+    Entity waiting to be written by the streaming modelspace.
+
+    Mirrors the handful of ezdxf entity methods the exporter calls right
+    after creating an entity (``set_xdata``, ``set_placement`` and
+    ``set_location``). The entity is written when the next entity is added
+    or when the document is saved, so at most one entity is held in memory.
+    """
+
+    def __init__(self, dxftype: str, attribs: Dict[str, Any]):
+        self.dxftype = dxftype
+        self.attribs = attribs
+        self.xdata: List[Tuple[str, List[Tuple[int, Any]]]] = []
+
+    def set_xdata(self, appid: str, tags: List[Tuple[int, Any]]) -> None:
+        """Attach extended data tags for the given application id."""
+        self.xdata.append((appid, list(tags)))
+
+    def set_placement(self, p1, p2=None, align=None) -> 'StreamEntity':
+        """Set TEXT location and alignment (ezdxf Text.set_placement)."""
+        self.attribs['insert'] = (p1[0], p1[1])
+        if align is not None:
+            self.attribs['align'] = getattr(align, 'name', str(align))
+        return self
+
+    def set_location(self, insert, rotation=None, attachment_point=None) -> 'StreamEntity':
+        """Set MTEXT location and attachment point (ezdxf MText.set_location)."""
+        self.attribs['insert'] = (insert[0], insert[1])
+        if rotation is not None:
+            self.attribs['rotation'] = rotation
+        if attachment_point is not None:
+            self.attribs['attachment_point'] = int(attachment_point)
+        return self
+
+
+class _NameTable:
+    """Minimal table supporting ``name in table`` and ``table.new(...)``."""
+
+    def __init__(self, document: 'DXFStreamDocument', factory):
+        self._document = document
+        self._factory = factory
+        self._entries: Dict[str, Any] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self._entries
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def new(self, name: str, dxfattribs: Optional[Dict[str, Any]] = None):
+        """Create a new table entry; only possible before entities are streamed."""
+        self._document._check_preamble_open(name)
+        entry = self._factory(name, dict(dxfattribs or {}))
+        self._entries[name.upper()] = entry
+        return entry
+
+
+class StreamBlock:
+    """Block definition collected in memory until the BLOCKS section is written."""
+
+    def __init__(self, name: str, dxfattribs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.dxfattribs = dxfattribs or {}
+        self.entities: List[StreamEntity] = []
+
+    def add_solid(self, points, dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        entity = StreamEntity('SOLID', {'points': [tuple(p) for p in points], **(dxfattribs or {})})
+        self.entities.append(entity)
+        return entity
+
+    def add_circle(self, center, radius: float,
+                   dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        entity = StreamEntity('CIRCLE', {'center': tuple(center), 'radius': radius, **(dxfattribs or {})})
+        self.entities.append(entity)
+        return entity
+
+    def add_line(self, start, end, dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        entity = StreamEntity('LINE', {'start': tuple(start), 'end': tuple(end), **(dxfattribs or {})})
+        self.entities.append(entity)
+        return entity
+
+
+class StreamingModelSpace:
+    """
+    Modelspace facade writing entities to the open DXF stream.
+
+    Implements the subset of ``ezdxf.layouts.Modelspace`` used by the
+    exporter: ``add_line``, ``add_circle``, ``add_text``, ``add_mtext``,
+    ``add_lwpolyline`` and ``add_blockref``.
+    """
+
+    def __init__(self, document: 'DXFStreamDocument'):
+        self.doc = document
+
+    def add_line(self, start, end, dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        return self.doc._queue(StreamEntity('LINE', {'start': tuple(start), 'end': tuple(end),
+                                                     **(dxfattribs or {})}))
+
+    def add_circle(self, center, radius: float,
+                   dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        return self.doc._queue(StreamEntity('CIRCLE', {'center': tuple(center), 'radius': radius,
+                                                       **(dxfattribs or {})}))
+
+    def add_text(self, text: str, height: Optional[float] = None,
+                 rotation: Optional[float] = None,
+                 dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        attribs = dict(dxfattribs or {})
+        attribs['text'] = text
+        if height is not None:
+            attribs['height'] = height
+        if rotation is not None:
+            attribs['rotation'] = rotation
+        return self.doc._queue(StreamEntity('TEXT', attribs))
+
+    def add_mtext(self, text: str, dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        attribs = dict(dxfattribs or {})
+        attribs['text'] = text
+        return self.doc._queue(StreamEntity('MTEXT', attribs))
+
+    def add_lwpolyline(self, points, format: str = 'xy', close: bool = False,
+                       dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        attribs = dict(dxfattribs or {})
+        attribs['points'] = [tuple(p[:2]) for p in points]
+        attribs['closed'] = close
+        return self.doc._queue(StreamEntity('POLYLINE', attribs))
+
+    def add_blockref(self, name: str, insert,
+                     dxfattribs: Optional[Dict[str, Any]] = None) -> StreamEntity:
+        if name not in self.doc.blocks:
+            raise ExportError(f"Block '{name}' must be defined before streaming entities")
+        return self.doc._queue(StreamEntity('INSERT', {'name': name, 'insert': tuple(insert),
+                                                       **(dxfattribs or {})}))
+
+
+class DXFStreamDocument:
+    """
+    Streaming DXF R12 document.
+
+    Usage mirrors an ezdxf document: define layers, styles, appids and blocks,
+    request the modelspace (this writes HEADER, TABLES and BLOCKS), add
+    entities, then call :meth:`saveas`. Output goes to a temporary file next
+    to the target which replaces the target only when the export succeeds.
+    """
+
+    def __init__(self, output_path: str, binary: bool = False):
+        """
+        Initialize streaming document.
+
+        Args:
+            output_path: Final DXF file path
+            binary: Write binary instead of ASCII DXF
+        """
+        self.output_path = output_path
+        self.binary = binary
+        self.layers = _NameTable(self, lambda name, attribs: (name, attribs))
+        self.styles = _NameTable(self, lambda name, attribs: (name, attribs))
+        self.appids = _NameTable(self, lambda name, attribs: (name, attribs))
+        self.blocks = _NameTable(self, StreamBlock)
+        self.entity_count = 0
+
+        self._temp_path = f"{output_path}.part"
+        self._stream = None
+        self._writer: Optional[_R12EntityWriter] = None
+        self._pending: Optional[StreamEntity] = None
+        self._modelspace: Optional[StreamingModelSpace] = None
+
+    # --- document API -----------------------------------------------------
+
+    def modelspace(self) -> StreamingModelSpace:
+        """Return the streaming modelspace, writing the preamble on first call."""
+        if self._modelspace is None:
+            self._write_preamble()
+            self._modelspace = StreamingModelSpace(self)
+        return self._modelspace
+
+    def saveas(self, filename: Optional[str] = None, fmt: Optional[str] = None) -> None:
+        """
+        Finish the ENTITIES section and move the file to its final location.
+
+        Args:
+            filename: Target path, defaults to the path given at construction
+            fmt: ``'asc'`` or ``'bin'`` as for ezdxf documents; must match the
+                format chosen at construction, since the file is already written
+
+        Raises:
+            ExportError: If fmt differs from the format being streamed
+        """
+        if fmt is not None and fmt.startswith('bin') != self.binary:
+            raise ExportError(f"Streamed DXF is written as {'binary' if self.binary else 'ASCII'}, "
+                              f"cannot save it as '{fmt}'")
+        self.modelspace()  # guarantees a complete file even without entities
+        self._flush_pending()
+        self._stream.write("0\nENDSEC\n0\nEOF\n")
+        self._stream.close()
+        self._stream = None
+        os.replace(self._temp_path, filename or self.output_path)
+
+    def write_fragment(self, text: str, entity_count: int) -> None:
+        """
+        Append pre-rendered ENTITIES section content (see DXFStreamFragment).
+
+        Args:
+            text: DXF tag text of complete entities
+            entity_count: Number of entities contained in the text
+        """
+        self.modelspace()
+        self._flush_pending()
+        self._stream.write(text)
+        self.entity_count += entity_count
+
+    def abort(self) -> None:
+        """Close the stream and discard the partially written file."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if os.path.exists(self._temp_path):
+            try:
+                os.remove(self._temp_path)
+            except OSError:
+                pass
+
+    # --- internals --------------------------------------------------------
+
+    def _check_preamble_open(self, name: str) -> None:
+        if self._modelspace is not None:
+            raise ExportError(
+                f"Cannot define '{name}' after entities started streaming"
+            )
+
+    def _queue(self, entity: StreamEntity) -> StreamEntity:
+        self._flush_pending()
+        self._pending = entity
+        return entity
+
+    def _flush_pending(self) -> None:
+        if self._pending is not None:
+            self._write_entity(self._pending)
+            self._pending = None
+
+    def _write_preamble(self) -> None:
+        try:
+            if self.binary:
+                self._stream = _BinaryDXFStream(self._temp_path)
+            else:
+                self._stream = open(self._temp_path, 'wt', encoding='cp1252', errors='dxfreplace')
+        except OSError as e:
+            raise ExportError(f"Cannot open DXF output file: {e}", error_type="file")
+        self._writer = _R12EntityWriter(self._stream)
+        write = self._stream.write
+
+        # HEADER
+        write("0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n"
+              "9\n$DWGCODEPAGE\n3\nANSI_1252\n0\nENDSEC\n")
+
+        # TABLES
+        write("0\nSECTION\n2\nTABLES\n")
+        write("0\nTABLE\n2\nLTYPE\n70\n1\n"
+              "0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n"
+              "0\nENDTAB\n")
+
+        layers = [('0', {'color': 7})] + [entry for entry in self.layers if entry[0] != '0']
+        write(f"0\nTABLE\n2\nLAYER\n70\n{len(layers)}\n")
+        for name, attribs in layers:
+            color = _valid_color(attribs.get('color'))
+            if color is None or not 1 <= color <= 255:
+                color = 7
+            write(f"0\nLAYER\n2\n{name}\n70\n0\n62\n{color}\n6\nCONTINUOUS\n")
+        write("0\nENDTAB\n")
+
+        styles = [('STANDARD', {'font': 'txt'})] + [
+            entry for entry in self.styles if entry[0].upper() != 'STANDARD'
+        ]
+        write(f"0\nTABLE\n2\nSTYLE\n70\n{len(styles)}\n")
+        for name, attribs in styles:
+            write(f"0\nSTYLE\n2\n{name}\n70\n0\n40\n0.0\n41\n1.0\n50\n0.0\n71\n0\n"
+                  f"42\n2.5\n3\n{attribs.get('font', 'txt')}\n4\n\n")
+        write("0\nENDTAB\n")
+
+        appids = [('ACAD', {})] + [entry for entry in self.appids if entry[0] != 'ACAD']
+        write(f"0\nTABLE\n2\nAPPID\n70\n{len(appids)}\n")
+        for name, _ in appids:
+            write(f"0\nAPPID\n2\n{name}\n70\n0\n")
+        write("0\nENDTAB\n0\nENDSEC\n")
+
+        # BLOCKS
+        write("0\nSECTION\n2\nBLOCKS\n")
+        for block in self.blocks:
+            write(f"0\nBLOCK\n8\n0\n2\n{block.name}\n70\n0\n"
+                  f"10\n0.0\n20\n0.0\n30\n0.0\n3\n{block.name}\n1\n\n")
+            for entity in block.entities:
+                self._write_entity(entity, count=False)
+            write("0\nENDBLK\n8\n0\n")
+        write("0\nENDSEC\n")
+
+        write("0\nSECTION\n2\nENTITIES\n")
+
+    def _write_entity(self, entity: StreamEntity, count: bool = True) -> None:
+        attribs = entity.attribs
+        layer = attribs.get('layer', '0')
+        color = _valid_color(attribs.get('color'))
+        writer = self._writer
+
+        if entity.dxftype == 'LINE':
+            writer.add_line(_xyz(attribs['start']), _xyz(attribs['end']), layer=layer, color=color)
+        elif entity.dxftype == 'CIRCLE':
+            writer.add_circle(_xyz(attribs['center']), attribs['radius'], layer=layer, color=color)
+        elif entity.dxftype == 'SOLID':
+            writer.add_solid(attribs['points'], layer=layer, color=color)
+        elif entity.dxftype == 'POLYLINE':
+            writer.add_polyline_2d(attribs['points'], closed=attribs.get('closed', False),
+                                   layer=layer, color=color)
+        elif entity.dxftype == 'INSERT':
+            writer.add_insert(attribs['name'], attribs['insert'],
+                              xscale=attribs.get('xscale', 1.0),
+                              yscale=attribs.get('yscale', 1.0),
+                              rotation=attribs.get('rotation', 0.0),
+                              layer=layer, color=color)
+        elif entity.dxftype == 'TEXT':
+            self._write_text(attribs, layer, color)
+        elif entity.dxftype == 'MTEXT':
+            self._write_mtext(attribs, layer, color)
+        else:
+            raise ExportError(f"Unsupported streaming entity type: {entity.dxftype}")
+
+        for appid, tags in entity.xdata:
+            writer.add_xdata(appid, tags)
+
+        if count:
+            self.entity_count += 1
+
+    def _write_text(self, attribs: Dict[str, Any], layer: str, color: Optional[int]) -> None:
+        if 'align' in attribs:
+            align = attribs['align']
+            insert = attribs.get('insert', (0.0, 0.0))
+        elif 'halign' in attribs or 'valign' in attribs:
+            flags = (attribs.get('halign', 0), attribs.get('valign', 0))
+            align = _ALIGN_NAMES.get(flags, 'LEFT')
+            insert = attribs.get('align_point', attribs.get('insert', (0.0, 0.0)))
+        else:
+            align = 'LEFT'
+            insert = attribs.get('insert', (0.0, 0.0))
+
+        self._writer.add_text(
+            attribs['text'],
+            insert=(insert[0], insert[1]),
+            height=attribs.get('height', 1.0),
+            align=align if align.upper() in TEXT_ALIGN_FLAGS else 'LEFT',
+            rotation=attribs.get('rotation', 0.0) or 0.0,
+            style=attribs.get('style', 'STANDARD'),
+            layer=layer,
+            color=color,
+        )
+
+    def _write_mtext(self, attribs: Dict[str, Any], layer: str, color: Optional[int]) -> None:
+        """Write MTEXT as one TEXT entity per paragraph."""
+        paragraphs = attribs['text'].split('\\P')
+        height = attribs.get('char_height', 1.0)
+        rotation = attribs.get('rotation', 0.0) or 0.0
+        insert_x, insert_y = attribs.get('insert', (0.0, 0.0))[:2]
+
+        # attachment point 1-9: row = top/middle/bottom, column = left/center/right
+        attachment = attribs.get('attachment_point', 1)
+        row, column = divmod(attachment - 1, 3)
+        vertical = ('TOP', 'MIDDLE', 'BOTTOM')[row]
+        horizontal = ('LEFT', 'CENTER', 'RIGHT')[column]
+
+        pitch = height * MTEXT_LINE_SPACING
+        count = len(paragraphs)
+        cos_r = math.cos(math.radians(rotation))
+        sin_r = math.sin(math.radians(rotation))
+
+        for index, paragraph in enumerate(paragraphs):
+            colors = _MTEXT_COLOR_CODE.findall(paragraph)
+            text = _MTEXT_FORMAT_CODE.sub('', paragraph).strip()
+            if not text:
+                continue
+
+            if row == 0:
+                local_y = -index * pitch
+            elif row == 1:
+                local_y = ((count - 1) / 2.0 - index) * pitch
+            else:
+                local_y = (count - 1 - index) * pitch
+
+            self._writer.add_text(
+                text,
+                insert=(insert_x - local_y * sin_r, insert_y + local_y * cos_r),
+                height=height,
+                align=f"{vertical}_{horizontal}",
+                rotation=rotation,
+                style=attribs.get('style', 'STANDARD'),
+                layer=layer,
+                color=_valid_color(colors[0]) if colors else color,
+            )
+
+
+class DXFStreamFragment(DXFStreamDocument):
+    """
+    In-memory ENTITIES section fragment.
+
+    Renders entities exactly like :class:`DXFStreamDocument` but into a
+    string, without header, tables or blocks. Fragments rendered separately
+    (e.g. in worker processes) are appended to the final document in a fixed
+    order with :meth:`DXFStreamDocument.write_fragment`. R12 stream output
+    carries no entity handles, so the merged file does not depend on how the
+    entities were split into fragments.
+    """
+
+    def __init__(self, block_names: Iterable[str] = ()):
+        """
+        Initialize fragment.
+
+        Args:
+            block_names: Names of blocks defined in the target document
+        """
+        super().__init__('')
+        for name in block_names:
+            self.blocks._entries[name.upper()] = StreamBlock(name)
+        self._stream = io.StringIO()
+        self._writer = _R12EntityWriter(self._stream)
+        self._modelspace = StreamingModelSpace(self)
+
+    def modelspace(self) -> StreamingModelSpace:
+        return self._modelspace
+
+    def getvalue(self) -> str:
+        """Return the rendered entity text."""
+        self._flush_pending()
+        return self._stream.getvalue()
+
+    def take(self) -> Tuple[str, int]:
+        """
+        Return the rendered entity text and count, and empty the fragment.
+
+        Lets one fragment render many separately kept pieces, e.g. the
+        entities of each feature for the incremental export cache.
+
+        Returns:
+            (entity_text, entity_count)
+        """
+        text = self.getvalue()
+        count = self.entity_count
+        self._stream.seek(0)
+        self._stream.truncate()
+        self.entity_count = 0
+        return text, count
+
+    def saveas(self, filename: Optional[str] = None, fmt: Optional[str] = None) -> None:
+        raise ExportError("A DXF fragment cannot be saved on its own")
+
+    def abort(self) -> None:
+        self._pending = None
@@ -5,7 +5,9 @@ This module provides mechanisms for graceful error recovery, feature skipping,
 and detailed progress reporting during export operations.
 """
 
+import random
 import traceback
+from collections import Counter, deque
 from typing import List, Dict, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
@@ -54,6 +56,16 @@ except ImportError:
     )
 
 
+# Sample records kept per error type (reservoir sampling over all occurrences)
+SAMPLES_PER_TYPE = 5
+
+# Records buffered before a summary is written to the QGIS message log
+LOG_BATCH_SIZE = 200
+
+# Most recent messages kept for the error summary
+RECENT_RECORDS = 10
+
+
 class ErrorSeverity(Enum):
     """Error severity levels for recovery decisions."""
     INFO = "info"
@@ -126,20 +138,44 @@ class ProcessingStats:
 class ErrorRecoveryManager:
     """Manages error recovery strategies and graceful degradation."""
     
-    def __init__(self, max_errors: int = 100, max_warnings: int = 500):
+    def __init__(self, max_errors: int = 100, max_warnings: int = 500, log_to_qgis: bool = True,
+                 samples_per_type: int = SAMPLES_PER_TYPE, log_batch_size: int = LOG_BATCH_SIZE):
         """
         Initialize error recovery manager.
         
+        Records are aggregated: occurrences are counted per error type and
+        severity, only a bounded sample of records is kept per error type,
+        and the QGIS message log receives one summary line per error type
+        and severity for each batch of records.
+        
         Args:
             max_errors: Maximum number of errors before stopping
             max_warnings: Maximum number of warnings before stopping
+            log_to_qgis: Write records to the QGIS message log (disabled in
+                worker processes without a QGIS application)
+            samples_per_type: Sample records kept per error type
+            log_batch_size: Records buffered before the log is flushed
         """
         self.max_errors = max_errors
         self.max_warnings = max_warnings
-        self.error_records: List[ErrorRecord] = []
+        self.log_to_qgis = log_to_qgis
+        self.samples_per_type = samples_per_type
+        self.log_batch_size = log_batch_size
         self.stats = ProcessingStats()
+        self.total_records = 0
+        # (error_type, severity) -> occurrences
+        self._counts: Counter = Counter()
+        # error_type -> [occurrences offered to the reservoir, sample records]
+        self._samples: Dict[str, list] = {}
+        self._recent: deque = deque(maxlen=RECENT_RECORDS)
+        # (error_type, severity) -> [count, first display message] since the last flush
+        self._pending_log: Dict[Tuple[str, ErrorSeverity], list] = {}
+        self._pending_count = 0
+        # Fixed seed: the same export keeps the same samples
+        self._random = random.Random(0)
         self.recovery_strategies: Dict[str, Callable] = {}
         self.should_continue = True
+        self.cancelled = False
         
         # Set up default recovery strategies
         self._setup_default_strategies()
@@ -154,6 +190,11 @@ class ErrorRecoveryManager:
             'export_error': self._retry_strategy,
         }
     
+    def cancel(self):
+        """Request cancellation; processing loops stop at the next feature."""
+        self.cancelled = True
+        self.should_continue = False
+    
     def record_error(self, severity: ErrorSeverity, message: str, 
                     feature_id: Optional[str] = None, layer_name: Optional[str] = None,
                     error_type: str = "general", exception: Optional[Exception] = None,
@@ -173,8 +214,99 @@ class ErrorRecoveryManager:
         Returns:
             True if processing should continue, False if it should stop
         """
-        # Create error record
-        error_record = ErrorRecord(
+        self._add(severity, error_type, 1)
+        self._offer_sample(error_type, 1, severity, message, feature_id, layer_name,
+                           exception, context)
+        self._recent.append((severity, message, feature_id, layer_name))
+        
+        # Queue for the QGIS message log
+        if self.log_to_qgis:
+            self._queue_log(severity, error_type, 1, message, feature_id, layer_name)
+            if severity == ErrorSeverity.CRITICAL or self._pending_count >= self.log_batch_size:
+                self.flush_log()
+        
+        return self._check_limits(severity)
+    
+    def merge_aggregate(self, aggregate: List[Tuple[str, str, int, List[Tuple[str, Optional[str], Optional[str]]]]]) -> bool:
+        """
+        Add the records aggregated by another manager (see get_aggregate).
+        
+        Args:
+            aggregate: (severity name, error type, count, samples) entries,
+                samples as (message, feature_id, layer_name) tuples
+            
+        Returns:
+            True if processing should continue, False if it should stop
+        """
+        stop_severity = None
+        for severity_name, error_type, count, samples in aggregate:
+            severity = ErrorSeverity[severity_name]
+            self._add(severity, error_type, count)
+            weight = count / len(samples) if samples else 0
+            for message, feature_id, layer_name in samples:
+                self._offer_sample(error_type, weight, severity, message, feature_id, layer_name)
+            if samples:
+                message, feature_id, layer_name = samples[-1]
+                self._recent.append((severity, message, feature_id, layer_name))
+                if self.log_to_qgis:
+                    self._queue_log(severity, error_type, count, message, feature_id, layer_name)
+            if severity == ErrorSeverity.CRITICAL:
+                stop_severity = severity
+        
+        if self.log_to_qgis and self._pending_count >= self.log_batch_size:
+            self.flush_log()
+        return self._check_limits(stop_severity or ErrorSeverity.INFO)
+    
+    def get_aggregate(self) -> List[Tuple[str, str, int, List[Tuple[str, Optional[str], Optional[str]]]]]:
+        """
+        Get the recorded counts and samples as plain (picklable) tuples.
+        
+        Returns:
+            (severity name, error type, count, samples) entries, samples as
+            (message, feature_id, layer_name) tuples of that severity
+        """
+        aggregate = []
+        for (error_type, severity), count in self._counts.items():
+            samples = [
+                (record.message, record.feature_id, record.layer_name)
+                for record in self._samples.get(error_type, (0, []))[1]
+                if record.severity == severity
+            ]
+            aggregate.append((severity.name, error_type, count, samples))
+        return aggregate
+    
+    @property
+    def error_records(self) -> List[ErrorRecord]:
+        """Sample records of all error types (bounded, see samples_per_type)."""
+        return [record for _, records in self._samples.values() for record in records]
+    
+    def _add(self, severity: ErrorSeverity, error_type: str, count: int):
+        """Count occurrences and update statistics."""
+        self._counts[(error_type, severity)] += count
+        self.total_records += count
+        if severity == ErrorSeverity.WARNING:
+            self.stats.warnings += count
+        elif severity in (ErrorSeverity.ERROR, ErrorSeverity.CRITICAL):
+            self.stats.errors += count
+    
+    def _offer_sample(self, error_type: str, weight: float, severity: ErrorSeverity, message: str,
+                      feature_id: Optional[str], layer_name: Optional[str],
+                      exception: Optional[Exception] = None, context: Optional[Dict[str, Any]] = None):
+        """Offer an occurrence to the reservoir of its error type (weight = occurrences it stands for)."""
+        entry = self._samples.get(error_type)
+        if entry is None:
+            entry = self._samples[error_type] = [0, []]
+        entry[0] += weight
+        records = entry[1]
+        if len(records) < self.samples_per_type:
+            slot = len(records)
+            records.append(None)
+        else:
+            slot = int(self._random.random() * entry[0])
+            if slot >= self.samples_per_type:
+                return
+        # Records are only built for kept samples
+        records[slot] = ErrorRecord(
             severity=severity,
             message=message,
             feature_id=feature_id,
@@ -183,23 +315,35 @@ class ErrorRecoveryManager:
             exception=exception,
             context=context or {}
         )
-        
-        self.error_records.append(error_record)
-        
-        # Update statistics
-        if severity == ErrorSeverity.WARNING:
-            self.stats.warnings += 1
-        elif severity in [ErrorSeverity.ERROR, ErrorSeverity.CRITICAL]:
-            self.stats.errors += 1
-        
-        # Log to QGIS message log
-        qgis_level = self._get_qgis_log_level(severity)
-        QgsMessageLog.logMessage(
-            error_record.get_display_message(),
-            "RedBasica Export",
-            qgis_level
-        )
-        
+    
+    def _queue_log(self, severity: ErrorSeverity, error_type: str, count: int, message: str,
+                   feature_id: Optional[str], layer_name: Optional[str]):
+        """Buffer occurrences for the next log flush."""
+        key = (error_type, severity)
+        pending = self._pending_log.get(key)
+        if pending is None:
+            display = ErrorRecord(severity, message, feature_id, layer_name,
+                                  timestamp="-").get_display_message()
+            self._pending_log[key] = [count, display]
+        else:
+            pending[0] += count
+        self._pending_count += count
+    
+    def flush_log(self):
+        """Write the buffered records to the QGIS message log, one line per type and severity."""
+        pending, self._pending_log = self._pending_log, {}
+        self._pending_count = 0
+        for (error_type, severity), (count, display) in pending.items():
+            if count > 1:
+                display = f"{display} (+{count - 1} more '{error_type}' {severity.value}s)"
+            QgsMessageLog.logMessage(
+                display,
+                "RedBasica Export",
+                self._get_qgis_log_level(severity)
+            )
+    
+    def _check_limits(self, severity: ErrorSeverity) -> bool:
+        """Determine if processing should continue after new records."""
         # Check if we should continue processing
         if severity == ErrorSeverity.CRITICAL:
             self.should_continue = False
@@ -307,29 +451,41 @@ class ErrorRecoveryManager:
     
     def get_error_summary(self) -> Dict[str, Any]:
         """Get summary of all errors and statistics."""
+        if self.log_to_qgis:
+            self.flush_log()
+        
         error_by_type = {}
         error_by_severity = {}
         
-        for record in self.error_records:
+        for (error_type, severity), count in self._counts.items():
             # Count by type
-            error_by_type[record.error_type] = error_by_type.get(record.error_type, 0) + 1
+            error_by_type[error_type] = error_by_type.get(error_type, 0) + count
             
             # Count by severity
-            severity_key = record.severity.value
-            error_by_severity[severity_key] = error_by_severity.get(severity_key, 0) + 1
+            severity_key = severity.value
+            error_by_severity[severity_key] = error_by_severity.get(severity_key, 0) + count
+        
+        recent_errors = [
+            ErrorRecord(severity, message, feature_id, layer_name, timestamp="-").get_display_message()
+            for severity, message, feature_id, layer_name in self._recent
+        ]
         
         return {
             'statistics': self.stats,
-            'total_errors': len(self.error_records),
+            'total_errors': self.total_records,
             'by_type': error_by_type,
             'by_severity': error_by_severity,
+            'samples': {
+                error_type: [record.get_display_message() for record in records]
+                for error_type, (_, records) in self._samples.items()
+            },
             'should_continue': self.should_continue,
-            'recent_errors': [r.get_display_message() for r in self.error_records[-10:]]
+            'recent_errors': recent_errors
         }
     
     def get_user_report(self) -> str:
         """Generate user-friendly error report."""
-        if not self.error_records:
+        if not self.total_records:
             return "No errors or warnings occurred during processing."
         
         summary = self.get_error_summary()
@@ -348,14 +504,15 @@ class ErrorRecoveryManager:
         
         if summary['by_type']:
             report_lines.append("Issues by type:")
-            for error_type, count in summary['by_type'].items():
-                report_lines.append(f"- {error_type.replace('_', ' ').title()}: {count}")
-            report_lines.append("")
-        
-        if summary['recent_errors']:
-            report_lines.append("Recent issues:")
-            for error_msg in summary['recent_errors']:
-                report_lines.append(f"- {error_msg}")
+            for error_type, count in sorted(summary['by_type'].items(), key=lambda item: -item[1]):
+                line = f"- {error_type.replace('_', ' ').title()}: {count}"
+                _, records = self._samples.get(error_type, (0, []))
+                feature_ids = [str(record.feature_id) for record in records if record.feature_id]
+                if feature_ids:
+                    line += f" (e.g. features {', '.join(feature_ids)})"
+                report_lines.append(line)
+                if records:
+                    report_lines.append(f"  Example: {records[0].message}")
         
         return "\n".join(report_lines)
 
@@ -363,17 +520,21 @@ class ErrorRecoveryManager:
 class ProgressTracker:
     """Tracks and reports progress during export operations."""
     
-    def __init__(self, total_steps: int, callback: Optional[Callable] = None):
+    def __init__(self, total_steps: int, callback: Optional[Callable] = None,
+                 profiler=None):
         """
         Initialize progress tracker.
         
         Args:
             total_steps: Total number of steps in the operation
             callback: Optional callback function for progress updates
+            profiler: Optional ExportProfiler timing each step (a step
+                lasts until the next update() or finish())
         """
         self.total_steps = total_steps
         self.current_step = 0
         self.callback = callback
+        self.profiler = profiler
         self.step_messages: List[str] = []
         self.start_time = None
         self.step_times: List[float] = []
@@ -392,6 +553,12 @@ class ProgressTracker:
             step: Current step number
             message: Progress message
         """
+        if self.profiler is not None:
+            self.profiler.begin_step(step, message)
+        self._report(step, message)
+    
+    def _report(self, step: int, message: str):
+        """Record the step and notify the callback and the QGIS log."""
         import time
         
         self.current_step = step
@@ -416,6 +583,24 @@ class ProgressTracker:
             Qgis.Info
         )
     
+    def update_partial(self, step: int, done: int, total: int, message: str = ""):
+        """
+        Report progress within a step, e.g. after each chunk of features.
+        
+        Only the progress callback is notified; the QGIS log and the step
+        history are left to update().
+        
+        Args:
+            step: Current step number
+            done: Items processed so far within the step
+            total: Total items in the step (0 if unknown)
+            message: Progress message
+        """
+        fraction = min(done / total, 1.0) if total > 0 else 0.0
+        if self.callback:
+            progress_percent = int(((step + fraction) / self.total_steps) * 100)
+            self.callback(min(progress_percent, 100), message)
+    
     def finish(self, success: bool = True, final_message: str = ""):
         """
         Finish progress tracking.
@@ -429,7 +614,9 @@ class ProgressTracker:
         if not final_message:
             final_message = "Export completed successfully" if success else "Export completed with errors"
         
-        self.update(self.total_steps, final_message)
+        if self.profiler is not None:
+            self.profiler.end_step()
+        self._report(self.total_steps, final_message)
         
         # Calculate total time
         if self.start_time:
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Per-feature entity cache for incremental streamed exports.
+
+A streamed (DXF R12) export renders every feature into a self-contained
+piece of ENTITIES section text (see DXFStreamFragment). The cache keeps that
+text per feature in a SQLite file next to the DXF (``<name>.rbcache``),
+together with a fingerprint of everything the text was rendered from:
+
+- per feature: the extracted and calculated attribute values and the
+  vertices (the feature id is the key)
+- per cache: the label and geometry affecting export settings, the layer
+  mappings and a digest of the rendering code (the export signature)
+
+On re-export, a feature whose fingerprint is unchanged is copied from the
+cache instead of being rendered; changed and added features are rendered and
+stored, and features no longer present are dropped. A different export
+signature empties the cache. All changes are made in one transaction that is
+committed only when the DXF file was saved.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .data_structures import ExportConfiguration, LayerMapping
+
+
+# Bump when the cache layout or the fingerprint encoding changes
+CACHE_VERSION = 1
+
+# Cached rows written per executemany call
+STORE_BATCH_SIZE = 500
+
+# Modules whose code determines the rendered entity text
+_RENDER_MODULES = ('dxf_exporter.py', 'dxf_stream_writer.py', 'pipe_geometry.py', 'dxf_colors.py')
+
+# (entity_text, entity_count)
+CachedEntities = Tuple[str, int]
+
+
+def cache_path(output_path: str) -> str:
+    """
+    Get the path of the entity cache of a DXF file.
+
+    Args:
+        output_path: DXF output path
+
+    Returns:
+        ``<name>.rbcache`` in the directory of the DXF file
+    """
+    return os.path.splitext(output_path)[0] + '.rbcache'
+
+
+def _renderer_digest() -> str:
+    """Digest of the rendering code, so cached text is dropped after plugin updates."""
+    digest = hashlib.sha1()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in _RENDER_MODULES:
+        try:
+            with open(os.path.join(directory, name), 'rb') as handle:
+                digest.update(handle.read())
+        except OSError:
+            digest.update(name.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _mapping_signature(mapping: Optional[LayerMapping]) -> Any:
+    if mapping is None:
+        return None
+    return {
+        'layer_id': mapping.layer_id,
+        'field_mappings': mapping.field_mappings,
+        'default_values': mapping.default_values,
+        'calculated_fields': mapping.calculated_fields,
+    }
+
+
+def export_signature(config: ExportConfiguration, block_names: Iterable[str],
+                     text_style: str) -> str:
+    """
+    Get the signature of everything besides the feature data that affects the entities.
+
+    Args:
+        config: Export configuration
+        block_names: Names of the blocks defined in the target document
+        text_style: Default text style of the template manager
+
+    Returns:
+        Hex digest; cached entities are only reused under the same signature
+    """
+    parts = {
+        'version': CACHE_VERSION,
+        'renderer': _renderer_digest(),
+        'scale_factor': config.scale_factor,
+        'layer_prefix': config.layer_prefix,
+        'include_arrows': config.include_arrows,
+        'include_labels': config.include_labels,
+        'include_elevations': config.include_elevations,
+        'include_collector_depth': config.include_collector_depth,
+        'export_node_id': config.export_node_id,
+        'include_slope_unit': config.include_slope_unit,
+        'label_format': config.label_format,
+        'export_mode': config.export_mode.name,
+        'label_style': config.label_style.name,
+        'pipes_mapping': _mapping_signature(config.pipes_mapping),
+        'junctions_mapping': _mapping_signature(config.junctions_mapping),
+        'blocks': sorted(block_names),
+        'text_style': text_style,
+    }
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def feature_fingerprint(feature_data: Dict[str, Any], vertices: Any) -> bytes:
+    """
+    Fingerprint the data a feature's entities are rendered from.
+
+    Args:
+        feature_data: Extracted (and calculated) attribute values
+        vertices: Plain coordinates, e.g. [(x, y), ...] or (x, y)
+
+    Returns:
+        16 byte digest
+    """
+    return hashlib.blake2b(repr((feature_data, vertices)).encode('utf-8'), digest_size=16).digest()
+
+
+class ExportCache:
+    """
+    SQLite store of rendered entity text per feature (see module docstring).
+
+    Usage per layer: begin_layer(), then lookup() every feature and store()
+    the ones that had to be rendered, then end_layer(). Finally commit()
+    after a successful save or rollback() otherwise.
+    """
+
+    def __init__(self, path: str, signature: str):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: Cache file path, see cache_path()
+            signature: Export signature, see export_signature()
+
+        Raises:
+            sqlite3.Error: If the cache file cannot be opened or created
+        """
+        self.path = path
+        self.signature = signature
+        self.reused = 0
+        self.rendered = 0
+        self.removed = 0
+        self.invalidated = False
+
+        self._known: Dict[str, bytes] = {}
+        self._layer: Optional[str] = None
+        self._pending: List[Tuple[str, str, bytes, int, str]] = []
+
+        try:
+            self._connection = self._connect()
+        except sqlite3.OperationalError:
+            raise  # locked or not accessible, leave the file alone
+        except sqlite3.DatabaseError:
+            # Not a cache file (or damaged): start over
+            os.remove(path)
+            self._connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entities ("
+                "layer TEXT NOT NULL, feature_id TEXT NOT NULL, fingerprint BLOB NOT NULL, "
+                "entity_count INTEGER NOT NULL, text TEXT NOT NULL, "
+                "PRIMARY KEY (layer, feature_id))"
+            )
+            connection.commit()
+
+            row = connection.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+            if row is None or row[0] != self.signature:
+                # Settings or renderer changed: nothing cached can be reused.
+                # Part of the export transaction, so a failed export keeps it.
+                self.invalidated = row is not None
+                connection.execute("DELETE FROM entities")
+                connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                                   (self.signature,))
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def begin_layer(self, layer: str) -> None:
+        """
+        Start a layer; loads the fingerprints of its cached features.
+
+        Args:
+            layer: Cache key of the layer ("pipes", "junctions")
+        """
+        self.end_layer()
+        self._layer = layer
+        self._known = dict(self._connection.execute(
+            "SELECT feature_id, fingerprint FROM entities WHERE layer = ?", (layer,)
+        ))
+
+    def lookup(self, feature_id: str, fingerprint: bytes) -> Optional[CachedEntities]:
+        """
+        Get the cached entities of an unchanged feature.
+
+        Args:
+            feature_id: Source feature id
+            fingerprint: Current fingerprint, see feature_fingerprint()
+
+        Returns:
+            (entity_text, entity_count), or None if the feature is new or changed
+        """
+        if self._known.pop(feature_id, None) != fingerprint:
+            return None
+        row = self._connection.execute(
+            "SELECT text, entity_count FROM entities WHERE layer = ? AND feature_id = ?",
+            (self._layer, feature_id)
+        ).fetchone()
+        if row is None:
+            return None
+        self.reused += 1
+        return row[0], row[1]
+
+    def store(self, feature_id: str, fingerprint: bytes, text: str, entity_count: int) -> None:
+        """
+        Store the freshly rendered entities of a feature.
+
+        Args:
+            feature_id: Source feature id
+            fingerprint: Fingerprint the entities were rendered from
+            text: Rendered ENTITIES section text
+            entity_count: Number of entities in the text
+        """
+        self.rendered += 1
+        self._pending.append((self._layer, feature_id, fingerprint, entity_count, text))
+        if len(self._pending) >= STORE_BATCH_SIZE:
+            self._write_pending()
+
+    def end_layer(self) -> None:
+        """Finish the current layer; drops the features that were not seen."""
+        if self._layer is None:
+            return
+        self._write_pending()
+        if self._known:
+            self._connection.executemany(
+                "DELETE FROM entities WHERE layer = ? AND feature_id = ?",
+                ((self._layer, feature_id) for feature_id in self._known)
+            )
+            self.removed += len(self._known)
+        self._known = {}
+        self._layer = None
+
+    def commit(self) -> None:
+        """Make the changes of this export permanent and close the cache."""
+        if self._connection is None:
+            return
+        self.end_layer()
+        connection, self._connection = self._connection, None
+        try:
+            connection.commit()
+        finally:
+            connection.close()
+
+    def rollback(self) -> None:
+        """Discard the changes of this export and close the cache (no-op once closed)."""
+        if self._connection is None:
+            return
+        self._pending = []
+        self._layer = None
+        connection, self._connection = self._connection, None
+        try:
+            connection.rollback()
+        finally:
+            connection.close()
+
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Get the reuse statistics of this export.
+
+        Returns:
+            Dictionary with reused, rendered and removed feature counts,
+            whether the cache was invalidated, and the cache path
+        """
+        return {
+            'reused': self.reused,
+            'rendered': self.rendered,
+            'removed': self.removed,
+            'invalidated': self.invalidated,
+            'cache_path': self.path,
+        }
+
+    def _write_pending(self) -> None:
+        if self._pending:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entities (layer, feature_id, fingerprint, entity_count, text) "
+                "VALUES (?, ?, ?, ?, ?)", self._pending
+            )
+            self._pending = []
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Export profiling: per-stage wall/CPU time, entity counts and peak memory.
+
+An ExportProfiler is attached to the DXFExporter for one export when
+``ExportConfiguration.profile_export`` is set. The ProgressTracker reports
+the export steps to it, and the hot path wraps its stages (feature read,
+attribute extraction, conversion, geometry, entity creation per entity type,
+XDATA) in ``profiler.stage(name)`` blocks. Hot path stages are nested inside
+the steps, so step times include them.
+
+Without profiling the exporter uses NULL_PROFILER, whose stages are shared
+no-op context managers.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+
+# Modelspace factory methods whose entity type is not the upper-cased suffix
+_ENTITY_TYPES = {
+    'add_blockref': 'INSERT',
+    'add_multileader_mtext': 'MULTILEADER',
+    'add_multileader_block': 'MULTILEADER',
+}
+
+_MB = 1024.0 * 1024.0
+
+
+def profile_report_path(output_path: str) -> str:
+    """
+    Get the path of the JSON profile report written next to a DXF file.
+
+    Args:
+        output_path: DXF output path
+
+    Returns:
+        ``<name>_profile.json`` in the directory of the DXF file
+    """
+    return os.path.splitext(output_path)[0] + '_profile.json'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident set size of the process (QGIS) in MiB.
+
+    Returns:
+        Peak RSS, or None if it cannot be determined on this platform
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / _MB if sys.platform == 'darwin' else peak / 1024.0
+    if PSUTIL_AVAILABLE:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / _MB
+    return None
+
+
+class _Stage:
+    """Accumulating timer for one stage name (not reentrant)."""
+
+    __slots__ = ('calls', 'wall', 'cpu', '_wall_start', '_cpu_start')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    def __enter__(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall += time.perf_counter() - self._wall_start
+        self.cpu += time.process_time() - self._cpu_start
+        self.calls += 1
+        return False
+
+
+class _NullStage:
+    """No-op stage timer."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class ProfiledLayout:
+    """
+    Modelspace wrapper timing and counting entity creation per entity type.
+
+    ``add_*`` calls are timed as ``entity.<TYPE>`` stages; everything else
+    is passed through to the wrapped layout. For streamed documents an
+    entity is written when the next one is added, so the write cost of an
+    entity is booked on the entity that follows it.
+    """
+
+    def __init__(self, layout, profiler: 'ExportProfiler'):
+        self._layout = layout
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._layout, name)
+        if not name.startswith('add_') or not callable(attribute):
+            return attribute
+
+        entity_type = _ENTITY_TYPES.get(name, name[4:].upper())
+        stage = self._profiler.stage(f"entity.{entity_type}")
+        entities = self._profiler.entities
+
+        def add_entity(*args, **kwargs):
+            with stage:
+                entity = attribute(*args, **kwargs)
+            entities[entity_type] = entities.get(entity_type, 0) + 1
+            return entity
+
+        # Cache the wrapper so later lookups bypass __getattr__
+        setattr(self, name, add_entity)
+        return add_entity
+
+
+class ExportProfiler:
+    """Collects the profile of one export (see module docstring)."""
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            trace_memory: Track Python allocations with tracemalloc (slows
+                the export down noticeably; the timings are inflated)
+        """
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, _Stage] = {}
+        self.entities: Dict[str, int] = {}
+        self.steps: List[Dict[str, Any]] = []
+        self.features: Dict[str, Dict[str, Any]] = {}
+        self._step: Optional[Dict[str, Any]] = None
+        self._started_tracing = False
+        self._wall_start = None
+        self._cpu_start = None
+        self._total = None
+        self._tracemalloc_peak = None
+        self._peak_rss = None
+
+    def start(self):
+        """Start the total clock (and allocation tracing if requested)."""
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        """Stop the clocks and take the memory peaks."""
+        if self._wall_start is None:
+            return
+        self.end_step()
+        self._total = {
+            'wall_s': time.perf_counter() - self._wall_start,
+            'cpu_s': time.process_time() - self._cpu_start,
+        }
+        if tracemalloc.is_tracing() and self.trace_memory:
+            self._tracemalloc_peak = tracemalloc.get_traced_memory()[1] / _MB
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        self._peak_rss = peak_rss_mb()
+        self._wall_start = None
+
+    def stage(self, name: str) -> _Stage:
+        """
+        Get the accumulating timer of a stage, for use as ``with profiler.stage(name):``.
+
+        Args:
+            name: Stage name
+
+        Returns:
+            Context manager adding the elapsed wall/CPU time to the stage
+        """
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage()
+        return stage
+
+    def wrap_layout(self, layout):
+        """Wrap a modelspace so entity creation is timed per entity type."""
+        return ProfiledLayout(layout, self)
+
+    def begin_step(self, step: int, message: str = ""):
+        """End the current step and start timing the next one (called by ProgressTracker)."""
+        self.end_step()
+        self._step = {
+            'step': step,
+            'name': message.rstrip('.') or f"Step {step}",
+            '_wall': time.perf_counter(),
+            '_cpu': time.process_time(),
+        }
+
+    def end_step(self):
+        """End the current step, if any."""
+        if self._step is None:
+            return
+        step, self._step = self._step, None
+        self.steps.append({
+            'step': step['step'],
+            'name': step['name'],
+            'wall_s': time.perf_counter() - step['_wall'],
+            'cpu_s': time.process_time() - step['_cpu'],
+        })
+
+    def record_features(self, name: str, stats, step: int):
+        """
+        Record the feature counts of a layer export.
+
+        Args:
+            name: Feature class ("pipes", "junctions")
+            stats: ProcessingStats of the layer export
+            step: Progress step the layer was exported in (for features/s)
+        """
+        self.features[name] = {
+            'step': step,
+            'total': stats.total_features,
+            'processed': stats.processed_features,
+            'skipped': stats.skipped_features,
+            'failed': stats.failed_features,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the structured profile report.
+
+        Returns:
+            Dictionary with total, steps, stages, entities, features and memory
+        """
+        step_wall: Dict[int, float] = {}
+        for step in self.steps:
+            step_wall[step['step']] = step_wall.get(step['step'], 0.0) + step['wall_s']
+
+        features = {}
+        for name, counts in self.features.items():
+            entry = {key: value for key, value in counts.items() if key != 'step'}
+            seconds = step_wall.get(counts['step'])
+            entry['wall_s'] = seconds
+            entry['per_second'] = counts['processed'] / seconds if seconds else None
+            features[name] = entry
+
+        stages = {
+            name: {'calls': stage.calls, 'wall_s': stage.wall, 'cpu_s': stage.cpu}
+            for name, stage in sorted(self.stages.items(), key=lambda item: -item[1].wall)
+        }
+
+        return {
+            'total': self._total,
+            'steps': list(self.steps),
+            'stages': stages,
+            'entities': dict(sorted(self.entities.items())),
+            'features': features,
+            'memory': {
+                'peak_rss_mb': self._peak_rss,
+                'tracemalloc_peak_mb': self._tracemalloc_peak,
+            },
+        }
+
+    def write_json(self, path: str, extra: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Write the report as JSON.
+
+        Args:
+            path: Output file path
+            extra: Additional top-level entries (e.g. output path, settings)
+
+        Returns:
+            The path written
+        """
+        report = dict(extra or {})
+        report.update(self.report())
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        return path
+
+
+class NullProfiler:
+    """Profiler stand-in used when profiling is off; every call is a no-op."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def wrap_layout(self, layout):
+        return layout
+
+    def begin_step(self, step: int, message: str = ""):
+        pass
+
+    def end_step(self):
+        pass
+
+    def record_features(self, name: str, stats, step: int):
+        pass
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        return None
+
+
+NULL_PROFILER = NullProfiler()
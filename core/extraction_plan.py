@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Precompiled field extraction plans.
+
+Extracting feature data used to resolve every target field against the
+LayerMapping, look up the source field by name and branch on its FieldType
+once per field per feature. An ExtractionPlan does all of that once per
+LayerMapping and layer schema: each target field is resolved to an attribute
+index (or a constant raw value), a bound converter and a default. Running the
+plan on a feature is then a flat index lookup over ``feature.attributes()``.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .data_structures import LayerMapping, GeometryType, FieldType, RequiredField
+from .field_definitions import SewageNetworkFields
+from .data_converter import DataConverter
+
+
+Converter = Callable[[Any], Any]
+
+# Converters used by the DXF exporter (booleans are passed through unchanged)
+EXPORT_CONVERTERS: Dict[FieldType, Optional[Converter]] = {
+    FieldType.STRING: DataConverter.to_string,
+    FieldType.DOUBLE: DataConverter.to_double,
+    FieldType.INTEGER: DataConverter.to_integer,
+    FieldType.BOOLEAN: None,
+}
+
+# Converters used by the AttributeMapper (every type is converted)
+MAPPER_CONVERTERS: Dict[FieldType, Optional[Converter]] = {
+    FieldType.STRING: DataConverter.to_string,
+    FieldType.DOUBLE: DataConverter.to_double,
+    FieldType.INTEGER: DataConverter.to_integer,
+    FieldType.BOOLEAN: DataConverter.to_boolean,
+}
+
+
+class PlanEntry:
+    """Resolved extraction step for one target field."""
+
+    __slots__ = ('name', 'index', 'raw_value', 'converter', 'field_def')
+
+    def __init__(self, name: str, index: int, raw_value: Any,
+                 converter: Optional[Converter], field_def: RequiredField):
+        self.name = name
+        self.index = index              # attribute index, -1 for a constant raw value
+        self.raw_value = raw_value      # raw value used when index is -1
+        self.converter = converter      # None passes the raw value through
+        self.field_def = field_def
+
+    @property
+    def default_value(self) -> Any:
+        return self.field_def.default_value
+
+
+class ExtractionPlan:
+    """
+    Field extraction plan compiled for one LayerMapping and layer schema.
+
+    Use :meth:`compile` (or :class:`ExtractionPlanCache`) to build a plan and
+    :meth:`extract` to run it on the attribute list of a feature.
+    """
+
+    __slots__ = ('entries', 'missing_sources', '_steps')
+
+    def __init__(self, entries: List[PlanEntry], missing_sources: List[str]):
+        self.entries = entries
+        self.missing_sources = missing_sources
+        self._steps = tuple((e.name, e.index, e.raw_value, e.converter, e) for e in entries)
+
+    @staticmethod
+    def field_definitions(geometry_type: GeometryType) -> List[RequiredField]:
+        """Get the target field definitions for a geometry type."""
+        if geometry_type == GeometryType.LINE:
+            return SewageNetworkFields.get_all_pipe_fields()
+        return SewageNetworkFields.get_all_junction_fields()
+
+    @classmethod
+    def compile(cls, mapping: LayerMapping, field_names: Sequence[str],
+                converters: Dict[FieldType, Optional[Converter]] = EXPORT_CONVERTERS,
+                field_defs: Optional[Iterable[RequiredField]] = None,
+                skip_calculated: bool = False) -> 'ExtractionPlan':
+        """
+        Compile an extraction plan.
+
+        Args:
+            mapping: LayerMapping with field mappings and default values
+            field_names: Attribute names of the layer, in attribute order
+            converters: Converter per FieldType (None passes values through)
+            field_defs: Target field definitions, defaults to the definitions
+                for the mapping's geometry type
+            skip_calculated: Leave out fields marked as calculated in the mapping
+
+        Returns:
+            Compiled ExtractionPlan
+        """
+        if field_defs is None:
+            field_defs = cls.field_definitions(mapping.geometry_type)
+
+        field_mappings = mapping.field_mappings if isinstance(mapping.field_mappings, dict) else {}
+        default_values = mapping.default_values if isinstance(mapping.default_values, dict) else {}
+        index_by_name = {name: i for i, name in enumerate(field_names)}
+
+        entries = []
+        missing_sources = []
+        for field_def in field_defs:
+            name = field_def.name
+            if skip_calculated and mapping.is_field_calculated(name):
+                continue
+
+            index = -1
+            if name in field_mappings:
+                source_field = field_mappings[name]
+                raw_value = None
+                if source_field in index_by_name:
+                    index = index_by_name[source_field]
+                else:
+                    missing_sources.append(source_field)
+            elif name in default_values:
+                raw_value = default_values[name]
+            else:
+                raw_value = field_def.default_value
+
+            converter = converters.get(field_def.field_type, DataConverter.to_string)
+            entries.append(PlanEntry(name, index, raw_value, converter, field_def))
+
+        return cls(entries, missing_sources)
+
+    def extract(self, attributes: Sequence[Any],
+                on_error: Optional[Callable[[PlanEntry, Any, Exception], Any]] = None) -> Dict[str, Any]:
+        """
+        Run the plan on the attribute values of one feature.
+
+        Args:
+            attributes: Attribute values in layer order (``feature.attributes()``)
+            on_error: Called as ``on_error(entry, raw_value, exception)`` when a
+                conversion fails; its return value is used. Without a handler
+                the exception propagates.
+
+        Returns:
+            Dictionary of converted values keyed by target field name
+        """
+        data = {}
+        for name, index, raw_value, converter, entry in self._steps:
+            if index >= 0:
+                raw_value = attributes[index]
+            if converter is None:
+                data[name] = raw_value
+                continue
+            try:
+                data[name] = converter(raw_value)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                data[name] = on_error(entry, raw_value, e)
+        return data
+
+    def extract_values(self, attributes: Sequence[Any],
+                       on_error: Optional[Callable[[PlanEntry, Any, Exception], Any]] = None) -> List[Any]:
+        """
+        Run the plan on one feature, returning the values in entry order.
+
+        Used to fill a FeatureRecordStore (see FeatureRecordStore.for_plan)
+        without building a dictionary per feature.
+
+        Args:
+            attributes: Attribute values in layer order (``feature.attributes()``)
+            on_error: Conversion error handler, see :meth:`extract`
+
+        Returns:
+            Converted values, one per entry of the plan
+        """
+        values = []
+        append = values.append
+        for name, index, raw_value, converter, entry in self._steps:
+            if index >= 0:
+                raw_value = attributes[index]
+            if converter is None:
+                append(raw_value)
+                continue
+            try:
+                append(converter(raw_value))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                append(on_error(entry, raw_value, e))
+        return values
+
+
+class ExtractionPlanCache:
+    """Cache of compiled plans keyed by mapping contents and layer schema."""
+
+    def __init__(self, converters: Dict[FieldType, Optional[Converter]] = EXPORT_CONVERTERS,
+                 skip_calculated: bool = False, max_size: int = 32):
+        self.converters = converters
+        self.skip_calculated = skip_calculated
+        self.max_size = max_size
+        self._plans: Dict[Tuple, ExtractionPlan] = {}
+
+    @staticmethod
+    def _mapping_key(mapping: LayerMapping, field_names: Sequence[str]) -> Optional[Tuple]:
+        try:
+            key = (
+                mapping.geometry_type,
+                tuple(field_names),
+                tuple(mapping.field_mappings.items()) if isinstance(mapping.field_mappings, dict) else (),
+                tuple(mapping.default_values.items()) if isinstance(mapping.default_values, dict) else (),
+                tuple(mapping.calculated_fields.items()) if isinstance(mapping.calculated_fields, dict) else (),
+            )
+            hash(key)
+            return key
+        except TypeError:
+            # Unhashable default values, compile without caching
+            return None
+
+    def get(self, mapping: LayerMapping, field_names: Sequence[str]) -> ExtractionPlan:
+        """
+        Get the plan for a mapping and layer schema, compiling it if needed.
+
+        Args:
+            mapping: LayerMapping configuration
+            field_names: Attribute names of the layer, in attribute order
+
+        Returns:
+            Compiled ExtractionPlan
+        """
+        key = self._mapping_key(mapping, field_names)
+        plan = self._plans.get(key) if key is not None else None
+        if plan is None:
+            plan = ExtractionPlan.compile(
+                mapping, field_names, self.converters, skip_calculated=self.skip_calculated
+            )
+            if key is not None:
+                if len(self._plans) >= self.max_size:
+                    self._plans.clear()
+                self._plans[key] = plan
+        return plan
+
+    def clear(self) -> None:
+        """Drop all cached plans."""
+        self._plans.clear()
@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar (struct-of-arrays) store for extracted feature data.
+
+Extracting a feature used to produce a fresh ``Dict[str, Any]`` holding one
+boxed Python object per field. A FeatureRecordStore keeps one typed column
+per target field of the SewageNetworkFields catalog instead:
+
+- DOUBLE fields: ``array('d')``, NULLs as NaN plus a NULL bitmask
+- INTEGER fields: ``array('q')`` with a NULL bitmask
+- STRING fields: a list of interned strings (ids and node names repeat)
+- anything else (pass-through values): a plain list
+
+NULL bitmasks are only allocated once a column holds a NULL. A value that
+does not fit its typed column (e.g. a recovery default of another type)
+turns that column into a plain list, so values are always returned exactly
+as extracted.
+
+Emitters read rows through FeatureRecord, a ``__slots__`` view that behaves
+like the former dictionary (read-only Mapping with ``get``, ``in`` and a
+dict ``repr``). Column passes such as the calculated fields read and write
+the columns directly, with NumPy when it is available (see float_array).
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .data_structures import FieldType
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+_NAN = float('nan')
+_NONE_TYPE = type(None)
+_intern = sys.intern
+
+# Rows buffered by append_values() before they are transposed into the columns
+APPEND_BATCH_SIZE = 1024
+
+
+class Bitmask:
+    """Growable bit set; bits beyond the allocated bytes read as 0."""
+
+    __slots__ = ('bits',)
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def __getitem__(self, index: int) -> bool:
+        byte = index >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] >> (index & 7) & 1)
+
+    def set(self, index: int, flag: bool = True) -> None:
+        byte = index >> 3
+        if byte >= len(self.bits):
+            if not flag:
+                return
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        if flag:
+            self.bits[byte] |= 1 << (index & 7)
+        else:
+            self.bits[byte] &= ~(1 << (index & 7)) & 0xFF
+
+    def to_numpy(self, size: int):
+        """Get the first ``size`` bits as a NumPy bool array."""
+        flags = np.unpackbits(np.frombuffer(bytes(self.bits), dtype=np.uint8), bitorder='little')
+        if len(flags) < size:
+            flags = np.concatenate([flags, np.zeros(size - len(flags), dtype=np.uint8)])
+        return flags[:size].astype(bool)
+
+    def update(self, mask, flag: bool) -> None:
+        """Set (or clear) the bits selected by a NumPy bool array."""
+        current = self.to_numpy(len(mask))
+        current = current | mask if flag else current & ~mask
+        self.bits = bytearray(np.packbits(current, bitorder='little').tobytes())
+
+
+class _Column:
+    """
+    Base column. ``present`` is None for columns every row has; optional
+    columns (added after rows were stored) track the rows holding a value.
+    """
+
+    __slots__ = ('values', 'nulls', 'present')
+
+    def __init__(self, optional: bool = False):
+        self.values = self._new_values()
+        self.nulls: Optional[Bitmask] = None
+        self.present: Optional[Bitmask] = Bitmask() if optional else None
+
+    @staticmethod
+    def _new_values():
+        return []
+
+    def clear(self) -> None:
+        # New containers instead of deleting in place: NumPy views of the
+        # old arrays may still be alive
+        self.values = self._new_values()
+        self.nulls = None
+        if self.present is not None:
+            self.present = Bitmask()
+
+    def has(self, index: int) -> bool:
+        return self.present is None or self.present[index]
+
+    def get(self, index: int, default: Any = None) -> Any:
+        if self.present is not None and not self.present[index]:
+            return default
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        return self.values[index]
+
+    def _set_null(self, index: int, flag: bool) -> None:
+        if self.nulls is None:
+            if not flag:
+                return
+            self.nulls = Bitmask()
+        self.nulls.set(index, flag)
+
+    def append(self, value: Any) -> bool:
+        """Append a value; False if the column cannot hold it."""
+        self.values.append(value)
+        return True
+
+    def extend(self, values: Sequence[Any]) -> bool:
+        """Append values; False (and nothing appended) if the column cannot hold them all."""
+        self.values.extend(values)
+        return True
+
+    def pad(self, size: int) -> None:
+        """Extend an optional column with placeholders up to ``size`` rows."""
+        missing = size - len(self.values)
+        if missing > 0:
+            self.values.extend([None] * missing)
+
+    def set(self, index: int, value: Any) -> bool:
+        """Set the value of a row; False if the column cannot hold it."""
+        self.pad(index + 1)
+        self.values[index] = value
+        if self.present is not None:
+            self.present.set(index)
+        return True
+
+
+class _ObjectColumn(_Column):
+    """Column of arbitrary values."""
+
+    __slots__ = ()
+
+
+class _StringColumn(_Column):
+    """Column of interned strings (None for NULL)."""
+
+    __slots__ = ()
+
+    def append(self, value: Any) -> bool:
+        if type(value) is str:
+            self.values.append(_intern(value))
+            return True
+        if value is None:
+            self.values.append(None)
+            return True
+        return False
+
+    def extend(self, values: Sequence[Any]) -> bool:
+        types = set(map(type, values))
+        if types <= {str}:
+            self.values.extend(map(_intern, values))
+        elif types <= {str, _NONE_TYPE}:
+            self.values.extend(None if value is None else _intern(value) for value in values)
+        else:
+            return False
+        return True
+
+    def set(self, index: int, value: Any) -> bool:
+        if type(value) is str:
+            value = _intern(value)
+        elif value is not None:
+            return False
+        return super().set(index, value)
+
+
+class _TypedColumn(_Column):
+    """Column backed by a typed array, NULLs in a bitmask."""
+
+    __slots__ = ()
+
+    typecode = 'd'
+    value_type = float
+    placeholder: Any = _NAN
+
+    def _new_values(self):
+        return array(self.typecode)
+
+    def append(self, value: Any) -> bool:
+        if type(value) is self.value_type:
+            try:
+                self.values.append(value)
+            except OverflowError:
+                return False
+            return True
+        if value is None:
+            self._set_null(len(self.values), True)
+            self.values.append(self.placeholder)
+            return True
+        return False
+
+    def extend(self, values: Sequence[Any]) -> bool:
+        types = set(map(type, values))
+        if types <= {self.value_type}:
+            try:
+                # Built first so an overflow leaves the column unchanged
+                self.values.extend(array(self.typecode, values))
+            except OverflowError:
+                return False
+        elif types <= {self.value_type, _NONE_TYPE}:
+            try:
+                typed = array(self.typecode, [self.placeholder if value is None else value
+                                              for value in values])
+            except OverflowError:
+                return False
+            start = len(self.values)
+            for offset, value in enumerate(values):
+                if value is None:
+                    self._set_null(start + offset, True)
+            self.values.extend(typed)
+        else:
+            return False
+        return True
+
+    def pad(self, size: int) -> None:
+        missing = size - len(self.values)
+        if missing > 0:
+            self.values.extend(array(self.typecode, [self.placeholder]) * missing)
+
+    def set(self, index: int, value: Any) -> bool:
+        if value is None:
+            self.pad(index + 1)
+            self.values[index] = self.placeholder
+            self._set_null(index, True)
+        elif type(value) is self.value_type:
+            self.pad(index + 1)
+            try:
+                self.values[index] = value
+            except OverflowError:
+                return False
+            self._set_null(index, False)
+        else:
+            return False
+        if self.present is not None:
+            self.present.set(index)
+        return True
+
+
+class _DoubleColumn(_TypedColumn):
+    __slots__ = ()
+
+
+class _IntegerColumn(_TypedColumn):
+    __slots__ = ()
+
+    typecode = 'q'
+    value_type = int
+    placeholder = 0
+
+
+_COLUMN_TYPES = {
+    FieldType.DOUBLE: _DoubleColumn,
+    FieldType.INTEGER: _IntegerColumn,
+    FieldType.STRING: _StringColumn,
+}
+
+
+class FeatureRecord(Mapping):
+    """
+    Read-only dictionary-like view of one stored feature.
+
+    Views stay valid until the store is cleared.
+    """
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: 'FeatureRecordStore', index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        """Row index in the store."""
+        return self._index
+
+    def __getitem__(self, name: str) -> Any:
+        store = self._store
+        if store._pending:
+            store.flush()
+        column = store.columns.get(name)
+        if column is None or not column.has(self._index):
+            raise KeyError(name)
+        return column.get(self._index)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        store = self._store
+        if store._pending:
+            store.flush()
+        column = store.columns.get(name)
+        if column is None:
+            return default
+        return column.get(self._index, default)
+
+    def __contains__(self, name) -> bool:
+        store = self._store
+        if store._pending:
+            store.flush()
+        column = store.columns.get(name)
+        return column is not None and column.has(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        store = self._store
+        if store._pending:
+            store.flush()
+        index = self._index
+        return (name for name, column in store.columns.items() if column.has(index))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy the row into a plain dictionary."""
+        store = self._store
+        if store._pending:
+            store.flush()
+        index = self._index
+        return {name: column.get(index) for name, column in store.columns.items()
+                if column.has(index)}
+
+    def __repr__(self) -> str:
+        # Same as the dictionary, so fingerprints do not depend on the container
+        return repr(self.to_dict())
+
+
+class FeatureRecordStore:
+    """
+    Columnar store of extracted feature data (see module docstring).
+
+    Rows are appended with append_values() in the field order given at
+    construction (for_plan() uses the order of an ExtractionPlan) and read
+    with row() or by iterating the store. Appended rows are buffered and
+    transposed into the columns in batches (one type check and array
+    extension per column and batch); reads flush the buffer first. Columns
+    added later with add_column() are optional: rows only hold a value once
+    it is set.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, FieldType]], passthrough: Iterable[str] = ()):
+        """
+        Create an empty store.
+
+        Args:
+            fields: (name, FieldType) per appended value; for a repeated name
+                the last value wins, as in a dictionary
+            passthrough: Names of fields stored as given (no typed column)
+        """
+        passthrough = set(passthrough)
+        # Dictionary semantics: key order of the first occurrence, value of the last
+        last_position = {name: position for position, (name, _) in enumerate(fields)}
+        self.columns: Dict[str, _Column] = dict.fromkeys(last_position)
+        self._slots: List[Tuple[int, str]] = []
+        for position, (name, field_type) in enumerate(fields):
+            if last_position[name] == position:
+                column_type = _ObjectColumn if name in passthrough else _COLUMN_TYPES.get(field_type, _ObjectColumn)
+                self.columns[name] = column_type()
+                self._slots.append((position, name))
+        self._count = 0
+        self._pending: List[Sequence[Any]] = []
+
+    @classmethod
+    def for_plan(cls, plan) -> 'FeatureRecordStore':
+        """
+        Create a store for the values of ExtractionPlan.extract_values().
+
+        Args:
+            plan: Compiled ExtractionPlan
+
+        Returns:
+            Empty store with one column per target field of the plan
+        """
+        return cls([(entry.name, entry.field_def.field_type) for entry in plan.entries],
+                   passthrough=[entry.name for entry in plan.entries if entry.converter is None])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> FeatureRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return FeatureRecord(self, index)
+
+    def __iter__(self) -> Iterator[FeatureRecord]:
+        return (FeatureRecord(self, index) for index in range(self._count))
+
+    def row(self, index: int) -> FeatureRecord:
+        """Get the view of a row (not range checked)."""
+        return FeatureRecord(self, index)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Copy all rows into plain dictionaries."""
+        return [record.to_dict() for record in self]
+
+    def clear(self) -> None:
+        """Remove all rows; existing row views become invalid."""
+        self._pending = []
+        for column in self.columns.values():
+            column.clear()
+        self._count = 0
+
+    def append_values(self, values: Sequence[Any]) -> FeatureRecord:
+        """
+        Append a row.
+
+        Args:
+            values: One value per field given at construction, in that order
+                (the sequence is kept until the next flush; do not modify it)
+
+        Returns:
+            View of the new row
+        """
+        index = self._count
+        self._pending.append(values)
+        self._count = index + 1
+        if len(self._pending) >= APPEND_BATCH_SIZE:
+            self.flush()
+        return FeatureRecord(self, index)
+
+    def flush(self) -> None:
+        """Transpose the buffered rows into the columns."""
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        transposed = list(zip(*rows))
+        for position, name in self._slots:
+            values = transposed[position]
+            if not self.columns[name].extend(values):
+                self._demote(name).extend(values)
+
+    def add_column(self, name: str, field_type: FieldType) -> None:
+        """
+        Add an optional column (no-op if it exists).
+
+        Args:
+            name: Field name
+            field_type: FieldType selecting the column type
+        """
+        self.flush()
+        if name not in self.columns:
+            self.columns[name] = _COLUMN_TYPES.get(field_type, _ObjectColumn)(optional=True)
+
+    def set_value(self, index: int, name: str, value: Any) -> None:
+        """
+        Set a field of a row (optional columns are added as needed).
+
+        Args:
+            index: Row index
+            name: Field name
+            value: New value
+        """
+        self.flush()
+        if name not in self.columns:
+            self.columns[name] = _ObjectColumn(optional=True)
+        if not self.columns[name].set(index, value):
+            self._demote(name).set(index, value)
+
+    def _demote(self, name: str) -> _Column:
+        """Replace a typed column with a plain list column holding the same values."""
+        column = self.columns[name]
+        demoted = _ObjectColumn(optional=column.present is not None)
+        size = len(column.values)
+        demoted.values = [column.get(index) for index in range(size)]
+        if column.present is not None:
+            demoted.present = column.present
+        self.columns[name] = demoted
+        return demoted
+
+    def is_double(self, name: str) -> bool:
+        """Check that a field is stored as a double column."""
+        self.flush()
+        return type(self.columns.get(name)) is _DoubleColumn
+
+    def float_array(self, name: str):
+        """
+        Get a double column as a writable NumPy view (NULLs are NaN).
+
+        The view shares memory with the column; do not keep it across
+        append_values() calls.
+
+        Args:
+            name: Name of a double column (see is_double)
+
+        Returns:
+            float64 array of length len(self)
+        """
+        self.flush()
+        column = self.columns[name]
+        column.pad(self._count)
+        if not self._count:
+            return np.zeros(0)
+        return np.frombuffer(column.values, dtype=np.float64)[:self._count]
+
+    def null_array(self, name: str):
+        """Get the NULL (or absent) rows of a column as a NumPy bool array."""
+        self.flush()
+        column = self.columns[name]
+        nulls = column.nulls.to_numpy(self._count) if column.nulls is not None \
+            else np.zeros(self._count, dtype=bool)
+        if column.present is not None:
+            nulls |= ~column.present.to_numpy(self._count)
+        return nulls
+
+    def assign(self, name: str, mask, values) -> None:
+        """
+        Write the rows of a double column selected by a NumPy mask.
+
+        Args:
+            name: Name of a double column (see is_double)
+            mask: bool array selecting the rows
+            values: float64 array of length len(self)
+        """
+        if not mask.any():
+            return
+        self.flush()
+        column = self.columns[name]
+        target = self.float_array(name)
+        target[mask] = values[mask]
+        if column.nulls is not None:
+            column.nulls.update(mask, False)
+        if column.present is not None:
+            column.present.update(mask, True)
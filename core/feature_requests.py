@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Feature request builder for layer scans.
+
+Every scan over a source layer (export loops, sampling, validation, node
+assignment) builds its QgsFeatureRequest here, so that providers such as
+PostGIS or GeoPackage only return the attributes the caller actually reads
+and skip geometry when it is not used.
+"""
+
+from typing import Iterable, List, Optional
+
+from qgis.core import QgsFeatureRequest, QgsVectorLayer
+
+from .data_structures import LayerMapping
+
+
+def mapped_attribute_indices(layer: QgsVectorLayer, mapping: LayerMapping) -> List[int]:
+    """
+    Resolve the layer attribute indices used by a LayerMapping.
+
+    Args:
+        layer: Source layer
+        mapping: LayerMapping whose mapped layer fields are needed
+
+    Returns:
+        Sorted list of attribute indices (fields missing from the layer are skipped)
+    """
+    field_mappings = mapping.field_mappings if isinstance(mapping.field_mappings, dict) else {}
+    return attribute_indices(layer, field_mappings.values())
+
+
+def attribute_indices(layer: QgsVectorLayer, field_names: Iterable[Optional[str]]) -> List[int]:
+    """
+    Resolve layer field names to attribute indices.
+
+    Args:
+        layer: Source layer
+        field_names: Field names, empty names and None are ignored
+
+    Returns:
+        Sorted list of attribute indices (fields missing from the layer are skipped)
+    """
+    fields = layer.fields()
+    indices = set()
+    for name in field_names:
+        if not name:
+            continue
+        index = fields.lookupField(name)
+        if index >= 0:
+            indices.add(index)
+    return sorted(indices)
+
+
+def build_feature_request(layer: QgsVectorLayer,
+                          mapping: Optional[LayerMapping] = None,
+                          field_names: Optional[Iterable[str]] = None,
+                          with_geometry: bool = True,
+                          with_attributes: bool = True,
+                          limit: Optional[int] = None) -> QgsFeatureRequest:
+    """
+    Build a minimal feature request for a layer scan.
+
+    Attributes are restricted to the layer fields used by ``mapping`` plus
+    ``field_names``. When neither is given all attributes are fetched (unless
+    ``with_attributes`` is False).
+
+    Args:
+        layer: Source layer
+        mapping: Optional LayerMapping whose mapped layer fields are fetched
+        field_names: Optional additional layer field names to fetch
+        with_geometry: Fetch feature geometry
+        with_attributes: Fetch attributes at all
+        limit: Optional maximum number of features
+
+    Returns:
+        Configured QgsFeatureRequest
+    """
+    request = QgsFeatureRequest()
+
+    if not with_attributes:
+        request.setNoAttributes()
+    elif mapping is not None or field_names is not None:
+        indices = set()
+        if mapping is not None:
+            indices.update(mapped_attribute_indices(layer, mapping))
+        if field_names is not None:
+            indices.update(attribute_indices(layer, field_names))
+        request.setSubsetOfAttributes(sorted(indices))
+
+    if not with_geometry:
+        request.setFlags(request.flags() | QgsFeatureRequest.NoGeometry)
+
+    if limit is not None and limit >= 0:
+        request.setLimit(limit)
+
+    return request
+
+
+def export_feature_request(layer: QgsVectorLayer, mapping: LayerMapping) -> QgsFeatureRequest:
+    """Request for the DXF export loops: mapped attributes and geometry."""
+    return build_feature_request(layer, mapping, with_geometry=True)
+
+
+def extraction_feature_request(layer: QgsVectorLayer, mapping: LayerMapping) -> QgsFeatureRequest:
+    """Request for attribute extraction: mapped attributes, no geometry."""
+    return build_feature_request(layer, mapping, with_geometry=False)
+
+
+def sample_feature_request(layer: QgsVectorLayer, limit: int) -> QgsFeatureRequest:
+    """Request for attribute previews: all attributes, no geometry, limited."""
+    return build_feature_request(layer, with_geometry=False, limit=limit)
+
+
+def geometry_feature_request(layer: QgsVectorLayer, limit: Optional[int] = None) -> QgsFeatureRequest:
+    """Request for geometry-only scans: no attributes."""
+    return build_feature_request(layer, with_attributes=False, limit=limit)
@@ -17,6 +17,34 @@ except ImportError:
     from exceptions import FilePermissionError, ExportError
 
 
+# First bytes of every binary DXF file
+BINARY_DXF_SENTINEL = b"AutoCAD Binary DXF\r\n\x1a\x00"
+
+
+def dxf_file_format(header: bytes) -> Optional[str]:
+    """
+    Detect the DXF flavour from the first bytes of a file.
+    
+    Args:
+        header: Leading bytes of the file (the first 100 are plenty)
+        
+    Returns:
+        'binary', 'ascii' or None if the bytes do not start a DXF file
+    """
+    if header.startswith(BINARY_DXF_SENTINEL):
+        return 'binary'
+    
+    # ASCII DXF: group code 0 + SECTION, or a 999 comment; group codes may be
+    # padded with spaces and files may start with a UTF-8 BOM
+    lines = header[3:] if header.startswith(b'\xef\xbb\xbf') else header
+    lines = [line.strip() for line in lines.lstrip().splitlines()]
+    if lines and lines[0] == b'999':
+        return 'ascii'
+    if len(lines) >= 2 and lines[0] == b'0' and lines[1] == b'SECTION':
+        return 'ascii'
+    return None
+
+
 class FileSecurityValidator:
     """Validates file operations for security and accessibility."""
     
@@ -32,12 +60,13 @@ class FileSecurityValidator:
             Tuple of (is_valid, error_message)
         """
         try:
-            path = Path(file_path).resolve()
-            
-            # Check for directory traversal attempts
-            if '..' in str(path) or str(path).startswith('/'):
+            # Check for directory traversal attempts (before resolving, which
+            # removes them; absolute POSIX paths start with '/' legitimately)
+            if '..' in Path(file_path).parts:
                 return False, "Path contains directory traversal sequences"
             
+            path = Path(file_path).resolve()
+            
             # Check if path is absolute and reasonable
             if not path.is_absolute():
                 return False, "Path must be absolute"
@@ -303,6 +332,9 @@ class FileOperationHelper:
         """
         Perform basic file integrity check.
         
+        Files with a .dxf extension must also start like an ASCII or binary
+        DXF file (see dxf_file_format).
+        
         Args:
             file_path: Path to file to verify
             
@@ -326,6 +358,9 @@ class FileOperationHelper:
                 if not header:
                     return False, "File appears to be empty or unreadable"
             
+            if path.suffix.lower() == '.dxf' and dxf_file_format(header) is None:
+                return False, "File is neither an ASCII nor a binary DXF file"
+            
             return True, None
             
         except Exception as e:
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Tiered geometry checks for the export and the layer validation scan.
+
+The export only reads the vertices of a pipe (endpoints, label and arrow
+placement) or the position of a junction, so a full GEOS validity check per
+feature (``isGeosValid()`` converts the geometry to GEOS and runs the
+topology checks) costs far more than the export of the feature itself,
+especially on long polylines. The checks are therefore split in two tiers:
+
+- basic (always on): a line needs at least 2 vertices, finite coordinates
+  and at least one segment of non-zero length; a point needs finite
+  coordinates. These are exactly the conditions under which GEOS reports a
+  line or point invalid. For lines they are answered by the length of the
+  geometry, which QGIS computes on the abstract geometry in C++: a finite,
+  positive length means every coordinate is finite (a NaN or infinite
+  coordinate makes its segments, and the sum, non-finite) and the line does
+  not collapse to a point. Only lines failing that test have their vertices
+  inspected in Python, to tell the issues apart. Interior zero-length
+  segments (repeated vertices) are valid and only counted by the layer scan.
+- GEOS (opt-in, ExportConfiguration.geos_validation): ``isGeosValid()`` over
+  a layer in one geometry-only pass before the export, collected into a
+  GeosValidityReport. The exporter keeps one report per layer and export,
+  so every export path looks the invalid feature ids up instead of
+  validating each feature again.
+"""
+
+import math
+from itertools import islice
+from operator import eq
+from typing import FrozenSet, Optional, Sequence, Tuple
+
+from qgis.core import QgsVectorLayer
+
+from .feature_requests import geometry_feature_request
+
+
+# Issue kinds of the basic tier (keys of layer_scan.ISSUE_MESSAGES)
+TOO_FEW_VERTICES = 'too_few_vertices'
+NON_FINITE_COORDINATES = 'non_finite_coordinates'
+ZERO_LENGTH_LINE = 'zero_length_line'
+ZERO_LENGTH_SEGMENT = 'zero_length_segment'
+
+# Error messages of the basic tier, used for GeometryError
+CHECK_MESSAGES = {
+    TOO_FEW_VERTICES: "Line has less than 2 points",
+    NON_FINITE_COORDINATES: "Geometry has non-finite coordinates",
+    ZERO_LENGTH_LINE: "Line has zero length",
+}
+
+
+def _finite(values: Sequence[float]) -> bool:
+    """Check that no value is NaN or infinite."""
+    # The sum is NaN or infinite as soon as one value is; only a sum that
+    # overflows needs the per-value check
+    if math.isfinite(sum(values)):
+        return True
+    return all(map(math.isfinite, values))
+
+
+def zero_length_segments(xs: Sequence[float], ys: Sequence[float]) -> int:
+    """
+    Count the segments of a polyline whose vertices coincide.
+
+    Args:
+        xs: Vertex x coordinates
+        ys: Vertex y coordinates
+
+    Returns:
+        Number of zero-length segments
+    """
+    coords = list(zip(xs, ys))
+    return sum(map(eq, coords, islice(coords, 1, None)))
+
+
+def check_line(points: Sequence, length: Optional[float] = None) -> Optional[str]:
+    """
+    Basic tier check of a polyline.
+
+    Args:
+        points: Line vertices (QgsPointXY)
+        length: Length of the line (QgsGeometry.length()), if known; the
+            vertices are only inspected when it is not finite and positive
+
+    Returns:
+        Issue kind (TOO_FEW_VERTICES, NON_FINITE_COORDINATES or
+        ZERO_LENGTH_LINE), None when the line can be exported
+    """
+    count = len(points)
+    if count < 2:
+        return TOO_FEW_VERTICES
+    if length is not None and length > 0.0 and math.isfinite(length):
+        return None
+
+    xs = [point.x() for point in points]
+    ys = [point.y() for point in points]
+    if not (_finite(xs) and _finite(ys)):
+        return NON_FINITE_COORDINATES
+    # Zero length only if every vertex equals the first one
+    x0, y0 = xs[0], ys[0]
+    if xs.count(x0) == count and ys.count(y0) == count:
+        return ZERO_LENGTH_LINE
+    return None
+
+
+def scan_line(points: Sequence, length: Optional[float] = None) -> Tuple[Optional[str], int]:
+    """
+    Basic tier check of a polyline for the layer scan.
+
+    Args:
+        points: Line vertices (QgsPointXY)
+        length: Length of the line, see check_line
+
+    Returns:
+        Issue kind as in check_line, and the number of zero-length segments
+        of an otherwise usable line
+    """
+    issue = check_line(points, length)
+    if issue is not None or len(points) == 2:
+        return issue, 0
+    return None, zero_length_segments([point.x() for point in points], [point.y() for point in points])
+
+
+def first_part(geometry, is_line: bool):
+    """
+    Get the vertices (lines) or the point the export uses: the first part of multipart geometries.
+
+    Args:
+        geometry: Non-null QgsGeometry
+        is_line: Line (True) or point (False) geometry
+
+    Returns:
+        List of QgsPointXY for lines, QgsPointXY (None for empty multipoints) for points
+    """
+    if is_line:
+        if geometry.isMultipart():
+            parts = geometry.asMultiPolyline()
+            return parts[0] if parts else []
+        return geometry.asPolyline()
+    if geometry.isMultipart():
+        parts = geometry.asMultiPoint()
+        return parts[0] if parts else None
+    return geometry.asPoint()
+
+
+def check_point(point) -> Optional[str]:
+    """
+    Basic tier check of a point.
+
+    Args:
+        point: Point (QgsPointXY)
+
+    Returns:
+        NON_FINITE_COORDINATES or None when the point can be exported
+    """
+    x, y = point.x(), point.y()
+    if math.isfinite(x + y) or all(map(math.isfinite, (x, y))):
+        return None
+    return NON_FINITE_COORDINATES
+
+
+class GeosValidityReport:
+    """Feature ids of a layer whose geometry GEOS reports invalid (GEOS tier)."""
+
+    def __init__(self, layer_id: str, feature_count: int, invalid_ids: FrozenSet[int]):
+        self.layer_id = layer_id
+        self.feature_count = feature_count
+        self.invalid_ids = invalid_ids
+
+    @classmethod
+    def scan(cls, layer: QgsVectorLayer) -> 'GeosValidityReport':
+        """
+        Run the GEOS validity check over every geometry of a layer.
+
+        Null and empty geometries are left to the basic tier.
+
+        Args:
+            layer: Source layer (or the exporter's LayerSnapshot)
+
+        Returns:
+            GeosValidityReport of the layer
+        """
+        invalid = []
+        count = 0
+        for feature in layer.getFeatures(geometry_feature_request(layer)):
+            count += 1
+            geometry = feature.geometry()
+            if geometry is None or geometry.isNull() or geometry.isEmpty():
+                continue
+            if not geometry.isGeosValid():
+                invalid.append(feature.id())
+        return cls(layer.id(), count, frozenset(invalid))
+
+    def __contains__(self, feature_id: int) -> bool:
+        return feature_id in self.invalid_ids
@@ -18,6 +18,7 @@ from .data_structures import GeometryType, FieldType, LayerMapping
 from .field_definitions import SewageNetworkFields
 from .exceptions import LayerValidationError, ValidationError
 from .validation import ValidationResult, LayerValidator
+from .feature_requests import sample_feature_request
 
 
 class LayerManager:
@@ -153,8 +154,8 @@ class LayerManager:
         sample_data = []
         field_names = self.get_layer_field_names(layer)
         
-        # Get sample features
-        features = layer.getFeatures()
+        # Get sample features (attributes only, limited on the provider side)
+        features = layer.getFeatures(sample_feature_request(layer, max_features))
         count = 0
         
         for feature in features:
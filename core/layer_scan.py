@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass validation scan of the network layers.
+
+The configuration validator used to run separate checks over a layer (a
+capped geometry sample, field types, field existence) and never looked at
+the attribute values themselves. LayerScanner reads every feature of a layer
+once, with only the mapped attributes, and collects the mapped attribute
+values into columns and the geometry state per feature. The value checks
+then run per column (vectorized with NumPy when it is available):
+
+- geometry: missing or empty geometry and the basic tier of
+  geometry_checks (vertex count, finite coordinates, zero-length lines and
+  segments); GEOS validity only with geos_validation set
+- conversion: values of numeric fields that hold no number (the exporter
+  would write 0.0)
+- rules: values outside the ``validation_rules`` of the field definition
+  (min_value, max_value, max_length) and missing values of required fields
+- duplicate pipe or node ids
+- references: pipe upstream/downstream nodes missing from the junctions
+  layer and junctions no pipe connects to (see cross_reference)
+
+Issues are aggregated into a LayerScanReport: one IssueTally (count and the
+first sample feature ids) per kind of issue and field.
+"""
+
+import math
+from array import array
+from operator import itemgetter
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+from qgis.core import QgsVectorLayer
+
+from .data_converter import DataConverter
+from .data_structures import FieldType, GeometryType, LayerMapping, RequiredField
+from .extraction_plan import ExtractionPlan
+from .feature_requests import build_feature_request
+from .geometry_checks import ZERO_LENGTH_SEGMENT, check_point, first_part, scan_line
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Sample feature ids kept per issue
+MAX_SAMPLES = 5
+
+# Id field per geometry type, checked for duplicates
+ID_FIELDS = {GeometryType.LINE: 'pipe_id', GeometryType.POINT: 'node_id'}
+
+# Value types of numeric columns used without parsing
+_NUMBER_TYPES = frozenset((float, int))
+
+# Markers of _parse_numbers: string not parsed yet, value holding no number
+_UNPARSED = object()
+_FAILED = object()
+
+# Pipe fields referencing junction ids
+NODE_REFERENCE_FIELDS = ('upstream_node', 'downstream_node')
+
+# Message per issue kind; {count}, {field} and {detail} are filled in
+ISSUE_MESSAGES = {
+    'null_geometry': "{count} feature(s) without geometry",
+    'empty_geometry': "{count} feature(s) with empty geometry",
+    'too_few_vertices': "{count} line(s) with less than 2 vertices",
+    'non_finite_coordinates': "{count} feature(s) with non-finite (NaN or infinite) coordinates",
+    'zero_length_line': "{count} line(s) of zero length",
+    'zero_length_segment': "{count} line(s) with zero-length segments (repeated vertices)",
+    'invalid_geometry': "{count} feature(s) with invalid geometry (GEOS)",
+    'missing_value': "{count} feature(s) without a value for required field {field}",
+    'conversion_failed': "{count} {field} value(s) that are not numbers (exported as 0)",
+    'below_min': "{count} {field} value(s) below the minimum of {detail}",
+    'above_max': "{count} {field} value(s) above the maximum of {detail}",
+    'too_long': "{count} {field} value(s) longer than {detail} characters",
+    'duplicate_id': "{count} feature(s) sharing their {field} with another feature",
+    'unknown_node': "{count} {field} value(s) not found in the junctions layer",
+    'unconnected_node': "{count} junction(s) not connected to any pipe",
+}
+
+
+class IssueTally:
+    """Number of occurrences of one issue with the first sample feature ids."""
+
+    __slots__ = ('count', 'samples', 'detail')
+
+    def __init__(self, detail: Any = None):
+        self.count = 0
+        self.samples: List[int] = []
+        self.detail = detail
+
+    def add(self, feature_ids: Sequence[int]) -> None:
+        """Count features, keeping the first MAX_SAMPLES ids."""
+        self.count += len(feature_ids)
+        missing = MAX_SAMPLES - len(self.samples)
+        if missing > 0:
+            self.samples.extend(int(fid) for fid in feature_ids[:missing])
+
+
+class LayerScanReport:
+    """Issues found by one layer scan, keyed by (issue kind, field name)."""
+
+    def __init__(self, layer_name: str, geometry_type: GeometryType):
+        self.layer_name = layer_name
+        self.geometry_type = geometry_type
+        self.feature_count = 0
+        self.issues: Dict[Tuple[str, str], IssueTally] = {}
+        # Converted ids (pipe_id / node_id) and pipe node references, for cross_reference
+        self.feature_ids: Sequence[int] = ()
+        self.ids: Dict[str, List[str]] = {}
+
+    def add(self, kind: str, field_name: str, feature_ids: Sequence[int], detail: Any = None) -> None:
+        """
+        Record features with an issue.
+
+        Args:
+            kind: Issue kind (key of ISSUE_MESSAGES)
+            field_name: Target field name, empty for geometry issues
+            feature_ids: Ids of the affected features
+            detail: Rule limit shown in the message
+        """
+        if not len(feature_ids):
+            return
+        key = (kind, field_name)
+        if key not in self.issues:
+            self.issues[key] = IssueTally(detail)
+        self.issues[key].add(feature_ids)
+
+    def histogram(self) -> Dict[str, Dict[str, int]]:
+        """Issue counts per kind and field (geometry issues under the empty field name)."""
+        histogram: Dict[str, Dict[str, int]] = {}
+        for (kind, field_name), tally in self.issues.items():
+            histogram.setdefault(kind, {})[field_name] = tally.count
+        return histogram
+
+    def issue_count(self) -> int:
+        """Total number of issues."""
+        return sum(tally.count for tally in self.issues.values())
+
+    def messages(self, kinds: Optional[Collection[str]] = None) -> List[str]:
+        """
+        Get a readable message per issue, with sample feature ids.
+
+        Args:
+            kinds: Only report these issue kinds (default: all)
+
+        Returns:
+            One message per issue kind and field
+        """
+        messages = []
+        for (kind, field_name), tally in self.issues.items():
+            if kinds is not None and kind not in kinds:
+                continue
+            text = ISSUE_MESSAGES[kind].format(count=tally.count, field=field_name, detail=tally.detail)
+            samples = ", ".join(str(fid) for fid in tally.samples)
+            more = ", ..." if tally.count > len(tally.samples) else ""
+            messages.append(f"Layer '{self.layer_name}': {text} (feature ids {samples}{more})")
+        return messages
+
+
+class _FieldCheck:
+    """Resolved checks of one mapped field."""
+
+    __slots__ = ('name', 'index', 'field_type', 'is_required', 'min_value', 'max_value', 'max_length')
+
+    def __init__(self, field_def: RequiredField, index: int):
+        rules = field_def.validation_rules or {}
+        self.name = field_def.name
+        self.index = index
+        self.field_type = field_def.field_type
+        self.is_required = field_def.is_required
+        self.min_value = rules.get('min_value')
+        self.max_value = rules.get('max_value')
+        self.max_length = rules.get('max_length')
+
+
+class LayerScanner:
+    """Validates layers in one streaming pass each (see module docstring)."""
+
+    def __init__(self, check_geometry: bool = True, use_numpy: Optional[bool] = None,
+                 geos_validation: bool = False):
+        """
+        Create a scanner.
+
+        Args:
+            check_geometry: Check feature geometries (otherwise geometry is not fetched)
+            use_numpy: Force (True) or disable (False) the NumPy column checks;
+                defaults to NumPy when available
+            geos_validation: Also run the GEOS validity check on every geometry
+        """
+        self.check_geometry = check_geometry
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else use_numpy
+        self.geos_validation = geos_validation
+
+    @staticmethod
+    def field_checks(layer: QgsVectorLayer, mapping: LayerMapping) -> List[_FieldCheck]:
+        """Checks for the target fields mapped to existing layer fields (calculated fields excluded)."""
+        field_names = layer.fields().names()
+        index_by_name = {name: i for i, name in enumerate(field_names)}
+        field_mappings = mapping.field_mappings if isinstance(mapping.field_mappings, dict) else {}
+        checks = {}
+        for field_def in ExtractionPlan.field_definitions(mapping.geometry_type):
+            name = field_def.name
+            # First definition wins (downstream_depth is also a calculated field)
+            if name in checks or mapping.is_field_calculated(name):
+                continue
+            source = field_mappings.get(name)
+            if source in index_by_name:
+                checks[name] = _FieldCheck(field_def, index_by_name[source])
+        return list(checks.values())
+
+    def scan(self, layer: QgsVectorLayer, mapping: LayerMapping) -> LayerScanReport:
+        """
+        Scan a layer and check its geometries and mapped values.
+
+        Args:
+            layer: Source layer
+            mapping: LayerMapping of the layer
+
+        Returns:
+            LayerScanReport of the layer
+        """
+        report = LayerScanReport(layer.name(), mapping.geometry_type)
+        checks = self.field_checks(layer, mapping)
+        request = build_feature_request(layer, mapping, with_geometry=self.check_geometry)
+
+        # The only pass over the layer: feature ids, geometry state and the
+        # mapped attribute values (as rows, transposed below)
+        feature_ids = array('q')
+        geometry_issues: Dict[str, List[int]] = {}
+        is_line = mapping.geometry_type == GeometryType.LINE
+        geos_validation = self.geos_validation
+        rows = []
+        getter = itemgetter(*(check.index for check in checks)) if checks else None
+        check_geometry = self.check_geometry
+        check_vertices = self._check_vertices
+        add_id = feature_ids.append
+        add_row = rows.append
+        for feature in layer.getFeatures(request):
+            fid = feature.id()
+            add_id(fid)
+            if check_geometry:
+                geometry = feature.geometry()
+                if geometry is None or geometry.isNull():
+                    issue = 'null_geometry'
+                elif geometry.isEmpty():
+                    issue = 'empty_geometry'
+                else:
+                    issue = check_vertices(geometry, is_line, fid, geometry_issues)
+                    if issue is None and geos_validation and not geometry.isGeosValid():
+                        issue = 'invalid_geometry'
+                if issue is not None:
+                    geometry_issues.setdefault(issue, []).append(fid)
+            if getter is not None:
+                add_row(getter(feature.attributes()))
+
+        report.feature_count = len(feature_ids)
+        report.feature_ids = feature_ids
+        for kind in ISSUE_MESSAGES:
+            if kind in geometry_issues:
+                report.add(kind, '', geometry_issues[kind])
+        if not rows:
+            return report
+
+        columns = list(zip(*rows)) if len(checks) > 1 else [rows]
+        del rows
+        id_field = ID_FIELDS.get(mapping.geometry_type)
+        for check, values in zip(checks, columns):
+            if check.field_type in (FieldType.DOUBLE, FieldType.INTEGER):
+                self._check_numbers(report, check, values, feature_ids)
+            elif check.field_type == FieldType.STRING:
+                to_string = DataConverter.to_string
+                strings = [value.strip() if type(value) is str else to_string(value) for value in values]
+                self._check_strings(report, check, strings, feature_ids)
+                if check.name == id_field or check.name in NODE_REFERENCE_FIELDS:
+                    report.ids[check.name] = strings
+        if id_field in report.ids:
+            report.add('duplicate_id', id_field, _duplicates(report.ids[id_field], feature_ids))
+        return report
+
+    @staticmethod
+    def _check_vertices(geometry, is_line: bool, fid: int,
+                        geometry_issues: Dict[str, List[int]]) -> Optional[str]:
+        """Basic tier check of the exported part; lines with repeated vertices are noted separately."""
+        part = first_part(geometry, is_line)
+        if not is_line:
+            return 'empty_geometry' if part is None else check_point(part)
+        issue, repeated = scan_line(part, None if geometry.isMultipart() else geometry.length())
+        if repeated:
+            geometry_issues.setdefault(ZERO_LENGTH_SEGMENT, []).append(fid)
+        return issue
+
+    def _check_numbers(self, report: LayerScanReport, check: _FieldCheck,
+                       values: Sequence[Any], feature_ids: Sequence[int]) -> None:
+        try:
+            # Columns holding only numbers convert in one call
+            numbers = array('d', values)
+            missing = failed = ()
+        except TypeError:
+            numbers, missing, failed = _parse_numbers(values, feature_ids)
+
+        report.add('conversion_failed', check.name, failed)
+        if check.is_required:
+            report.add('missing_value', check.name, missing)
+        if check.min_value is None and check.max_value is None:
+            return
+
+        if self.use_numpy:
+            column = np.frombuffer(numbers, dtype=np.float64)
+            ids = np.frombuffer(feature_ids, dtype=np.int64)
+            if check.min_value is not None:
+                report.add('below_min', check.name, ids[column < check.min_value], check.min_value)
+            if check.max_value is not None:
+                report.add('above_max', check.name, ids[column > check.max_value], check.max_value)
+        else:
+            if check.min_value is not None:
+                report.add('below_min', check.name, [fid for fid, number in zip(feature_ids, numbers)
+                                                      if number < check.min_value], check.min_value)
+            if check.max_value is not None:
+                report.add('above_max', check.name, [fid for fid, number in zip(feature_ids, numbers)
+                                                      if number > check.max_value], check.max_value)
+
+    @staticmethod
+    def _check_strings(report: LayerScanReport, check: _FieldCheck,
+                       strings: Sequence[str], feature_ids: Sequence[int]) -> None:
+        if check.is_required:
+            report.add('missing_value', check.name,
+                       [fid for fid, text in zip(feature_ids, strings) if not text])
+        if check.max_length is not None:
+            limit = check.max_length
+            report.add('too_long', check.name,
+                       [fid for fid, text in zip(feature_ids, strings) if len(text) > limit], limit)
+
+
+def _parse_numbers(values: Sequence[Any],
+                   feature_ids: Sequence[int]) -> Tuple[array, List[int], List[int]]:
+    """
+    Convert a numeric column holding strings or NULLs with DataConverter.parse_double.
+
+    Numbers are taken as they are and each distinct string is parsed once.
+
+    Args:
+        values: Attribute values of the column
+        feature_ids: Feature id per value
+
+    Returns:
+        Column as doubles (NaN for missing and failed values), ids of the
+        features without a value and ids of the features whose value holds
+        no number
+    """
+    column = list(values)
+    missing, failed = [], []
+    parse = DataConverter.parse_double
+    parsed: Dict[str, Any] = {}
+    for position in [position for position, value in enumerate(column) if type(value) not in _NUMBER_TYPES]:
+        value = column[position]
+        number = parsed.get(value, _UNPARSED) if type(value) is str else _UNPARSED
+        if number is _UNPARSED:
+            try:
+                number = parse(value)
+            except ValueError:
+                number = _FAILED
+            if type(value) is str:
+                parsed[value] = number
+        if number is None:
+            missing.append(feature_ids[position])
+            number = math.nan
+        elif number is _FAILED:
+            failed.append(feature_ids[position])
+            number = math.nan
+        column[position] = number
+    return array('d', column), missing, failed
+
+
+def _duplicates(ids: Sequence[str], feature_ids: Sequence[int]) -> List[int]:
+    """Feature ids of every feature sharing a (non-empty) id with an earlier feature."""
+    seen = set()
+    duplicates = []
+    for fid, value in zip(feature_ids, ids):
+        if not value:
+            continue
+        if value in seen:
+            duplicates.append(fid)
+        else:
+            seen.add(value)
+    return duplicates
+
+
+def cross_reference(pipes: LayerScanReport, junctions: LayerScanReport) -> None:
+    """
+    Check the pipe node references against the junction ids.
+
+    Adds 'unknown_node' issues to the pipes report and 'unconnected_node'
+    issues to the junctions report. Needs node_id in the junctions scan and
+    at least one node reference field in the pipes scan.
+
+    Args:
+        pipes: Report of the pipes layer scan
+        junctions: Report of the junctions layer scan
+    """
+    node_ids = junctions.ids.get('node_id')
+    references = [name for name in NODE_REFERENCE_FIELDS if name in pipes.ids]
+    if node_ids is None or not references:
+        return
+
+    known = set(node_ids)
+    known.discard('')
+    connected = set()
+    for name in references:
+        values = pipes.ids[name]
+        connected.update(values)
+        pipes.add('unknown_node', name, [fid for fid, value in zip(pipes.feature_ids, values)
+                                         if value and value not in known])
+    junctions.add('unconnected_node', 'node_id', [fid for fid, value in zip(junctions.feature_ids, node_ids)
+                                                  if value and value not in connected])
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred loading of the DXF export machinery.
+
+The exporter, the template manager and the DXF writers import the bundled
+ezdxf package (entities, math, render, fonts), which is a noticeable part of
+the QGIS start when it happens at plugin load. The plugin module therefore
+only imports the light modules (configuration, layer handling, dialogs) and
+the export modules are imported on first use through load_export_modules().
+
+warm_up_in_background() imports them in a daemon thread, started once the
+QGIS UI is idle, so the first export usually finds them loaded. Imports hold
+the GIL, so the warm-up briefly competes with the UI thread; a first use
+while it is running simply waits for it.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+from typing import Optional
+
+# Core modules importing ezdxf; dxf_exporter pulls in the writers, colors and binary output
+EXPORT_MODULES = ('template_manager', 'dxf_exporter')
+
+_load_lock = threading.Lock()
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def _add_addon_path() -> None:
+    addon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'addon')
+    if addon_path not in sys.path:
+        sys.path.insert(0, addon_path)
+
+
+def ezdxf_available() -> bool:
+    """
+    Check that the bundled ezdxf library can be found, without importing it.
+
+    Returns:
+        True if the ezdxf package is on the (addon) path
+    """
+    _add_addon_path()
+    try:
+        return importlib.util.find_spec('ezdxf') is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def export_modules_loaded() -> bool:
+    """
+    Check whether the export modules have been imported.
+
+    Returns:
+        True if load_export_modules() would not import anything
+    """
+    return all(f"{__package__}.{name}" in sys.modules for name in EXPORT_MODULES)
+
+
+def load_export_modules() -> str:
+    """
+    Import the export modules (and with them ezdxf); no-op once loaded.
+
+    Returns:
+        Version of the loaded ezdxf library
+
+    Raises:
+        ImportError: If the bundled ezdxf library or an export module cannot be imported
+    """
+    with _load_lock:
+        _add_addon_path()
+        for name in EXPORT_MODULES:
+            importlib.import_module(f".{name}", __package__)
+    return getattr(sys.modules.get('ezdxf'), '__version__', 'unknown')
+
+
+def _warm_up() -> None:
+    try:
+        load_export_modules()
+    except Exception:
+        # Reported by the first real use, which imports again
+        pass
+
+
+def warm_up_in_background() -> Optional[threading.Thread]:
+    """
+    Start importing the export modules in a daemon thread.
+
+    Returns:
+        The warm-up thread, or None if the modules are already loaded
+    """
+    global _warm_up_thread
+    if export_modules_loaded():
+        return None
+    if _warm_up_thread is None or not _warm_up_thread.is_alive():
+        _warm_up_thread = threading.Thread(target=_warm_up, name="RedBasicaExportWarmUp", daemon=True)
+        _warm_up_thread.start()
+    return _warm_up_thread
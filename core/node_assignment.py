@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial assignment of junction (node) attributes to pipes.
+
+The assignment is split in three phases so the expensive part can run off
+the GUI thread:
+
+1. :func:`ensure_node_fields` adds the ``node_up_*``/``node_down_*`` fields
+   to the pipes layer (main thread).
+2. :func:`compute_node_assignments` reads pipes and junctions from feature
+   sources and resolves the nearest junction for all pipe ends in one batch
+   (any thread, see :mod:`node_snapping`).
+3. :func:`apply_node_assignments` writes the collected attribute changes to
+   the pipes layer in one call (main thread).
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from qgis.core import QgsField, QgsPointXY, QgsSpatialIndex, QgsVectorDataProvider, QgsVectorLayer, NULL
+from qgis.PyQt.QtCore import QVariant
+
+from .feature_requests import build_feature_request, geometry_feature_request
+from .node_snapping import DEFAULT_SEARCH_RADIUS, UNRESOLVED, nearest_points
+
+
+# Fields created on the pipes layer -> type
+# node_up_* (upstream/montante) and node_down_* (downstream/jusante)
+NODE_FIELDS = {
+    'node_up_id': QVariant.String,
+    'node_down_id': QVariant.String,
+    'node_up_depth': QVariant.Double,          # Profundidade (h) do nó montante
+    'node_down_depth': QVariant.Double,        # Profundidade (h) do nó jusante
+    'node_up_ground_elev': QVariant.Double,    # Cota do terreno (CT) montante
+    'node_down_ground_elev': QVariant.Double,  # Cota do terreno (CT) jusante
+    'node_up_invert_elev': QVariant.Double,    # Cota de fundo (CF) montante
+    'node_down_invert_elev': QVariant.Double   # Cota de fundo (CF) jusante
+}
+
+# Progress/cancellation checks happen once per this many pipes
+CHECK_INTERVAL = 200
+
+
+@dataclass
+class NodeAssignmentResult:
+    """Attribute changes and statistics of a node assignment run."""
+    changes: Dict[int, Dict[int, Any]] = field(default_factory=dict)  # pipe fid -> {field index: value}
+    total_pipes: int = 0
+    assignments: int = 0          # pipes with both ends connected
+    pipes_with_issues: int = 0    # pipes with a missing start or end node
+    cancelled: bool = False
+    snap_tolerance: Optional[float] = None
+    distances: Dict[int, Tuple[float, float]] = field(default_factory=dict)  # pipe fid -> (up, down) snap distance, NaN if unmatched
+    unmatched: List[Tuple[int, str]] = field(default_factory=list)  # (pipe fid, 'upstream'/'downstream'/'both')
+    max_distance: float = 0.0     # largest snap distance of a matched end
+
+
+def ensure_node_fields(pipes_layer: QgsVectorLayer) -> Dict[str, int]:
+    """
+    Add missing node fields to the pipes layer.
+
+    Args:
+        pipes_layer: Pipes layer
+
+    Returns:
+        Mapping of node field name -> attribute index
+    """
+    fields_to_add = [
+        QgsField(field_name, field_type)
+        for field_name, field_type in NODE_FIELDS.items()
+        if pipes_layer.fields().indexFromName(field_name) == -1
+    ]
+    if fields_to_add:
+        pipes_layer.dataProvider().addAttributes(fields_to_add)
+        pipes_layer.updateFields()
+
+    return {name: pipes_layer.fields().indexFromName(name) for name in NODE_FIELDS}
+
+
+def compute_node_assignments(pipes_source, junctions_source, idx_map: Dict[str, int],
+                             node_id_field: str, depth_field: Optional[str] = None,
+                             ground_elev_field: Optional[str] = None,
+                             invert_elev_field: Optional[str] = None,
+                             total_pipes: int = 0,
+                             progress_callback: Optional[Callable[[int, str], None]] = None,
+                             is_cancelled: Optional[Callable[[], bool]] = None,
+                             snap_tolerance: Optional[float] = None) -> NodeAssignmentResult:
+    """
+    Resolve the nearest junction for the start and end point of every pipe.
+
+    Pipe endpoints and junction points are collected first and matched in one
+    batched nearest-point search. Only reads from the sources, so it is safe
+    to run in a background task when given QgsVectorLayerFeatureSource
+    instances.
+
+    Args:
+        pipes_source: Feature source (or layer) of the pipes
+        junctions_source: Feature source (or layer) of the junctions
+        idx_map: Node field indices on the pipes layer (see ensure_node_fields)
+        node_id_field: Name of the ID field in the junctions layer
+        depth_field: Name of the depth field (optional)
+        ground_elev_field: Name of the ground elevation (CT) field (optional)
+        invert_elev_field: Name of the invert elevation (CF) field (optional)
+        total_pipes: Number of pipes, used for progress reporting
+        progress_callback: Optional callback(percent, message)
+        is_cancelled: Optional callable returning True to stop early
+        snap_tolerance: Maximum endpoint to junction distance in map units;
+            None (or 0) matches the nearest junction at any distance
+
+    Returns:
+        NodeAssignmentResult with the attribute changes and snap distances per pipe
+    """
+    if snap_tolerance is not None and snap_tolerance <= 0:
+        snap_tolerance = None
+    result = NodeAssignmentResult(total_pipes=total_pipes, snap_tolerance=snap_tolerance)
+
+    def report(percent: int, message: str):
+        if progress_callback is not None:
+            progress_callback(percent, message)
+
+    def cancelled() -> bool:
+        if is_cancelled is not None and is_cancelled():
+            result.cancelled = True
+        return result.cancelled
+
+    # Junction value -> pipe field suffix
+    copied_fields = [('id', node_id_field)]
+    if depth_field:
+        copied_fields.append(('depth', depth_field))
+    if ground_elev_field:
+        copied_fields.append(('ground_elev', ground_elev_field))
+    if invert_elev_field:
+        copied_fields.append(('invert_elev', invert_elev_field))
+
+    # Junction points and the copied values, in one scan
+    junction_fids = []
+    junction_x = []
+    junction_y = []
+    junction_values = []
+    junction_request = build_feature_request(
+        junctions_source,
+        field_names=[source for _, source in copied_fields]
+    )
+    for j_feat in junctions_source.getFeatures(junction_request):
+        geom = j_feat.geometry()
+        if not geom or geom.isEmpty():
+            continue
+        point = geom.asMultiPoint()[0] if geom.isMultipart() else geom.asPoint()
+        junction_fids.append(j_feat.id())
+        junction_x.append(point.x())
+        junction_y.append(point.y())
+        junction_values.append([j_feat[source] for _, source in copied_fields])
+
+    # Pipe endpoints
+    pipe_fids = []
+    point_x = []
+    point_y = []
+    count = 0
+    for p_feat in pipes_source.getFeatures(geometry_feature_request(pipes_source)):
+        if count % CHECK_INTERVAL == 0:
+            if cancelled():
+                return result
+            if total_pipes > 0:
+                report(int(count * 90 / total_pipes), f"Reading pipes: {count}/{total_pipes}")
+        count += 1
+
+        geom = p_feat.geometry()
+        if not geom or geom.isEmpty():
+            continue
+
+        # Get start and end points
+        if geom.isMultipart():
+            points = geom.asMultiPolyline()[0]
+        else:
+            points = geom.asPolyline()
+
+        pipe_fids.append(p_feat.id())
+        point_x.append(points[0].x())
+        point_y.append(points[0].y())
+        point_x.append(points[-1].x())
+        point_y.append(points[-1].y())
+
+    if cancelled():
+        return result
+    report(90, f"Matching {len(point_x)} pipe ends to {len(junction_fids)} junctions")
+
+    # Batched search (upstream ends at even, downstream ends at odd positions)
+    nearest, distances = nearest_points(
+        point_x, point_y, junction_x, junction_y,
+        snap_tolerance or DEFAULT_SEARCH_RADIUS
+    )
+
+    # Ends the grid could not decide, and without a snap tolerance ends beyond
+    # the grid radius: nearest neighbour query (unbounded without tolerance)
+    unresolved = [i for i, junction in enumerate(nearest)
+                  if junction == UNRESOLVED or (junction == -1 and snap_tolerance is None)]
+    if unresolved and junction_fids:
+        position = {fid: i for i, fid in enumerate(junction_fids)}
+        index = QgsSpatialIndex(junctions_source.getFeatures(geometry_feature_request(junctions_source)))
+        for i in unresolved:
+            nearest[i] = -1
+            found = index.nearestNeighbor(QgsPointXY(point_x[i], point_y[i]), 1, snap_tolerance or 0.0)
+            if not found or found[0] not in position:
+                continue
+            junction = position[found[0]]
+            distance = math.hypot(junction_x[junction] - point_x[i], junction_y[junction] - point_y[i])
+            if snap_tolerance is None or distance <= snap_tolerance:
+                nearest[i] = junction
+                distances[i] = distance
+
+    for n, fid in enumerate(pipe_fids):
+        changes: Dict[int, Any] = {}
+        ends = []
+        for prefix, i in (('node_up', 2 * n), ('node_down', 2 * n + 1)):
+            junction = nearest[i]
+            values = junction_values[junction] if junction != -1 else None
+            for k, (key, _) in enumerate(copied_fields):
+                changes[idx_map[f'{prefix}_{key}']] = values[k] if values is not None else NULL
+            ends.append(values is not None)
+            if values is not None and distances[i] > result.max_distance:
+                result.max_distance = distances[i]
+        result.changes[fid] = changes
+        result.distances[fid] = (distances[2 * n], distances[2 * n + 1])
+
+        if all(ends):
+            result.assignments += 1
+        else:
+            result.pipes_with_issues += 1
+            result.unmatched.append(
+                (fid, 'both' if not any(ends) else ('upstream' if not ends[0] else 'downstream'))
+            )
+
+    report(100, f"Assigned nodes to {len(pipe_fids)} pipes")
+    result.total_pipes = max(total_pipes, count)
+    return result
+
+
+def apply_node_assignments(pipes_layer: QgsVectorLayer, result: NodeAssignmentResult) -> bool:
+    """
+    Write computed node assignments to the pipes layer.
+
+    When the layer is not being edited, all changes go to the data provider
+    in a single changeAttributeValues map (no edit buffer). A layer with
+    pending edits gets the changes through its edit buffer, as one edit
+    command, and is committed.
+
+    Args:
+        pipes_layer: Pipes layer
+        result: Result of compute_node_assignments
+
+    Returns:
+        True if the changes were written
+    """
+    provider = pipes_layer.dataProvider()
+    if (not pipes_layer.isEditable()
+            and provider.capabilities() & QgsVectorDataProvider.ChangeAttributeValues):
+        written = provider.changeAttributeValues(result.changes)
+        pipes_layer.triggerRepaint()
+        return written
+
+    if not pipes_layer.isEditable():
+        pipes_layer.startEditing()
+
+    pipes_layer.beginEditCommand("Assign node attributes")
+    try:
+        for fid, changes in result.changes.items():
+            pipes_layer.changeAttributeValues(fid, changes)
+    except Exception:
+        pipes_layer.destroyEditCommand()
+        raise
+    pipes_layer.endEditCommand()
+
+    return pipes_layer.commitChanges()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Batched nearest-junction lookup for node assignment.
+
+All pipe endpoints are resolved against all junctions in one call. Junctions
+are bucketed into a uniform grid; every junction within one cell size of a
+point lies in the 3x3 block of cells around the point, so only those buckets
+are searched. With NumPy the search runs as vectorized passes over all
+points (one pass per neighbour cell and bucket rank), otherwise as a plain
+Python loop over a dict grid.
+
+The cell size follows the junction density (CELL_SIZE_FACTOR times the mean
+junction spacing), clamped to the search radius, so the buckets stay small
+in any CRS (degrees or metres) and with large snap tolerances. Buckets with
+more than MAX_BUCKET_SIZE junctions are not searched.
+
+Points without a junction within the radius are reported as unmatched
+(index -1, distance NaN). Points the grid cannot decide (the nearest
+junction may lie beyond one cell, or a bucket around the point is
+oversized) are reported as UNRESOLVED; the caller resolves those with a
+spatial index query, as it does for unmatched points without a snap
+tolerance.
+"""
+
+import math
+from typing import Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Search radius used when no snap tolerance is given, in map units. Points
+# farther than this from every junction fall back to a spatial index query.
+DEFAULT_SEARCH_RADIUS = 1.0
+
+# Cell size in mean junction spacings (sqrt(extent area / junctions))
+CELL_SIZE_FACTOR = 2.0
+
+# Buckets holding more junctions are skipped and their points left unresolved
+MAX_BUCKET_SIZE = 64
+
+# Index of points the grid search could not decide
+UNRESOLVED = -2
+
+
+def nearest_points(point_x: Sequence[float], point_y: Sequence[float],
+                   target_x: Sequence[float], target_y: Sequence[float],
+                   radius: float, use_numpy: Optional[bool] = None) -> Tuple[list, list]:
+    """
+    Find the nearest target within ``radius`` of every point.
+
+    Args:
+        point_x: X coordinates of the query points
+        point_y: Y coordinates of the query points
+        target_x: X coordinates of the targets (junctions)
+        target_y: Y coordinates of the targets (junctions)
+        radius: Search radius (> 0)
+        use_numpy: Force (True) or disable (False) the NumPy kernel;
+            defaults to NumPy when available
+
+    Returns:
+        (indices, distances) lists with one entry per point; the index is
+        the position of the nearest target, -1 if no target lies within the
+        radius or UNRESOLVED if the grid could not decide (both with
+        distance NaN)
+    """
+    if radius <= 0:
+        raise ValueError("Search radius must be positive")
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    if len(point_x) == 0 or len(target_x) == 0:
+        return [-1] * len(point_x), [math.nan] * len(point_x)
+    cell = grid_cell_size(target_x, target_y, radius)
+    if use_numpy and _grid_fits_int64(point_x, point_y, target_x, target_y, cell):
+        return _nearest_numpy(point_x, point_y, target_x, target_y, radius, cell)
+    return _nearest_python(point_x, point_y, target_x, target_y, radius, cell)
+
+
+def grid_cell_size(target_x: Sequence[float], target_y: Sequence[float], radius: float) -> float:
+    """
+    Get the grid cell size for a set of targets.
+
+    Args:
+        target_x: X coordinates of the targets
+        target_y: Y coordinates of the targets
+        radius: Search radius, the upper bound of the cell size
+
+    Returns:
+        CELL_SIZE_FACTOR times the mean target spacing, at most ``radius``
+    """
+    area = (max(target_x) - min(target_x)) * (max(target_y) - min(target_y))
+    if not area > 0 or not math.isfinite(area):
+        # Targets on a line or a single target: the bucket cap still applies
+        return radius
+    return min(radius, CELL_SIZE_FACTOR * math.sqrt(area / len(target_x)))
+
+
+def _grid_fits_int64(point_x, point_y, target_x, target_y, cell) -> bool:
+    # Cell keys are cx * stride + cy; huge extents with a tiny cell would overflow
+    span_x = max(max(point_x), max(target_x)) - min(min(point_x), min(target_x))
+    span_y = max(max(point_y), max(target_y)) - min(min(point_y), min(target_y))
+    return (span_x / cell + 4) * (span_y / cell + 4) < 2 ** 62
+
+
+def _nearest_numpy(point_x, point_y, target_x, target_y, radius, cell):
+    px = np.asarray(point_x, dtype=np.float64)
+    py = np.asarray(point_y, dtype=np.float64)
+    tx = np.asarray(target_x, dtype=np.float64)
+    ty = np.asarray(target_y, dtype=np.float64)
+
+    # Grid cells relative to the common origin, as one int64 key per cell
+    origin_x = min(px.min(), tx.min()) - cell
+    origin_y = min(py.min(), ty.min()) - cell
+    tcx = np.floor((tx - origin_x) / cell).astype(np.int64)
+    tcy = np.floor((ty - origin_y) / cell).astype(np.int64)
+    pcx = np.floor((px - origin_x) / cell).astype(np.int64)
+    pcy = np.floor((py - origin_y) / cell).astype(np.int64)
+    stride = int(max(tcy.max(), pcy.max())) + 3
+
+    # Targets sorted by cell: bucket start/count per distinct cell key
+    target_keys = tcx * stride + tcy
+    order = np.argsort(target_keys, kind='stable')
+    sorted_keys = target_keys[order]
+    cell_keys, cell_start, cell_count = np.unique(sorted_keys, return_index=True, return_counts=True)
+
+    best_index = np.full(len(px), -1, dtype=np.int64)
+    best_dist = np.full(len(px), np.inf)
+    oversized = np.zeros(len(px), dtype=bool)
+
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            keys = (pcx + dx) * stride + (pcy + dy)
+            pos = np.searchsorted(cell_keys, keys)
+            pos = np.minimum(pos, len(cell_keys) - 1)
+            found = cell_keys[pos] == keys
+            large = found & (cell_count[pos] > MAX_BUCKET_SIZE)
+            if large.any():
+                oversized |= large
+                found &= ~large
+            if not found.any():
+                continue
+            points = np.nonzero(found)[0]
+            start = cell_start[pos[points]]
+            count = cell_count[pos[points]]
+            for rank in range(int(count.max())):
+                valid = rank < count
+                candidates = points[valid]
+                targets = order[start[valid] + rank]
+                dist = np.hypot(tx[targets] - px[candidates], ty[targets] - py[candidates])
+                better = dist < best_dist[candidates]
+                best_dist[candidates[better]] = dist[better]
+                best_index[candidates[better]] = targets[better]
+
+    # Only targets within one cell are certain to be the nearest ones
+    unresolved = oversized | ((best_dist > cell) & (cell < radius))
+    unmatched = best_dist > radius
+    best_index[unmatched] = -1
+    best_index[unresolved] = UNRESOLVED
+    best_dist[unmatched | unresolved] = np.nan
+    return best_index.tolist(), best_dist.tolist()
+
+
+def _nearest_python(point_x, point_y, target_x, target_y, radius, cell):
+    grid = {}
+    for index, (x, y) in enumerate(zip(target_x, target_y)):
+        grid.setdefault((math.floor(x / cell), math.floor(y / cell)), []).append(index)
+
+    indices = []
+    distances = []
+    for x, y in zip(point_x, point_y):
+        cx = math.floor(x / cell)
+        cy = math.floor(y / cell)
+        best = -1
+        best_dist = math.inf
+        oversized = False
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                bucket = grid.get((gx, gy), ())
+                if len(bucket) > MAX_BUCKET_SIZE:
+                    oversized = True
+                    continue
+                for index in bucket:
+                    dist = math.hypot(target_x[index] - x, target_y[index] - y)
+                    if dist < best_dist:
+                        best, best_dist = index, dist
+        if oversized or (best_dist > cell and cell < radius):
+            best, best_dist = UNRESOLVED, math.nan
+        elif best_dist > radius:
+            best, best_dist = -1, math.nan
+        indices.append(best)
+        distances.append(best_dist)
+    return indices, distances
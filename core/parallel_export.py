@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel pipe entity rendering for streamed DXF exports.
+
+Building the pipe entities (line, labels, arrow, drop marker, collector
+depth label) is pure CPU work. In parallel mode the main thread only reads
+features and extracts their data into a FeatureRecordStore per chunk::
+
+    (records, [(feature_id, record_index, [(x, y), ...]), ...])
+
+Chunks (the columnar store is pickled as a whole) are sent to a pool of worker processes which render them
+into DXF entity text with :class:`DXFStreamFragment`. Chunks are merged into
+the streamed document strictly in submission order, so the output is
+identical to a serial streamed export. R12 stream output carries no entity
+handles, so no handle reassignment is needed when merging.
+
+Worker processes are started with the ``spawn`` method using a plain Python
+interpreter (QGIS' own executable cannot be used to start workers). The pool
+is started eagerly, so workers that fail to initialize are reported when the
+renderer is created. If the pool breaks later, WorkerPoolBroken carries the
+chunks that were not rendered and :class:`SerialPipeRenderer` renders them and
+the rest of the export in the main process.
+"""
+
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .data_structures import ExportConfiguration
+from .exceptions import ExportError
+from .feature_records import FeatureRecordStore
+
+
+# Number of pipes sent to a worker at once
+PARALLEL_CHUNK_SIZE = 2000
+
+# (feature_id, record_index, vertices)
+PipeRecord = Tuple[str, int, List[Tuple[float, float]]]
+
+# (records, pipes): pipe data of the chunk and one PipeRecord per pipe
+PipeChunk = Tuple[FeatureRecordStore, List[PipeRecord]]
+
+# (entity_text, entity_count, processed, failures, aggregate)
+#   failures: [(feature_id, message)]
+#   aggregate: ErrorRecoveryManager.get_aggregate() of the chunk
+ChunkResult = Tuple[str, int, int, List[Tuple[str, str]], List[Tuple[str, str, int, list]]]
+
+# Per worker process state, set by _init_worker
+_worker_state = None
+
+
+def python_executable() -> Optional[str]:
+    """
+    Find a Python interpreter suitable for starting worker processes.
+
+    Returns:
+        Interpreter path, or None if none was found
+    """
+    executable = sys.executable or ''
+    if os.path.basename(executable).lower().startswith('python'):
+        return executable
+
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    candidates = [
+        os.path.join(sys.exec_prefix, 'python.exe'),
+        os.path.join(sys.exec_prefix, 'pythonw.exe'),
+        os.path.join(sys.exec_prefix, 'bin', f'python{version}'),
+        os.path.join(sys.exec_prefix, 'bin', 'python3'),
+    ]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+class WorkerPoolBroken(ExportError):
+    """The worker pool died; ``chunks`` were submitted but not rendered (in order)."""
+
+    def __init__(self, chunks: List[PipeChunk]):
+        super().__init__("Parallel export worker pool stopped unexpectedly")
+        self.chunks = chunks
+
+
+def _render_state(config: ExportConfiguration, text_style: str, block_names: List[str]):
+    """Create a render-only exporter with its configuration."""
+    from .dxf_exporter import DXFExporter
+
+    exporter = DXFExporter()
+    exporter.template_manager.default_text_style = text_style
+    return exporter, config, block_names
+
+
+def _init_worker(config: ExportConfiguration, text_style: str, block_names: List[str]) -> None:
+    """Create the render-only exporter of a worker process."""
+    global _worker_state
+    _worker_state = _render_state(config, text_style, block_names)
+
+
+def _worker_ready() -> bool:
+    """Warm-up call: returns once a worker has been initialized."""
+    return _worker_state is not None
+
+
+def _render_pipe_chunk(chunk: PipeChunk) -> ChunkResult:
+    """Render a chunk of pipe records into DXF entity text (worker process)."""
+    return _render_chunk(_worker_state, chunk)
+
+
+def _render_chunk(state, chunk: PipeChunk) -> ChunkResult:
+    """Render a chunk of pipe records with a render state (see _render_state)."""
+    from .dxf_stream_writer import DXFStreamFragment
+    from .error_recovery import ErrorRecoveryManager
+    from .pipe_geometry import PipeGeometryBatch
+
+    exporter, config, block_names = state
+    # Limits are applied by the main process when the records are replayed
+    exporter.error_manager = ErrorRecoveryManager(
+        max_errors=sys.maxsize, max_warnings=sys.maxsize, log_to_qgis=False
+    )
+
+    records, pipes = chunk
+    fragment = DXFStreamFragment(block_names)
+    msp = fragment.modelspace()
+    geometry = PipeGeometryBatch.from_lines([vertices for _, _, vertices in pipes])
+
+    processed = 0
+    failures = []
+    for index, (feature_id, record_index, vertices) in enumerate(pipes):
+        try:
+            exporter._export_pipe_feature(msp, feature_id, records.row(record_index), config,
+                                          vertices, geometry.row(index))
+            processed += 1
+        except Exception as e:
+            failures.append((feature_id, str(e)))
+
+    return (fragment.getvalue(), fragment.entity_count, processed, failures,
+            exporter.error_manager.get_aggregate())
+
+
+class ParallelPipeRenderer:
+    """
+    Process pool rendering pipe chunks, yielding results in submission order.
+
+    At most ``2 * workers`` chunks are in flight, which bounds the memory
+    used by pending records and rendered text.
+    """
+
+    def __init__(self, config: ExportConfiguration, text_style: str,
+                 block_names: Iterable[str], workers: int):
+        """
+        Start the worker pool.
+
+        Args:
+            config: Export configuration (sent to every worker once)
+            text_style: Default text style of the template manager
+            block_names: Names of the blocks defined in the target document
+            workers: Number of worker processes
+
+        Raises:
+            ExportError: If no Python interpreter is available for the workers
+                or the workers fail to start
+        """
+        executable = python_executable()
+        if executable is None:
+            raise ExportError("No Python interpreter available to start worker processes")
+
+        self._initargs = (config, text_style, list(block_names))
+        context = multiprocessing.get_context('spawn')
+        context.set_executable(executable)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+        # Workers start lazily; wait for one so initializer failures
+        # (e.g. modules not importable in the worker) surface here
+        try:
+            self._executor.submit(_worker_ready).result()
+        except Exception as e:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            raise ExportError(f"Worker processes failed to start: {e}")
+        self._in_flight = deque()
+        self._max_in_flight = max(2, 2 * workers)
+
+    def submit(self, chunk: PipeChunk) -> Iterator[ChunkResult]:
+        """
+        Queue a chunk; yields results of earlier chunks while the queue is full.
+
+        Args:
+            chunk: Record store and pipe records of the chunk (the store must
+                not be changed afterwards, it is pickled asynchronously)
+
+        Raises:
+            WorkerPoolBroken: If the pool died; carries all queued chunks and this one
+        """
+        try:
+            future = self._executor.submit(_render_pipe_chunk, chunk)
+        except BrokenProcessPool:
+            raise WorkerPoolBroken(self._take_queued() + [chunk])
+        self._in_flight.append((future, chunk))
+        while len(self._in_flight) >= self._max_in_flight:
+            yield self._next_result()
+
+    def drain(self) -> Iterator[ChunkResult]:
+        """
+        Yield the results of all queued chunks in order.
+
+        Raises:
+            WorkerPoolBroken: If the pool died; carries the chunks not yet rendered
+        """
+        while self._in_flight:
+            yield self._next_result()
+
+    def serial_renderer(self) -> 'SerialPipeRenderer':
+        """Renderer for the main process with the same configuration."""
+        return SerialPipeRenderer(*self._initargs)
+
+    def _next_result(self) -> ChunkResult:
+        future, chunk = self._in_flight.popleft()
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            raise WorkerPoolBroken([chunk] + self._take_queued())
+
+    def _take_queued(self) -> List[PipeChunk]:
+        """Remove the queued chunks (their results are lost with the pool)."""
+        chunks = [chunk for _, chunk in self._in_flight]
+        self._in_flight.clear()
+        return chunks
+
+    def shutdown(self, cancel: bool = False) -> None:
+        """
+        Stop the worker pool.
+
+        Args:
+            cancel: Drop queued chunks that have not started yet
+        """
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        self._in_flight.clear()
+
+
+class SerialPipeRenderer:
+    """
+    Renders pipe chunks in the main process, with the interface of ParallelPipeRenderer.
+
+    Takes over the chunks of a parallel export whose worker pool died.
+    """
+
+    def __init__(self, config: ExportConfiguration, text_style: str, block_names: Iterable[str]):
+        """
+        Create the render-only exporter.
+
+        Args:
+            config: Export configuration
+            text_style: Default text style of the template manager
+            block_names: Names of the blocks defined in the target document
+        """
+        self._state = _render_state(config, text_style, list(block_names))
+
+    def submit(self, chunk: PipeChunk) -> Iterator[ChunkResult]:
+        """Render a chunk right away and yield its result."""
+        yield _render_chunk(self._state, chunk)
+
+    def render(self, chunks: Iterable[PipeChunk]) -> Iterator[ChunkResult]:
+        """Render chunks in order and yield their results."""
+        for chunk in chunks:
+            yield _render_chunk(self._state, chunk)
+
+    def drain(self) -> Iterator[ChunkResult]:
+        """Nothing is queued."""
+        return iter(())
+
+    def shutdown(self, cancel: bool = False) -> None:
+        """Nothing to stop."""
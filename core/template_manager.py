@@ -6,11 +6,16 @@ template creation. It manages block libraries and standard layer definitions
 for QEsg-compatible DXF output.
 """
 
+import io
 import os
 import sys
-from typing import Optional, Dict, List, Tuple
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, List, Tuple
 from pathlib import Path
 
+from .file_utils import dxf_file_format
+
 # Add addon directory to path for bundled libraries
 addon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'addon')
 if addon_path not in sys.path:
@@ -20,10 +25,99 @@ try:
     import ezdxf
     from ezdxf.enums import TextEntityAlignment
     from ezdxf import units
+    from ezdxf.document import Drawing
+    from ezdxf.lldxf.tagger import ascii_tags_loader, tag_compiler
 except ImportError as e:
     raise ImportError(f"Failed to import bundled ezdxf library: {e}")
 
 
+class DocumentImageCache:
+    """
+    Cache of prepared DXF documents, stored as compiled DXF tag streams.
+
+    Loading a template means reading the file, tokenizing and compiling the
+    tags, building the entity database and then adding the standard layers,
+    styles and blocks. The cache keeps the compiled tags of the fully
+    prepared document, so a repeat export only rebuilds the entities from
+    memory (``Drawing.from_tags``) and every export still gets its own
+    independent document. Compiled tags are immutable and can be shared by
+    all clones.
+
+    Keys start with the resolved template path followed by its mtime and
+    size; when a template changes on disk its outdated images are dropped.
+    """
+
+    def __init__(self, max_size: int = 4):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of cached document images
+        """
+        self.max_size = max_size
+        self._images: 'OrderedDict[tuple, list]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(path: str) -> tuple:
+        """
+        Build the cache key prefix of a template file.
+
+        Args:
+            path: Template file path
+
+        Returns:
+            (resolved path, mtime in ns, size) tuple
+        """
+        stat = os.stat(path)
+        return os.path.realpath(path), stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: tuple, build: Callable[[], Drawing]) -> Drawing:
+        """
+        Get a new document cloned from the cached image, building it on a miss.
+
+        Args:
+            key: Cache key, starting with the template path (see file_key)
+            build: Callable returning the prepared document
+
+        Returns:
+            Independent ezdxf Drawing
+        """
+        with self._lock:
+            tags = self._images.get(key)
+            if tags is not None:
+                self._images.move_to_end(key)
+                return Drawing.from_tags(tags)
+
+            doc = build()
+            tags = self._snapshot(doc)
+
+            # Images of an older version of the same template are stale
+            for stale in [k for k in self._images if k[0] == key[0] and k[1:3] != key[1:3]]:
+                del self._images[stale]
+            self._images[key] = tags
+            while len(self._images) > self.max_size:
+                self._images.popitem(last=False)
+
+        # The built document is handed out, the cache keeps the tags only
+        return doc
+
+    def clear(self) -> None:
+        """Drop all cached document images."""
+        with self._lock:
+            self._images.clear()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @staticmethod
+    def _snapshot(doc: Drawing) -> list:
+        stream = io.StringIO()
+        doc.write(stream)
+        stream.seek(0)
+        return list(tag_compiler(ascii_tags_loader(stream)))
+
+
 class TemplateManager:
     """
     Manages DXF templates and standard block definitions.
@@ -61,6 +155,9 @@ class TemplateManager:
     # Arrow block definition
     ARROW_BLOCK = 'SETA'
     
+    # Prepared template documents, shared by all instances for the session
+    document_cache = DocumentImageCache()
+    
     def __init__(self):
         """Initialize template manager."""
         self.bundled_template_path = self._get_bundled_template_path()
@@ -114,7 +211,7 @@ class TemplateManager:
     
     def validate_template(self, template_path: str) -> Tuple[bool, List[str]]:
         """
-        Validate DXF template file.
+        Validate DXF template file (ASCII or binary DXF).
         
         Args:
             template_path: Path to template file
@@ -134,7 +231,12 @@ class TemplateManager:
             errors.append(f"Template file not readable: {template_path}")
             return False, errors
         
-        # Try to load with ezdxf
+        with open(template_path, 'rb') as handle:
+            if dxf_file_format(handle.read(100)) is None:
+                errors.append(f"Template is not an ASCII or binary DXF file: {template_path}")
+                return False, errors
+        
+        # Try to load with ezdxf (detects binary files by their sentinel)
         try:
             doc = ezdxf.readfile(template_path)
             
@@ -159,12 +261,18 @@ class TemplateManager:
         # Template is valid (warnings don't make it invalid)
         return True, errors
     
-    def load_template(self, template_path: Optional[str] = None) -> ezdxf.document.Drawing:
+    def load_template(self, template_path: Optional[str] = None,
+                      layer_prefix: Optional[str] = None) -> ezdxf.document.Drawing:
         """
         Load DXF template or create default if not available.
         
+        Documents are cloned from a cached, prepared image of the template, so
+        repeated loads skip reading the file and the table setup.
+        
         Args:
             template_path: Path to template file (uses bundled if None)
+            layer_prefix: If given, the document properties and the prefixed
+                standard layers are set up as well
             
         Returns:
             ezdxf Drawing document
@@ -173,19 +281,52 @@ class TemplateManager:
         if template_path is None:
             template_path = self.bundled_template_path
         
+        def prepare(doc: ezdxf.document.Drawing) -> ezdxf.document.Drawing:
+            if layer_prefix is not None:
+                self.setup_document_properties(doc)
+                self.create_layers_with_prefix(doc, layer_prefix)
+            return doc
+        
         # Try to load specified template
         if template_path and os.path.exists(template_path):
             try:
-                doc = ezdxf.readfile(template_path)
-                # Ensure required layers exist
-                self._ensure_standard_layers(doc)
-                return doc
+                def build():
+                    doc = ezdxf.readfile(template_path)
+                    # Ensure required layers exist
+                    self._ensure_standard_layers(doc)
+                    return prepare(doc)
+                
+                return self.load_prepared_document(template_path, build, ('template', layer_prefix))
             except Exception as e:
                 # Fall back to default template
                 pass
         
         # Create default template
-        return self._create_default_template()
+        return self.load_prepared_document(
+            None, lambda: prepare(self._create_default_template()), ('default', layer_prefix)
+        )
+    
+    def load_prepared_document(self, template_path: Optional[str],
+                               build: Callable[[], ezdxf.document.Drawing],
+                               variant: tuple = ()) -> ezdxf.document.Drawing:
+        """
+        Get a prepared document from the template cache.
+        
+        Args:
+            template_path: Template file the document is built from, None for
+                documents created from scratch
+            build: Callable creating the fully prepared document on a cache miss
+            variant: Everything besides the template that the preparation
+                depends on (layer prefix, scale, ...)
+            
+        Returns:
+            Independent ezdxf Drawing
+        """
+        if template_path:
+            key = DocumentImageCache.file_key(template_path) + (self.default_text_style,) + tuple(variant)
+        else:
+            key = (None, None, None, self.default_text_style) + tuple(variant)
+        return self.document_cache.get(key, build)
     
     def _create_default_template(self) -> ezdxf.document.Drawing:
         """
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Level-gated tracing for the RedBasica Export plugin.
+
+Hot code paths (the per-feature export loop, field extraction, label and
+block creation) use named tracers instead of ``print`` calls. Every tracer
+caches whether it is enabled, so a disabled trace point costs one attribute
+lookup and no string formatting. Messages use lazy ``%`` formatting and are
+only rendered when a handler is attached.
+
+Tracing is disabled by default. It can be enabled from code with
+:func:`configure_tracing` or through the ``REDBASICA_TRACE`` environment
+variable, e.g. ``REDBASICA_TRACE=DEBUG`` or ``REDBASICA_TRACE=export=DEBUG``.
+Output goes to the QGIS message log and/or a rotating log file.
+"""
+
+import logging
+import logging.handlers
+import os
+from enum import IntEnum
+from typing import Dict, Iterable, Optional
+
+try:
+    from qgis.core import QgsMessageLog, Qgis
+    QGIS_AVAILABLE = True
+except ImportError:
+    QGIS_AVAILABLE = False
+
+
+TRACE_ROOT = "redbasica.trace"
+TRACE_ENV_VAR = "REDBASICA_TRACE"
+QGIS_LOG_TAG = "RedBasica Export"
+
+
+class TraceLevel(IntEnum):
+    """Trace levels (aligned with the standard logging levels)."""
+    DEBUG = logging.DEBUG
+    INFO = logging.INFO
+    WARNING = logging.WARNING
+    ERROR = logging.ERROR
+    OFF = logging.CRITICAL + 10
+
+
+class QgsMessageLogHandler(logging.Handler):
+    """Logging handler forwarding records to the QGIS message log."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not QGIS_AVAILABLE:
+            return
+        try:
+            if record.levelno >= logging.ERROR:
+                level = Qgis.Critical
+            elif record.levelno >= logging.WARNING:
+                level = Qgis.Warning
+            else:
+                level = Qgis.Info
+            QgsMessageLog.logMessage(self.format(record), QGIS_LOG_TAG, level)
+        except Exception:
+            self.handleError(record)
+
+
+class Tracer:
+    """
+    Named trace category.
+
+    Check ``tracer.debug_enabled`` (or :meth:`is_enabled`) before building
+    expensive arguments; the logging methods also check the level first and
+    only format the message when it will actually be emitted.
+    """
+
+    __slots__ = ('category', '_logger', 'debug_enabled', 'info_enabled')
+
+    def __init__(self, category: str):
+        self.category = category
+        self._logger = logging.getLogger(f"{TRACE_ROOT}.{category}")
+        self.debug_enabled = False
+        self.info_enabled = False
+
+    def refresh(self) -> None:
+        """Re-evaluate the cached level flags after a configuration change."""
+        self.debug_enabled = self._logger.isEnabledFor(logging.DEBUG)
+        self.info_enabled = self._logger.isEnabledFor(logging.INFO)
+
+    def is_enabled(self, level: int) -> bool:
+        """Check whether messages of the given level are emitted."""
+        return self._logger.isEnabledFor(level)
+
+    def debug(self, msg: str, *args) -> None:
+        if self.debug_enabled:
+            self._logger.debug(msg, *args)
+
+    def info(self, msg: str, *args) -> None:
+        if self.info_enabled:
+            self._logger.info(msg, *args)
+
+    def warning(self, msg: str, *args) -> None:
+        self._logger.warning(msg, *args)
+
+
+_tracers: Dict[str, Tracer] = {}
+_handlers = []
+_category_overrides = set()
+
+
+def get_tracer(category: str) -> Tracer:
+    """
+    Get (or create) the tracer for a category.
+
+    Args:
+        category: Dotted category name, e.g. ``'export.pipes'``
+
+    Returns:
+        Tracer instance shared by all callers of the category
+    """
+    tracer = _tracers.get(category)
+    if tracer is None:
+        tracer = Tracer(category)
+        tracer.refresh()
+        _tracers[category] = tracer
+    return tracer
+
+
+def configure_tracing(level: int = TraceLevel.DEBUG,
+                      categories: Optional[Dict[str, int]] = None,
+                      qgis_log: bool = True,
+                      log_file: Optional[str] = None,
+                      max_bytes: int = 5 * 1024 * 1024,
+                      backup_count: int = 3) -> None:
+    """
+    Enable or reconfigure tracing.
+
+    Args:
+        level: Default level for all categories (TraceLevel.OFF disables tracing)
+        categories: Optional per-category level overrides, e.g. {'export.fields': TraceLevel.OFF}
+        qgis_log: Send trace output to the QGIS message log
+        log_file: Optional path of a rotating trace log file
+        max_bytes: Maximum size of the log file before rotation
+        backup_count: Number of rotated log files to keep
+    """
+    root = logging.getLogger(TRACE_ROOT)
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+
+    root.setLevel(int(level))
+    root.propagate = False
+
+    # Drop overrides from a previous configuration
+    for category in _category_overrides:
+        logging.getLogger(f"{TRACE_ROOT}.{category}").setLevel(logging.NOTSET)
+    _category_overrides.clear()
+
+    for category, category_level in (categories or {}).items():
+        logging.getLogger(f"{TRACE_ROOT}.{category}").setLevel(int(category_level))
+        _category_overrides.add(category)
+
+    if level < TraceLevel.OFF or any(lvl < TraceLevel.OFF for lvl in (categories or {}).values()):
+        formatter = logging.Formatter('%(name)s %(levelname)s: %(message)s')
+        if qgis_log:
+            _handlers.append(QgsMessageLogHandler())
+        if log_file:
+            _handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            ))
+        if not _handlers:
+            _handlers.append(logging.NullHandler())
+        for handler in _handlers:
+            handler.setFormatter(formatter)
+            root.addHandler(handler)
+
+    for tracer in _tracers.values():
+        tracer.refresh()
+
+
+def disable_tracing() -> None:
+    """Disable all tracing output."""
+    configure_tracing(TraceLevel.OFF, qgis_log=False)
+
+
+def _parse_level(name: str) -> int:
+    try:
+        return TraceLevel[name.strip().upper()]
+    except KeyError:
+        return TraceLevel.DEBUG
+
+
+def configure_from_environment(spec: Optional[str] = None) -> None:
+    """
+    Configure tracing from a specification string.
+
+    Format: ``LEVEL`` or ``category=LEVEL[,category=LEVEL...]``, optionally
+    followed by ``;file=/path/to/trace.log``.
+
+    Args:
+        spec: Specification, defaults to the REDBASICA_TRACE environment variable
+    """
+    spec = spec if spec is not None else os.environ.get(TRACE_ENV_VAR, '')
+    if not spec.strip():
+        disable_tracing()
+        return
+
+    log_file = None
+    level = TraceLevel.OFF
+    categories: Dict[str, int] = {}
+    for part in spec.replace(';', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '=' in part:
+            key, value = part.split('=', 1)
+            if key.strip().lower() == 'file':
+                log_file = value.strip()
+            else:
+                categories[key.strip()] = _parse_level(value)
+        else:
+            level = _parse_level(part)
+
+    configure_tracing(level, categories, qgis_log=True, log_file=log_file)
+
+
+def trace_categories() -> Iterable[str]:
+    """Return the names of all tracers created so far."""
+    return list(_tracers.keys())
+
+
+configure_from_environment()
@@ -22,6 +22,8 @@ from .exceptions import (
 from .field_definitions import SewageNetworkFields
 from .data_structures import GeometryType, FieldType
 from .data_structures import LayerMapping, ExportConfiguration
+from .feature_requests import geometry_feature_request
+from .layer_scan import LayerScanner, LayerScanReport, cross_reference
 
 
 class ValidationResult:
@@ -249,7 +251,7 @@ class LayerValidator:
         null_count = 0
         checked_count = 0
         
-        for feature in layer.getFeatures():
+        for feature in layer.getFeatures(geometry_feature_request(layer, max_check)):
             if checked_count >= max_check:
                 break
             
@@ -528,6 +530,9 @@ class ComprehensiveValidator:
         self.layer_validator = LayerValidator()
         self.mapping_validator = MappingValidator()
         self.export_validator = ExportValidator()
+        self.layer_scanner = LayerScanner()
+        # Scan reports of the last validation, keyed by "pipes" / "junctions"
+        self.scan_reports: Dict[str, LayerScanReport] = {}
     
     def validate_complete_configuration(self, config: ExportConfiguration) -> ValidationResult:
         """
@@ -541,6 +546,8 @@ class ComprehensiveValidator:
         """
         reporter = ProgressReporter(10, self.progress_callback)
         result = ValidationResult()
+        self.scan_reports = {}
+        self.layer_scanner.geos_validation = config.geos_validation
         
         try:
             # Step 1: Validate export configuration
@@ -616,16 +623,21 @@ class ComprehensiveValidator:
         
         # Get required fields based on layer type
         if layer_type == "pipes":
-            required_fields = [field.name for field in SewageNetworkFields.PIPES_REQUIRED]
+            required_fields = SewageNetworkFields.get_required_pipe_fields()
         else:
-            required_fields = [field.name for field in SewageNetworkFields.JUNCTIONS_REQUIRED]
+            required_fields = SewageNetworkFields.get_required_junction_fields()
         
         completeness_result = self.mapping_validator.validate_mapping_completeness(mapping, required_fields)
         result.merge(completeness_result)
         
-        # Geometry validation (sample)
-        geometry_result = self.layer_validator.validate_feature_geometries(layer, max_check=50)
-        result.merge(geometry_result)
+        # Geometries and mapped values of every feature, in one pass
+        report = self.layer_scanner.scan(layer, mapping)
+        self.scan_reports[layer_type] = report
+        for message in report.messages():
+            result.add_warning(message)
+        if not report.issues:
+            result.add_info(f"All {report.feature_count} features of layer '{layer.name()}' "
+                            f"passed the geometry and value checks")
         
         return result
     
@@ -633,6 +645,9 @@ class ComprehensiveValidator:
         """
         Validate cross-references between pipes and junctions.
         
+        Matches the pipe node references against the junction ids collected
+        by the layer scans of this validation (see layer_scan.cross_reference).
+        
         Args:
             config: Export configuration
             
@@ -641,13 +656,18 @@ class ComprehensiveValidator:
         """
         result = ValidationResult()
         
-        # This is a simplified cross-reference validation
-        # In a full implementation, you would check that pipe upstream/downstream
-        # nodes reference valid junction IDs
-        
-        if config.pipes_mapping and config.junctions_mapping:
-            result.add_info("Cross-reference validation would check pipe-junction connectivity")
-        else:
+        pipes = self.scan_reports.get("pipes")
+        junctions = self.scan_reports.get("junctions")
+        if pipes is None or junctions is None:
             result.add_warning("Cannot perform cross-reference validation - missing layer mappings")
+            return result
+        
+        cross_reference(pipes, junctions)
+        kinds = ('unknown_node', 'unconnected_node')
+        messages = pipes.messages(kinds) + junctions.messages(kinds)
+        for message in messages:
+            result.add_warning(message)
+        if not messages:
+            result.add_info("All pipe node references match the junctions layer")
         
         return result
\ No newline at end of file
@@ -22,25 +22,29 @@
  ***************************************************************************/
 """
 import os
-import sys
 import traceback
 
-from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, Qt, QThread, pyqtSignal
+from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, Qt, QThread, QTimer, pyqtSignal
 from qgis.PyQt.QtGui import QIcon
-from qgis.PyQt.QtWidgets import QAction, QMessageBox, QProgressDialog
+from qgis.PyQt.QtWidgets import QAction, QMessageBox, QProgressBar, QProgressDialog
 from qgis.core import Qgis, QgsMessageLog, QgsApplication
 
 # Initialize Qt resources from file resources.py
 from .resources import *
 
-# Import core modules
+# Import core modules. The exporter and template manager import ezdxf and
+# are loaded on first use (see core/lazy_loader.py).
 from .core.layer_manager import LayerManager
-from .core.template_manager import TemplateManager
-from .core.dxf_exporter import DXFExporter
+from .core.background_tasks import DXFExportTask
 from .core.configuration import Configuration, ExportConfiguration
 from .core.i18n_manager import init_i18n, tr
+from .core.lazy_loader import ezdxf_available, load_export_modules, warm_up_in_background
 from .ui.main_export_dialog import MainExportDialog
 
+# Delay before the export modules are imported in the background after the
+# GUI is created, so QGIS finishes starting first
+WARM_UP_DELAY_MS = 3000
+
 
 class RedBasicaExport:
     """QGIS Plugin Implementation."""
@@ -75,12 +79,16 @@ class RedBasicaExport:
         # Core components
         self.layer_manager = None
         self.template_manager = None
-        self.dxf_exporter = None
         self.configuration = None
         
         # Dialogs
         self.main_export_dialog = None
         
+        # Running background export (kept referenced until finished) and its
+        # progress item in the message bar
+        self.export_task = None
+        self.export_progress = None
+        
         # Check dependencies on initialization
         self.dependencies_ok = self._check_dependencies()
 
@@ -200,6 +208,10 @@ class RedBasicaExport:
             parent=self.iface.mainWindow())
         
         # (Secondary action removed as it is now redundant)
+        
+        # Load the export machinery once QGIS is idle, unless disabled
+        if self.dependencies_ok and Configuration().load_user_preferences().get('warm_up_export_modules', True):
+            QTimer.singleShot(WARM_UP_DELAY_MS, warm_up_in_background)
 
     #--------------------------------------------------------------------------
     
@@ -207,31 +219,21 @@ class RedBasicaExport:
         """
         Check if bundled dependencies are available.
         
+        Only locates the bundled ezdxf; it is imported on first use.
+        
         Returns:
             bool: True if dependencies are available, False otherwise
         """
         try:
-            # Add addon directory to Python path
-            addon_path = os.path.join(self.plugin_dir, 'addon')
-            if addon_path not in sys.path:
-                sys.path.insert(0, addon_path)
-            
-            # Try to import ezdxf
-            import ezdxf
-            version = getattr(ezdxf, '__version__', 'unknown')
-            
-            # Log successful import
-            QgsMessageLog.logMessage(
-                f"ezdxf library loaded successfully (version: {version})",
-                "RedBasica Export", Qgis.Info
-            )
+            if not ezdxf_available():
+                QgsMessageLog.logMessage(
+                    "Failed to find bundled ezdxf library",
+                    "RedBasica Export", Qgis.Critical
+                )
+                return False
             
             return True
             
-        except ImportError as e:
-            error_msg = f"Failed to import bundled ezdxf library: {e}"
-            QgsMessageLog.logMessage(error_msg, "RedBasica Export", Qgis.Critical)
-            return False
         except Exception as e:
             error_msg = f"Unexpected error checking dependencies: {e}"
             QgsMessageLog.logMessage(error_msg, "RedBasica Export", Qgis.Critical)
@@ -243,10 +245,17 @@ class RedBasicaExport:
             if not self.dependencies_ok:
                 raise RuntimeError("Dependencies not available")
             
+            # Import the export machinery (no-op after the background warm-up)
+            version = load_export_modules()
+            QgsMessageLog.logMessage(
+                f"ezdxf library loaded successfully (version: {version})",
+                "RedBasica Export", Qgis.Info
+            )
+            from .core.template_manager import TemplateManager
+            
             # Initialize core components
             self.layer_manager = LayerManager()
             self.template_manager = TemplateManager()
-            self.dxf_exporter = DXFExporter(self.template_manager)
             self.configuration = Configuration()
             
             QgsMessageLog.logMessage(
@@ -311,30 +320,38 @@ class RedBasicaExport:
             # Convert dict back to ExportConfiguration
             config = self.configuration._dict_to_export_config(config_dict)
             
-            # Show start message
-            self.iface.messageBar().pushMessage(
-                "RedBasica Export",
-                "Exporting sewerage network to DXF...",
-                level=Qgis.Info,
-                duration=3
-            )
-            QgsApplication.processEvents()
-            
-            # Perform export
-            success, message, stats = self.dxf_exporter.export_with_error_handling(config)
-            
-            if success:
-                self._show_success_message(
-                    "Export Complete",
-                    f"Sewerage network exported successfully to:\n{config.output_path}"
-                )
-            else:
+            if self.export_task is not None:
                 self._show_error_message(
-                    "Export Failed",
-                    f"Failed to export sewerage network:\n{message}"
+                    "Export Running",
+                    "A DXF export is already running. Cancel it from the task manager or wait for it to finish."
                 )
+                return
+            
+            # Perform export in a background task
+            task = DXFExportTask(config, self.template_manager)
+            
+            # Progress widget in the message bar, updated from the task's progress messages
+            progress_item = self.iface.messageBar().createMessage(
+                "RedBasica Export", "Exporting sewerage network to DXF..."
+            )
+            progress_bar = QProgressBar()
+            progress_bar.setMaximum(100)
+            progress_bar.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+            progress_item.layout().addWidget(progress_bar)
+            self.iface.messageBar().pushWidget(progress_item, Qgis.Info)
+            self.export_progress = progress_item
+            
+            task.progressMessage.connect(
+                lambda progress, message: self._on_export_progress(progress_item, progress_bar, progress, message)
+            )
+            task.exportFinished.connect(
+                lambda success, message, stats: self._on_export_finished(config, success, message)
+            )
+            self.export_task = task
+            QgsApplication.taskManager().addTask(task)
                 
         except Exception as e:
+            self._clear_export_progress()
             error_msg = f"Export error: {e}\n\nTraceback:\n{traceback.format_exc()}"
             QgsMessageLog.logMessage(error_msg, "RedBasica Export", Qgis.Critical)
             self._show_error_message(
@@ -342,6 +359,56 @@ class RedBasicaExport:
                 f"An unexpected error occurred during export:\n{str(e)}"
             )
     
+    def _on_export_finished(self, config, success, message):
+        """
+        Report the result of a background export.
+        
+        Args:
+            config: ExportConfiguration used for the export
+            success: Whether the export succeeded
+            message: Result or error message
+        """
+        self.export_task = None
+        self._clear_export_progress()
+        
+        if success:
+            self._show_success_message(
+                "Export Complete",
+                f"Sewerage network exported successfully to:\n{config.output_path}"
+            )
+        else:
+            self._show_error_message(
+                "Export Failed",
+                f"Failed to export sewerage network:\n{message}"
+            )
+    
+    def _on_export_progress(self, progress_item, progress_bar, progress, message):
+        """
+        Show the progress of a background export in its message bar item.
+        
+        Args:
+            progress_item: Message bar item of the export
+            progress_bar: Progress bar of the item
+            progress: Progress percentage
+            message: Current export step
+        """
+        try:
+            progress_bar.setValue(int(progress))
+            if message:
+                progress_item.setText(message)
+        except RuntimeError:
+            pass  # the user closed the message bar item
+    
+    def _clear_export_progress(self):
+        """Remove the progress item of the background export from the message bar."""
+        if self.export_progress is None:
+            return
+        try:
+            self.iface.messageBar().popWidget(self.export_progress)
+        except RuntimeError:
+            pass  # already closed by the user
+        self.export_progress = None
+    
     def _show_error_message(self, title, message):
         """Show error message to user."""
         self.iface.messageBar().pushMessage(
@@ -357,6 +424,12 @@ class RedBasicaExport:
     def unload(self):
         """Removes the plugin menu item and icon from QGIS GUI."""
 
+        # Cancel a running export
+        if self.export_task is not None:
+            self.export_task.cancel()
+            self.export_task = None
+        self._clear_export_progress()
+        
         # Clean up dialogs
         if self.main_export_dialog:
             self.main_export_dialog.close()
@@ -373,5 +446,4 @@ class RedBasicaExport:
         # Clean up components
         self.layer_manager = None
         self.template_manager = None
-        self.dxf_exporter = None
         self.configuration = None
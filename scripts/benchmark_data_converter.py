@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark for DataConverter numeric conversion.
+
+Measures conversions per second of DataConverter.to_double and to_integer for
+the value kinds found in attribute tables:
+- native numbers (float and int attributes)
+- numeric strings from a small set of repeated values (memo hits)
+- unique numeric strings (memo misses)
+- NULL values (None and the NULL stand-in)
+
+Each case is also run through the former implementation (uncompiled regexes,
+exception based NULL checks, no memo) for comparison.
+
+Runs without QGIS; only core/data_converter.py is loaded.
+"""
+
+import argparse
+import importlib.util
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+
+def load_converter_module():
+    """Load core/data_converter.py without importing the (QGIS dependent) core package."""
+    path = Path(__file__).resolve().parent.parent / 'core' / 'data_converter.py'
+    spec = importlib.util.spec_from_file_location('redbasica_data_converter', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_legacy_to_double(null):
+    """Return the former to_double implementation, kept here as the reference."""
+    def legacy_to_double(value):
+        if value is None:
+            return 0.0
+        try:
+            if value == null:
+                return 0.0
+        except:
+            pass
+        if hasattr(value, '__class__') and ('Null' in value.__class__.__name__ or 'NULL' in value.__class__.__name__):
+            return 0.0
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            cleaned = value.strip()
+            if not cleaned:
+                return 0.0
+            cleaned = re.sub(r'^[^\d\-]*', '', cleaned)
+            cleaned = re.sub(r'[^\d\-\.,]*$', '', cleaned)
+            match = re.match(r'^(\d{1,3}(?:\.\d{3})*),(\d+)$', cleaned)
+            if match:
+                cleaned = f"{match.group(1).replace('.', '')}.{match.group(2)}"
+            else:
+                cleaned = cleaned.replace(',', '.')
+            numeric_match = re.search(r'-?\d*\.?\d+', cleaned)
+            return float(numeric_match.group()) if numeric_match else 0.0
+        return float(value)
+    return legacy_to_double
+
+
+def make_workloads(count: int, null):
+    """Create the input value lists per case."""
+    rng = random.Random(42)
+    repeated = [f"{rng.randint(1, 9)}.{rng.randint(0, 999):03d},{rng.randint(0, 99):02d}"
+                for _ in range(200)]
+    repeated += [f"{rng.uniform(0, 50):.2f}".replace('.', ',') for _ in range(200)]
+    repeated += [f"R$ {rng.uniform(0, 500):.2f}" for _ in range(100)]
+    return {
+        'native': [rng.uniform(0, 1000) if i % 2 else i for i in range(count)],
+        'string (repeated)': [rng.choice(repeated) for _ in range(count)],
+        'string (unique)': [f"{i // 1000}.{i % 1000:03d},{i % 97:02d}" for i in range(count)],
+        'NULL': [None if i % 2 else null for i in range(count)],
+    }
+
+
+def run(func, values, repeat, reset=None):
+    """Return the best conversions/second over ``repeat`` runs."""
+    best = None
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(values) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataConverter numeric conversion")
+    parser.add_argument('--values', type=int, default=200000, help="Number of values per case")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions (best time is reported)")
+    args = parser.parse_args()
+
+    converter = load_converter_module()
+    legacy = make_legacy_to_double(converter.NULL)
+    reset = converter._parse_number_string.cache_clear
+    workloads = make_workloads(args.values, converter.NULL)
+
+    print(f"Values per case: {args.values}, repeat: {args.repeat}, "
+          f"string memo size: {converter.STRING_CACHE_SIZE}\n")
+    memo_info = None
+    print(f"{'case':<20} {'to_double':>14} {'to_integer':>14} {'legacy':>14} {'speedup':>8}")
+    for label, values in workloads.items():
+        # Unique strings start from an empty memo on every run
+        case_reset = reset if label == 'string (unique)' else None
+        to_double = run(converter.DataConverter.to_double, values, args.repeat, case_reset)
+        to_integer = run(converter.DataConverter.to_integer, values, args.repeat, case_reset)
+        former = run(legacy, values, args.repeat)
+        print(f"{label:<20} {to_double:12,.0f}/s {to_integer:12,.0f}/s {former:12,.0f}/s "
+              f"{to_double / former:7.1f}x")
+        if label == 'string (repeated)':
+            memo_info = converter._parse_number_string.cache_info()
+
+    print(f"\nString memo after repeated strings: {memo_info.hits} hits, "
+          f"{memo_info.misses} misses, {memo_info.currsize} entries")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(main())
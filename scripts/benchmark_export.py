@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end export benchmark on synthetic sewer networks.
+
+Runs the DXF exporter over generated networks (see synthetic_network.py) of
+the requested sizes through a QGIS-free stand-in, one stage per child
+process so peak memory is measured per stage:
+- generate:  scan both synthetic layers only (cost of the stand-in itself)
+- legacy:    DXFExporter.export_to_dxf
+- standard:  export_with_error_handling, in-memory document, TEXT labels
+- enhanced:  export_with_error_handling, in-memory document, MTEXT/MULTILEADER labels
+- streaming: export_with_error_handling with streaming_export (R12 to disk)
+- incremental: streaming export with incremental_export; a first export fills
+  the entity cache, then 0.1% of the pipes are edited and the timed
+  re-export only renders those
+
+For each size and stage, features per second, peak RSS and output size are
+reported, optionally also written as JSON.
+
+Examples:
+    python scripts/benchmark_export.py
+    python scripts/benchmark_export.py --sizes 1k,10k,100k,1M --stages generate,streaming
+    python scripts/benchmark_export.py --sizes 10k --stages streaming --profile
+    python scripts/benchmark_export.py --sizes 10k --binary
+
+With --profile, exports run with ExportConfiguration.profile_export and the
+slowest stages of each run are listed below its row.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ('generate', 'legacy', 'standard', 'enhanced', 'streaming', 'incremental')
+INCREMENTAL_EDIT_SHARE = 0.001
+DEFAULT_SIZES = '1k,10k'
+DEFAULT_STAGES = 'generate,standard,streaming'
+RESULT_PREFIX = 'BENCHMARK_RESULT '
+
+
+def parse_size(text: str) -> int:
+    """Parse pipe counts such as 1000, 10k or 1M."""
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith('k'):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith('m'):
+        multiplier, text = 1000000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stage(stage: str, pipes: int, output_dir: str, profile: bool = False,
+              binary: bool = False) -> dict:
+    """Run one stage in this process and return its measurements."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import synthetic_network
+
+    synthetic_network.install_qgis_stand_in()
+    synthetic_network.load_core()
+    from core.data_structures import ExportMode
+    from core.dxf_exporter import DXFExporter
+
+    network = synthetic_network.SyntheticNetwork(pipes)
+    output_path = os.path.join(output_dir, f'network_{pipes}_{stage}.dxf')
+    options = {'profile_export': profile, 'binary_dxf': binary}
+    if stage == 'enhanced':
+        options['export_mode'] = ExportMode.ENHANCED
+    elif stage == 'streaming':
+        options['streaming_export'] = True
+    elif stage == 'incremental':
+        options['streaming_export'] = True
+        options['incremental_export'] = True
+    config = synthetic_network.build_export_configuration(network, output_path, **options)
+    features = network.pipes + network.nodes
+    baseline_rss = peak_rss_mb()
+
+    cold_seconds = None
+    if stage == 'incremental':
+        start = time.perf_counter()
+        DXFExporter().export_with_error_handling(config)
+        cold_seconds = time.perf_counter() - start
+        network.edit_pipes(INCREMENTAL_EDIT_SHARE)
+
+    start = time.perf_counter()
+    if stage == 'generate':
+        project = synthetic_network.QgsProject.instance()
+        for mapping in (config.pipes_mapping, config.junctions_mapping):
+            for feature in project.mapLayer(mapping.layer_id).getFeatures():
+                feature.geometry()
+        success, message, details = True, 'generated', {}
+    else:
+        exporter = DXFExporter()
+        if stage == 'legacy':
+            success, message, details = exporter.export_to_dxf(config)
+        else:
+            success, message, details = exporter.export_with_error_handling(config)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'stage': stage,
+        'pipes': network.pipes,
+        'junctions': network.nodes,
+        'seconds': elapsed,
+        'features_per_second': features / elapsed if elapsed > 0 else None,
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': peak_rss_mb(),
+        'output_bytes': os.path.getsize(output_path) if os.path.exists(output_path) else 0,
+        'success': bool(success),
+        'message': str(message).splitlines()[0] if message else '',
+        'log_messages': synthetic_network.QgsMessageLog.messages,
+    }
+    if stage == 'legacy':
+        result['exported'] = details.get('pipes_exported', 0) + details.get('junctions_exported', 0)
+    elif details:
+        result['warnings'] = details['statistics'].warnings
+        result['errors'] = details['statistics'].errors
+        if details.get('incremental'):
+            result['incremental'] = details['incremental']
+            result['cold_seconds'] = cold_seconds
+        if details.get('profile'):
+            result['profile'] = details['profile']
+    return result
+
+
+def run_child(stage: str, pipes: int, output_dir: str, keep_output: bool, profile: bool = False,
+              binary: bool = False) -> dict:
+    """Run a stage in a fresh interpreter so peak RSS is per stage."""
+    command = [sys.executable, os.path.abspath(__file__), '--child', stage,
+               '--sizes', str(pipes), '--output-dir', output_dir]
+    if profile:
+        command.append('--profile')
+    if binary:
+        command.append('--binary')
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            break
+    else:
+        tail = (completed.stderr or completed.stdout).strip().splitlines()[-5:]
+        result = {'stage': stage, 'pipes': pipes, 'success': False,
+                  'message': ' | '.join(tail) or f'exit code {completed.returncode}'}
+    if not keep_output:
+        base = os.path.join(output_dir, f'network_{pipes}_{stage}')
+        for path in (base + '.dxf', base + '_profile.json', base + '.rbcache'):
+            if os.path.exists(path):
+                os.remove(path)
+    return result
+
+
+def format_row(result: dict) -> str:
+    if 'seconds' not in result:
+        return f"{result['pipes']:>9} {result['stage']:<10} FAILED: {result['message']}"
+    rss = result['peak_rss_mb']
+    rss_text = f"{rss:9.1f}" if rss is not None else f"{'n/a':>9}"
+    status = 'ok' if result['success'] else f"failed: {result['message']}"
+    if 'exported' in result:
+        status += f" ({result['exported']} exported)"
+    elif 'warnings' in result:
+        status += f" ({result['warnings']} warnings, {result['errors']} errors)"
+    if 'incremental' in result:
+        cache = result['incremental']
+        status += (f" [{cache['rendered']} rendered, {cache['reused']} reused; "
+                   f"first export {result['cold_seconds']:.2f}s]")
+    return (f"{result['pipes']:>9} {result['stage']:<10} {result['seconds']:9.2f} "
+            f"{result['features_per_second']:12,.0f} {rss_text} "
+            f"{result['output_bytes'] / (1024 * 1024):10.1f}  {status}")
+
+
+def format_profile(profile: dict, limit: int = 8) -> str:
+    """Format the slowest stages and the entity counts of a profile report."""
+    total = profile['total']['wall_s'] or 1.0
+    lines = []
+    for name, stage in list(profile['stages'].items())[:limit]:
+        lines.append(f"{'':>20} {name:<24} {stage['wall_s']:8.2f}s wall {stage['cpu_s']:8.2f}s cpu "
+                     f"{100.0 * stage['wall_s'] / total:5.1f}% {stage['calls']:>10,} calls")
+    entities = ', '.join(f"{name} {count:,}" for name, count in profile['entities'].items())
+    if entities:
+        lines.append(f"{'':>20} entities: {entities}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end DXF export benchmark on synthetic networks")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help="Comma separated pipe counts, e.g. 1k,10k,100k,1M (default: %(default)s)")
+    parser.add_argument('--stages', default=DEFAULT_STAGES,
+                        help=f"Comma separated stages out of {', '.join(STAGES)} (default: %(default)s)")
+    parser.add_argument('--output-dir', help="Directory for the DXF files (default: temporary directory)")
+    parser.add_argument('--keep-output', action='store_true', help="Keep the exported DXF files")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--profile', action='store_true', help="Profile the export stages")
+    parser.add_argument('--binary', action='store_true', help="Write binary instead of ASCII DXF")
+    parser.add_argument('--child', choices=STAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+
+    if args.child:
+        result = run_stage(args.child, sizes[0], args.output_dir, args.profile, args.binary)
+        print(RESULT_PREFIX + json.dumps(result))
+        return 0
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix='redbasica_bench_') as temp_dir:
+        output_dir = args.output_dir or temp_dir
+        os.makedirs(output_dir, exist_ok=True)
+        keep_output = args.keep_output and args.output_dir is not None
+
+        print(f"{'pipes':>9} {'stage':<10} {'seconds':>9} {'features/s':>12} "
+              f"{'peak MiB':>9} {'output MiB':>10}  status")
+        results = []
+        for pipes in sizes:
+            for stage in stages:
+                result = run_child(stage, pipes, output_dir, keep_output, args.profile, args.binary)
+                results.append(result)
+                print(format_row(result), flush=True)
+                if result.get('profile'):
+                    print(format_profile(result['profile']), flush=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump({'sizes': sizes, 'stages': stages, 'results': results}, handle, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
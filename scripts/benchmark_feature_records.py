@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for holding extracted pipe data: per-feature dicts vs FeatureRecordStore.
+
+Extracts the pipes of a synthetic network (see synthetic_network.py) with the
+exporter's extraction plan and keeps every record, once as one dictionary
+per feature (ExtractionPlan.extract + DXFExporter._calculate_pipe_fields per
+feature) and once in a columnar FeatureRecordStore (extract_values +
+DXFExporter._calculate_pipe_columns). Reports the memory retained by the
+records (tracemalloc) and the extraction and calculated-field times.
+
+Examples:
+    python scripts/benchmark_feature_records.py
+    python scripts/benchmark_feature_records.py --pipes 500k
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_export import parse_size  # noqa: E402
+import synthetic_network  # noqa: E402
+
+
+def extract_dicts(features, plan, exporter):
+    records = [plan.extract(attributes) for attributes in features]
+    start = time.perf_counter()
+    for record in records:
+        exporter._calculate_pipe_fields(record)
+    return records, time.perf_counter() - start
+
+
+def extract_store(features, plan, exporter):
+    from core.feature_records import FeatureRecordStore
+
+    records = FeatureRecordStore.for_plan(plan)
+    for attributes in features:
+        records.append_values(plan.extract_values(attributes))
+    start = time.perf_counter()
+    exporter._calculate_pipe_columns(records)
+    return records, time.perf_counter() - start
+
+
+def measure(name, extract, network, plan, exporter):
+    """Time one variant, then measure the memory it retains in a second run."""
+    layer = network.pipes_layer()
+
+    def features():
+        return (feature.attributes() for feature in layer.getFeatures())
+
+    gc.collect()
+    start = time.perf_counter()
+    records, calculate_seconds = extract(features(), plan, exporter)
+    total_seconds = time.perf_counter() - start
+    del records
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    records, _ = extract(features(), plan, exporter)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    count = len(records)
+    del records
+
+    return {
+        'variant': name,
+        'records': count,
+        'retained_mb': retained / (1024 * 1024),
+        'bytes_per_record': retained / count if count else 0.0,
+        'extract_s': total_seconds - calculate_seconds,
+        'calculate_s': calculate_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-feature dicts vs columnar record store")
+    parser.add_argument('--pipes', default='100k', help="Pipe count, e.g. 100k or 500k (default: %(default)s)")
+    args = parser.parse_args()
+
+    synthetic_network.install_qgis_stand_in()
+    synthetic_network.load_core()
+    from core.dxf_exporter import DXFExporter
+    from core.extraction_plan import ExtractionPlan
+
+    network = synthetic_network.SyntheticNetwork(parse_size(args.pipes))
+    config = synthetic_network.build_export_configuration(network, 'unused.dxf')
+    layer = synthetic_network.QgsProject.instance().mapLayer(config.pipes_mapping.layer_id)
+    plan = ExtractionPlan.compile(config.pipes_mapping, layer.fields().names())
+    exporter = DXFExporter()
+
+    print(f"{'variant':<8} {'records':>9} {'retained MiB':>13} {'bytes/record':>13} "
+          f"{'extract s':>10} {'calculate s':>12}")
+    results = [measure(name, extract, network, plan, exporter)
+               for name, extract in (('dicts', extract_dicts), ('columns', extract_store))]
+    for result in results:
+        print(f"{result['variant']:<8} {result['records']:>9,} {result['retained_mb']:13.1f} "
+              f"{result['bytes_per_record']:13.0f} {result['extract_s']:10.2f} {result['calculate_s']:12.3f}")
+    dicts, columns = results
+    if columns['retained_mb']:
+        print(f"\nmemory: {dicts['retained_mb'] / columns['retained_mb']:.1f}x less, "
+              f"calculated fields: {dicts['calculate_s'] / max(columns['calculate_s'], 1e-9):.1f}x faster")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
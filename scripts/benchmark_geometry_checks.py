@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the per-feature geometry checks of the pipe export.
+
+Times the geometry step of a pipe (DXFExporter._pipe_line_coords) for
+polylines of increasing vertex counts with the basic tier of
+core.geometry_checks, and the former per-feature ``isGeosValid()`` call
+followed by the same vertex extraction. The GEOS column needs a QGIS
+installation; with the stand-in of synthetic_network.py it is skipped,
+since the stand-in geometries have no GEOS backend (and compute their
+length in Python, so the basic tier timings are only indicative).
+
+Examples:
+    python scripts/benchmark_geometry_checks.py
+    python scripts/benchmark_geometry_checks.py --features 5000 --vertices 2,50,500
+"""
+
+import argparse
+import gc
+import importlib.util
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic_network  # noqa: E402
+
+QGIS_AVAILABLE = importlib.util.find_spec('qgis') is not None
+
+
+def make_lines(count, vertices):
+    """Wavy polylines of the given vertex count, each 50 map units long."""
+    from qgis.core import QgsGeometry, QgsPointXY
+
+    step = 50.0 / (vertices - 1)
+    lines = []
+    for i in range(count):
+        y = i * 10.0
+        points = [QgsPointXY(k * step, y + math.sin(k) * 0.5) for k in range(vertices)]
+        lines.append(QgsGeometry.fromPolylineXY(points))
+    return lines
+
+
+def basic_tier(geometries):
+    from core.geometry_checks import check_line
+
+    for geometry in geometries:
+        if geometry.isNull():
+            continue
+        line_coords = geometry.asPolyline()
+        check_line(line_coords, geometry.length())
+
+
+def geos_per_feature(geometries):
+    for geometry in geometries:
+        if geometry.isNull() or not geometry.isGeosValid():
+            continue
+        line_coords = geometry.asPolyline()
+        if len(line_coords) < 2:
+            continue
+
+
+def timed(function, *args):
+    gc.collect()
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Basic tier geometry checks vs per-feature isGeosValid()")
+    parser.add_argument('--features', type=int, default=20000, help="Lines per vertex count (default: %(default)s)")
+    parser.add_argument('--vertices', default='2,10,100,1000',
+                        help="Comma separated vertex counts (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not QGIS_AVAILABLE:
+        synthetic_network.install_qgis_stand_in()
+    synthetic_network.load_core()
+
+    print(f"{'vertices':>8} {'features':>9} {'basic us/feat':>14} {'GEOS us/feat':>13} {'speedup':>8}")
+    for vertices in (int(value) for value in args.vertices.split(',')):
+        geometries = make_lines(args.features, vertices)
+        basic_seconds = timed(basic_tier, geometries)
+        basic_us = basic_seconds / args.features * 1e6
+        if QGIS_AVAILABLE:
+            geos_seconds = timed(geos_per_feature, geometries)
+            geos_us = geos_seconds / args.features * 1e6
+            print(f"{vertices:>8} {args.features:>9,} {basic_us:14.2f} {geos_us:13.2f} "
+                  f"{geos_seconds / basic_seconds if basic_seconds else 0.0:8.1f}")
+        else:
+            print(f"{vertices:>8} {args.features:>9,} {basic_us:14.2f} {'n/a':>13} {'n/a':>8}")
+    if not QGIS_AVAILABLE:
+        print("\nQGIS not available: GEOS timings skipped (stand-in geometries)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import time benchmark for the plugin start.
+
+Runs fresh interpreters under ``python -X importtime`` and splits the import
+cost in two phases:
+- load:      what QGIS imports when it loads the plugin (redbasica_export.py
+             and the dialogs it imports)
+- first use: core.lazy_loader.load_export_modules(), i.e. ezdxf, the exporter
+             and the template manager, paid on the first export (or by the
+             background warm-up)
+
+Before lazy loading both phases were paid at load. For each phase the median
+wall time, the summed self import time, the number of modules and the
+slowest top-level imports are reported.
+
+With QGIS importable, the plugin module itself is imported. Otherwise the
+synthetic_network stand-in replaces QGIS and the core modules that
+redbasica_export.py and ui/*.py import at module level are imported instead
+(the Qt dialogs themselves are left out).
+
+Examples:
+    python scripts/benchmark_import.py
+    python scripts/benchmark_import.py --repeat 10 --top 10 --json import_times.json
+"""
+
+import argparse
+import ast
+import importlib.util
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PHASES = ('load', 'first_use')
+PHASE_MARKER = '# benchmark phase: '
+RESULT_PREFIX = 'BENCHMARK_RESULT '
+
+
+def module_level_core_imports() -> list:
+    """Core modules imported at module level by redbasica_export.py and ui/*.py."""
+    modules = []
+    sources = [ROOT / 'redbasica_export.py'] + sorted((ROOT / 'ui').glob('*.py'))
+    for path in sources:
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom) and node.level and node.module \
+                    and node.module.startswith('core.'):
+                name = node.module.split('.', 1)[1]
+                if name not in modules:
+                    modules.append(name)
+    return modules
+
+
+def run_phases(mode: str) -> dict:
+    """Import the phases in this process (run under -X importtime)."""
+    if mode == 'qgis':
+        sys.path.insert(0, str(ROOT.parent))
+        package = ROOT.name
+        load_modules = [f'{package}.redbasica_export']
+    else:
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        import synthetic_network
+
+        synthetic_network.install_qgis_stand_in()
+        synthetic_network.load_core()
+        package = ''
+        load_modules = [f'core.{name}' for name in module_level_core_imports()]
+    core_package = f'{package}.core' if package else 'core'
+
+    seconds = {}
+    loaded = {}
+    for phase in PHASES:
+        sys.stderr.write(PHASE_MARKER + phase + '\n')
+        sys.stderr.flush()
+        start = time.perf_counter()
+        if phase == 'load':
+            for name in load_modules:
+                importlib.import_module(name)
+        else:
+            importlib.import_module(f'{core_package}.lazy_loader').load_export_modules()
+        seconds[phase] = time.perf_counter() - start
+        loaded[phase] = 'ezdxf' in sys.modules
+    sys.stderr.write(PHASE_MARKER + 'done\n')
+    return {'seconds': seconds, 'ezdxf_loaded': loaded, 'load_modules': load_modules}
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Split -X importtime output by phase into (module, self_us, cumulative_us, depth) rows."""
+    phases = {}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith(PHASE_MARKER):
+            current = line[len(PHASE_MARKER):].strip()
+            phases.setdefault(current, [])
+            continue
+        if current not in PHASES or not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        phases[current].append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return phases
+
+
+def run_child(mode: str) -> dict:
+    """Run the phases in a fresh interpreter under -X importtime."""
+    command = [sys.executable, '-X', 'importtime', str(Path(__file__).resolve()), '--child', mode]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=str(ROOT))
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            break
+    else:
+        tail = completed.stderr.strip().splitlines()[-5:]
+        raise RuntimeError(' | '.join(tail) or f'exit code {completed.returncode}')
+    result['imports'] = parse_importtime(completed.stderr)
+    return result
+
+
+def summarize(runs: list, top: int) -> dict:
+    """Median wall and self import times per phase, slowest imports of the last run."""
+    summary = {}
+    for phase in PHASES:
+        rows = runs[-1]['imports'].get(phase, [])
+        level = min((depth for _, _, _, depth in rows), default=0)
+        slowest = sorted((row for row in rows if row[3] == level), key=lambda row: -row[2])[:top]
+        summary[phase] = {
+            'wall_ms': statistics.median(run['seconds'][phase] for run in runs) * 1000.0,
+            'import_ms': statistics.median(
+                sum(row[1] for row in run['imports'].get(phase, [])) for run in runs) / 1000.0,
+            'modules': len(rows),
+            'ezdxf_loaded': runs[-1]['ezdxf_loaded'][phase],
+            'slowest': [{'module': name, 'cumulative_ms': cumulative / 1000.0}
+                        for name, _, cumulative, _ in slowest],
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plugin import time benchmark (python -X importtime)")
+    parser.add_argument('--mode', choices=('auto', 'qgis', 'stand-in'), default='auto',
+                        help="Import the real plugin module (qgis) or the core modules with the "
+                             "QGIS stand-in (default: qgis if importable)")
+    parser.add_argument('--repeat', type=int, default=5, help="Measured runs (default: %(default)s)")
+    parser.add_argument('--top', type=int, default=5, help="Slowest imports listed per phase")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--child', choices=('qgis', 'stand-in'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_PREFIX + json.dumps(run_phases(args.child)))
+        return 0
+
+    mode = args.mode
+    if mode == 'auto':
+        mode = 'qgis' if importlib.util.find_spec('qgis') is not None else 'stand-in'
+
+    run_child(mode)  # compile the .pyc files first
+    runs = [run_child(mode) for _ in range(max(1, args.repeat))]
+    summary = summarize(runs, args.top)
+
+    print(f"mode: {mode}, {len(runs)} runs, medians")
+    print(f"{'phase':<10} {'wall ms':>9} {'import ms':>10} {'modules':>8}  ezdxf loaded")
+    for phase in PHASES:
+        entry = summary[phase]
+        print(f"{phase:<10} {entry['wall_ms']:9.1f} {entry['import_ms']:10.1f} {entry['modules']:>8}  "
+              f"{'yes' if entry['ezdxf_loaded'] else 'no'}")
+    eager = sum(summary[phase]['wall_ms'] for phase in PHASES)
+    print(f"{'eager':<10} {eager:9.1f}  (load + first use, all paid at plugin load before lazy loading)")
+    for phase in PHASES:
+        print(f"\nslowest top-level imports ({phase}):")
+        for entry in summary[phase]['slowest']:
+            print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump({'mode': mode, 'repeat': len(runs), 'summary': summary,
+                       'load_modules': runs[-1]['load_modules']}, handle, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the export loop tracing overhead.
+
+Replays the trace points of the pipe export loop (one per feature, one per
+extracted feature, label and arrow creation) over a synthetic workload and
+compares:
+- no trace calls at all (baseline)
+- tracing disabled (default plugin configuration)
+- tracing enabled with a null handler (formatting cost only)
+- the former print(f"DEBUG: ...") calls redirected to os.devnull
+
+Runs without QGIS; only core/tracing.py is loaded.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def load_tracing_module():
+    """Load core/tracing.py without importing the (QGIS dependent) core package."""
+    path = Path(__file__).resolve().parent.parent / 'core' / 'tracing.py'
+    spec = importlib.util.spec_from_file_location('redbasica_tracing', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_workload(features: int, fields: int):
+    """Create synthetic field mappings and per-feature data dictionaries."""
+    field_mappings = {f"field_{i}": f"layer_field_{i}" for i in range(fields)}
+    rows = [
+        {name: float(index * fields + i) for i, name in enumerate(field_mappings)}
+        for index in range(features)
+    ]
+    return field_mappings, rows
+
+
+def loop_baseline(field_mappings, rows, tracer):
+    total = 0
+    for row in rows:
+        for name in field_mappings:
+            total += row[name] > 0
+    return total
+
+
+def loop_traced(field_mappings, rows, tracer):
+    total = 0
+    count = len(rows)
+    for i, row in enumerate(rows):
+        tracer.debug("Processing feature %d/%d", i + 1, count)
+        for name in field_mappings:
+            total += row[name] > 0
+        tracer.debug("_extract_feature_data_safe returned: %s", row)
+        tracer.debug("Line length: %s, minimum length for arrows: %s", 100.0, 10.0)
+    return total
+
+
+def loop_print(field_mappings, rows, tracer):
+    total = 0
+    count = len(rows)
+    for i, row in enumerate(rows):
+        print(f"DEBUG: Processing feature {i+1}/{count}")
+        print(f"DEBUG: config.pipes_mapping.field_mappings: {field_mappings}")
+        for name in field_mappings:
+            print(f"DEBUG: Processing field: {name}")
+            print(f"DEBUG: mapping.field_mappings: {field_mappings}")
+            total += row[name] > 0
+        print(f"DEBUG: _extract_feature_data_safe returned: {row}")
+        print(f"DEBUG: Total line length: {100.0}")
+    return total
+
+
+def run(label, func, field_mappings, rows, tracer, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(field_mappings, rows, tracer)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_feature_us = best / len(rows) * 1e6
+    print(f"{label:<34} {best * 1000:10.1f} ms  {per_feature_us:8.2f} us/feature")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark export loop tracing overhead")
+    parser.add_argument('--features', type=int, default=50000, help="Number of synthetic features")
+    parser.add_argument('--fields', type=int, default=20, help="Number of mapped fields per feature")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions (best time is reported)")
+    args = parser.parse_args()
+
+    tracing = load_tracing_module()
+    tracer = tracing.get_tracer('export')
+    field_mappings, rows = make_workload(args.features, args.fields)
+
+    print(f"Features: {args.features}, fields: {args.fields}, repeat: {args.repeat}\n")
+
+    tracing.disable_tracing()
+    baseline = run("baseline (no trace points)", loop_baseline, field_mappings, rows, tracer, args.repeat)
+    disabled = run("tracing disabled", loop_traced, field_mappings, rows, tracer, args.repeat)
+
+    tracing.configure_tracing(tracing.TraceLevel.DEBUG, qgis_log=False)
+    run("tracing enabled (null handler)", loop_traced, field_mappings, rows, tracer, args.repeat)
+    tracing.disable_tracing()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        legacy = run("legacy print() to devnull", loop_print, field_mappings, rows, tracer, args.repeat)
+    # run() printed into devnull as well, report again
+    per_feature_us = legacy / len(rows) * 1e6
+    print(f"{'legacy print() to devnull':<34} {legacy * 1000:10.1f} ms  {per_feature_us:8.2f} us/feature")
+
+    print(f"\nTracing disabled overhead: {(disabled - baseline) * 1000:.1f} ms "
+          f"({(disabled - baseline) / len(rows) * 1e6:.2f} us/feature)")
+    print(f"Speedup vs legacy prints: {legacy / disabled:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
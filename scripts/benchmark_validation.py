@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the single-pass layer validation scan.
+
+Scans the pipes and junctions of a synthetic network (see
+synthetic_network.py) with core.layer_scan.LayerScanner and compares the
+time with a bare ``getFeatures()`` loop over the same feature request that
+only touches each feature's geometry and attributes. Reports both times, the
+ratio and the issue histogram of the scan.
+
+Examples:
+    python scripts/benchmark_validation.py
+    python scripts/benchmark_validation.py --pipes 50k --no-geometry
+"""
+
+import argparse
+import gc
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_export import parse_size  # noqa: E402
+import synthetic_network  # noqa: E402
+
+
+def bare_scan(layer, mapping, with_geometry):
+    from core.feature_requests import build_feature_request
+
+    request = build_feature_request(layer, mapping, with_geometry=with_geometry)
+    count = 0
+    for feature in layer.getFeatures(request):
+        if with_geometry:
+            feature.geometry()
+        feature.attributes()
+        count += 1
+    return count
+
+
+def timed(function, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-pass layer validation vs a bare feature scan")
+    parser.add_argument('--pipes', default='200k', help="Pipe count, e.g. 50k or 200k (default: %(default)s)")
+    parser.add_argument('--no-geometry', action='store_true', help="Skip the geometry checks")
+    parser.add_argument('--no-numpy', action='store_true', help="Use the pure Python column checks")
+    args = parser.parse_args()
+
+    synthetic_network.install_qgis_stand_in()
+    synthetic_network.load_core()
+    from core.layer_scan import LayerScanner, cross_reference
+
+    network = synthetic_network.SyntheticNetwork(parse_size(args.pipes))
+    config = synthetic_network.build_export_configuration(network, 'unused.dxf')
+    project = synthetic_network.QgsProject.instance()
+    with_geometry = not args.no_geometry
+    scanner = LayerScanner(check_geometry=with_geometry, use_numpy=False if args.no_numpy else None)
+
+    print(f"{'layer':<10} {'features':>9} {'bare scan s':>12} {'validation s':>13} {'ratio':>6}")
+    reports = {}
+    for name, mapping in (('pipes', config.pipes_mapping), ('junctions', config.junctions_mapping)):
+        layer = project.mapLayer(mapping.layer_id)
+        count, bare_seconds = timed(bare_scan, layer, mapping, with_geometry)
+        reports[name], scan_seconds = timed(scanner.scan, layer, mapping)
+        print(f"{name:<10} {count:>9,} {bare_seconds:12.2f} {scan_seconds:13.2f} "
+              f"{scan_seconds / bare_seconds if bare_seconds else 0.0:6.2f}")
+
+    _, cross_seconds = timed(cross_reference, reports['pipes'], reports['junctions'])
+    print(f"cross reference: {cross_seconds:.2f} s")
+    for name, report in reports.items():
+        print(f"\n{name}: {report.issue_count():,} issues")
+        for message in report.messages():
+            print(f"  {message}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
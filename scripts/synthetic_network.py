@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic sewer networks and a QGIS-free stand-in for benchmarking exports.
+
+The stand-in provides the small part of the ``qgis.core`` / ``qgis.PyQt`` API
+used by the export path (layers, features, geometries, feature requests, the
+project registry and the message log), in the spirit of the fallback mocks in
+core/error_recovery.py. Install it with install_qgis_stand_in() before loading
+the core package with load_core().
+
+Networks are laid out as a tree on a jittered grid: node k sits on the grid,
+pipe k drains node k into its left neighbour (or the node below at the start
+of a row). Features are generated lazily and deterministically from their
+index, so a 1M pipe layer costs no memory until the exporter reads it and
+every scan returns the same values.
+
+Attribute mix per pipe: mostly native numbers, a share of Portuguese
+formatted strings ("1.234,56", "45,30 m"), NULLs in optional fields and
+drop types (TC / D) with drop heights.
+"""
+
+import math
+import os
+import sys
+import types
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Grid spacing between nodes in map units
+NODE_SPACING = 50.0
+
+PIPE_FIELDS = ['DC_ID', 'PVM', 'PVJ', 'L', 'DN', 'CFM', 'CFJ', 'CTM', 'CTJ',
+               'DECL', 'MAT', 'OBS', 'H_COL', 'TIPO_QUEDA', 'H_QUEDA']
+JUNCTION_FIELDS = ['NOME', 'CT', 'CF', 'OBS']
+
+# required field -> synthetic layer field
+PIPE_MAPPING = {
+    'pipe_id': 'DC_ID', 'upstream_node': 'PVM', 'downstream_node': 'PVJ',
+    'length': 'L', 'diameter': 'DN',
+    'upstream_invert_elev': 'CFM', 'downstream_invert_elev': 'CFJ',
+    'upstream_ground_elev': 'CTM', 'downstream_ground_elev': 'CTJ',
+    'slope': 'DECL', 'material': 'MAT', 'notes': 'OBS',
+    'downstream_depth': 'H_COL', 'drop_type': 'TIPO_QUEDA', 'drop_height': 'H_QUEDA',
+}
+JUNCTION_MAPPING = {
+    'node_id': 'NOME', 'ground_elevation': 'CT', 'invert_elevation': 'CF', 'notes': 'OBS',
+}
+
+DIAMETERS = (150, 200, 250, 300, 400)
+MATERIALS = ('PVC', 'PEAD', 'Concreto', 'Manilha', 'PVC Ocre')
+
+
+# --- QGIS stand-in -----------------------------------------------------------
+
+class QVariantNull:
+    """Stand-in for the QGIS NULL value (QVariant())."""
+
+    def __eq__(self, other):
+        return isinstance(other, QVariantNull)
+
+    def __hash__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'NULL'
+
+
+NULL = QVariantNull()
+
+
+class Qgis:
+    Info = 0
+    Warning = 1
+    Critical = 2
+    Success = 3
+
+
+class QgsMessageLog:
+    """Counts messages instead of writing them (logging cost stays in the numbers)."""
+
+    messages = 0
+
+    @staticmethod
+    def logMessage(message, tag='', level=Qgis.Info, notifyUser=True):
+        QgsMessageLog.messages += 1
+
+
+class QgsWkbTypes:
+    Unknown = 0
+    Point = 1
+    LineString = 2
+    Polygon = 3
+    MultiPoint = 4
+    MultiLineString = 5
+    MultiPolygon = 6
+    PointGeometry = 0
+    LineGeometry = 1
+    PolygonGeometry = 2
+
+
+class QgsPointXY:
+    __slots__ = ('_x', '_y')
+
+    def __init__(self, x: float = 0.0, y: float = 0.0):
+        self._x = float(x)
+        self._y = float(y)
+
+    def x(self) -> float:
+        return self._x
+
+    def y(self) -> float:
+        return self._y
+
+    def sqrDist(self, other: 'QgsPointXY') -> float:
+        return (self._x - other._x) ** 2 + (self._y - other._y) ** 2
+
+    def distance(self, other: 'QgsPointXY') -> float:
+        return math.sqrt(self.sqrDist(other))
+
+    def azimuth(self, other: 'QgsPointXY') -> float:
+        return math.degrees(math.atan2(other._x - self._x, other._y - self._y))
+
+    def __eq__(self, other):
+        return isinstance(other, QgsPointXY) and self._x == other._x and self._y == other._y
+
+    def __repr__(self):
+        return f'<QgsPointXY: {self._x} {self._y}>'
+
+
+class QgsGeometry:
+    """Point or polyline geometry (single part)."""
+
+    __slots__ = ('_points', '_type')
+
+    def __init__(self, points: Optional[List[QgsPointXY]] = None, wkb_type: int = QgsWkbTypes.Unknown):
+        self._points = points or []
+        self._type = wkb_type
+
+    @staticmethod
+    def fromPolylineXY(points: List[QgsPointXY]) -> 'QgsGeometry':
+        return QgsGeometry(list(points), QgsWkbTypes.LineString)
+
+    @staticmethod
+    def fromPointXY(point: QgsPointXY) -> 'QgsGeometry':
+        return QgsGeometry([point], QgsWkbTypes.Point)
+
+    def isNull(self) -> bool:
+        return not self._points
+
+    def isEmpty(self) -> bool:
+        return not self._points
+
+    def isGeosValid(self) -> bool:
+        return bool(self._points)
+
+    def isMultipart(self) -> bool:
+        return False
+
+    def wkbType(self) -> int:
+        return self._type
+
+    def type(self) -> int:
+        return QgsWkbTypes.PointGeometry if self._type == QgsWkbTypes.Point else QgsWkbTypes.LineGeometry
+
+    def asPolyline(self) -> List[QgsPointXY]:
+        return list(self._points) if self._type == QgsWkbTypes.LineString else []
+
+    def asMultiPolyline(self) -> List[List[QgsPointXY]]:
+        return [self.asPolyline()]
+
+    def asPoint(self) -> QgsPointXY:
+        return self._points[0] if self._points else QgsPointXY()
+
+    def asMultiPoint(self) -> List[QgsPointXY]:
+        return list(self._points)
+
+    def length(self) -> float:
+        return sum(a.distance(b) for a, b in zip(self._points, self._points[1:]))
+
+
+class QgsField:
+    def __init__(self, name: str, type_: int = 0):
+        self._name = name
+        self._type = type_
+
+    def name(self) -> str:
+        return self._name
+
+    def type(self) -> int:
+        return self._type
+
+
+class QgsFields:
+    def __init__(self, names: Sequence[str]):
+        self._fields = [QgsField(name) for name in names]
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def names(self) -> List[str]:
+        return [f.name() for f in self._fields]
+
+    def lookupField(self, name: str) -> int:
+        return self._index.get(name, -1)
+
+    def indexFromName(self, name: str) -> int:
+        return self._index.get(name, -1)
+
+    def count(self) -> int:
+        return len(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+
+class QgsFeature:
+    __slots__ = ('_id', '_fields', '_attributes', '_geometry')
+
+    def __init__(self, fields: Optional[QgsFields] = None, fid: int = 0):
+        self._id = fid
+        self._fields = fields or QgsFields([])
+        self._attributes: List[Any] = []
+        self._geometry = QgsGeometry()
+
+    def id(self) -> int:
+        return self._id
+
+    def fields(self) -> QgsFields:
+        return self._fields
+
+    def attributes(self) -> List[Any]:
+        return self._attributes
+
+    def setAttributes(self, attributes: List[Any]):
+        self._attributes = attributes
+
+    def geometry(self) -> QgsGeometry:
+        return self._geometry
+
+    def setGeometry(self, geometry: QgsGeometry):
+        self._geometry = geometry
+
+    def hasGeometry(self) -> bool:
+        return not self._geometry.isNull()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._fields.lookupField(key)
+        return self._attributes[key]
+
+
+class QgsFeatureRequest:
+    NoFlags = 0
+    NoGeometry = 1
+
+    def __init__(self):
+        self._flags = 0
+        self._subset = None
+        self._limit = -1
+
+    def setSubsetOfAttributes(self, indices):
+        self._subset = list(indices)
+        return self
+
+    def setNoAttributes(self):
+        self._subset = []
+        return self
+
+    def setFlags(self, flags):
+        self._flags = flags
+        return self
+
+    def flags(self):
+        return self._flags
+
+    def setLimit(self, limit):
+        self._limit = limit
+        return self
+
+    def limit(self):
+        return self._limit
+
+
+class QgsVectorLayer:
+    """Layer whose features are produced by a generator function of the feature index."""
+
+    def __init__(self, name: str, field_names: Sequence[str], count: int, make_feature):
+        self._id = f'{name}_{id(self):x}'
+        self._name = name
+        self._fields = QgsFields(field_names)
+        self._count = count
+        self._make_feature = make_feature
+
+    def id(self) -> str:
+        return self._id
+
+    def name(self) -> str:
+        return self._name
+
+    def isValid(self) -> bool:
+        return True
+
+    def fields(self) -> QgsFields:
+        return self._fields
+
+    def featureCount(self) -> int:
+        return self._count
+
+    def getFeatures(self, request: Optional[QgsFeatureRequest] = None) -> Iterator[QgsFeature]:
+        limit = self._count
+        if request is not None and request.limit() >= 0:
+            limit = min(limit, request.limit())
+        make_feature = self._make_feature
+        fields = self._fields
+        for fid in range(limit):
+            yield make_feature(fid, fields)
+
+
+class QgsVectorLayerFeatureSource:
+    def __init__(self, layer: QgsVectorLayer):
+        self._layer = layer
+
+    def getFeatures(self, request: Optional[QgsFeatureRequest] = None) -> Iterator[QgsFeature]:
+        return self._layer.getFeatures(request)
+
+
+class QgsProject:
+    _instance = None
+
+    def __init__(self):
+        self._layers: Dict[str, QgsVectorLayer] = {}
+
+    @classmethod
+    def instance(cls) -> 'QgsProject':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def addMapLayer(self, layer: QgsVectorLayer):
+        self._layers[layer.id()] = layer
+        return layer
+
+    def removeAllMapLayers(self):
+        self._layers.clear()
+
+    def mapLayer(self, layer_id: str) -> Optional[QgsVectorLayer]:
+        return self._layers.get(layer_id)
+
+    def mapLayers(self) -> Dict[str, QgsVectorLayer]:
+        return dict(self._layers)
+
+
+class _Unavailable:
+    """Placeholder for QGIS classes the export path does not use."""
+
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError(f'{type(self).__name__} is not part of the benchmark stand-in')
+
+
+def install_qgis_stand_in():
+    """Register the stand-in as the ``qgis`` package (no-op if QGIS is importable)."""
+    if 'qgis.core' in sys.modules:
+        return sys.modules['qgis.core']
+
+    core = types.ModuleType('qgis.core')
+    for cls in (Qgis, QgsMessageLog, QgsWkbTypes, QgsPointXY, QgsGeometry, QgsField, QgsFields,
+                QgsFeature, QgsFeatureRequest, QgsVectorLayer, QgsVectorLayerFeatureSource,
+                QgsProject):
+        setattr(core, cls.__name__, cls)
+    core.NULL = NULL
+    for name in ('QgsApplication', 'QgsExpression', 'QgsExpressionContext',
+                 'QgsExpressionContextUtils', 'QgsSpatialIndex', 'QgsVectorDataProvider', 'QgsTask'):
+        setattr(core, name, type(name, (_Unavailable,), {}))
+
+    qtcore = types.ModuleType('qgis.PyQt.QtCore')
+    qtcore.QVariant = type('QVariant', (), {'Int': 2, 'Double': 6, 'String': 10, 'Type': int})
+    qtcore.pyqtSignal = lambda *args, **kwargs: None
+    # QSettings, QTranslator and QCoreApplication are left out on purpose:
+    # the core modules fall back to their own mocks when the import fails
+
+    qgis = types.ModuleType('qgis')
+    pyqt = types.ModuleType('qgis.PyQt')
+    qgis.core = core
+    qgis.PyQt = pyqt
+    pyqt.QtCore = qtcore
+    sys.modules.update({'qgis': qgis, 'qgis.core': core, 'qgis.PyQt': pyqt, 'qgis.PyQt.QtCore': qtcore})
+    return core
+
+
+def load_core():
+    """
+    Import the plugin core package without running core/__init__.py.
+
+    Returns:
+        The ``core`` package module (submodules are imported on demand)
+    """
+    if 'core' not in sys.modules:
+        addon = str(ROOT / 'addon')
+        if addon not in sys.path:
+            sys.path.insert(0, addon)
+        package = types.ModuleType('core')
+        package.__path__ = [str(ROOT / 'core')]
+        sys.modules['core'] = package
+    return sys.modules['core']
+
+
+# --- Network generator -------------------------------------------------------
+
+def _jitter(k: int, salt: int) -> float:
+    """Deterministic pseudo random value in [0, 1) for index k."""
+    h = (k * 2654435761 + salt * 40503) & 0xFFFFFFFF
+    h ^= h >> 15
+    h = (h * 2246822519) & 0xFFFFFFFF
+    h ^= h >> 13
+    return h / 4294967296.0
+
+
+def _pt_number(value: float, decimals: int = 2) -> str:
+    """Format a number the Brazilian way: 1.234,56"""
+    text = f'{value:,.{decimals}f}'
+    return text.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+class SyntheticNetwork:
+    """
+    Tree-shaped sewer network with ``pipes`` pipes and ``pipes + 1`` nodes.
+
+    Args:
+        pipes: Number of pipes
+        string_share: Share of numeric attributes stored as Portuguese strings
+        null_share: Share of optional attributes left NULL
+        drop_share: Share of pipes with a drop (half TC, half D)
+        seed: Salt of the deterministic value generator
+    """
+
+    def __init__(self, pipes: int, string_share: float = 0.25, null_share: float = 0.05,
+                 drop_share: float = 0.1, seed: int = 1):
+        self.pipes = pipes
+        self.nodes = pipes + 1
+        self.columns = max(2, int(math.ceil(math.sqrt(self.nodes))))
+        self.string_share = string_share
+        self.null_share = null_share
+        self.drop_share = drop_share
+        self.seed = seed
+        # Pipes whose diameter was changed, see edit_pipes()
+        self.edited_pipes = frozenset()
+
+    def edit_pipes(self, share: float):
+        """
+        Change the diameter of an evenly spread share of the pipes (at least one).
+
+        Simulates the edits between two exports of the same network.
+        """
+        step = max(1, int(round(1.0 / share))) if share > 0 else self.pipes + 1
+        self.edited_pipes = frozenset(range(0, self.pipes, step)) or frozenset((0,))
+
+    def node_xy(self, k: int) -> Tuple[float, float]:
+        row, col = divmod(k, self.columns)
+        return (500000.0 + col * NODE_SPACING + (_jitter(k, self.seed) - 0.5) * 10.0,
+                7400000.0 + row * NODE_SPACING + (_jitter(k, self.seed + 1) - 0.5) * 10.0)
+
+    def node_elevations(self, k: int) -> Tuple[float, float]:
+        """(ground, invert) elevation of node k; inverts fall towards node 0."""
+        row, col = divmod(k, self.columns)
+        ground = 750.0 + 0.02 * (row + col) * NODE_SPACING + _jitter(k, self.seed + 2) * 0.5
+        depth = 1.2 + _jitter(k, self.seed + 3) * 2.0
+        return ground, ground - depth
+
+    def downstream_node(self, pipe: int) -> int:
+        k = pipe + 1
+        return k - 1 if k % self.columns else k - self.columns
+
+    def _number(self, value: float, k: int, salt: int, decimals: int = 2, optional: bool = False):
+        r = _jitter(k, self.seed + salt)
+        if optional and r < self.null_share:
+            return NULL
+        if r > 1.0 - self.string_share:
+            text = _pt_number(value, decimals)
+            return f'{text} m' if r > 1.0 - self.string_share / 4 else text
+        return round(value, decimals)
+
+    def make_pipe(self, fid: int, fields: QgsFields) -> QgsFeature:
+        up = fid + 1
+        down = self.downstream_node(fid)
+        x1, y1 = self.node_xy(up)
+        x2, y2 = self.node_xy(down)
+        ground_up, invert_up = self.node_elevations(up)
+        ground_down, invert_down = self.node_elevations(down)
+        length = math.hypot(x2 - x1, y2 - y1)
+        slope = max((invert_up - invert_down) / length, 0.0005) if length else 0.0005
+
+        r = _jitter(fid, self.seed + 20)
+        if r < self.drop_share / 2:
+            drop_type, drop_height = 'TC', self._number(0.5 + r * 5.0, fid, 21)
+        elif r < self.drop_share:
+            drop_type, drop_height = 'D', self._number(0.05 + r, fid, 21)
+        else:
+            drop_type, drop_height = NULL, NULL
+
+        feature = QgsFeature(fields, fid)
+        feature.setAttributes([
+            f'C-{fid + 1}',
+            f'PV-{up}',
+            f'PV-{down}',
+            self._number(length, fid, 10),
+            DIAMETERS[(int(_jitter(fid, self.seed + 11) * len(DIAMETERS))
+                       + (fid in self.edited_pipes)) % len(DIAMETERS)],
+            self._number(invert_up, fid, 12, 3),
+            self._number(invert_down, fid, 13, 3),
+            self._number(ground_up, fid, 14, 3, optional=True),
+            self._number(ground_down, fid, 15, 3, optional=True),
+            self._number(slope, fid, 16, 5, optional=True),
+            MATERIALS[int(_jitter(fid, self.seed + 17) * len(MATERIALS))],
+            NULL if _jitter(fid, self.seed + 18) < 0.8 else 'Trecho existente',
+            self._number(ground_down - invert_down, fid, 19, 2, optional=True),
+            drop_type,
+            drop_height,
+        ])
+        feature.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(x1, y1), QgsPointXY(x2, y2)]))
+        return feature
+
+    def make_junction(self, fid: int, fields: QgsFields) -> QgsFeature:
+        ground, invert = self.node_elevations(fid)
+        feature = QgsFeature(fields, fid)
+        feature.setAttributes([
+            f'PV-{fid}',
+            self._number(ground, fid, 30, 3),
+            self._number(invert, fid, 31, 3),
+            NULL,
+        ])
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(*self.node_xy(fid))))
+        return feature
+
+    def pipes_layer(self) -> QgsVectorLayer:
+        return QgsVectorLayer('synthetic_pipes', PIPE_FIELDS, self.pipes, self.make_pipe)
+
+    def junctions_layer(self) -> QgsVectorLayer:
+        return QgsVectorLayer('synthetic_junctions', JUNCTION_FIELDS, self.nodes, self.make_junction)
+
+
+def build_export_configuration(network: SyntheticNetwork, output_path: str, **options):
+    """
+    Register the network layers in the project and build an ExportConfiguration.
+
+    Requires install_qgis_stand_in() and load_core() to have been called.
+
+    Args:
+        network: Synthetic network
+        output_path: Output DXF path
+        **options: ExportConfiguration overrides (streaming_export, export_mode, ...)
+
+    Returns:
+        ExportConfiguration for the registered layers
+    """
+    from core.data_structures import ExportConfiguration, GeometryType, LayerMapping
+
+    project = QgsProject.instance()
+    project.removeAllMapLayers()
+    pipes = project.addMapLayer(network.pipes_layer())
+    junctions = project.addMapLayer(network.junctions_layer())
+
+    with open(os.devnull, 'w') as devnull:
+        # LayerMapping/ExportConfiguration print their contents on creation
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            pipes_mapping = LayerMapping(pipes.id(), pipes.name(), GeometryType.LINE,
+                                         field_mappings=dict(PIPE_MAPPING), is_valid=True)
+            junctions_mapping = LayerMapping(junctions.id(), junctions.name(), GeometryType.POINT,
+                                             field_mappings=dict(JUNCTION_MAPPING), is_valid=True)
+            config = ExportConfiguration(pipes_mapping=pipes_mapping, junctions_mapping=junctions_mapping,
+                                         output_path=output_path, **options)
+        finally:
+            sys.stdout = stdout
+    return config
@@ -16,7 +16,7 @@ from qgis.PyQt.QtWidgets import (
 )
 from qgis.PyQt import QtWidgets
 from qgis.core import (
-    QgsProject, QgsVectorLayer, QgsWkbTypes, QgsMapLayerProxyModel
+    QgsProject, QgsVectorLayer, QgsWkbTypes, QgsMapLayerProxyModel, QgsMessageLog
 )
 from qgis.gui import QgsMapLayerComboBox
 from .node_assignment_dialog import NodeAssignmentDialog
@@ -28,10 +28,11 @@ from ..core.field_definitions import SewageNetworkFields
 from ..core.validation import ComprehensiveValidator, ValidationResult
 from ..core.exceptions import ValidationError, ExportError
 from ..core.error_messages import create_error_formatter
-from ..core.dxf_exporter import DXFExporter
 from ..core.i18n_manager import tr
 from ..core.i18n_manager import tr
 from ..core.attribute_mapper import AttributeMapper
+from ..core.background_tasks import NodeAssignmentTask
+from ..core.node_assignment import apply_node_assignments
 from .attribute_mapper_dialog import AttributeMapperDialog
 from .collapsible_group_box import CollapsibleGroupBox
 
@@ -39,6 +40,9 @@ from .collapsible_group_box import CollapsibleGroupBox
 FORM_CLASS, _ = uic.loadUiType(os.path.join(
     os.path.dirname(__file__), 'main_export_dialog.ui'))
 
+# Unmatched pipes listed in the node assignment log message
+UNMATCHED_LOG_LIMIT = 50
+
 
 class MainExportDialog(QDialog, FORM_CLASS):
     """
@@ -80,6 +84,9 @@ class MainExportDialog(QDialog, FORM_CLASS):
         self.pipes_mapping = None
         self.junctions_mapping = None
         
+        # Running background node assignment (kept referenced until finished)
+        self._node_assignment_task = None
+        
         self._setup_ui()
         self._connect_signals()
         self._load_configuration()
@@ -228,6 +235,73 @@ class MainExportDialog(QDialog, FORM_CLASS):
         self.includeCollectorDepthCheckBox.setToolTip("Show collector depth (h_col_p2) 5m from downstream node")
         self.collapsible_advanced.addWidget(self.includeCollectorDepthCheckBox)
         
+        # 7. Streaming Export (unchecked by default)
+        self.streamingExportCheckBox = QCheckBox("Streaming export (large networks, DXF R12)")
+        self.streamingExportCheckBox.setChecked(False)
+        self.streamingExportCheckBox.setToolTip(
+            "Writes entities straight to disk instead of building the drawing in memory. "
+            "Recommended for very large networks; output is DXF R12 and the template is not used"
+        )
+        self.collapsible_advanced.addWidget(self.streamingExportCheckBox)
+        
+        # 8. Parallel workers (streaming export only, 0 = serial)
+        self.parallelWorkersSpinBox = QSpinBox()
+        self.parallelWorkersSpinBox.setRange(0, max(1, os.cpu_count() or 1))
+        self.parallelWorkersSpinBox.setValue(0)
+        self.parallelWorkersSpinBox.setSpecialValueText("Off")
+        self.parallelWorkersSpinBox.setToolTip(
+            "Number of worker processes rendering pipes in parallel during a streaming export. "
+            "Off (or 1) exports serially"
+        )
+        self.parallelWorkersSpinBox.setEnabled(False)
+        self.streamingExportCheckBox.toggled.connect(self.parallelWorkersSpinBox.setEnabled)
+        parallel_workers_container = QWidget()
+        parallel_workers_layout = QHBoxLayout(parallel_workers_container)
+        parallel_workers_layout.setContentsMargins(0, 0, 0, 0)
+        parallel_workers_layout.addWidget(QLabel("Parallel workers:"))
+        parallel_workers_layout.addWidget(self.parallelWorkersSpinBox)
+        self.collapsible_advanced.addWidget(parallel_workers_container)
+        
+        # 9. Incremental export (streaming export only)
+        self.incrementalExportCheckBox = QCheckBox("Incremental export (re-render changed features only)")
+        self.incrementalExportCheckBox.setChecked(False)
+        self.incrementalExportCheckBox.setToolTip(
+            "Keeps the rendered entities of every feature in a cache file next to the DXF "
+            "(<file>.rbcache); re-exports only render new and changed features. "
+            "Warnings are only reported for features that were rendered again"
+        )
+        self.incrementalExportCheckBox.setEnabled(False)
+        self.streamingExportCheckBox.toggled.connect(self.incrementalExportCheckBox.setEnabled)
+        self.collapsible_advanced.addWidget(self.incrementalExportCheckBox)
+        
+        # 10. Binary DXF (unchecked by default)
+        self.binaryDxfCheckBox = QCheckBox("Binary DXF output (smaller files)")
+        self.binaryDxfCheckBox.setChecked(False)
+        self.binaryDxfCheckBox.setToolTip(
+            "Writes binary instead of ASCII DXF, about 30% smaller. "
+            "AutoCAD and most CAD programs read both"
+        )
+        self.collapsible_advanced.addWidget(self.binaryDxfCheckBox)
+        
+        # 11. Full GEOS geometry validation (unchecked by default)
+        self.geosValidationCheckBox = QCheckBox("Full geometry validation (GEOS)")
+        self.geosValidationCheckBox.setChecked(False)
+        self.geosValidationCheckBox.setToolTip(
+            "Also checks every geometry for topological validity before the export and "
+            "skips invalid features. Vertex counts, coordinates and zero-length lines "
+            "are always checked"
+        )
+        self.collapsible_advanced.addWidget(self.geosValidationCheckBox)
+        
+        # 12. Profiling report (unchecked by default)
+        self.profileExportCheckBox = QCheckBox("Write profiling report (JSON next to the DXF)")
+        self.profileExportCheckBox.setChecked(False)
+        self.profileExportCheckBox.setToolTip(
+            "Measures the time spent per export stage and entity type and writes it "
+            "to <file>_profile.json for performance analysis"
+        )
+        self.collapsible_advanced.addWidget(self.profileExportCheckBox)
+        
         # Create a container for the label format row
         label_format_container = QWidget()
         label_format_layout = QHBoxLayout(label_format_container)
@@ -571,7 +645,13 @@ class MainExportDialog(QDialog, FORM_CLASS):
             include_collector_depth=self.includeCollectorDepthCheckBox.isChecked(),
             label_format=self.labelFormatEdit.text().strip(),
             export_mode=self.exportModeCombo.currentData(),
-            label_style=self.labelStyleCombo.currentData()
+            label_style=self.labelStyleCombo.currentData(),
+            streaming_export=self.streamingExportCheckBox.isChecked(),
+            parallel_workers=self.parallelWorkersSpinBox.value(),
+            binary_dxf=self.binaryDxfCheckBox.isChecked(),
+            geos_validation=self.geosValidationCheckBox.isChecked(),
+            incremental_export=self.incrementalExportCheckBox.isChecked(),
+            profile_export=self.profileExportCheckBox.isChecked()
         )
     
     def _load_configuration(self):
@@ -627,6 +707,24 @@ class MainExportDialog(QDialog, FORM_CLASS):
             self.includeElevationsCheckBox.setChecked(
                 self.configuration.get_setting('include_elevations', True)
             )
+            self.streamingExportCheckBox.setChecked(
+                self.configuration.get_setting('streaming_export', False)
+            )
+            self.parallelWorkersSpinBox.setValue(
+                int(self.configuration.get_setting('parallel_workers', 0))
+            )
+            self.binaryDxfCheckBox.setChecked(
+                self.configuration.get_setting('binary_dxf', False)
+            )
+            self.geosValidationCheckBox.setChecked(
+                self.configuration.get_setting('geos_validation', False)
+            )
+            self.incrementalExportCheckBox.setChecked(
+                self.configuration.get_setting('incremental_export', False)
+            )
+            self.profileExportCheckBox.setChecked(
+                self.configuration.get_setting('profile_export', False)
+            )
             
             # Label Style
             # Label Style - force default to STACKED if not set or invalid
@@ -684,6 +782,12 @@ class MainExportDialog(QDialog, FORM_CLASS):
             self.configuration.set_setting('include_arrows', self.includeArrowsCheckBox.isChecked())
             self.configuration.set_setting('include_labels', self.includeLabelsCheckBox.isChecked())
             self.configuration.set_setting('include_elevations', self.includeElevationsCheckBox.isChecked())
+            self.configuration.set_setting('streaming_export', self.streamingExportCheckBox.isChecked())
+            self.configuration.set_setting('parallel_workers', self.parallelWorkersSpinBox.value())
+            self.configuration.set_setting('binary_dxf', self.binaryDxfCheckBox.isChecked())
+            self.configuration.set_setting('geos_validation', self.geosValidationCheckBox.isChecked())
+            self.configuration.set_setting('incremental_export', self.incrementalExportCheckBox.isChecked())
+            self.configuration.set_setting('profile_export', self.profileExportCheckBox.isChecked())
             self.configuration.set_setting('label_format', self.labelFormatEdit.text())
             self.configuration.set_setting('last_output_path', self.outputPathEdit.text())
             
@@ -848,223 +952,145 @@ class MainExportDialog(QDialog, FORM_CLASS):
         dialog = NodeAssignmentDialog(fields, parent=self)
         if dialog.exec_() == QDialog.Accepted:
             node_id_field, depth_field, ground_elev_field, invert_elev_field = dialog.get_selected_fields()
-            self._execute_node_assignment(node_id_field, depth_field, ground_elev_field, invert_elev_field)
+            self._execute_node_assignment(node_id_field, depth_field, ground_elev_field, invert_elev_field,
+                                          dialog.get_snap_tolerance())
 
-    def _execute_node_assignment(self, node_id_field, depth_field=None, ground_elev_field=None, invert_elev_field=None):
+    def _execute_node_assignment(self, node_id_field, depth_field=None, ground_elev_field=None, invert_elev_field=None,
+                                 snap_tolerance=None):
         """
         Execute the spatial assignment of Node attributes to pipes.
         
+        The nearest junction lookup runs as a background task; the attribute
+        changes are written and committed in _on_node_assignment_finished.
+        
         Args:
             node_id_field (str): Name of the ID field in junctions layer
             depth_field (str): Name of depth field (optional)
             ground_elev_field (str): Name of ground elevation (CT) field (optional)
             invert_elev_field (str): Name of invert elevation (CF) field (optional)
+            snap_tolerance (float): Maximum pipe end to node distance (None = no limit)
         """
         pipes_layer = self.pipesLayerCombo.currentLayer()
         junctions_layer = self.junctionsLayerCombo.currentLayer()
         
-        if not pipes_layer.isEditable():
-            pipes_layer.startEditing()
+        from qgis.PyQt.QtWidgets import QProgressBar
+        from qgis.core import Qgis, QgsApplication
+        from qgis.utils import iface
+        
+        if self._node_assignment_task is not None:
+            iface.messageBar().pushMessage(
+                "Node Assignment",
+                "A node assignment is already running.",
+                level=Qgis.Warning, duration=5
+            )
+            return
             
         try:
-            from qgis.core import QgsSpatialIndex, QgsField, NULL
-            from qgis.PyQt.QtCore import QVariant, QCoreApplication
-            from qgis.PyQt.QtWidgets import QProgressBar
-            from qgis.core import Qgis
-            from qgis.utils import iface
-
+            task = NodeAssignmentTask(
+                pipes_layer, junctions_layer,
+                node_id_field, depth_field, ground_elev_field, invert_elev_field,
+                snap_tolerance=snap_tolerance
+            )
+            
             # Create progress widget (MessageBar best practice)
             progressMessage = iface.messageBar().createMessage("Assigning Node IDs...")
             progressBar = QProgressBar()
-            progressBar.setMaximum(pipes_layer.featureCount())
+            progressBar.setMaximum(100)
             progressBar.setAlignment(Qt.AlignLeft|Qt.AlignVCenter)
             progressMessage.layout().addWidget(progressBar)
             iface.messageBar().pushWidget(progressMessage, Qgis.Info)
-
-            # Ensure fields exist
-            fields_to_add = []
-            
-            # Map of fields to create -> Type
-            # New naming: node_up_* (upstream/montante) and node_down_* (downstream/jusante)
-            new_fields = {
-                'node_up_id': QVariant.String,
-                'node_down_id': QVariant.String,
-                'node_up_depth': QVariant.Double,      # Profundidade (h) do nó montante
-                'node_down_depth': QVariant.Double,    # Profundidade (h) do nó jusante
-                'node_up_ground_elev': QVariant.Double,    # Cota do terreno (CT) montante
-                'node_down_ground_elev': QVariant.Double,  # Cota do terreno (CT) jusante
-                'node_up_invert_elev': QVariant.Double,    # Cota de fundo (CF) montante
-                'node_down_invert_elev': QVariant.Double   # Cota de fundo (CF) jusante
-            }
             
-            for field_name, field_type in new_fields.items():
-                if pipes_layer.fields().indexFromName(field_name) == -1:
-                    fields_to_add.append(QgsField(field_name, field_type))
-                
-            if fields_to_add:
-                pipes_layer.dataProvider().addAttributes(fields_to_add)
-                pipes_layer.updateFields()
-
-            # Get field indices
-            idx_map = {
-                'node_up_id': pipes_layer.fields().indexFromName('node_up_id'),
-                'node_down_id': pipes_layer.fields().indexFromName('node_down_id'),
-                'node_up_depth': pipes_layer.fields().indexFromName('node_up_depth'),
-                'node_down_depth': pipes_layer.fields().indexFromName('node_down_depth'),
-                'node_up_ground_elev': pipes_layer.fields().indexFromName('node_up_ground_elev'),
-                'node_down_ground_elev': pipes_layer.fields().indexFromName('node_down_ground_elev'),
-                'node_up_invert_elev': pipes_layer.fields().indexFromName('node_up_invert_elev'),
-                'node_down_invert_elev': pipes_layer.fields().indexFromName('node_down_invert_elev')
-            }
-
-            # Build Spatial Index
-            index = QgsSpatialIndex(junctions_layer.getFeatures())
-            
-            # Cache junction attributes map {feature_id: {field: value}}
-            # This avoids re-querying the layer constantly
-            junction_cache = {}
-            for j_feat in junctions_layer.getFeatures():
-                data = {'id': j_feat[node_id_field]}
-                if depth_field:
-                    data['depth'] = j_feat[depth_field]
-                if ground_elev_field:
-                    data['ground_elev'] = j_feat[ground_elev_field]
-                if invert_elev_field:
-                    data['invert_elev'] = j_feat[invert_elev_field]
-                junction_cache[j_feat.id()] = data
-
-            count = 0
-            assignments = 0
-            pipes_with_issues = 0
+            task.progressChanged.connect(lambda value: progressBar.setValue(int(value)))
+            task.assignmentFinished.connect(
+                lambda result: self._on_node_assignment_finished(task, pipes_layer, progressMessage, result)
+            )
             
-            for p_feat in pipes_layer.getFeatures():
-                progressBar.setValue(count)
-                QCoreApplication.processEvents() # Needed for UI updates since we dominate the main thread
-                    
-                geom = p_feat.geometry()
-                if not geom or geom.isEmpty():
-                    count += 1
-                    continue
-                    
-                # Get start and end points
-                if geom.isMultipart():
-                    points = geom.asMultiPolyline()[0]
-                else:
-                    points = geom.asPolyline()
-                    
-                start_pt = points[0]
-                end_pt = points[-1]
-                
-                has_missing_node = False
-                
-                # Search Upstream (Start Point)
-                upstream_ids = index.nearestNeighbor(start_pt, 1)
-                found_upstream = False
-                if upstream_ids:
-                    u_feat_id = upstream_ids[0]
-                    u_data = junction_cache.get(u_feat_id, {})
-                    
-                    pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_id'], u_data.get('id', NULL))
-                    if depth_field:
-                        pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_depth'], u_data.get('depth', NULL))
-                    if ground_elev_field:
-                        pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_ground_elev'], u_data.get('ground_elev', NULL))
-                    if invert_elev_field:
-                        pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_invert_elev'], u_data.get('invert_elev', NULL))
-                        
-                    found_upstream = True
-                else:
-                    pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_id'], NULL)
-                    # Clear other fields if no node found
-                    if depth_field: pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_depth'], NULL)
-                    if ground_elev_field: pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_ground_elev'], NULL)
-                    if invert_elev_field: pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_up_invert_elev'], NULL)
-                    has_missing_node = True
-
-                # Search Downstream (End Point)
-                downstream_ids = index.nearestNeighbor(end_pt, 1)
-                found_downstream = False
-                if downstream_ids:
-                    d_feat_id = downstream_ids[0]
-                    d_data = junction_cache.get(d_feat_id, {})
-                    
-                    pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_id'], d_data.get('id', NULL))
-                    if depth_field:
-                        pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_depth'], d_data.get('depth', NULL))
-                    if ground_elev_field:
-                        pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_ground_elev'], d_data.get('ground_elev', NULL))
-                    if invert_elev_field:
-                        pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_invert_elev'], d_data.get('invert_elev', NULL))
-                        
-                    found_downstream = True
-                else:
-                    pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_id'], NULL)
-                    if depth_field: pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_depth'], NULL)
-                    if ground_elev_field: pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_ground_elev'], NULL)
-                    if invert_elev_field: pipes_layer.changeAttributeValue(p_feat.id(), idx_map['node_down_invert_elev'], NULL)
-                    has_missing_node = True
-                
-                if found_upstream and found_downstream:
-                    assignments += 1
+            self._node_assignment_task = task
+            QgsApplication.taskManager().addTask(task)
                 
-                if has_missing_node:
-                    pipes_with_issues += 1
-
-                count += 1
+        except Exception as e:
+            self._node_assignment_task = None
+            if 'progressMessage' in locals():
+                iface.messageBar().popWidget(progressMessage)
                 
-            # Clear progress widget
-            iface.messageBar().popWidget(progressMessage)
-
-            # Atomic Save
-            if pipes_layer.commitChanges():
-                if pipes_with_issues == 0:
-                    iface.messageBar().pushMessage(
-                        "Node Assignment Success",
-                        f"All {assignments} pipes were successfully connected to upstream and downstream nodes.",
-                        level=Qgis.Success, duration=5
-                    )
-                else:
-                    iface.messageBar().pushMessage(
-                        "Node Assignment Warning",
-                        f"Assigned IDs to {assignments} fully connected pipes. <br><b>Warning:</b> {pipes_with_issues} pipes have missing start or end nodes (NULL values). Check topology.",
-                        level=Qgis.Warning, duration=10
-                    )
+            iface.messageBar().pushMessage(
+                "Execution Error",
+                f"An error occurred: {str(e)}",
+                level=Qgis.Critical, duration=10
+            )
+            QgsMessageLog.logMessage(str(e), "RedBasica Export", Qgis.Critical)
+    
+    def _on_node_assignment_finished(self, task, pipes_layer, progressMessage, result):
+        """Apply the computed node assignment on the main thread and report the outcome."""
+        from qgis.core import Qgis
+        from qgis.utils import iface
+        
+        self._node_assignment_task = None
+        
+        # Clear progress widget
+        iface.messageBar().popWidget(progressMessage)
+        
+        if result is None:
+            if task.isCanceled():
+                iface.messageBar().pushMessage(
+                    "Node Assignment", "Node assignment cancelled.",
+                    level=Qgis.Info, duration=5
+                )
             else:
+                error = task.exception or "unknown error"
                 iface.messageBar().pushMessage(
-                    "Save Error",
-                    f"Failed to save changes: {pipes_layer.commitErrors()}",
+                    "Execution Error",
+                    f"An error occurred: {error}",
                     level=Qgis.Critical, duration=10
                 )
-                
+                QgsMessageLog.logMessage(str(error), "RedBasica Export", Qgis.Critical)
+            return
+        
+        try:
+            committed = apply_node_assignments(pipes_layer, result)
         except Exception as e:
             pipes_layer.rollBack()
-            # Clear progress widget if it exists
-            if 'progressMessage' in locals():
-                iface.messageBar().popWidget(progressMessage)
-                
             iface.messageBar().pushMessage(
                 "Execution Error",
                 f"An error occurred: {str(e)}",
                 level=Qgis.Critical, duration=10
             )
             QgsMessageLog.logMessage(str(e), "RedBasica Export", Qgis.Critical)
-            # Create exporter and execute
-            exporter = DXFExporter(progress_callback=progress_callback)
-            success, message, statistics = exporter.export_with_error_handling(config)
-            
-            progress_dialog.close()
-            
-            if success:
-                self._show_success_message(message, statistics)
+            return
+        
+        # Atomic Save
+        if committed:
+            if result.pipes_with_issues == 0:
+                iface.messageBar().pushMessage(
+                    "Node Assignment Success",
+                    f"All {result.assignments} pipes were successfully connected to upstream and downstream nodes.",
+                    level=Qgis.Success, duration=5
+                )
             else:
-                self._show_export_error(message, statistics)
-                
-        except Exception as e:
-            if 'progress_dialog' in locals():
-                progress_dialog.close()
-            
-            error_msg = self.error_formatter.format_export_error("export_failed", error_details=str(e))
-            self._show_error_message(error_msg)
+                # Audit list of pipe ends that matched no node
+                # (one message, the first UNMATCHED_LOG_LIMIT pipes)
+                tolerance = f"{result.snap_tolerance}" if result.snap_tolerance else "no limit"
+                listed = "\n".join(f"  pipe fid {fid}: {ends} end unmatched"
+                                    for fid, ends in result.unmatched[:UNMATCHED_LOG_LIMIT])
+                more = len(result.unmatched) - UNMATCHED_LOG_LIMIT
+                if more > 0:
+                    listed += f"\n  ... and {more} more"
+                QgsMessageLog.logMessage(
+                    f"Node assignment: {len(result.unmatched)} pipes with unmatched ends "
+                    f"(snap tolerance: {tolerance}, largest snap distance: {result.max_distance:.3f})\n{listed}",
+                    "RedBasica Export", Qgis.Warning
+                )
+                iface.messageBar().pushMessage(
+                    "Node Assignment Warning",
+                    f"Assigned IDs to {result.assignments} fully connected pipes. <br><b>Warning:</b> {result.pipes_with_issues} pipes have missing start or end nodes (NULL values). Check topology (unmatched pipes are listed in the log).",
+                    level=Qgis.Warning, duration=10
+                )
+        else:
+            iface.messageBar().pushMessage(
+                "Save Error",
+                f"Failed to save changes: {pipes_layer.commitErrors()}",
+                level=Qgis.Critical, duration=10
+            )
     
     def _get_export_configuration(self) -> ExportConfiguration:
         """Get current export configuration from UI."""
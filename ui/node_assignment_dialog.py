@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from qgis.PyQt.QtWidgets import QDialog, QVBoxLayout, QLabel, QComboBox, QDialogButtonBox
+from qgis.PyQt.QtWidgets import QDialog, QVBoxLayout, QLabel, QComboBox, QDialogButtonBox, QDoubleSpinBox
 
 
 class NodeAssignmentDialog(QDialog):
@@ -43,6 +43,18 @@ class NodeAssignmentDialog(QDialog):
         self._set_default(self.depth_combo, ["h_nodo_nt", "depth", "profundidade"])
         layout.addWidget(self.depth_combo)
         
+        # Snap tolerance (0 = nearest node at any distance)
+        layout.addWidget(QLabel("Snap Tolerance (map units):"))
+        self.tolerance_spin = QDoubleSpinBox()
+        self.tolerance_spin.setDecimals(3)
+        self.tolerance_spin.setRange(0.0, 1000.0)
+        self.tolerance_spin.setSingleStep(0.1)
+        self.tolerance_spin.setSpecialValueText("Nearest (no limit)")
+        self.tolerance_spin.setToolTip(
+            "Pipe ends farther than this from every node stay unassigned and are listed in the log"
+        )
+        layout.addWidget(self.tolerance_spin)
+        
 
         # Buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -84,3 +96,8 @@ class NodeAssignmentDialog(QDialog):
         if invert_elev_f == " - Skip - ": invert_elev_f = None
         
         return id_f, depth_f, ground_elev_f, invert_elev_f
+
+    def get_snap_tolerance(self):
+        """Return the snap tolerance, or None to match the nearest node at any distance."""
+        tolerance = self.tolerance_spin.value()
+        return tolerance if tolerance > 0 else None